@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+bench_hebrew_matcher.py - Micro-benchmark de l'extraction de mots-clés hébreux
+Compare, sur un corpus de demandes d'administrateurs, le parcours mot-clé par
+mot-clé (`keyword in text`, l'ancienne implémentation) et l'automate
+KeywordMatcher de HebrewLanguageProcessor, puis mesure analyze_hebrew_text.
+
+Usage:
+    python benchmarks/bench_hebrew_matcher.py [--corpus fichier] [--repeat 200]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scheduler_ai"))
+
+from hebrew_language_processor import HebrewLanguageProcessor
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hebrew_admin_messages.txt")
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def best_of(fn, repeat: int, rounds: int = 5) -> float:
+    """Meilleur temps (secondes) de `repeat` appels, sur plusieurs essais"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction de mots-clés hébreux")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    processor = HebrewLanguageProcessor()
+    texts = [processor._normalize_hebrew_text(text) for text in load_corpus(args.corpus)]
+    keywords = sorted(processor.matcher._prefixes)
+
+    def substring_scan():
+        return [{keyword for keyword in keywords if keyword in text} for text in texts]
+
+    def automaton():
+        return [processor.matcher.keywords(text) for text in texts]
+
+    assert substring_scan() == automaton(), "les deux méthodes doivent trouver les mêmes mots-clés"
+
+    messages = len(texts) * args.repeat
+    scan = best_of(substring_scan, args.repeat)
+    compiled = best_of(automaton, args.repeat)
+    analyze = best_of(lambda: [processor.analyze_hebrew_text(text) for text in texts], args.repeat // 10 or 1)
+
+    print(f"Corpus: {len(texts)} messages, {len(keywords)} mots-clés")
+    print(f"  keyword in text  : {scan / messages * 1e6:8.2f} µs/message")
+    print(f"  KeywordMatcher   : {compiled / messages * 1e6:8.2f} µs/message  (x{scan / compiled:.1f})")
+    print(f"  analyze_hebrew_text: {analyze / (len(texts) * (args.repeat // 10 or 1)) * 1e6:8.2f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
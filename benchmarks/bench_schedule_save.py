@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+bench_schedule_save.py - Compare l'écriture des entrées d'emploi du temps
+INSERT ligne par ligne (ancien chemin) contre execute_values par lots
+(schedule_persistence.insert_schedule_entries). Tout est fait dans une
+transaction annulée: la base n'est pas modifiée.
+
+Usage:
+    DB_HOST=localhost python benchmarks/bench_schedule_save.py --entries 2000 --runs 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'solver'))
+from schedule_persistence import insert_schedule_entries  # noqa: E402
+
+COLUMNS = ("teacher_name", "class_name", "subject", "day_of_week", "period_number",
+           "is_parallel_group", "group_id")
+
+
+def db_config_from_env():
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", "5432")),
+        "database": os.getenv("DB_NAME", "school_scheduler"),
+        "user": os.getenv("DB_USER", "admin"),
+        "password": os.getenv("DB_PASSWORD", "school123"),
+    }
+
+
+def synthetic_rows(count):
+    """Entrées réalistes: 6 jours x 10 périodes, ~1 cours parallèle sur 5"""
+    rows = []
+    for i in range(count):
+        parallel = i % 5 == 0
+        rows.append((
+            f"Prof {i % 60}",
+            f"ז-{i % 12 + 1}",
+            f"Matière {i % 25}",
+            i % 6,
+            i % 10 + 1,
+            parallel,
+            i // 5 if parallel else None,
+        ))
+    return rows
+
+
+def _new_schedule(cur):
+    cur.execute("""
+        INSERT INTO schedules (academic_year, term, status, created_at)
+        VALUES ('bench', 1, 'draft', NOW())
+        RETURNING schedule_id
+    """)
+    return cur.fetchone()[0]
+
+
+def per_row(cur, schedule_id, rows):
+    query = (f"INSERT INTO schedule_entries (schedule_id, {', '.join(COLUMNS)}) "
+             f"VALUES (%s, {', '.join(['%s'] * len(COLUMNS))})")
+    for row in rows:
+        cur.execute(query, (schedule_id, *row))
+
+
+def batched(cur, schedule_id, rows):
+    insert_schedule_entries(cur, schedule_id, COLUMNS, rows)
+
+
+def measure(conn, write, rows):
+    cur = conn.cursor()
+    try:
+        schedule_id = _new_schedule(cur)
+        start = time.perf_counter()
+        write(cur, schedule_id, rows)
+        return time.perf_counter() - start
+    finally:
+        conn.rollback()
+        cur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.entries)
+    conn = psycopg2.connect(**db_config_from_env())
+    try:
+        print(f"{args.entries} entrées, {args.runs} essais (transactions annulées)")
+        results = {}
+        for name, write in (("ligne par ligne", per_row), ("execute_values", batched)):
+            times = [measure(conn, write, rows) for _ in range(args.runs)]
+            results[name] = statistics.median(times)
+            print(f"  {name:<16} médiane {results[name] * 1000:8.1f} ms  "
+                  f"({args.entries / results[name]:,.0f} lignes/s)")
+        print(f"  accélération: x{results['ligne par ligne'] / results['execute_values']:.1f}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
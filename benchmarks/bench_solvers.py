@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+bench_solvers.py - Benchmark de bout en bout des moteurs CP-SAT sur écoles synthétiques
+Chaque moteur est exécuté sur des jeux de données générés par synthetic_school.py
+(graines fixes), sans base de données: les lignes générées sont injectées dans
+le moteur comme son chargeur les aurait préparées, puis le modèle est construit
+et résolu normalement.
+
+Mesures par (moteur, jeu de données), dans un processus séparé:
+    build_time            construction du modèle (jusqu'à l'appel à Solve)
+    num_variables         variables du modèle CP-SAT
+    num_constraints       contraintes du modèle CP-SAT
+    first_solution_time   délai de la première solution faisable (s après Solve)
+    solve_time, status, objective, best_bound, num_solutions
+    peak_rss_mb           mémoire résidente maximale du processus
+
+Usage:
+    python benchmarks/bench_solvers.py --sizes 6,12 --seeds 1,2 --time-limit 30 --output bench.json
+    python benchmarks/bench_solvers.py --output new.json --compare bench.json --max-regression 0.25
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'solver'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from synthetic_school import dataset_name, generate_school  # noqa: E402
+
+# Mesures comparées par --compare (plus petit = meilleur)
+COMPARED_METRICS = ("build_time", "first_solution_time", "peak_rss_mb")
+
+
+# ----------------------------------------------------------------------
+# Injection des données dans chaque moteur (équivalent de son chargeur)
+# ----------------------------------------------------------------------
+
+def _active_slots(school, max_day):
+    return [dict(slot) for slot in school["time_slots"]
+            if not slot["is_break"] and slot["is_active"] and slot["day_of_week"] <= max_day]
+
+
+def _courses(school, *, positive=False):
+    return [dict(course) for course in school["solver_input"] if not positive or course["hours"] > 0]
+
+
+def _split(value):
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def _prepare_constraints_solver(school):
+    from constraint_registry import compile_rows
+    from parallel_course_handler import ParallelCourseHandler
+    from solver_engine_with_constraints import ScheduleSolverWithConstraints
+
+    engine = ScheduleSolverWithConstraints({})
+    engine.teachers = [dict(row) for row in school["teachers"]]
+    engine.classes = [dict(row) for row in school["classes"]]
+    engine.time_slots = _active_slots(school, max_day=5)
+    raw_courses = sorted(_courses(school), key=lambda c: (c["course_type"], c["course_id"]))
+    engine.courses, engine.sync_groups = ParallelCourseHandler.expand_parallel_courses(raw_courses)
+    engine.constraints = compile_rows(school["constraints"])
+    engine.build_index()
+    return engine, lambda limit: engine.solve(time_limit=limit)
+
+
+def _prepare_pedagogical_v2(school):
+    from pedagogical_solver_v2 import PedagogicalScheduleSolverV2
+
+    engine = PedagogicalScheduleSolverV2({})
+    engine.courses = _courses(school, positive=True)
+    for course in engine.courses:
+        course["_classes"] = _split(course.get("class_list"))
+        course["_teachers"] = _split(course.get("teacher_names"))
+    engine.time_slots = _active_slots(school, max_day=5)
+    engine.classes = sorted((dict(row) for row in school["classes"]), key=lambda c: c["class_name"])
+    engine.teachers = sorted(({"teacher_name": row["teacher_name"]} for row in school["teachers"]),
+                             key=lambda t: t["teacher_name"])
+    engine.parallel_groups = [dict(row) for row in school["parallel_groups"]]
+    engine.constraints = list(school["constraints"])
+
+    def run(limit):
+        engine.create_variables()
+        engine.add_constraints()
+        return engine.solve(time_limit=limit)
+    return engine, run
+
+
+def _prepare_parallel_sync_v2(school):
+    from parallel_sync_solver_v2 import ParallelSyncSolverV2
+
+    engine = ParallelSyncSolverV2()
+    raw_courses = sorted(
+        ({
+            "course_id": course["course_id"],
+            "class_list": course["class_list"] or "",
+            "subject": course["subject"] or "",
+            "teacher_names": course["teacher_names"] or "",
+            "hours": course["hours"] or 1,
+            "is_parallel": course["is_parallel"] or False,
+            "group_id": course["group_id"],
+        } for course in school["solver_input"]),
+        key=lambda c: (c["subject"], c["class_list"], not c["is_parallel"])
+    )
+    engine.courses = engine._analyze_and_group_courses(raw_courses)
+    engine.time_slots = [
+        {
+            "slot_id": slot["slot_id"],
+            "day_of_week": slot["day_of_week"],
+            "period_number": slot["period_number"],
+            "is_edge": slot["period_number"] <= 2 or slot["period_number"] >= 9,
+        }
+        for slot in school["time_slots"] if slot["day_of_week"] != 5
+    ]
+
+    def run(limit):
+        engine.create_model()
+        return engine.solve(time_limit_seconds=limit)
+    return engine, run
+
+
+def _prepare_integrated(school):
+    from integrated_solver import IntegratedScheduleSolver
+    from parallel_course_handler import ParallelCourseHandler
+
+    engine = IntegratedScheduleSolver({})
+    engine.courses = sorted(_courses(school, positive=True),
+                            key=lambda c: (not c["is_parallel"], c["group_id"] is None,
+                                           c["group_id"] or 0, c["course_id"]))
+    _, engine.parallel_groups = ParallelCourseHandler.expand_parallel_courses(engine.courses)
+    engine.time_slots = _active_slots(school, max_day=4)
+    engine.classes = sorted({name for course in engine.courses for name in _split(course.get("class_list"))})
+
+    def run(limit):
+        engine.create_variables()
+        engine.add_constraints()
+        return engine.solve(time_limit=limit)
+    return engine, run
+
+
+def _prepare_advanced_cpsat(school):
+    from advanced_cpsat_solver import AdvancedCPSATSolver
+
+    engine = AdvancedCPSATSolver({})
+    engine.time_slots = _active_slots(school, max_day=4)
+    engine._process_courses(sorted(_courses(school), key=lambda c: (c["course_type"], c["course_id"])))
+    return engine, lambda limit: engine.solve(time_limit=limit)
+
+
+ENGINES: Dict[str, Callable] = {
+    "constraints": _prepare_constraints_solver,
+    "pedagogical_v2": _prepare_pedagogical_v2,
+    "parallel_sync_v2": _prepare_parallel_sync_v2,
+    "integrated": _prepare_integrated,
+    "advanced_cpsat": _prepare_advanced_cpsat,
+}
+
+
+# ----------------------------------------------------------------------
+# Instrumentation de la résolution
+# ----------------------------------------------------------------------
+
+class InstrumentedSolver:
+    """
+    Remplace le CpSolver d'un moteur: fixe graine et workers juste avant Solve,
+    relève la taille du modèle et le temps de la première solution.
+    Les autres attributs (parameters, Value, ObjectiveValue...) sont délégués.
+    """
+
+    def __init__(self, solver, seed: int, workers: int):
+        from solution_stream import SolutionRecorder
+
+        self._solver = solver
+        self._recorder_class = SolutionRecorder
+        self.seed = seed
+        self.workers = workers
+        self.solve_started: Optional[float] = None
+        self.stats: Dict[str, Any] = {}
+
+    def __getattr__(self, name):
+        return getattr(self._solver, name)
+
+    def Solve(self, model, callback=None):  # noqa: N802 - API CP-SAT
+        from ortools.sat.python import cp_model
+
+        if self.solve_started is None:
+            self.solve_started = time.perf_counter()
+            proto = model.Proto()
+            self.stats["num_variables"] = len(proto.variables)
+            self.stats["num_constraints"] = len(proto.constraints)
+
+        parameters = self._solver.parameters
+        parameters.random_seed = self.seed
+        parameters.num_search_workers = self.workers
+        parameters.log_search_progress = False
+
+        recorder = None
+        if callback is None:
+            recorder = self._recorder_class(lambda values: [])
+            callback = recorder
+        start = time.perf_counter()
+        status = self._solver.Solve(model, callback)
+
+        self.stats["solve_time"] = round(time.perf_counter() - start, 3)
+        self.stats["status"] = self._solver.StatusName(status)
+        if recorder is not None:
+            self.stats["num_solutions"] = len(recorder.solutions)
+            self.stats["first_solution_time"] = recorder.solutions[0]["wall_time"] if recorder.solutions else None
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.stats["objective"] = self._solver.ObjectiveValue()
+            self.stats["best_bound"] = self._solver.BestObjectiveBound()
+        return status
+
+
+def run_case(engine_name: str, params: Dict[str, Any], time_limit: float,
+             seed: int, workers: int, log_level: int = logging.CRITICAL) -> Dict[str, Any]:
+    """Exécute un moteur sur un jeu de données (appelé dans un processus dédié)"""
+    logging.basicConfig(level=log_level)
+    result = {"engine": engine_name, "dataset": dataset_name(params), "params": params}
+    try:
+        school = generate_school(**params)
+        engine, run = ENGINES[engine_name](school)
+        solver = InstrumentedSolver(engine.solver, seed=seed, workers=workers)
+        engine.solver = solver
+
+        start = time.perf_counter()
+        schedule = run(time_limit)
+        if solver.solve_started is not None:
+            result["build_time"] = round(solver.solve_started - start, 3)
+        result.update(solver.stats)
+        result["entries"] = len(schedule) if schedule else 0
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc(limit=5)
+    # ru_maxrss est en Ko sous Linux
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+
+def run_isolated(engine_name, params, time_limit, seed, workers, log_level=logging.CRITICAL):
+    """Un processus neuf par mesure: mémoire de pointe et état CP-SAT indépendants"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(run_case, engine_name, params, time_limit, seed, workers, log_level).result()
+
+
+# ----------------------------------------------------------------------
+# Comparaison avec une exécution de référence
+# ----------------------------------------------------------------------
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            max_regression: float) -> List[str]:
+    """Affiche les écarts et renvoie la liste des régressions au-delà du seuil"""
+    reference = {(r["engine"], r["dataset"]): r for r in baseline}
+    regressions = []
+    print(f"\n{'moteur':<18} {'jeu de données':<28} {'mesure':<20} {'réf.':>10} {'actuel':>10} {'écart':>8}")
+    for result in results:
+        previous = reference.get((result["engine"], result["dataset"]))
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS + ("objective",):
+            old, new = previous.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / abs(old) if old else 0.0
+            print(f"{result['engine']:<18} {result['dataset']:<28} {metric:<20} "
+                  f"{old:>10.3f} {new:>10.3f} {change:>+7.0%}")
+            if metric in COMPARED_METRICS and change > max_regression:
+                regressions.append(f"{result['engine']} {result['dataset']} {metric} {change:+.0%}")
+        if previous.get("status") in ("OPTIMAL", "FEASIBLE") and result.get("status") not in ("OPTIMAL", "FEASIBLE"):
+            regressions.append(f"{result['engine']} {result['dataset']} plus de solution ({result.get('status')})")
+    return regressions
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs CP-SAT sur écoles synthétiques")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help=f"moteurs, parmi: {', '.join(ENGINES)}")
+    parser.add_argument("--sizes", type=_int_list, default=[6, 12], help="nombres de classes")
+    parser.add_argument("--seeds", type=_int_list, default=[1], help="graines des jeux de données")
+    parser.add_argument("--teachers-per-class", type=float, default=3.0)
+    parser.add_argument("--parallel-ratio", type=float, default=0.2)
+    parser.add_argument("--utilization", type=float, default=0.8)
+    parser.add_argument("--time-limit", type=float, default=30.0)
+    parser.add_argument("--solver-seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--verbose", action="store_true", help="afficher les logs des moteurs")
+    parser.add_argument("--output", help="fichier JSON de résultats")
+    parser.add_argument("--compare", help="résultats de référence (JSON) à comparer")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="écart relatif toléré sur build/première solution/mémoire")
+    args = parser.parse_args()
+
+    engines = [name for name in args.engines.split(",") if name]
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"moteurs inconnus: {', '.join(unknown)}")
+
+    results = []
+    for classes in args.sizes:
+        for seed in args.seeds:
+            params = {
+                "classes": classes,
+                "teachers": max(2, round(classes * args.teachers_per_class)),
+                "parallel_ratio": args.parallel_ratio,
+                "utilization": args.utilization,
+                "seed": seed,
+            }
+            for engine_name in engines:
+                result = run_isolated(engine_name, params, args.time_limit, args.solver_seed, args.workers,
+                                      logging.INFO if args.verbose else logging.CRITICAL)
+                results.append(result)
+                if "error" in result:
+                    print(f"{engine_name:<18} {result['dataset']:<28} ERREUR {result['error']}")
+                else:
+                    first = result.get("first_solution_time")
+                    print(f"{engine_name:<18} {result['dataset']:<28} "
+                          f"build={result.get('build_time', 0):.2f}s "
+                          f"vars={result.get('num_variables', 0)} cons={result.get('num_constraints', 0)} "
+                          f"first={'-' if first is None else f'{first:.2f}s'} "
+                          f"status={result.get('status')} obj={result.get('objective')} "
+                          f"rss={result['peak_rss_mb']}Mo")
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "ortools": _ortools_version(),
+            "time_limit": args.time_limit,
+            "solver_seed": args.solver_seed,
+            "workers": args.workers,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nRésultats écrits dans {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print("\nRégressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+
+
+def _ortools_version():
+    try:
+        import ortools
+        return ortools.__version__
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    main()
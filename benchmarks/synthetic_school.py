@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+synthetic_school.py - Générateur d'écoles synthétiques pour les benchmarks du solveur
+Produit des lignes au format des tables lues par les moteurs (teachers, classes,
+time_slots, solver_input, parallel_groups, constraints), de façon déterministe
+pour une graine donnée.
+
+Paramètres:
+    classes        nombre de classes (réparties sur les niveaux ז à יב)
+    teachers       nombre de professeurs
+    parallel_ratio part des heures d'une classe enseignées en groupes parallèles
+    utilization    part des créneaux dimanche-jeudi occupés par classe
+
+Usage:
+    python benchmarks/synthetic_school.py --classes 12 --teachers 40 --seed 1 > school.json
+"""
+import argparse
+import json
+import random
+import sys
+from typing import Any, Dict, List
+
+GRADES = ["ז", "ח", "ט", "י", "יא", "יב"]
+
+# Matières générales et matières enseignées en groupes parallèles (niveaux)
+SUBJECTS = [
+    "מתמטיקה", "עברית", "תנ״ך", "היסטוריה", "מדעים", "ספרות",
+    "גיאוגרפיה", "אזרחות", "חינוך גופני", "תורה", "גמרא", "אמנות",
+]
+PARALLEL_SUBJECTS = ["אנגלית", "מתמטיקה", "ערבית", "מגמה"]
+
+# Horaires: 45 min par période à partir de 08:00
+PERIOD_MINUTES = 45
+DAY_START_MINUTES = 8 * 60
+
+
+def _time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _time_slots(periods_per_day: int, friday_periods: int) -> List[Dict[str, Any]]:
+    slots = []
+    for day in range(6):
+        for period in range(1, (friday_periods if day == 5 else periods_per_day) + 1):
+            start = DAY_START_MINUTES + (period - 1) * PERIOD_MINUTES
+            slots.append({
+                "slot_id": len(slots) + 1,
+                "day_of_week": day,
+                "period_number": period,
+                "start_time": _time(start),
+                "end_time": _time(start + PERIOD_MINUTES),
+                "is_break": False,
+                "is_active": True,
+            })
+    return slots
+
+
+def _split_hours(rng: random.Random, total: int, low: int, high: int) -> List[int]:
+    """Découpe `total` heures en cours de `low` à `high` heures"""
+    parts = []
+    while total > 0:
+        hours = min(total, rng.randint(low, high))
+        parts.append(hours)
+        total -= hours
+    return parts
+
+
+class _TeacherPool:
+    """Attribue les professeurs les moins chargés, dans la limite de `max_hours`"""
+
+    def __init__(self, rng: random.Random, names: List[str], max_hours: int):
+        self.rng = rng
+        self.load = {name: 0 for name in names}
+        self.max_hours = max_hours
+
+    def take(self, count: int, hours: int) -> List[str]:
+        candidates = sorted(self.load, key=lambda name: (self.load[name], self.rng.random()))
+        chosen = [name for name in candidates if self.load[name] + hours <= self.max_hours][:count]
+        if len(chosen) < count:
+            # Plus de capacité: on dépasse plutôt que de perdre des heures
+            chosen = candidates[:count]
+        for name in chosen:
+            self.load[name] += hours
+        return chosen
+
+
+def generate_school(classes: int = 12, teachers: int = 40, parallel_ratio: float = 0.2,
+                    utilization: float = 0.8, periods_per_day: int = 8,
+                    friday_periods: int = 4, seed: int = 0) -> Dict[str, Any]:
+    """Génère un jeu de données complet; même paramètres et même graine -> mêmes données"""
+    rng = random.Random(seed)
+
+    slots = _time_slots(periods_per_day, friday_periods)
+    weekly_slots = 5 * periods_per_day  # dimanche-jeudi
+    hours_per_class = max(1, round(utilization * weekly_slots))
+    parallel_hours = round(parallel_ratio * hours_per_class)
+
+    # Classes réparties sur les niveaux
+    grade_classes: Dict[str, List[str]] = {}
+    class_rows = []
+    for i in range(classes):
+        grade = GRADES[i * len(GRADES) // classes]
+        section = len(grade_classes.setdefault(grade, [])) + 1
+        class_name = f"{grade}-{section}"
+        grade_classes[grade].append(class_name)
+        class_rows.append({
+            "class_id": i + 1,
+            "grade": grade,
+            "section": str(section),
+            "class_name": class_name,
+            "student_count": rng.randint(24, 36),
+        })
+
+    teacher_names = [f"מורה {i + 1}" for i in range(teachers)]
+    total_hours = classes * hours_per_class
+    pool = _TeacherPool(rng, teacher_names, max_hours=max(weekly_slots - 4, -(-total_hours // teachers)))
+
+    solver_input: List[Dict[str, Any]] = []
+    parallel_groups: List[Dict[str, Any]] = []
+
+    def add_course(**fields):
+        course = {
+            "course_id": len(solver_input) + 1,
+            "course_type": "regular",
+            "teacher_name": fields["teacher_names"].split(",")[0],
+            "subject_name": fields["subject"],
+            "teacher_count": len(fields["teacher_names"].split(",")),
+            "is_parallel": False,
+            "group_id": None,
+            "work_days": "0,1,2,3,4",
+            **fields,
+        }
+        solver_input.append(course)
+        return course
+
+    # 1. Groupes parallèles: toutes les classes d'un niveau, un professeur par classe
+    for grade, names in grade_classes.items():
+        if len(names) < 2:
+            continue
+        for hours in _split_hours(rng, parallel_hours, 2, 4):
+            group_id = len(parallel_groups) + 1
+            subject = rng.choice(PARALLEL_SUBJECTS)
+            group_teachers = pool.take(len(names), hours)
+            add_course(
+                course_type="parallel_group",
+                subject=subject,
+                grade=grade,
+                class_list=",".join(names),
+                teacher_names=",".join(group_teachers),
+                hours=hours,
+                is_parallel=True,
+                group_id=group_id,
+            )
+            parallel_groups.append({
+                "group_id": group_id,
+                "subject": subject,
+                "grade": grade,
+                "teachers": ",".join(group_teachers),
+                "class_lists": ",".join(names),
+                "all_classes": [",".join(names)],
+            })
+
+    # 2. Cours individuels pour compléter l'horaire de chaque classe
+    for row in class_rows:
+        grade = row["grade"]
+        own_hours = hours_per_class - (parallel_hours if len(grade_classes[grade]) > 1 else 0)
+        subjects = rng.sample(SUBJECTS, len(SUBJECTS))
+        for i, hours in enumerate(_split_hours(rng, own_hours, 1, 5)):
+            add_course(
+                subject=subjects[i % len(subjects)],
+                grade=grade,
+                class_list=row["class_name"],
+                teacher_names=pool.take(1, hours)[0],
+                hours=hours,
+            )
+
+    teacher_rows = [
+        {
+            "teacher_id": i + 1,
+            "teacher_name": name,
+            "total_hours": pool.load[name],
+            "work_days": "0,1,2,3,4",
+            "is_active": True,
+        }
+        for i, name in enumerate(teacher_names)
+    ]
+
+    return {
+        "params": {
+            "classes": classes,
+            "teachers": teachers,
+            "parallel_ratio": parallel_ratio,
+            "utilization": utilization,
+            "periods_per_day": periods_per_day,
+            "friday_periods": friday_periods,
+            "seed": seed,
+        },
+        "teachers": teacher_rows,
+        "classes": class_rows,
+        "time_slots": slots,
+        "solver_input": solver_input,
+        "parallel_groups": parallel_groups,
+        "constraints": [],
+    }
+
+
+def dataset_name(params: Dict[str, Any]) -> str:
+    """Nom court et stable d'un jeu de données, utilisé comme clé de comparaison"""
+    return (f"c{params['classes']}-t{params['teachers']}-p{params['parallel_ratio']:g}"
+            f"-u{params['utilization']:g}-s{params['seed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère une école synthétique (JSON sur stdout)")
+    parser.add_argument("--classes", type=int, default=12)
+    parser.add_argument("--teachers", type=int, default=40)
+    parser.add_argument("--parallel-ratio", type=float, default=0.2)
+    parser.add_argument("--utilization", type=float, default=0.8)
+    parser.add_argument("--periods-per-day", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    school = generate_school(
+        classes=args.classes, teachers=args.teachers, parallel_ratio=args.parallel_ratio,
+        utilization=args.utilization, periods_per_day=args.periods_per_day, seed=args.seed,
+    )
+    json.dump(school, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+-- ================================================================
+-- 003_solve_jobs.sql
+-- Table de suivi des jobs de génération (/generate_schedule).
+-- Créée aussi automatiquement au démarrage du solver (solve_jobs.py).
+-- ================================================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS solve_jobs (
+    job_id VARCHAR(36) PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL DEFAULT 'generate_schedule',
+    status VARCHAR(20) NOT NULL,          -- queued | running | succeeded | failed | cancelled | interrupted
+    stage VARCHAR(50),                    -- loading | building | solving | retrying | saving | done
+    progress INTEGER DEFAULT 0,
+    params JSONB DEFAULT '{}',
+    result JSONB,                         -- résumé (sans l'emploi du temps complet)
+    error TEXT,
+    schedule_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_solve_jobs_status ON solve_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_solve_jobs_created_at ON solve_jobs(created_at DESC);
+
+COMMIT;
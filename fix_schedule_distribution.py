@@ -43,7 +43,8 @@ def fix_schedule():
             "prevent_conflicts": True,
             "friday_short": True,
             "optimize_pedagogical": True,
-            "quality_target": 75  # Score minimum acceptable
+            "quality_target": 75,  # Score minimum acceptable
+            "wait": True  # attendre le résultat final (sinon 202 + job_id)
         }
         
         print(f"   🚀 Lancement génération (timeout: {payload['time_limit']}s)")
@@ -274,17 +274,28 @@ $body = @{
 } | ConvertTo-Json
 
 try {
-    $result = Invoke-RestMethod `
+    # Réponse 202 immédiate: le solve tourne en arrière-plan dans un job
+    $job = Invoke-RestMethod `
         -Method POST `
         -Uri "http://localhost:8000/generate_schedule" `
         -ContentType "application/json" `
         -Body $body `
-        -TimeoutSec 200
+        -TimeoutSec 30
+    Write-Host "   Job $($job.job_id) lancé" -ForegroundColor Gray
+
+    # Suivre le job jusqu'à sa fin
+    $deadline = (Get-Date).AddSeconds(200)
+    do {
+        Start-Sleep -Seconds 5
+        $job = Invoke-RestMethod -Uri "http://localhost:8000/api/jobs/$($job.job_id)" -TimeoutSec 10
+        Write-Host "   $($job.status) - $($job.stage) ($($job.progress)%)" -ForegroundColor DarkGray
+    } while ($job.status -in @("queued", "running") -and (Get-Date) -lt $deadline)
+    $result = $job.result
     
-    if ($result.success) {
+    if ($job.status -eq "succeeded" -and $result.success) {
         Write-Host "✅ ENFIN! SUCCÈS!" -ForegroundColor Green
-        Write-Host "   Schedule ID: $($result.schedule_id)" -ForegroundColor Gray
-        Write-Host "   Total créneaux: $($result.schedule.Count)" -ForegroundColor Gray
+        Write-Host "   Schedule ID: $($job.schedule_id)" -ForegroundColor Gray
+        Write-Host "   Total créneaux: $($result.total_entries)" -ForegroundColor Gray
         
         # Distribution
         docker exec school_db psql -U admin -d school_scheduler -c "
@@ -328,7 +339,7 @@ GROUP BY period_number
         Write-Host "  • 171 cours planifiés" -ForegroundColor Gray
         
     } else {
-        Write-Host "❌ Échec de génération" -ForegroundColor Red
+        Write-Host "❌ Échec de génération: $($job.status) $($job.error)" -ForegroundColor Red
     }
     
 } catch {
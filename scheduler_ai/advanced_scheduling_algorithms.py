@@ -17,10 +17,14 @@ import logging
 import random
 import math
 import copy
+import time
+from collections import deque
 from typing import List, Dict, Tuple, Any, Optional
 from dataclasses import dataclass
 import numpy as np
 
+from local_search import LocalSearchState
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -58,12 +62,14 @@ class AdvancedSchedulingEngine:
             'initial_temperature': 1000.0,
             'cooling_rate': 0.95,
             'min_temperature': 0.1,
-            'max_iterations': 1000
+            'max_iterations': 200000,
+            'moves_per_temperature': 1000  # mouvements évalués par palier de température
         }
         
         self.tabu_search_params = {
             'tabu_tenure': 7,
-            'max_iterations': 500,
+            'max_iterations': 10000,
+            'neighborhood_size': 10,
             'aspiration_threshold': 0.9
         }
         
@@ -233,128 +239,137 @@ class AdvancedSchedulingEngine:
     def simulated_annealing_optimization(self, initial_schedule: Dict) -> Dict[str, Any]:
         """
         Implémentation du Recuit Simulé selon l'analyse comparative
+        Les voisins sont évalués par variation de score (LocalSearchState)
         """
         logger.info("🔥 Démarrage optimisation par Recuit Simulé")
         
-        current_solution = copy.deepcopy(initial_schedule)
-        current_quality = self.analyze_schedule_quality(current_solution)
-        current_score = current_quality['total_score']
+        state = LocalSearchState(initial_schedule.get('entries', []))
+        current_score = state.score()
         
-        best_solution = copy.deepcopy(current_solution)
+        best_positions = state.positions()
         best_score = current_score
         
         temperature = self.simulated_annealing_params['initial_temperature']
         min_temp = self.simulated_annealing_params['min_temperature']
         cooling_rate = self.simulated_annealing_params['cooling_rate']
+        max_iterations = self.simulated_annealing_params['max_iterations']
+        moves_per_temperature = self.simulated_annealing_params['moves_per_temperature']
         
         iteration = 0
         improvements = 0
+        start = time.perf_counter()
         
-        while temperature > min_temp and iteration < self.simulated_annealing_params['max_iterations']:
-            # Générer une solution voisine
-            neighbor_solution = self._generate_neighbor_solution(current_solution)
-            neighbor_quality = self.analyze_schedule_quality(neighbor_solution)
-            neighbor_score = neighbor_quality['total_score']
+        while temperature > min_temp and iteration < max_iterations:
+            # Appliquer un mouvement voisin en place
+            score_delta = state.apply(self._random_move(state))
             
             # Critère d'acceptation de Boltzmann
-            score_delta = neighbor_score - current_score
-            
             if score_delta > 0 or random.random() < math.exp(score_delta / temperature):
-                current_solution = neighbor_solution
-                current_score = neighbor_score
+                current_score += score_delta
                 
-                if neighbor_score > best_score:
-                    best_solution = copy.deepcopy(neighbor_solution)
-                    best_score = neighbor_score
+                if current_score > best_score:
+                    best_positions = state.positions()
+                    best_score = current_score
                     improvements += 1
-                    logger.info(f"🔥 RS: Amélioration trouvée - Score: {best_score:.3f}")
+                    logger.debug(f"🔥 RS: Amélioration trouvée - Score: {best_score:.3f}")
+            else:
+                state.undo()
             
-            # Refroidissement
-            temperature *= cooling_rate
             iteration += 1
+            # Refroidissement
+            if iteration % moves_per_temperature == 0:
+                temperature *= cooling_rate
             
-            if iteration % 100 == 0:
+            if iteration % 50000 == 0:
                 logger.info(f"🔥 RS: Itération {iteration}, Temp: {temperature:.2f}, "
                            f"Score actuel: {current_score:.3f}")
         
-        logger.info(f"🔥 Recuit Simulé terminé: {improvements} améliorations en {iteration} itérations")
+        elapsed = time.perf_counter() - start
+        logger.info(f"🔥 Recuit Simulé terminé: {improvements} améliorations en {iteration} itérations "
+                   f"({iteration / max(elapsed, 1e-9):,.0f} mouvements/s)")
         
+        best_solution = state.to_schedule(initial_schedule, best_positions)
         return {
             'solution': best_solution,
             'quality': self.analyze_schedule_quality(best_solution),
             'algorithm': 'simulated_annealing',
             'iterations': iteration,
-            'improvements': improvements
+            'improvements': improvements,
+            'moves_per_second': round(iteration / max(elapsed, 1e-9))
         }
     
     def tabu_search_optimization(self, initial_schedule: Dict) -> Dict[str, Any]:
         """
         Implémentation de la Recherche Tabou selon l'analyse comparative
+        Chaque voisin est appliqué, évalué par variation de score puis annulé
         """
         logger.info("🚫 Démarrage optimisation par Recherche Tabou")
         
-        current_solution = copy.deepcopy(initial_schedule)
-        best_solution = copy.deepcopy(current_solution)
-        best_score = self.analyze_schedule_quality(best_solution)['total_score']
+        state = LocalSearchState(initial_schedule.get('entries', []))
+        current_score = state.score()
+        best_positions = state.positions()
+        best_score = current_score
         
-        tabu_list = []
-        tabu_tenure = self.tabu_search_params['tabu_tenure']
+        tabu_list = deque(maxlen=self.tabu_search_params['tabu_tenure'])
         max_iterations = self.tabu_search_params['max_iterations']
+        neighborhood_size = self.tabu_search_params['neighborhood_size']
+        aspiration_threshold = self.tabu_search_params['aspiration_threshold']
         
         iteration = 0
         improvements = 0
+        start = time.perf_counter()
         
         while iteration < max_iterations:
-            # Générer le voisinage
-            neighbors = self._generate_neighborhood(current_solution)
-            
-            best_neighbor = None
+            best_move = None
+            best_move_signature = None
             best_neighbor_score = -float('inf')
             
-            for neighbor in neighbors:
-                # Vérifier si le mouvement est tabou
-                move_signature = self._get_move_signature(current_solution, neighbor)
-                
-                neighbor_score = self.analyze_schedule_quality(neighbor)['total_score']
+            # Explorer le voisinage
+            for _ in range(neighborhood_size):
+                move = self._random_move(state)
+                move_signature = state.signature(move)
+                neighbor_score = current_score + state.apply(move)
+                state.undo()
                 
                 # Critère d'aspiration: accepter si meilleur que le meilleur global
                 is_tabu = move_signature in tabu_list
-                aspiration = neighbor_score > best_score * self.tabu_search_params['aspiration_threshold']
+                aspiration = neighbor_score > best_score * aspiration_threshold
                 
                 if (not is_tabu or aspiration) and neighbor_score > best_neighbor_score:
-                    best_neighbor = neighbor
+                    best_move = move
+                    best_move_signature = move_signature
                     best_neighbor_score = neighbor_score
             
-            if best_neighbor is not None:
-                # Mettre à jour la solution courante
-                move_signature = self._get_move_signature(current_solution, best_neighbor)
-                current_solution = best_neighbor
-                
-                # Gérer la liste tabou
-                tabu_list.append(move_signature)
-                if len(tabu_list) > tabu_tenure:
-                    tabu_list.pop(0)
+            if best_move is not None:
+                # Mettre à jour la solution courante et la liste tabou
+                current_score += state.apply(best_move)
+                tabu_list.append(best_move_signature)
                 
                 # Mettre à jour la meilleure solution
-                if best_neighbor_score > best_score:
-                    best_solution = copy.deepcopy(best_neighbor)
-                    best_score = best_neighbor_score
+                if current_score > best_score:
+                    best_positions = state.positions()
+                    best_score = current_score
                     improvements += 1
-                    logger.info(f"🚫 RT: Amélioration trouvée - Score: {best_score:.3f}")
+                    logger.debug(f"🚫 RT: Amélioration trouvée - Score: {best_score:.3f}")
             
             iteration += 1
             
-            if iteration % 50 == 0:
-                logger.info(f"🚫 RT: Itération {iteration}, Score actuel: {best_neighbor_score:.3f}")
+            if iteration % 2000 == 0:
+                logger.info(f"🚫 RT: Itération {iteration}, Score actuel: {current_score:.3f}")
         
-        logger.info(f"🚫 Recherche Tabou terminée: {improvements} améliorations en {iteration} itérations")
+        elapsed = time.perf_counter() - start
+        evaluated = iteration * neighborhood_size
+        logger.info(f"🚫 Recherche Tabou terminée: {improvements} améliorations en {iteration} itérations "
+                   f"({evaluated / max(elapsed, 1e-9):,.0f} voisins/s)")
         
+        best_solution = state.to_schedule(initial_schedule, best_positions)
         return {
             'solution': best_solution,
             'quality': self.analyze_schedule_quality(best_solution),
             'algorithm': 'tabu_search',
             'iterations': iteration,
-            'improvements': improvements
+            'improvements': improvements,
+            'moves_per_second': round(evaluated / max(elapsed, 1e-9))
         }
     
     def hybrid_optimization(self, initial_schedule: Dict) -> Dict[str, Any]:
@@ -459,66 +474,23 @@ class AdvancedSchedulingEngine:
         
         return True
     
-    def _generate_neighbor_solution(self, solution: Dict) -> Dict:
-        """Génère une solution voisine par petite perturbation"""
-        neighbor = copy.deepcopy(solution)
-        entries = neighbor.get('entries', [])
-        
-        if not entries:
-            return neighbor
+    def _random_move(self, state: LocalSearchState) -> Tuple:
+        """Tire un mouvement voisin: petit déplacement ou échange de deux entrées"""
+        n = len(state.day)
+        if not n:
+            return ('swap', 0, 0)
         
         # Choisir aléatoirement une entrée à modifier
-        entry_to_modify = random.choice(entries)
+        i = random.randrange(n)
         
-        # Appliquer une petite modification
-        modification_type = random.choice(['move_time', 'swap_entries'])
-        
-        if modification_type == 'move_time':
+        if random.random() < 0.5:
             # Déplacer vers un créneau proche
-            new_day = max(0, min(4, entry_to_modify.get('day_of_week', 0) + random.randint(-1, 1)))
-            new_period = max(0, min(7, entry_to_modify.get('period_number', 0) + random.randint(-1, 1)))
-            
-            entry_to_modify['day_of_week'] = new_day
-            entry_to_modify['period_number'] = new_period
-            
-        elif modification_type == 'swap_entries' and len(entries) >= 2:
-            # Échanger deux entrées
-            other_entry = random.choice(entries)
-            if other_entry != entry_to_modify:
-                # Échanger les créneaux
-                day1, period1 = entry_to_modify.get('day_of_week'), entry_to_modify.get('period_number')
-                day2, period2 = other_entry.get('day_of_week'), other_entry.get('period_number')
-                
-                entry_to_modify['day_of_week'] = day2
-                entry_to_modify['period_number'] = period2
-                other_entry['day_of_week'] = day1
-                other_entry['period_number'] = period1
-        
-        return neighbor
-    
-    def _generate_neighborhood(self, solution: Dict, size: int = 10) -> List[Dict]:
-        """Génère un voisinage de solutions"""
-        neighbors = []
-        for _ in range(size):
-            neighbor = self._generate_neighbor_solution(solution)
-            neighbors.append(neighbor)
-        return neighbors
-    
-    def _get_move_signature(self, solution1: Dict, solution2: Dict) -> str:
-        """Génère une signature unique pour un mouvement (pour la liste tabou)"""
-        # Simplification: compare les premières entrées modifiées
-        entries1 = solution1.get('entries', [])
-        entries2 = solution2.get('entries', [])
-        
-        if len(entries1) != len(entries2):
-            return f"size_change_{len(entries1)}_{len(entries2)}"
-        
-        for i, (e1, e2) in enumerate(zip(entries1, entries2)):
-            if (e1.get('day_of_week') != e2.get('day_of_week') or 
-                e1.get('period_number') != e2.get('period_number')):
-                return f"move_{i}_{e1.get('day_of_week')}_{e1.get('period_number')}_to_{e2.get('day_of_week')}_{e2.get('period_number')}"
+            new_day = max(0, min(4, state.day[i] + random.randint(-1, 1)))
+            new_period = max(0, min(7, state.period[i] + random.randint(-1, 1)))
+            return ('move', i, new_day, new_period)
         
-        return "no_change"
+        # Échanger les créneaux de deux entrées
+        return ('swap', i, random.randrange(n))
     
     def multi_objective_optimization(self, schedule: Dict, objectives: List[OptimizationObjective]) -> Dict[str, Any]:
         """
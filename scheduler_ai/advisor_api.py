@@ -4,6 +4,7 @@ from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import logging
 from schedule_advisor_agent import ScheduleAdvisorAgent, create_advisor_agent
+from db_pool import pool_stats
 import os
 from datetime import datetime
 import json
@@ -140,6 +141,7 @@ def get_advisor_status():
             "pending_changes": len(advisor_agent.pending_changes),
             "user_preferences": len(advisor_agent.user_preferences),
             "conversation_length": len(advisor_agent.conversation_history),
+            "db_pool": pool_stats(),
             "success": True
         })
     except Exception as e:
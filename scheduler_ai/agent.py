@@ -8,12 +8,13 @@ from datetime import datetime
 from enum import Enum
 import asyncio
 
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
+from constraint_registry import load_constraints
 from sqlalchemy import create_engine, Column, Integer, String, JSON, DateTime, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from fuzzy_hebrew_matching import HebrewFuzzyMatcher
+from fuzzy_hebrew_matching import HebrewFuzzyMatcher, SchoolNameIndex
 
 
 # Import du solver existant
@@ -67,6 +68,9 @@ class ScheduleAIAgent:
         # Solveur
         self.solver = ScheduleSolver()
         
+        # Index flou des noms (professeurs, classes, matières), reconstruit si les tables changent
+        self.fuzzy_matcher = SchoolNameIndex(db_config)
+        
         # Chargement des contraintes institutionnelles
         self._load_institutional_constraints()
     
@@ -95,34 +99,30 @@ class ScheduleAIAgent:
             "teacher": result["teacher"],
             "confidence": result["confidence"]
         }
+
+    def _suggest_similar_teachers(self, input_name: str, limit: int = 5) -> List[str]:
+        """Noms de professeurs proches de la saisie, du plus au moins probable"""
+        return [name for _, name, _ in self.fuzzy_matcher.search("teachers", input_name, k=limit)]
+
     def _load_institutional_constraints(self):
-        """Charge les contraintes institutionnelles depuis la BD"""
-        conn = psycopg2.connect(**self.db_config)
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        try:
-            cur.execute("""
-                SELECT * FROM v_active_institutional_constraints
-                ORDER BY priority ASC
-            """)
-            
-            self.institutional_constraints = []
-            for row in cur.fetchall():
-                constraint = {
-                    "id": f"inst_{row['id']}",
-                    "name": row['name'],
-                    "type": row['type'],
-                    "priority": row['priority'],
-                    "data": row['data'],
-                    "entities": row['entities']
-                }
-                self.institutional_constraints.append(constraint)
-                
-            logger.info(f"Loaded {len(self.institutional_constraints)} institutional constraints")
-            
-        finally:
-            cur.close()
-            conn.close()
+        """
+        Charge les contraintes institutionnelles depuis le registre compilé
+        (constraint_registry): mêmes lignes, même interprétation que les moteurs
+        """
+        self.constraint_set = load_constraints(self.db_config)
+        self.institutional_constraints = [
+            {
+                **constraint.describe(),
+                "id": f"inst_{constraint.constraint_id}",
+                "data": constraint.data,
+                "applicable_days": sorted(constraint.days) if constraint.days else None,
+            }
+            for constraint in self.constraint_set if constraint.source == "institutional"
+        ]
+        ignored = [c for c in self.constraint_set.ignored if c["source"] == "institutional"]
+
+        logger.info(f"Loaded {len(self.institutional_constraints)} institutional constraints "
+                    f"(version {str(self.constraint_set.version)[:8]}, {len(ignored)} ignored)")
     
     async def apply_constraint(self, constraint_json: Dict) -> Dict[str, Any]:
         """
@@ -286,6 +286,7 @@ class ScheduleAIAgent:
             return {
                 "feasible": False,
                 "reason": "Aucune solution trouvée avec cette contrainte",
+                "conflict": temp_solver.conflict.to_dict() if temp_solver.conflict else None,
                 "suggestions": self._generate_relaxation_suggestions(constraint)
             }
     
@@ -419,7 +420,7 @@ class ScheduleAIAgent:
     # Méthodes helper privées...
     def _get_current_schedule(self) -> List[Dict]:
         """Récupère l'emploi du temps actuel"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         try:
             cur.execute("""
@@ -433,7 +434,7 @@ class ScheduleAIAgent:
     
     def _get_existing_constraints(self) -> List[Dict]:
         """Récupère toutes les contraintes existantes"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         try:
             cur.execute("SELECT * FROM constraints WHERE is_active = TRUE")
@@ -8,13 +8,16 @@ import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 import redis
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 # Import de VOTRE LLMRouter existant
 from llm_router import LLMRouter, TaskComplexity
+from async_llm import AsyncLLMRunner
+from db_pool import pool_stats
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -82,9 +85,7 @@ class LLMMiddleware:
         """Analyse une contrainte en utilisant LLMRouter"""
         
         try:
-            # Détecter la langue (français ou hébreu)
-            language = "he" if any(ord(c) > 0x0590 and ord(c) < 0x05FF for c in text) else "fr"
-            
+            language = self._detect_language(text)
             logger.info(f"Analyse de contrainte ({language}): {text[:100]}...")
             
             # Utiliser parse_natural_language de LLMRouter
@@ -93,65 +94,93 @@ class LLMMiddleware:
                 language=language,
                 session_id=session_id
             )
+            return self._build_result(parsed, text)
             
-            logger.info(f"Résultat parsing: {parsed}")
-            
-            # Vérifier si clarification nécessaire
-            if parsed.get('requires_clarification') or parsed.get('confidence', 0) < 0.6:
-                questions = parsed.get('clarification_questions', [])
-                if not questions:
-                    questions = [
-                        "Pouvez-vous préciser le type de contrainte ?",
-                        "Pour quelle entité (professeur, classe, salle) ?"
-                    ]
-                
-                return {
-                    'status': 'clarification_needed',
-                    'clarification_questions': questions,
-                    'partial_result': parsed
-                }
-            
-            # Extraire la contrainte
-            constraint = parsed.get('constraint', {})
-            
-            # S'assurer que tous les champs requis sont présents
-            if not constraint.get('type'):
-                constraint['type'] = 'custom'
-            if not constraint.get('entity'):
-                constraint['entity'] = 'Global'
-            if not constraint.get('data'):
-                constraint['data'] = {'original_text': text}
-            
-            # Ajouter la confiance et le modèle utilisé
-            constraint['confidence'] = parsed.get('confidence', 0.5)
-            constraint['model_used'] = parsed.get('model_used', 'unknown')
-            constraint['original_text'] = text
-            
-            # Si un résumé est fourni
-            if parsed.get('summary'):
-                constraint['interpretation'] = parsed['summary']
+        except Exception as e:
+            logger.error(f"Erreur dans analyze_constraint: {str(e)}")
+            return self._fallback_result(text)
+    
+    async def analyze_constraint_async(self, text: str, session_id: str, context: Dict = None) -> Dict:
+        """Version asynchrone d'analyze_constraint, exécutée sur la boucle de llm_runner"""
+        try:
+            language = self._detect_language(text)
+            logger.info(f"Analyse de contrainte ({language}): {text[:100]}...")
             
-            return {
-                'status': 'success',
-                'constraint': constraint,
-                'alternatives': parsed.get('alternatives', [])
-            }
+            parsed = await self.router.parse_natural_language_async(
+                text=text,
+                language=language,
+                session_id=session_id
+            )
+            return self._build_result(parsed, text)
             
         except Exception as e:
-            logger.error(f"Erreur dans analyze_constraint: {str(e)}")
+            logger.error(f"Erreur dans analyze_constraint_async: {str(e)}")
+            return self._fallback_result(text)
+    
+    @staticmethod
+    def _detect_language(text: str) -> str:
+        """Détecter la langue (français ou hébreu)"""
+        return "he" if any(ord(c) > 0x0590 and ord(c) < 0x05FF for c in text) else "fr"
+    
+    def _build_result(self, parsed: Dict, text: str) -> Dict:
+        """Résultat renvoyé au client à partir du parsing"""
+        logger.info(f"Résultat parsing: {parsed}")
+        
+        # Vérifier si clarification nécessaire
+        if parsed.get('requires_clarification') or parsed.get('confidence', 0) < 0.6:
+            questions = parsed.get('clarification_questions', [])
+            if not questions:
+                questions = [
+                    "Pouvez-vous préciser le type de contrainte ?",
+                    "Pour quelle entité (professeur, classe, salle) ?"
+                ]
             
-            # Fallback : analyse basique
             return {
-                'status': 'success',
-                'constraint': {
-                    'type': 'custom',
-                    'entity': 'Global',
-                    'data': {'original_text': text},
-                    'confidence': 0.3,
-                    'model_used': 'fallback',
-                    'original_text': text
-                }
+                'status': 'clarification_needed',
+                'clarification_questions': questions,
+                'partial_result': parsed
             }
+        
+        # Extraire la contrainte
+        constraint = parsed.get('constraint', {})
+        
+        # S'assurer que tous les champs requis sont présents
+        if not constraint.get('type'):
+            constraint['type'] = 'custom'
+        if not constraint.get('entity'):
+            constraint['entity'] = 'Global'
+        if not constraint.get('data'):
+            constraint['data'] = {'original_text': text}
+        
+        # Ajouter la confiance et le modèle utilisé
+        constraint['confidence'] = parsed.get('confidence', 0.5)
+        constraint['model_used'] = parsed.get('model_used', 'unknown')
+        constraint['original_text'] = text
+        
+        # Si un résumé est fourni
+        if parsed.get('summary'):
+            constraint['interpretation'] = parsed['summary']
+        
+        return {
+            'status': 'success',
+            'constraint': constraint,
+            'alternatives': parsed.get('alternatives', [])
+        }
+    
+    @staticmethod
+    def _fallback_result(text: str) -> Dict:
+        """Fallback : analyse basique"""
+        return {
+            'status': 'success',
+            'constraint': {
+                'type': 'custom',
+                'entity': 'Global',
+                'data': {'original_text': text},
+                'confidence': 0.3,
+                'model_used': 'fallback',
+                'original_text': text
+            }
+        }
     
     def clear_session(self, session_id: str):
         """Nettoie une session"""
@@ -161,6 +190,36 @@ class LLMMiddleware:
 # Initialiser le middleware avec LLMRouter
 middleware = LLMMiddleware(llm_router)
 
+# Boucle asyncio des appels LLM: un message en attente du LLM n'occupe pas de thread
+llm_runner = AsyncLLMRunner(timeout=float(os.environ.get('AI_ANALYSIS_TIMEOUT', 60)))
+
+def _analysis_error(error: BaseException) -> Dict[str, Any]:
+    """Réponse d'erreur d'une analyse asynchrone"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return {'status': 'error', 'message': "Délai d'analyse dépassé, veuillez réessayer"}
+    return {'status': 'error', 'message': f'Erreur: {str(error)}'}
+
+def _emit_analysis(future, session_id: str, text: str) -> None:
+    """Envoie au client le résultat d'une analyse (appelé depuis la boucle LLM)"""
+    if future.cancelled():  # client déconnecté
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Erreur traitement message: {str(error)}")
+        result = _analysis_error(error)
+    else:
+        result = future.result()
+        # Ajouter des informations de debug si en mode development
+        if os.environ.get('FLASK_ENV') == 'development':
+            result['debug'] = {
+                'session_id': session_id,
+                'language_detected': 'hebrew' if any(ord(c) > 0x0590 and ord(c) < 0x05FF for c in text) else 'french',
+                'tokens_estimated': len(text.split())
+            }
+    
+    socketio.emit('ai_response', result, to=session_id)
+    logger.info(f"Réponse envoyée: status={result['status']}")
+
 # ============================================
 # ROUTES HTTP
 # ============================================
@@ -176,7 +235,8 @@ def health_check():
             'gpt': llm_router.openai_client is not None,
             'cache': redis_client is not None
         },
-        'active_sessions': len(active_sessions)
+        'active_sessions': len(active_sessions),
+        'db_pool': pool_stats()
     })
 
 @app.route('/api/ai/apply_constraint', methods=['POST'])
@@ -190,11 +250,17 @@ def apply_constraint():
         # Créer une session temporaire
         session_id = f"http_{datetime.now().timestamp()}"
         
-        # Analyser avec le middleware LLM
-        result = middleware.analyze_constraint(constraint_text, session_id, context)
-        
-        # Nettoyer la session
-        middleware.clear_session(session_id)
+        # Analyser avec le middleware LLM (boucle asyncio, délai borné)
+        future = llm_runner.submit(
+            middleware.analyze_constraint_async(constraint_text, session_id, context), session_id
+        )
+        try:
+            result = future.result()
+        except (asyncio.TimeoutError, TimeoutError) as e:
+            return jsonify(_analysis_error(e)), 504
+        finally:
+            # Nettoyer la session
+            middleware.clear_session(session_id)
         
         return jsonify(result)
         
@@ -278,21 +344,10 @@ def handle_message(data):
         if session_id in active_sessions:
             active_sessions[session_id]['messages_count'] += 1
         
-        # Analyser avec le middleware LLM
-        result = middleware.analyze_constraint(text, session_id, context)
-        
-        # Ajouter des informations de debug si en mode development
-        if os.environ.get('FLASK_ENV') == 'development':
-            result['debug'] = {
-                'session_id': session_id,
-                'language_detected': 'hebrew' if any(ord(c) > 0x0590 and ord(c) < 0x05FF for c in text) else 'french',
-                'tokens_estimated': len(text.split())
-            }
-        
-        # Envoyer la réponse
-        emit('ai_response', result)
-        
-        logger.info(f"Réponse envoyée: status={result['status']}")
+        # Analyser avec le middleware LLM: la réponse est envoyée par _emit_analysis,
+        # le thread du handler est libéré immédiatement
+        future = llm_runner.submit(middleware.analyze_constraint_async(text, session_id, context), session_id)
+        future.add_done_callback(lambda f: _emit_analysis(f, session_id, text))
         
     except Exception as e:
         logger.error(f"Erreur traitement message: {str(e)}")
@@ -315,9 +370,8 @@ def handle_clarification(data):
         enhanced_text += "\n".join(answers)
         
         # Réanalyser avec plus d'informations
-        result = middleware.analyze_constraint(enhanced_text, session_id, {})
-        
-        emit('ai_response', result)
+        future = llm_runner.submit(middleware.analyze_constraint_async(enhanced_text, session_id, {}), session_id)
+        future.add_done_callback(lambda f: _emit_analysis(f, session_id, enhanced_text))
         
     except Exception as e:
         logger.error(f"Erreur clarification: {str(e)}")
@@ -336,6 +390,8 @@ def handle_disconnect():
         logger.info(f"Déconnexion {session_id} après {info['messages_count']} messages")
         del active_sessions[session_id]
     
+    # Inutile d'attendre le LLM pour un client parti
+    llm_runner.cancel_session(session_id)
     middleware.clear_session(session_id)
 
 # ============================================
@@ -354,15 +410,17 @@ def get_stats():
         }
     }
     
-    # Ajouter stats Redis si disponible
-    if redis_client:
-        try:
-            stats['cache_keys'] = len(redis_client.keys('constraint:*'))
-        except:
-            pass
+    # Cache de parsing: taux de succès et latence LLM économisée
+    stats['parse_cache'] = llm_router.parse_cache.stats()
+    stats['llm_runner'] = llm_runner.stats()
     
     return jsonify(stats)
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Métriques Prometheus (cache de parsing, latence LLM)"""
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
 @app.route('/api/ai/test', methods=['POST'])
 def test_llm():
     """Route de test pour vérifier que les LLM fonctionnent"""
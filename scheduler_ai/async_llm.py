@@ -0,0 +1,78 @@
+"""
+scheduler_ai/async_llm.py - Boucle asyncio dédiée aux appels LLM de l'API
+Flask-SocketIO tourne en mode threading: un handler qui attend le LLM bloque un
+thread pendant plusieurs secondes. Les analyses sont donc soumises à une boucle
+asyncio unique, dans un thread de fond, qui multiplexe les appels des clients
+asynchrones OpenAI/Anthropic. Chaque soumission porte un délai maximal et peut
+être rattachée à une session pour être annulée à la déconnexion du client.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLLMRunner:
+    """
+    Exécute des coroutines sur une boucle asyncio de fond.
+
+    Args:
+        timeout: délai maximal d'une soumission (secondes), au-delà: TimeoutError
+    """
+
+    def __init__(self, timeout: float = 60.0):
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self._sessions: Dict[str, Set[Future]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.cancelled = 0
+        self._thread = threading.Thread(target=self._run, name="llm-event-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable[Any], session_id: Optional[str] = None,
+               timeout: Optional[float] = None) -> Future:
+        """Planifie `coro` sur la boucle; le Future est annulable depuis n'importe quel thread"""
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(coro, timeout or self.timeout), self.loop
+        )
+        if session_id is not None:
+            with self._lock:
+                self._sessions[session_id].add(future)
+            future.add_done_callback(lambda f: self._forget(session_id, f))
+        return future
+
+    def _forget(self, session_id: str, future: Future) -> None:
+        with self._lock:
+            futures = self._sessions.get(session_id)
+            if futures is not None:
+                futures.discard(future)
+                if not futures:
+                    del self._sessions[session_id]
+
+    def cancel_session(self, session_id: str) -> int:
+        """Annule les analyses en cours d'une session; retourne leur nombre"""
+        with self._lock:
+            futures = list(self._sessions.get(session_id, ()))
+        cancelled = sum(future.cancel() for future in futures)
+        if cancelled:
+            with self._lock:
+                self.cancelled += cancelled
+            logger.info(f"🛑 {cancelled} analyse(s) annulée(s) pour la session {session_id}")
+        return cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": sum(len(futures) for futures in self._sessions.values()),
+                "sessions": len(self._sessions),
+                "cancelled": self.cancelled,
+                "timeout": self.timeout,
+            }
@@ -0,0 +1,382 @@
+"""
+constraint_registry.py - Contraintes compilées depuis constraints / institutional_constraints
+Chaque ligne active est interprétée une seule fois en objet typé:
+    - restrict(domains): créneaux exclus (SlotDomains, avant création des variables)
+    - post_to_model(index, vars): contraintes CP-SAT (ModelIndex + VarStore)
+Le jeu compilé est mis en cache par version (md5 des lignes actives des deux
+tables): un solve relit seulement l'empreinte, sans reparser le JSON, et tous
+les moteurs appliquent les mêmes contraintes. Les types sans traduction dans
+le modèle sont signalés (ignored) au lieu d'être ignorés silencieusement.
+"""
+import datetime
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from db_pool import get_connection
+from slot_domains import parse_work_days
+
+logger = logging.getLogger(__name__)
+
+# Entités désignant « tous » plutôt qu'un professeur / une classe précis
+GLOBAL_ENTITIES = {None, "", "all", "global", "Global", "all_teachers", "all_classes", "school"}
+
+
+def _data(value: Any) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return json.loads(value)
+        except ValueError:
+            return {}
+    return {}
+
+
+def _minutes(value: Any) -> Optional[int]:
+    """Minutes depuis minuit d'un datetime.time, timedelta ou "HH:MM[:SS]\""""
+    if value is None:
+        return None
+    if isinstance(value, datetime.time):
+        return value.hour * 60 + value.minute
+    if isinstance(value, datetime.timedelta):
+        return int(value.total_seconds()) // 60
+    try:
+        hours, minutes = str(value).split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return None
+
+
+class CompiledConstraint:
+    """
+    Contrainte typée compilée depuis une ligne de la base.
+
+    Les lignes de `constraints` sont appliquées comme contraintes dures (comme
+    le faisaient les moteurs); celles de `institutional_constraints` seulement
+    si priority == 0.
+    """
+
+    def __init__(self, source: str, constraint_id: Any, constraint_type: str, priority: int,
+                 entity: Optional[str], data: Dict[str, Any], applicable_days: Optional[List[int]] = None):
+        self.source = source
+        self.constraint_id = constraint_id
+        self.constraint_type = constraint_type
+        self.priority = priority
+        self.entity = None if entity in GLOBAL_ENTITIES else entity
+        self.data = data
+        self.days = set(applicable_days) if applicable_days else None
+        self.hard = source == "constraints" or priority == 0
+        self.parse(data)
+
+    def parse(self, data: Dict[str, Any]) -> None:
+        """Lit les champs propres au type (appelé une fois, à la compilation)"""
+
+    def restrict(self, domains) -> None:
+        """Retire des domaines les créneaux interdits par la contrainte"""
+
+    def post_to_model(self, index, vars) -> int:
+        """Ajoute la contrainte au modèle de `vars`; retourne le nombre de contraintes posées"""
+        return 0
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "id": self.constraint_id,
+            "type": self.constraint_type,
+            "priority": self.priority,
+            "entity": self.entity,
+            "hard": self.hard,
+        }
+
+
+class SlotExclusion(CompiledConstraint):
+    """Créneaux interdits à un professeur (entity) ou à tous les cours"""
+
+    def excluded_slots(self, time_slots: List[Dict]) -> List[Any]:
+        raise NotImplementedError
+
+    def restrict(self, domains) -> None:
+        if not self.hard:
+            return
+        slots = self.excluded_slots(domains.time_slots)
+        if self.entity:
+            domains.block_teacher(self.entity, slots, self.constraint_type)
+        else:
+            domains.block_all(slots, self.constraint_type)
+
+    def post_to_model(self, index, vars) -> int:
+        # Sans effet quand les variables ont déjà été élaguées par restrict()
+        if not self.hard:
+            return 0
+        slots = self.excluded_slots(index.time_slots)
+        courses = index.teacher_courses(self.entity) if self.entity else index.courses
+        posted = 0
+        for var in vars.vars_for([course["course_id"] for course in courses], slots):
+            vars.model.Add(var == 0)
+            posted += 1
+        return posted
+
+    def _in_days(self, slot: Dict) -> bool:
+        return self.days is None or slot["day_of_week"] in self.days
+
+
+class TeacherAvailability(SlotExclusion):
+    """Jours / périodes indisponibles d'un professeur, ou fin de journée (available_until)"""
+
+    def parse(self, data):
+        self.unavailable_days = parse_work_days(data.get("unavailable_days") or None) or set()
+        self.unavailable_periods = {int(p) for p in data.get("unavailable_periods") or []
+                                    if str(p).strip().isdigit()}
+        # Forme {"day": 2, "available_until": "12:00"} (constraints_handler)
+        self.until_day = int(data["day"]) if str(data.get("day", "")).strip().isdigit() else None
+        self.until = _minutes(data.get("available_until"))
+
+    def excluded_slots(self, time_slots):
+        return [
+            slot["slot_id"] for slot in time_slots
+            if slot["day_of_week"] in self.unavailable_days
+            or slot["period_number"] in self.unavailable_periods
+            or (self.until is not None and slot["day_of_week"] == self.until_day
+                and (_minutes(slot.get("end_time")) or 0) > self.until)
+        ]
+
+
+class FridayEarlyEnd(SlotExclusion):
+    """Aucun cours le vendredi après last_period"""
+
+    def parse(self, data):
+        self.last_period = int(data.get("last_period", 6))
+
+    def excluded_slots(self, time_slots):
+        return [slot["slot_id"] for slot in time_slots
+                if slot["day_of_week"] == 5 and slot["period_number"] > self.last_period]
+
+
+def _window(data: Dict[str, Any]) -> Tuple[Optional[int], Optional[int]]:
+    """(début, fin) en minutes depuis {start, end}, {start_time, end_time} ou {time_slot: "08:00-08:30"}"""
+    start = _minutes(data.get("start") or data.get("start_time"))
+    end = _minutes(data.get("end") or data.get("end_time"))
+    if (start is None or end is None) and "-" in str(data.get("time_slot", "")):
+        start, end = (_minutes(part.strip()) for part in str(data["time_slot"]).split("-", 1))
+    return start, end
+
+
+class SchoolHours(SlotExclusion):
+    """Créneaux (même partiellement) hors des horaires d'ouverture"""
+
+    def parse(self, data):
+        self.start, self.end = _window(data)
+
+    def excluded_slots(self, time_slots):
+        if self.start is None or self.end is None:
+            return []
+        return [
+            slot["slot_id"] for slot in time_slots if self._in_days(slot) and (
+                (_minutes(slot.get("start_time")) or self.start) < self.start
+                or (_minutes(slot.get("end_time")) or self.end) > self.end
+            )
+        ]
+
+
+class ReservedWindow(SlotExclusion):
+    """
+    Plage réservée (prière, déjeuner, réunion): seuls les créneaux entièrement
+    compris dedans sont exclus. Un créneau qui la chevauche (08:00-08:45 pour
+    une prière 08:00-08:30) reste utilisable.
+    """
+
+    def parse(self, data):
+        self.start, self.end = _window(data)
+        if data.get("day") is not None and self.days is None:
+            self.days = {int(data["day"])}
+
+    def excluded_slots(self, time_slots):
+        if self.start is None or self.end is None:
+            return []
+        excluded = []
+        for slot in time_slots:
+            slot_start, slot_end = _minutes(slot.get("start_time")), _minutes(slot.get("end_time"))
+            if (self._in_days(slot) and slot_start is not None and slot_end is not None
+                    and self.start <= slot_start and slot_end <= self.end):
+                excluded.append(slot["slot_id"])
+        return excluded
+
+
+class ConsecutiveHoursLimit(CompiledConstraint):
+    """Au plus max_consecutive heures d'affilée par professeur (entity, ou tous)"""
+
+    def parse(self, data):
+        value = data.get("max_consecutive", data.get("max_hours"))
+        self.max_consecutive = int(value) if str(value).strip().isdigit() else None
+
+    def post_to_model(self, index, vars) -> int:
+        if not self.hard or not self.max_consecutive:
+            return 0
+        teachers = [self.entity] if self.entity else list(index.courses_by_teacher)
+        window = self.max_consecutive + 1
+        posted = 0
+        for teacher in teachers:
+            course_ids = [course["course_id"] for course in index.teacher_courses(teacher)]
+            if not course_ids:
+                continue
+            for day in index.days:
+                day_slots = [slot["slot_id"] for slot in index.day_slots(day)]
+                for start in range(len(day_slots) - window + 1):
+                    window_vars = vars.vars_for(course_ids, day_slots[start:start + window])
+                    if len(window_vars) > self.max_consecutive:
+                        vars.model.Add(sum(window_vars) <= self.max_consecutive)
+                        posted += 1
+        return posted
+
+
+# type de contrainte -> classe compilée
+CONSTRAINT_CLASSES = {
+    "teacher_availability": TeacherAvailability,
+    "friday_early_end": FridayEarlyEnd,
+    "school_hours": SchoolHours,
+    "morning_prayer": ReservedWindow,
+    "lunch_break": ReservedWindow,
+    "teacher_meeting": ReservedWindow,
+    "consecutive_hours_limit": ConsecutiveHoursLimit,
+}
+
+
+class CompiledConstraintSet:
+    """Contraintes compilées d'une version des tables, partagées par tous les moteurs"""
+
+    def __init__(self, constraints: List[CompiledConstraint], ignored: List[Dict[str, Any]],
+                 version: Optional[str] = None):
+        self.constraints = constraints
+        self.ignored = ignored
+        self.version = version
+
+    def __iter__(self):
+        return iter(self.constraints)
+
+    def __len__(self) -> int:
+        return len(self.constraints)
+
+    def of_type(self, *constraint_types: str) -> List[CompiledConstraint]:
+        return [c for c in self.constraints if c.constraint_type in constraint_types]
+
+    def restrict(self, domains) -> None:
+        for constraint in self.constraints:
+            constraint.restrict(domains)
+
+    def post_to_model(self, index, vars) -> int:
+        posted = 0
+        for constraint in self.constraints:
+            posted += constraint.post_to_model(index, vars)
+        return posted
+
+
+def compile_constraint(row: Dict[str, Any], source: str = "constraints") -> Optional[CompiledConstraint]:
+    """Compile une ligne de `constraints` ou `institutional_constraints` (None si type inconnu)"""
+    if source == "institutional":
+        constraint_type, constraint_id = row.get("type"), row.get("id")
+        entity, data = row.get("entity"), _data(row.get("data"))
+    else:
+        constraint_type, constraint_id = row.get("constraint_type"), row.get("constraint_id")
+        entity, data = row.get("entity_name"), _data(row.get("constraint_data"))
+    cls = CONSTRAINT_CLASSES.get(constraint_type)
+    if cls is None:
+        return None
+    priority = row.get("priority")
+    return cls(source, constraint_id, constraint_type, 0 if priority is None else int(priority),
+               entity, data, row.get("applicable_days"))
+
+
+def compile_rows(constraint_rows: Iterable[Dict] = (), institutional_rows: Iterable[Dict] = (),
+                 version: Optional[str] = None) -> CompiledConstraintSet:
+    """Compile des lignes déjà chargées"""
+    compiled, ignored = [], []
+    for source, rows in (("constraints", constraint_rows), ("institutional", institutional_rows)):
+        for row in rows:
+            if row.get("is_active") is False:
+                continue
+            try:
+                constraint = compile_constraint(row, source)
+            except (TypeError, ValueError) as e:
+                constraint, reason = None, f"données invalides: {e}"
+            else:
+                reason = "type non pris en charge par les moteurs"
+            if constraint is None:
+                ignored.append({
+                    "source": source,
+                    "id": row.get("constraint_id", row.get("id")),
+                    "type": row.get("constraint_type", row.get("type")),
+                    "reason": reason,
+                })
+            else:
+                compiled.append(constraint)
+    if ignored:
+        logger.warning(f"⚠️ {len(ignored)} contrainte(s) non appliquée(s): "
+                       f"{sorted({str(c['type']) for c in ignored})}")
+    return CompiledConstraintSet(compiled, ignored, version)
+
+
+# Cache par processus: version -> jeu compilé (prime_cache: jeu reçu d'un autre processus)
+_cache: Dict[str, CompiledConstraintSet] = {}
+_cache_lock = threading.Lock()
+
+VERSION_QUERY = "SELECT MD5(COALESCE(STRING_AGG(t::text, '|' ORDER BY t.{key}), '')) FROM {table} t WHERE t.is_active = TRUE"
+
+
+def _table_version(conn, cur, table: str, key: str) -> Optional[str]:
+    try:
+        cur.execute(VERSION_QUERY.format(table=table, key=key))
+        return cur.fetchone()[0]
+    except Exception as e:
+        # institutional_constraints n'existe que si la migration du service IA a tourné
+        conn.rollback()
+        logger.warning(f"⚠️ Table {table} illisible: {e}")
+        return None
+
+
+def _fetch_rows(cur, table: str, key: str) -> List[Dict]:
+    cur.execute(f"SELECT * FROM {table} WHERE is_active = TRUE ORDER BY {key}")
+    columns = [desc[0] for desc in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def prime_cache(compiled: CompiledConstraintSet) -> None:
+    """Installe dans le cache de ce processus un jeu compilé ailleurs (processus parent)"""
+    if compiled.version is None:
+        return
+    with _cache_lock:
+        _cache.clear()
+        _cache[compiled.version] = compiled
+
+
+def load_constraints(db_config: Dict[str, str]) -> CompiledConstraintSet:
+    """
+    Contraintes actives compilées, depuis le cache si les tables n'ont pas changé.
+
+    Seules les empreintes des deux tables sont relues à chaque appel; le JSON
+    n'est parsé qu'à la première lecture d'une nouvelle version.
+    """
+    conn = get_connection(db_config)
+    cur = conn.cursor()
+    try:
+        user_version = _table_version(conn, cur, "constraints", "constraint_id")
+        institutional_version = _table_version(conn, cur, "institutional_constraints", "id")
+        version = f"{user_version}:{institutional_version}"
+        with _cache_lock:
+            cached = _cache.get(version)
+        if cached is not None:
+            return cached
+
+        user_rows = _fetch_rows(cur, "constraints", "constraint_id") if user_version else []
+        institutional_rows = _fetch_rows(cur, "institutional_constraints", "id") if institutional_version else []
+    finally:
+        cur.close()
+        conn.close()
+
+    compiled = compile_rows(user_rows, institutional_rows, version)
+    with _cache_lock:
+        _cache.clear()  # une seule version utile: la courante
+        _cache[version] = compiled
+    logger.info(f"✓ {len(compiled)} contraintes compilées (version {version[:8]})")
+    return compiled
@@ -5,14 +5,15 @@ API Flask pour la gestion des contraintes avec interface web
 
 from flask import Flask, request, jsonify, render_template_string
 from flask_cors import CORS
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
+from constraint_registry import load_constraints
 import json
 import logging
 from datetime import datetime
+import os
 import time
 import httpx
-import asyncio
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +25,16 @@ DB_CONFIG = {
     "password": "school123"
 }
 
+# Service solver: il planifie et regroupe les régénérations automatiques
+SOLVER_URL = os.getenv("SOLVER_URL", "http://localhost:8000")
+
 class ConstraintsManager:
     def __init__(self, db_config):
         self.db_config = db_config
     
     def get_all_constraints(self):
         """Récupère toutes les contraintes avec leurs détails"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -67,33 +71,50 @@ class ConstraintsManager:
                 ORDER BY priority ASC, created_at DESC
             """)
             user_constraints = [dict(row) for row in cur.fetchall()]
-            
-            # Statistiques
-            total_active = len([c for c in institutional if c['is_active']]) + \
-                          len([c for c in user_constraints if c['is_active']])
-                          
-            return {
-                "institutional": institutional,
-                "user": user_constraints,
-                "total_active": total_active,
-                "stats": {
-                    "total_institutional": len(institutional),
-                    "total_user": len(user_constraints),
-                    "hard_constraints": len([c for c in institutional + user_constraints 
-                                           if c.get('priority', 0) == 0 and c.get('is_active', False)])
-                }
-            }
-            
         except Exception as e:
             logger.error(f"Erreur get_all_constraints: {e}")
             return {"institutional": [], "user": [], "total_active": 0, "stats": {}}
         finally:
             cur.close()
             conn.close()
+
+        # Contraintes réellement appliquées par les moteurs (registre compilé)
+        try:
+            compiled = self.compiled_constraints()
+        except Exception as e:
+            logger.error(f"Erreur get_all_constraints (registre): {e}")
+            compiled = None
+        applied = {(c.source, c.constraint_id) for c in compiled} if compiled is not None else set()
+        for row in institutional:
+            row["applied"] = ("institutional", row["id"]) in applied
+        for row in user_constraints:
+            row["applied"] = ("constraints", row["constraint_id"]) in applied
+
+        # Statistiques
+        total_active = len([c for c in institutional if c['is_active']]) + \
+                      len([c for c in user_constraints if c['is_active']])
+
+        return {
+            "institutional": institutional,
+            "user": user_constraints,
+            "total_active": total_active,
+            "version": compiled.version if compiled is not None else None,
+            "ignored": compiled.ignored if compiled is not None else [],
+            "stats": {
+                "total_institutional": len(institutional),
+                "total_user": len(user_constraints),
+                "applied": len(applied),
+                "hard_constraints": len([c for c in compiled if c.hard]) if compiled is not None else 0
+            }
+        }
+
+    def compiled_constraints(self):
+        """Contraintes actives compilées, telles que les moteurs les appliquent (constraint_registry)"""
+        return load_constraints(self.db_config)
     
     def toggle_constraint(self, constraint_type, constraint_id, active):
         """Active/désactive une contrainte"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -127,7 +148,7 @@ class ConstraintsManager:
     
     def delete_constraint(self, constraint_type, constraint_id):
         """Supprime une contrainte (sauf les critiques)"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -157,7 +178,7 @@ class ConstraintsManager:
     
     def reset_all_constraints(self):
         """Reset toutes les contraintes (garde seulement les critiques)"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -205,7 +226,7 @@ class ConstraintsManager:
     
     def disable_soft_constraints(self):
         """Désactive toutes les contraintes non-critiques (priorité > 0)"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -227,7 +248,7 @@ class ConstraintsManager:
     
     def add_constraint(self, constraint_data):
         """Ajoute une nouvelle contrainte utilisateur avec régénération automatique"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -270,12 +291,14 @@ class ConstraintsManager:
             
             if should_regenerate:
                 logger.info(f"Déclenchement de la régénération automatique pour contrainte: {constraint_id}")
-                regeneration_result = self._trigger_schedule_regeneration()
+                regeneration_result = self._trigger_schedule_regeneration(
+                    parsed["entity_type"], parsed["entity_name"], reason=f"constraint {constraint_id} created"
+                )
                 result["auto_regenerated"] = regeneration_result["success"]
                 result["regeneration_details"] = regeneration_result
                 
                 if regeneration_result["success"]:
-                    result["message"] = "Contrainte ajoutée et emploi du temps automatiquement régénéré"
+                    result["message"] = "Contrainte ajoutée, régénération de l'emploi du temps programmée"
                 else:
                     result["message"] = "Contrainte ajoutée mais échec de la régénération automatique"
             else:
@@ -386,17 +409,25 @@ class ConstraintsManager:
             
             end_time = time.time()
             
+            constraints = {
+                "version": solver.constraints.version,
+                "applied": len(solver.constraints),
+                "ignored": solver.constraints.ignored
+            }
             if result:
                 return {
                     "success": True,
                     "time": round(end_time - start_time, 2),
-                    "message": "Solution trouvée!"
+                    "message": "Solution trouvée!",
+                    "constraints": constraints
                 }
             else:
                 return {
                     "success": False,
                     "time": round(end_time - start_time, 2),
-                    "error": "Aucune solution trouvée - contraintes incompatibles"
+                    "error": "Aucune solution trouvée - contraintes incompatibles",
+                    "conflict": solver.conflict.to_dict() if solver.conflict else None,
+                    "constraints": constraints
                 }
                 
         except Exception as e:
@@ -454,104 +485,37 @@ class ConstraintsManager:
         logger.info(f"Contrainte non critique: {constraint_type}, priorité: {priority}")
         return False
 
-    def _trigger_schedule_regeneration(self) -> dict:
-        """Déclenche la régénération automatique de l'emploi du temps"""
-        
+    def _trigger_schedule_regeneration(self, entity_type=None, entity_name=None, reason=None) -> dict:
+        """
+        Programme la régénération auprès du solver, qui regroupe les demandes
+        rapprochées en un seul solve (voir solver/regeneration_scheduler.py).
+        """
         try:
-            logger.info("Début de la régénération automatique de l'emploi du temps...")
-            
-            # Utiliser une boucle d'événements pour les appels async
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            response = httpx.post(
+                f"{SOLVER_URL}/api/regeneration/request",
+                json={"entity_type": entity_type, "entity_name": entity_name, "reason": reason},
+                timeout=10.0
+            )
+            if response.status_code != 200:
+                logger.error(f"Erreur HTTP régénération: {response.status_code}")
+                return {"success": False, "error": f"Erreur HTTP: {response.status_code}"}
             
-            try:
-                result = loop.run_until_complete(self._async_regenerate_schedule())
-                return result
-            finally:
-                loop.close()
+            status = response.json()
+            logger.info(f"Régénération programmée dans {status.get('scheduled_in')}s")
+            return {
+                "success": True,
+                "scheduled": True,
+                "method": "debounced",
+                "queue": status,
+                "message": "Régénération de l'emploi du temps programmée"
+            }
                 
         except Exception as e:
-            logger.error(f"Erreur générale lors de la régénération: {e}")
+            logger.error(f"Erreur lors de la programmation de la régénération: {e}")
             return {
                 "success": False,
-                "error": f"Erreur système: {str(e)}"
+                "error": f"Erreur technique: {str(e)}"
             }
-    
-    async def _async_regenerate_schedule(self) -> dict:
-        """Version async de la régénération"""
-        
-        # Essayer d'abord le solver avancé/pédagogique
-        regeneration_payload = {
-            "time_limit": 300,  # 5 minutes max pour la régénération auto
-            "advanced": True,
-            "minimize_gaps": True,
-            "friday_short": True
-        }
-        
-        # Appeler l'endpoint de génération avancée en local
-        async with httpx.AsyncClient() as client:
-            try:
-                # Essayer d'abord l'optimisation avancée
-                response = await client.post(
-                    "http://localhost:8000/api/advanced/optimize",
-                    timeout=310.0  # Un peu plus que time_limit
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"Régénération avancée réussie: score {result.get('quality_score', 0)}")
-                    return {
-                        "success": True,
-                        "method": "advanced",
-                        "quality_score": result.get('quality_score', 0),
-                        "schedule_id": result.get('schedule_id'),
-                        "message": "Emploi du temps régénéré avec optimisation avancée"
-                    }
-                else:
-                    logger.warning(f"Optimisation avancée échouée: {response.status_code}")
-                    
-            except Exception as e:
-                logger.warning(f"Erreur optimisation avancée: {e}")
-            
-            # Fallback sur la génération standard
-            try:
-                response = await client.post(
-                    "http://localhost:8000/generate_schedule",
-                    json=regeneration_payload,
-                    timeout=310.0
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get('success'):
-                        logger.info("Régénération standard réussie")
-                        return {
-                            "success": True,
-                            "method": "standard",
-                            "schedule_id": result.get('schedule_id'),
-                            "total_entries": result.get('total_entries', 0),
-                            "message": "Emploi du temps régénéré avec méthode standard"
-                        }
-                    else:
-                        logger.error(f"Régénération standard échouée: {result}")
-                        return {
-                            "success": False,
-                            "error": "Génération standard échouée",
-                            "details": result
-                        }
-                else:
-                    logger.error(f"Erreur HTTP régénération: {response.status_code}")
-                    return {
-                        "success": False,
-                        "error": f"Erreur HTTP: {response.status_code}"
-                    }
-                    
-            except Exception as e:
-                logger.error(f"Erreur lors de la régénération standard: {e}")
-                return {
-                    "success": False,
-                    "error": f"Erreur technique: {str(e)}"
-                }
 
 # Instance globale
 constraints_manager = ConstraintsManager(DB_CONFIG)
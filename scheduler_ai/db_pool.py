@@ -0,0 +1,296 @@
+"""
+db_pool.py - Pool de connexions PostgreSQL partagé
+Remplace psycopg2.connect(**db_config): get_connection(db_config)
+renvoie une connexion empruntée à un ThreadedConnectionPool (un pool par
+configuration et par processus). conn.close() la rend au pool au lieu de fermer
+la session TCP, donc le code existant (connect / cursor / close) n'a pas à changer.
+
+Réglages (variables d'environnement):
+    DB_POOL_MIN              connexions gardées ouvertes au repos (défaut 2)
+    DB_POOL_MAX              connexions simultanées au maximum (défaut 10)
+    DB_POOL_TIMEOUT          attente maximale d'une connexion libre, en s (défaut 30)
+
+Dans un handler async, get_connection_async() fait cette attente dans un thread
+pour ne pas bloquer la boucle d'événements.
+    DB_POOL_HEALTH_CHECK     au-delà de cette inactivité (s), SELECT 1 avant
+                             de prêter une connexion (défaut 30, 0 = toujours)
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+def _env_number(name: str, default, cast=int):
+    try:
+        return cast(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"{name} invalide, valeur par défaut {default}")
+        return default
+
+
+class ConnectionPool:
+    """
+    ThreadedConnectionPool avec attente bornée, vérification de santé et métriques.
+
+    ThreadedConnectionPool lève PoolError dès que maxconn connexions sont
+    prêtées; ici un sémaphore fait patienter l'appelant jusqu'à `timeout`.
+    """
+
+    def __init__(self, db_config: Dict[str, Any], minconn: Optional[int] = None,
+                 maxconn: Optional[int] = None, timeout: Optional[float] = None,
+                 health_check_interval: Optional[float] = None):
+        self.minconn = minconn if minconn is not None else _env_number("DB_POOL_MIN", 2)
+        self.maxconn = max(maxconn if maxconn is not None else _env_number("DB_POOL_MAX", 10),
+                           self.minconn, 1)
+        self.timeout = timeout if timeout is not None else _env_number("DB_POOL_TIMEOUT", 30, float)
+        self.health_check_interval = (health_check_interval if health_check_interval is not None
+                                      else _env_number("DB_POOL_HEALTH_CHECK", 30, float))
+
+        # Le pool est créé au premier get_connection (pas à l'import): les
+        # minconn connexions sont ouvertes à ce moment-là; si la base n'est pas
+        # prête, l'erreur remonte à l'appelant et le pool sera recréé au suivant
+        self._pool = ThreadedConnectionPool(self.minconn, self.maxconn, **db_config)
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+        self._metrics = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "health_checks": 0,
+            "discarded": 0,
+            "in_use": 0,
+        }
+
+    def getconn(self):
+        """Emprunte une connexion saine (attend au plus `timeout` secondes)"""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._metrics["timeouts"] += 1
+            raise PoolError(f"aucune connexion libre après {self.timeout}s ({self.maxconn} prêtées)")
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            metrics = self._metrics
+            metrics["checkouts"] += 1
+            metrics["in_use"] += 1
+            metrics["wait_time_total"] += waited
+            metrics["wait_time_max"] = max(metrics["wait_time_max"], waited)
+            if waited > 0.001:
+                metrics["waits"] += 1
+        return conn
+
+    def _checkout(self):
+        # Une connexion morte est jetée puis remplacée une seule fois
+        for _ in range(2):
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+        return self._pool.getconn()
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.health_check_interval:
+            return True  # connexion neuve ou utilisée récemment
+        with self._lock:
+            self._metrics["health_checks"] += 1
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+            finally:
+                cur.close()
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.warning(f"🔌 Connexion du pool invalide, remplacée: {e}")
+            return False
+
+    def _discard(self, conn) -> None:
+        self._last_used.pop(id(conn), None)
+        with self._lock:
+            self._metrics["discarded"] += 1
+        try:
+            self._pool.putconn(conn, close=True)
+        except PoolError:
+            pass
+
+    def putconn(self, conn) -> None:
+        """Rend une connexion au pool, dans un état propre"""
+        try:
+            if conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn)
+                return
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+            self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn)
+            if conn.closed:  # au-delà de minconn, psycopg2 ferme la connexion
+                self._last_used.pop(id(conn), None)
+        finally:
+            with self._lock:
+                self._metrics["in_use"] -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Métriques du pool (attentes en secondes)"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["wait_time_avg"] = (metrics["wait_time_total"] / metrics["checkouts"]
+                                    if metrics["checkouts"] else 0.0)
+        metrics.update({
+            "idle": len(self._pool._pool),
+            "minconn": self.minconn,
+            "maxconn": self.maxconn,
+        })
+        return metrics
+
+    def closeall(self) -> None:
+        if not self._pool.closed:
+            self._pool.closeall()
+
+
+class PooledConnection:
+    """
+    Connexion prêtée par le pool. Se comporte comme la connexion psycopg2
+    sous-jacente; close() (ou la destruction de l'objet) la rend au pool.
+    """
+
+    def __init__(self, pool: ConnectionPool, conn):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        conn = self._conn
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    @property
+    def closed(self) -> int:
+        return 1 if self._conn is None else self._conn.closed
+
+    @property
+    def raw(self):
+        """Connexion psycopg2 réelle (pour les API qui exigent le type natif)"""
+        return self._conn
+
+    def close(self) -> None:
+        conn = self._conn
+        if conn is None:
+            return
+        object.__setattr__(self, "_conn", None)
+        self._pool.putconn(conn)
+
+    def __del__(self):
+        # Filet de sécurité pour les chemins d'erreur qui oublient close()
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_pools: Dict[Tuple[int, Tuple], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(db_config: Dict[str, Any]) -> Tuple[int, Tuple]:
+    # Un pool par processus: les connexions ne survivent pas à un fork
+    return os.getpid(), tuple(sorted((k, str(v)) for k, v in db_config.items()))
+
+
+def get_pool(db_config: Dict[str, Any]) -> ConnectionPool:
+    """Pool associé à cette configuration (créé au premier appel)"""
+    key = _pool_key(db_config)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(db_config)
+                logger.info(f"🔌 Pool PostgreSQL créé ({pool.minconn}-{pool.maxconn} connexions)")
+    return pool
+
+
+def get_connection(db_config: Dict[str, Any]) -> PooledConnection:
+    """
+    Remplaçant poolé de psycopg2.connect(**db_config): connexion empruntée au
+    pool de cette configuration, rendue au pool par conn.close()
+    """
+    pool = get_pool(db_config)
+    return PooledConnection(pool, pool.getconn())
+
+
+async def get_connection_async(db_config: Dict[str, Any]) -> PooledConnection:
+    """
+    get_connection pour les handlers async: l'attente d'une connexion libre
+    (jusqu'à DB_POOL_TIMEOUT) a lieu dans un thread, pas dans la boucle d'événements
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, get_connection, db_config)
+
+
+@contextmanager
+def connection(db_config: Dict[str, Any]) -> Iterator[PooledConnection]:
+    """with connection(db_config) as conn: ... - rend la connexion en sortie"""
+    conn = get_connection(db_config)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Métriques de tous les pools du processus courant, par base"""
+    pid = os.getpid()
+    return {
+        dict(key).get("database", "default"): pool.stats()
+        for (owner, key), pool in list(_pools.items()) if owner == pid
+    }
+
+
+def close_all() -> None:
+    """Ferme les pools du processus courant (arrêt de l'application)"""
+    pid = os.getpid()
+    with _pools_lock:
+        for key in [k for k in _pools if k[0] == pid]:
+            _pools.pop(key).closeall()
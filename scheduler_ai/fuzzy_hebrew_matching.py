@@ -1,8 +1,45 @@
 # fuzzy_hebrew_matching.py
+"""
+Correspondance approximative des noms (professeurs, classes, matières).
+
+HebrewFuzzyMatcher compare deux chaînes; FuzzyNameIndex indexe une liste de
+noms par n-grammes de caractères (listes inversées) pour ne scorer que les
+candidats qui partagent au moins un n-gramme avec la saisie. SchoolNameIndex
+construit ces index depuis les tables teachers, classes et subjects et les
+reconstruit quand une table change.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+NIKUD_PATTERN = re.compile(r'[\u0591-\u05C7]')
+# Geresh, gershayim et guillemets: « תנ"ך » == « תנך », « גב' » == « גב »
+QUOTES_PATTERN = re.compile(r'[\'"`׳״]')
+SEPARATORS_PATTERN = re.compile(r'[\s\-_.,/]+')
+FINAL_LETTERS = {'ך': 'כ', 'ם': 'מ', 'ן': 'נ', 'ף': 'פ', 'ץ': 'צ'}
+
+
+def normalize_name(name: str) -> str:
+    """Forme canonique d'un nom: sans nikud ni guillemets, lettres finales normalisées"""
+    name = NIKUD_PATTERN.sub('', name or '')
+    name = QUOTES_PATTERN.sub('', name).lower()
+    for final, regular in FINAL_LETTERS.items():
+        name = name.replace(final, regular)
+    return SEPARATORS_PATTERN.sub(' ', name).strip()
+
+
 class HebrewFuzzyMatcher:
     def __init__(self):
         self.threshold = 0.8
-    
+
     def match(self, str1, str2):
         if not str1 or not str2:
             return 0.0
@@ -13,3 +50,165 @@ class HebrewFuzzyMatcher:
             return 0.8
         common = sum(1 for c in s1 if c in s2)
         return common / max(len(s1), len(s2))
+
+
+class FuzzyNameIndex:
+    """
+    Index de noms par n-grammes de caractères.
+
+    Score d'un candidat: 1.0 si les formes normalisées sont égales, sinon le
+    coefficient de Dice des n-grammes, relevé à 0.8 quand l'un des noms
+    contient l'autre (comme HebrewFuzzyMatcher).
+
+    Args:
+        n: taille des n-grammes (2 convient aux noms hébreux courts)
+    """
+
+    def __init__(self, n: int = 2):
+        self.n = n
+        self._names: List[str] = []
+        self._normalized: List[str] = []
+        self._records: List[Any] = []
+        self._gram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _grams(self, normalized: str) -> set:
+        padded = f' {normalized} '
+        return {padded[i:i + self.n] for i in range(max(len(padded) - self.n + 1, 1))}
+
+    def add(self, name: str, record: Any = None) -> None:
+        """Ajoute un nom (et l'enregistrement retourné avec lui)"""
+        normalized = normalize_name(name)
+        if not normalized:
+            return
+        item = len(self._names)
+        grams = self._grams(normalized)
+        self._names.append(name)
+        self._normalized.append(normalized)
+        self._records.append(record if record is not None else name)
+        self._gram_counts.append(len(grams))
+        self._exact[normalized].append(item)
+        for gram in grams:
+            self._postings[gram].append(item)
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.0) -> List[Tuple[float, str, Any]]:
+        """Les k meilleurs (score, nom, enregistrement), score décroissant"""
+        normalized = normalize_name(query)
+        if not normalized or k <= 0:
+            return []
+
+        exact = self._exact.get(normalized, [])
+        if len(exact) >= k:
+            return [(1.0, self._names[i], self._records[i]) for i in exact[:k]]
+
+        grams = self._grams(normalized)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for item in self._postings.get(gram, ()):
+                shared[item] += 1
+
+        scored = []
+        for item, common in shared.items():
+            candidate = self._normalized[item]
+            if candidate == normalized:
+                score = 1.0
+            else:
+                score = 2.0 * common / (len(grams) + self._gram_counts[item])
+                if normalized in candidate or candidate in normalized:
+                    score = max(score, 0.8)
+            if score >= min_score:
+                scored.append((score, -item))
+
+        return [(score, self._names[-neg], self._records[-neg])
+                for score, neg in heapq.nlargest(k, scored)]
+
+
+class SchoolNameIndex:
+    """
+    Index flous des professeurs, classes et matières de la base.
+
+    Chaque table est indexée une fois; avant une recherche, une empreinte
+    (nombre de lignes + md5 des noms) est relue au plus toutes les
+    `check_interval` secondes et l'index de la table est reconstruit si elle a
+    changé.
+    """
+
+    # entité -> (table, clé primaire, colonne du nom)
+    SOURCES = {
+        "teachers": ("teachers", "teacher_id", "teacher_name"),
+        "classes": ("classes", "class_id", "class_name"),
+        "subjects": ("subjects", "subject_id", "subject_name"),
+    }
+
+    def __init__(self, db_config: Dict[str, str], check_interval: float = 30.0,
+                 threshold: float = 0.6):
+        self.db_config = db_config
+        self.check_interval = check_interval
+        self.threshold = threshold
+        self._indexes: Dict[str, FuzzyNameIndex] = {entity: FuzzyNameIndex() for entity in self.SOURCES}
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        """Reconstruit les index des tables modifiées depuis la dernière vérification"""
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < self.check_interval:
+                return
+            # Même en cas d'échec: pas de nouvel essai avant check_interval
+            self._checked_at = time.monotonic()
+            conn = get_connection(self.db_config)
+            cur = conn.cursor()
+            try:
+                for entity, (table, key, column) in self.SOURCES.items():
+                    cur.execute(f"""
+                        SELECT COUNT(*), MD5(COALESCE(STRING_AGG({key}::text || ':' || {column}, '|'
+                                                             ORDER BY {key}), ''))
+                        FROM {table}
+                    """)
+                    fingerprint = tuple(cur.fetchone())
+                    if fingerprint == self._fingerprints.get(entity):
+                        continue
+                    cur.execute(f"SELECT * FROM {table} WHERE {column} IS NOT NULL ORDER BY {key}")
+                    columns = [desc[0] for desc in cur.description]
+                    index = FuzzyNameIndex()
+                    for row in cur.fetchall():
+                        record = dict(zip(columns, row))
+                        index.add(record[column], record)
+                    self._indexes[entity] = index
+                    self._fingerprints[entity] = fingerprint
+                    logger.info(f"🔎 Index flou {entity}: {len(index)} noms")
+            finally:
+                cur.close()
+                conn.close()
+
+    def search(self, entity: str, name: str, k: int = 5,
+               min_score: float = 0.3) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """Les k noms de `entity` ("teachers", "classes", "subjects") les plus proches"""
+        try:
+            self.refresh()
+        except Exception as e:
+            # Index précédent conservé si la base est momentanément indisponible
+            logger.warning(f"⚠️ Rafraîchissement de l'index {entity} impossible: {e}")
+        return self._indexes[entity].search(name, k=k, min_score=min_score)
+
+    def find(self, entity: str, name: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Meilleure correspondance au-dessus du seuil, ou None"""
+        matches = self.search(entity, name, k=1, min_score=self.threshold)
+        return (matches[0][0], matches[0][2]) if matches else None
+
+    def find_teacher(self, name: str) -> Optional[Dict[str, Any]]:
+        match = self.find("teachers", name)
+        return {"teacher": match[1], "confidence": match[0]} if match else None
+
+    def find_class(self, name: str) -> Optional[Dict[str, Any]]:
+        match = self.find("classes", name)
+        return {"class": match[1], "confidence": match[0]} if match else None
+
+    def find_subject(self, name: str) -> Optional[Dict[str, Any]]:
+        match = self.find("subjects", name)
+        return {"subject": match[1], "confidence": match[0]} if match else None
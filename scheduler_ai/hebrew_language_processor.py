@@ -1,11 +1,79 @@
 # hebrew_language_processor.py - Traitement spécialisé de l'hébreu pour l'agent conseiller
 import re
 import logging
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, FrozenSet, Iterable, List, Set, Tuple, Optional
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Compilés une fois pour tous les appels
+NIKUD_PATTERN = re.compile(r'[\u0591-\u05C7]')
+SPACES_PATTERN = re.compile(r'\s+')
+HOUR_PATTERN = re.compile(r'(\d{1,2}):(\d{2})')
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Alternation en forme de trie: au plus un test par caractère, le mot le plus long d'abord"""
+    trie: Dict[str, Dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Recherche simultanée des mots-clés de plusieurs vocabulaires en une passe.
+
+    Donne exactement les mots-clés k tels que `k in text`: à chaque position,
+    l'expression en trie trouve le mot-clé le plus long, et les autres
+    mots-clés commençant à cette position sont ses préfixes.
+
+    Args:
+        vocabularies: catégorie -> {mot-clé: valeur}
+    """
+
+    def __init__(self, vocabularies: Dict[str, Dict[str, Any]]):
+        # mot-clé -> [(rang de la catégorie, position dans le vocabulaire, catégorie, valeur)]
+        self._entries: Dict[str, List[Tuple[int, int, str, Any]]] = {}
+        for rank, (category, vocabulary) in enumerate(vocabularies.items()):
+            for position, (word, value) in enumerate(vocabulary.items()):
+                if word:
+                    self._entries.setdefault(word, []).append((rank, position, category, value))
+        words = sorted(self._entries)
+        self._prefixes: Dict[str, FrozenSet[str]] = {
+            word: frozenset(prefix for prefix in words if word.startswith(prefix)) for word in words
+        }
+        self._pattern = re.compile(f'(?=({_trie_regex(words)}))') if words else None
+
+    def keywords(self, text: str) -> Set[str]:
+        """Mots-clés présents dans le texte (sous-chaînes)"""
+        found: Set[str] = set()
+        if self._pattern is None:
+            return found
+        for match in self._pattern.finditer(text):
+            found |= self._prefixes[match.group(1)]
+        return found
+
+    def find(self, text: str) -> Dict[str, List[Any]]:
+        """Catégorie -> valeurs des mots-clés trouvés, dans l'ordre du vocabulaire"""
+        found: Dict[str, List[Any]] = {}
+        for _, _, category, value in sorted(entry for word in self.keywords(text)
+                                            for entry in self._entries[word]):
+            found.setdefault(category, []).append(value)
+        return found
+
+
 class HebrewLanguageProcessor:
     """Processeur de langage naturel spécialisé pour l'hébreu dans le contexte scolaire"""
     
@@ -142,6 +210,47 @@ class HebrewLanguageProcessor:
             "בשעה 10": "at_10",
         }
         
+        self.problem_indicators = {
+            "חור": "gap",
+            "חורים": "gaps", 
+            "ריק": "empty_slot",
+            "התנגשות": "conflict",
+            "קונפליקט": "conflict",
+            "בעיה": "problem",
+            "בעיות": "problems",
+            "עומס": "overload",
+            "עייפות": "fatigue",
+            "לחץ": "pressure"
+        }
+        
+        self.preference_indicators = {
+            "אני אוהב": "preference",
+            "אני מעדיף": "preference", 
+            "כדאי": "suggestion",
+            "עדיף": "better",
+            "חשוב לי": "important",
+            "אני צריך": "need",
+            "חובה": "must",
+            "אסור": "forbidden",
+            "אל תשים": "dont_put",
+            "תמיד": "always",
+            "לעולם לא": "never",
+            "בדרך כלל": "usually"
+        }
+        
+        # Mots déclenchant des actions composées (_extract_actions)
+        self.compound_actions = [
+            (["חור", "חורים", "ריק", "רווח"], "fix_gaps"),
+            (["התנגשות", "קונפליקט", "חפיפה"], "fix_conflicts"),
+            (["לאזן", "איזון", "שווה"], "balance"),
+        ]
+        
+        # Dans un vrai système, vous auriez une liste de noms de professeurs
+        self.teacher_indicators = ["מורה", "המורה", "הגב'", "האדון", "גב'", "מר"]
+        self.urgent_words = ["דחוף", "מיידי", "חשוב", "מהר", "עכשיו", "היום", "בבקשה מיד"]
+        self.medium_urgency_words = ["כדאי", "עדיף", "אם אפשר", "בזמן הקרוב"]
+        self.polite_words = ["בבקשה", "אודה", "תודה", "אם אפשר", "האם תוכל", "סליחה"]
+        
         self.class_pattern = re.compile(r'[זחטיא]-[0-9]')
         self.grade_names = {
             "ז": "7th_grade",
@@ -151,6 +260,25 @@ class HebrewLanguageProcessor:
             "יא": "11th_grade",
             "יב": "12th_grade"
         }
+        
+        # Tous les vocabulaires compilés en un seul automate: une passe par texte
+        self.matcher = KeywordMatcher({
+            "actions": self.actions_hebrew,
+            "compound_actions": {word: action for words, action in self.compound_actions for word in words},
+            "grades": {grade_letter: grade_letter for grade_letter in self.grade_names},
+            "subjects": self.subjects_hebrew,
+            "teachers": {indicator: "teacher_mentioned" for indicator in self.teacher_indicators},
+            "days": self.days_hebrew,
+            "times": self.time_expressions_hebrew,
+            "problems": self.problem_indicators,
+            "preferences": self.preference_indicators,
+            "urgent": dict.fromkeys(self.urgent_words, True),
+            "medium_urgency": dict.fromkeys(self.medium_urgency_words, True),
+            "polite": dict.fromkeys(self.polite_words, True),
+        })
+
+    def _keywords(self, text: str, found: Optional[Dict[str, List]]) -> Dict[str, List]:
+        return self.matcher.find(text) if found is None else found
 
     def analyze_hebrew_text(self, text: str) -> Dict[str, any]:
         """Analyse complète d'un texte en hébreu pour extraction des intentions"""
@@ -159,23 +287,26 @@ class HebrewLanguageProcessor:
         # Nettoyer et normaliser le texte
         cleaned_text = self._normalize_hebrew_text(text)
         
+        # Une seule passe pour tous les mots-clés
+        found = self.matcher.find(cleaned_text)
+        
         # Extraire les composants
         analysis = {
             "original_text": text,
             "normalized_text": cleaned_text,
             "detected_language": "hebrew",
-            "actions": self._extract_actions(cleaned_text),
+            "actions": self._extract_actions(cleaned_text, found),
             "entities": {
-                "classes": self._extract_classes(cleaned_text),
-                "subjects": self._extract_subjects(cleaned_text),
-                "teachers": self._extract_teachers(cleaned_text),
-                "days": self._extract_days(cleaned_text),
-                "times": self._extract_times(cleaned_text)
+                "classes": self._extract_classes(cleaned_text, found),
+                "subjects": self._extract_subjects(cleaned_text, found),
+                "teachers": self._extract_teachers(cleaned_text, found),
+                "days": self._extract_days(cleaned_text, found),
+                "times": self._extract_times(cleaned_text, found)
             },
-            "problems_mentioned": self._extract_problems(cleaned_text),
-            "preferences_indicators": self._extract_preferences_indicators(cleaned_text),
-            "urgency_level": self._assess_urgency(cleaned_text),
-            "politeness_level": self._assess_politeness(cleaned_text),
+            "problems_mentioned": self._extract_problems(cleaned_text, found),
+            "preferences_indicators": self._extract_preferences_indicators(cleaned_text, found),
+            "urgency_level": self._assess_urgency(cleaned_text, found),
+            "politeness_level": self._assess_politeness(cleaned_text, found),
             "confidence_score": 0.0
         }
         
@@ -195,39 +326,29 @@ class HebrewLanguageProcessor:
     def _normalize_hebrew_text(self, text: str) -> str:
         """Normalise le texte hébreu (supprime nikud, normalise les espaces, etc.)"""
         # Supprimer les signes de ponctuation hébraïques (nikud)
-        nikud_pattern = re.compile(r'[\u0591-\u05C7]')
-        text = nikud_pattern.sub('', text)
+        text = NIKUD_PATTERN.sub('', text)
         
         # Normaliser les espaces
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = SPACES_PATTERN.sub(' ', text.strip())
         
         # Normaliser certaines lettres finales
         text = text.replace('ך', 'כ').replace('ם', 'מ').replace('ן', 'נ').replace('ף', 'פ').replace('ץ', 'צ')
         
         return text.lower()
 
-    def _extract_actions(self, text: str) -> List[str]:
+    def _extract_actions(self, text: str, found: Optional[Dict[str, List]] = None) -> List[str]:
         """Extrait les actions demandées depuis le texte hébreu"""
-        actions = []
-        
-        for hebrew_action, english_action in self.actions_hebrew.items():
-            if hebrew_action in text:
-                actions.append(english_action)
+        found = self._keywords(text, found)
+        actions = found.get("actions", [])
         
         # Patterns spéciaux pour les actions complexes
-        if any(word in text for word in ["חור", "חורים", "ריק", "רווח"]):
-            actions.append("fix_gaps")
-        
-        if any(word in text for word in ["התנגשות", "קונפליקט", "חפיפה"]):
-            actions.append("fix_conflicts")
-        
-        if any(word in text for word in ["לאזן", "איזון", "שווה"]):
-            actions.append("balance")
+        actions = actions + found.get("compound_actions", [])
         
         return list(set(actions))  # Supprimer les doublons
 
-    def _extract_classes(self, text: str) -> List[str]:
+    def _extract_classes(self, text: str, found: Optional[Dict[str, List]] = None) -> List[str]:
         """Extrait les noms de classes depuis le texte"""
+        found = self._keywords(text, found)
         classes = []
         
         # Pattern principal pour les classes (ז-1, ח-2, etc.)
@@ -235,129 +356,59 @@ class HebrewLanguageProcessor:
         classes.extend(class_matches)
         
         # Rechercher des mentions plus générales
-        for grade_letter, grade_name in self.grade_names.items():
-            if grade_letter in text and not any(grade_letter in c for c in classes):
+        for grade_letter in found.get("grades", []):
+            if not any(grade_letter in c for c in classes):
                 # Mention générale d'une classe sans numéro spécifique
                 classes.append(f"{grade_letter}_general")
         
         return classes
 
-    def _extract_subjects(self, text: str) -> List[str]:
+    def _extract_subjects(self, text: str, found: Optional[Dict[str, List]] = None) -> List[str]:
         """Extrait les matières mentionnées"""
-        subjects = []
-        
-        for hebrew_subject, english_subject in self.subjects_hebrew.items():
-            if hebrew_subject in text:
-                subjects.append(english_subject)
-        
-        return subjects
+        return self._keywords(text, found).get("subjects", [])
 
-    def _extract_teachers(self, text: str) -> List[str]:
+    def _extract_teachers(self, text: str, found: Optional[Dict[str, List]] = None) -> List[str]:
         """Extrait les noms de professeurs (détection basique)"""
-        teachers = []
-        
-        # Pattern pour détecter des noms hébreux (très basique)
-        # Dans un vrai système, vous auriez une liste de noms de professeurs
-        teacher_indicators = ["מורה", "המורה", "הגב'", "האדון", "גב'", "מר"]
-        
-        for indicator in teacher_indicators:
-            if indicator in text:
-                # Dans la vraie implémentation, on extrairait le nom après l'indicateur
-                teachers.append("teacher_mentioned")
-        
-        return teachers
+        # Dans la vraie implémentation, on extrairait le nom après l'indicateur
+        return self._keywords(text, found).get("teachers", [])
 
-    def _extract_days(self, text: str) -> List[int]:
+    def _extract_days(self, text: str, found: Optional[Dict[str, List]] = None) -> List[int]:
         """Extrait les jours de la semaine mentionnés"""
-        days = []
-        
-        for hebrew_day, day_number in self.days_hebrew.items():
-            if hebrew_day in text:
-                days.append(day_number)
-        
-        return days
+        return self._keywords(text, found).get("days", [])
 
-    def _extract_times(self, text: str) -> List[str]:
+    def _extract_times(self, text: str, found: Optional[Dict[str, List]] = None) -> List[str]:
         """Extrait les références temporelles"""
-        times = []
-        
-        for hebrew_time, english_time in self.time_expressions_hebrew.items():
-            if hebrew_time in text:
-                times.append(english_time)
+        times = list(self._keywords(text, found).get("times", []))
         
         # Pattern pour les heures spécifiques
-        hour_pattern = re.compile(r'(\d{1,2}):(\d{2})')
-        hour_matches = hour_pattern.findall(text)
+        hour_matches = HOUR_PATTERN.findall(text)
         for hour, minute in hour_matches:
             times.append(f"{hour}:{minute}")
         
         return times
 
-    def _extract_problems(self, text: str) -> List[str]:
+    def _extract_problems(self, text: str, found: Optional[Dict[str, List]] = None) -> List[str]:
         """Identifie les problèmes mentionnés"""
-        problems = []
-        
-        problem_indicators = {
-            "חור": "gap",
-            "חורים": "gaps", 
-            "ריק": "empty_slot",
-            "התנגשות": "conflict",
-            "קונפליקט": "conflict",
-            "בעיה": "problem",
-            "בעיות": "problems",
-            "עומס": "overload",
-            "עייפות": "fatigue",
-            "לחץ": "pressure"
-        }
-        
-        for hebrew_problem, english_problem in problem_indicators.items():
-            if hebrew_problem in text:
-                problems.append(english_problem)
-        
-        return problems
+        return self._keywords(text, found).get("problems", [])
 
-    def _extract_preferences_indicators(self, text: str) -> List[str]:
+    def _extract_preferences_indicators(self, text: str, found: Optional[Dict[str, List]] = None) -> List[str]:
         """Identifie les indicateurs de préférences personnelles"""
-        preferences = []
-        
-        preference_indicators = {
-            "אני אוהב": "preference",
-            "אני מעדיף": "preference", 
-            "כדאי": "suggestion",
-            "עדיף": "better",
-            "חשוב לי": "important",
-            "אני צריך": "need",
-            "חובה": "must",
-            "אסור": "forbidden",
-            "אל תשים": "dont_put",
-            "תמיד": "always",
-            "לעולם לא": "never",
-            "בדרך כלל": "usually"
-        }
-        
-        for hebrew_pref, english_pref in preference_indicators.items():
-            if hebrew_pref in text:
-                preferences.append(english_pref)
-        
-        return preferences
+        return self._keywords(text, found).get("preferences", [])
 
-    def _assess_urgency(self, text: str) -> str:
+    def _assess_urgency(self, text: str, found: Optional[Dict[str, List]] = None) -> str:
         """Évalue le niveau d'urgence de la demande"""
-        urgent_words = ["דחוף", "מיידי", "חשוב", "מהר", "עכשיו", "היום", "בבקשה מיד"]
-        medium_words = ["כדאי", "עדיף", "אם אפשר", "בזמן הקרוב"]
-        
-        if any(word in text for word in urgent_words):
+        found = self._keywords(text, found)
+        if "urgent" in found:
             return "high"
-        elif any(word in text for word in medium_words):
+        elif "medium_urgency" in found:
             return "medium"
         else:
             return "low"
 
-    def _assess_politeness(self, text: str) -> str:
+    def _assess_politeness(self, text: str, found: Optional[Dict[str, List]] = None) -> str:
         """Évalue le niveau de politesse"""
-        polite_words = ["בבקשה", "אודה", "תודה", "אם אפשר", "האם תוכל", "סליחה"]
-        
-        if any(word in text for word in polite_words):
+        found = self._keywords(text, found)
+        if "polite" in found:
             return "high"
         elif "?" in text or text.endswith("?"):
             return "medium" 
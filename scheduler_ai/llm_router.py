@@ -3,17 +3,21 @@ scheduler_ai/llm_router.py - Routeur intelligent pour choisir entre GPT-4o et Cl
 """
 import os
 import json
+import asyncio
 import logging
 import tiktoken
-from typing import Dict, Any, List, Optional, Literal
+from typing import Dict, Any, List, Optional, Literal, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import re
+import time
 
 import openai
 import anthropic
 import httpx
 
+from parse_cache import ParseCache, fast_parse
+
 logger = logging.getLogger(__name__)
 session_memory: Dict[str, Dict[str, Any]] = {}
 
@@ -42,6 +46,14 @@ class LLMRouter:
         # Configuration du proxy via httpx si nécessaire
         proxy_url = os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
         http_client = httpx.Client(proxies=proxy_url) if proxy_url else None
+        async_http_client = httpx.AsyncClient(proxies=proxy_url) if proxy_url else None
+
+        # Appels asynchrones: délai par requête et nombre d'appels simultanés
+        self.request_timeout = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
+        self.async_openai_client = None
+        self.async_anthropic_client = None
         
         try:
             api_key = os.environ.get("OPENAI_API_KEY")
@@ -50,12 +62,18 @@ class LLMRouter:
                     api_key=api_key,
                     http_client=http_client
                 )
+                self.async_openai_client = openai.AsyncOpenAI(
+                    api_key=api_key,
+                    http_client=async_http_client,
+                    timeout=self.request_timeout
+                )
             else:
                 self.openai_client = None
                 logger.warning("OpenAI API key not configured")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI client: {e}")
             self.openai_client = None
+            self.async_openai_client = None
             
         try:
             api_key = os.environ.get("ANTHROPIC_API_KEY") 
@@ -64,12 +82,18 @@ class LLMRouter:
                     api_key=api_key,
                     http_client=http_client
                 )
+                self.async_anthropic_client = anthropic.AsyncAnthropic(
+                    api_key=api_key,
+                    http_client=async_http_client,
+                    timeout=self.request_timeout
+                )
             else:
                 self.anthropic_client = None
                 logger.warning("Anthropic API key not configured")
         except Exception as e:
             logger.error(f"Failed to initialize Anthropic client: {e}")
             self.anthropic_client = None
+            self.async_anthropic_client = None
         
         # Tokenizer pour compter les tokens
         try:
@@ -79,6 +103,13 @@ class LLMRouter:
         
         # Cache des patterns de contraintes
         self.constraint_patterns = self._load_constraint_patterns()
+
+        # Cache des contraintes déjà parsées (LRU + Redis si REDIS_URL)
+        self.parse_cache = ParseCache(
+            max_entries=int(os.getenv("LLM_PARSE_CACHE_SIZE", "1024")),
+            redis_url=os.getenv("REDIS_URL"),
+            ttl=int(os.getenv("LLM_PARSE_CACHE_TTL", str(7 * 24 * 3600))),
+        )
     
     def _load_constraint_patterns(self) -> Dict[str, Dict]:
         """Charge les patterns de reconnaissance des contraintes"""
@@ -88,7 +119,9 @@ class LLMRouter:
                     r"(.+) (?:ne peut pas|n'est pas disponible|absent) (?:le |les )?(.+)",
                     r"(.+) (?:לא יכול|לא זמין) (?:ב)?(.+)",
                 ],
-                "complexity": TaskComplexity.LOW
+                "complexity": TaskComplexity.LOW,
+                # Phrases simples (entité + jours) parsées sans LLM
+                "fast_path": True
             },
             "time_preference": {
                 "patterns": [
@@ -152,9 +185,57 @@ class LLMRouter:
         else:
             memory = {}
 
+        # Chemin rapide: phrase simple reconnue par les patterns, sans LLM
+        fast = fast_parse(text, self.constraint_patterns)
+        if fast is not None:
+            self.parse_cache.record_fast_path()
+            return fast
+
         if not self.openai_client and not self.anthropic_client:
             return self._basic_parse(text)
-        
+
+        constraint_type, model_name = self._route_parsing(text)
+        if model_name is None:
+            return self._basic_parse(text)
+
+        cached = self.parse_cache.get(text, language, model_name)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        parsed = self._parse_with_llm(text, language, constraint_type, model_name)
+        if parsed.get("model_used") != "basic":
+            self.parse_cache.put(text, language, model_name, parsed, time.perf_counter() - start)
+        return parsed
+
+    async def parse_natural_language_async(self, text: str, language: Literal["fr", "he"] = "fr",
+                                           session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Version asynchrone de parse_natural_language (clients LLM asynchrones,
+        au plus LLM_MAX_CONCURRENCY appels simultanés)"""
+        fast = fast_parse(text, self.constraint_patterns)
+        if fast is not None:
+            self.parse_cache.record_fast_path()
+            return fast
+
+        if not self.async_openai_client and not self.async_anthropic_client:
+            return self._basic_parse(text)
+
+        constraint_type, model_name = self._route_parsing(text)
+        if model_name is None:
+            return self._basic_parse(text)
+
+        cached = self.parse_cache.get(text, language, model_name)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        parsed = await self._parse_with_llm_async(text, language, constraint_type, model_name)
+        if parsed.get("model_used") != "basic":
+            self.parse_cache.put(text, language, model_name, parsed, time.perf_counter() - start)
+        return parsed
+
+    def _route_parsing(self, text: str) -> Tuple[str, Optional[str]]:
+        """Type de contrainte détecté et modèle à appeler (None si aucun)"""
         # Compter les tokens
         tokens = len(self.encoding.encode(text))
         
@@ -166,45 +247,26 @@ class LLMRouter:
         
         # Choisir le modèle
         model = self.choose_model("constraint_parsing", tokens, complexity)
-        
         if model == "none":
-            return self._basic_parse(text)
-        
+            return constraint_type, None
+        if model.startswith("openai") and self.openai_client:
+            return constraint_type, "gpt-4o"
+        return constraint_type, "claude-4-opus-20240514"
+
+    def _parse_with_llm(self, text: str, language: str, constraint_type: str, model_name: str) -> Dict[str, Any]:
+        """Parse une contrainte par le LLM (avec repli Anthropic puis parsing basique)"""
         # Construire le prompt
         prompt = self._build_parsing_prompt(text, language, constraint_type)
         
         # Appeler le LLM
         try:
-            if model.startswith("openai") and self.openai_client:
+            if model_name == "gpt-4o":
                 response = self._call_openai(prompt, model="gpt-4o")
             elif self.anthropic_client:
                 response = self._call_anthropic(prompt, model="claude-4-opus-20240514")
             else:
                 return self._basic_parse(text)
-            
-            # Parser la réponse
-            parsed = self._parse_llm_response(response.content)
-            # Validation du type
-            try:
-                from scheduler_ai.models import ConstraintType as AllowedType
-                allowed_values = {v.value for v in AllowedType}
-                # Fonction utilitaire
-                def _fix_type(container: dict):
-                    t = container.get("type")
-                    if t and t not in allowed_values:
-                        container["type"] = "custom"
-                        parsed["requires_clarification"] = True
-                        parsed.setdefault("clarification_questions", []).append(
-                            f"Quel type de contrainte représente « {t} » ?")
-                if "constraint" in parsed:
-                    _fix_type(parsed["constraint"])
-                else:
-                    _fix_type(parsed)
-            except Exception:
-                pass
-            parsed["confidence"] = self._calculate_confidence(parsed, text)
-            
-            return parsed
+            return self._finalize_parse(response, text)
         except Exception as e:
             logger.error(f"Error in parse_natural_language: {e}")
             # ---------------------------------------------
@@ -213,28 +275,7 @@ class LLMRouter:
                 try:
                     fallback_resp = self._call_anthropic(
                         prompt, model="claude-4-opus-20240514")
-                    parsed = self._parse_llm_response(fallback_resp.content)
-                    # Validation du type
-                    try:
-                        from scheduler_ai.models import ConstraintType as AllowedType
-                        allowed_values = {v.value for v in AllowedType}
-                        def _fix_type2(container: dict):
-                            t = container.get("type")
-                            if t and t not in allowed_values:
-                                container["type"] = "custom"
-                                parsed["requires_clarification"] = True
-                                parsed.setdefault("clarification_questions", []).append(
-                                    f"Quel type de contrainte représente « {t} » ?")
-                        if "constraint" in parsed:
-                            _fix_type2(parsed["constraint"])
-                        else:
-                            _fix_type2(parsed)
-                        ctype = parsed.get("constraint", {}).get("type", "")
-                        if ctype not in allowed_values:
-                            parsed["constraint"]["type"] = "custom"
-                    except Exception:
-                        pass
-                    parsed["confidence"] = self._calculate_confidence(parsed, text)
+                    parsed = self._finalize_parse(fallback_resp, text)
                     parsed["model_fallback"] = "anthropic"
                     logger.info("Fallback vers Anthropic réussi")
                     return parsed
@@ -242,6 +283,66 @@ class LLMRouter:
                     logger.error(f"Fallback Anthropic échoué: {e2}")
             # ---------------------------------------------
             return self._basic_parse(text)
+
+    async def _parse_with_llm_async(self, text: str, language: str, constraint_type: str,
+                                    model_name: str) -> Dict[str, Any]:
+        """Version asynchrone de _parse_with_llm; une annulation (déconnexion du
+        client, délai dépassé) interrompt l'appel HTTP en cours"""
+        prompt = self._build_parsing_prompt(text, language, constraint_type)
+        try:
+            async with self._llm_slots():
+                if model_name == "gpt-4o":
+                    response = await self._call_openai_async(prompt, model="gpt-4o")
+                elif self.async_anthropic_client:
+                    response = await self._call_anthropic_async(prompt, model="claude-4-opus-20240514")
+                else:
+                    return self._basic_parse(text)
+            return self._finalize_parse(response, text)
+        except Exception as e:
+            logger.error(f"Error in parse_natural_language_async: {e}")
+            if self.async_anthropic_client:
+                try:
+                    async with self._llm_slots():
+                        fallback_resp = await self._call_anthropic_async(
+                            prompt, model="claude-4-opus-20240514")
+                    parsed = self._finalize_parse(fallback_resp, text)
+                    parsed["model_fallback"] = "anthropic"
+                    logger.info("Fallback vers Anthropic réussi")
+                    return parsed
+                except Exception as e2:
+                    logger.error(f"Fallback Anthropic échoué: {e2}")
+            return self._basic_parse(text)
+
+    def _llm_slots(self) -> asyncio.Semaphore:
+        """Sémaphore des appels LLM asynchrones (créé dans la boucle qui l'utilise)"""
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._llm_semaphore
+
+    def _finalize_parse(self, response: LLMResponse, text: str) -> Dict[str, Any]:
+        """Réponse LLM -> contrainte: JSON, validation du type, confiance"""
+        parsed = self._parse_llm_response(response.content)
+        # Validation du type
+        try:
+            from scheduler_ai.models import ConstraintType as AllowedType
+            allowed_values = {v.value for v in AllowedType}
+            # Fonction utilitaire
+            def _fix_type(container: dict):
+                t = container.get("type")
+                if t and t not in allowed_values:
+                    container["type"] = "custom"
+                    parsed["requires_clarification"] = True
+                    parsed.setdefault("clarification_questions", []).append(
+                        f"Quel type de contrainte représente « {t} » ?")
+            if "constraint" in parsed:
+                _fix_type(parsed["constraint"])
+            else:
+                _fix_type(parsed)
+        except Exception:
+            pass
+        parsed["confidence"] = self._calculate_confidence(parsed, text)
+        parsed["model_used"] = response.model_used
+        return parsed
     
     def _basic_parse(self, text: str) -> Dict[str, Any]:
         """Parsing basique sans LLM"""
@@ -266,7 +367,8 @@ class LLMRouter:
             },
             "confidence": 0.3,
             "summary": f"Contrainte détectée: {text[:50]}...",
-            "alternatives": []
+            "alternatives": [],
+            "model_used": "basic"
         }
     
     def _detect_constraint_type(self, text: str) -> str:
@@ -426,6 +528,49 @@ Réponds de manière claire et pédagogique. Si la question concerne des modific
             logger.error(f"Erreur Anthropic: {e}")
             raise
     
+    async def _call_openai_async(self, prompt: str, model: str = "gpt-4o", **kwargs) -> LLMResponse:
+        """Appelle l'API OpenAI (client asynchrone)"""
+        if not self.async_openai_client:
+            raise Exception("OpenAI async client not initialized")
+
+        response = await self.async_openai_client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "Tu es un expert en planification scolaire."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            **kwargs
+        )
+        return LLMResponse(
+            content=response.choices[0].message.content,
+            model_used=model,
+            tokens_used=response.usage.total_tokens,
+            confidence=0.9,
+            metadata={"finish_reason": response.choices[0].finish_reason}
+        )
+
+    async def _call_anthropic_async(self, prompt: str, model: str = "claude-4-opus-20240514", **kwargs) -> LLMResponse:
+        """Appelle l'API Anthropic (client asynchrone)"""
+        if not self.async_anthropic_client:
+            raise Exception("Anthropic async client not initialized")
+
+        response = await self.async_anthropic_client.messages.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=4096,
+            temperature=0.3,
+            **kwargs
+        )
+        content = response.content[0].text if response.content else ""
+        return LLMResponse(
+            content=content,
+            model_used=model,
+            tokens_used=response.usage.input_tokens + response.usage.output_tokens,
+            confidence=0.95,
+            metadata={"stop_reason": response.stop_reason}
+        )
+    
     def _parse_llm_response(self, response: str) -> Dict[str, Any]:
         """Parse la réponse JSON du LLM"""
         try:
@@ -0,0 +1,208 @@
+"""
+local_search.py - État de recherche locale à évaluation incrémentale
+Les positions (jour, période) des entrées sont gardées dans des tableaux plats,
+avec les agrégats du score de AdvancedSchedulingEngine.analyze_schedule_quality:
+    - conflits de professeurs: compteurs par (professeur, jour, période)
+    - trous: masque de bits des périodes occupées par (classe, jour)
+    - blocs consécutifs: masque et effectif par (classe, matière, jour)
+Un déplacement ou un échange ne met à jour que les lignes touchées; le score
+est relu en O(1) et le dernier mouvement peut être annulé.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+# Professeur ignoré par la détection de conflits (cours non attribué)
+UNASSIGNED_TEACHER = 'לא משובץ'
+
+# Mouvements: ('move', i, jour, période) ou ('swap', i, j)
+Move = Tuple
+
+
+def _has_gap(mask: int) -> bool:
+    """Vrai si les bits occupés ne sont pas contigus"""
+    if not mask:
+        return False
+    mask //= mask & -mask
+    return bool(mask & (mask + 1))
+
+
+class LocalSearchState:
+    """
+    Emploi du temps sous forme compacte pour les métaheuristiques.
+
+    Le score suit exactement analyze_schedule_quality()['total_score'], avec les
+    mêmes champs d'entrée (teacher_name, class_name, subject_name, day_of_week,
+    period_number).
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], min_days: int = 5, min_periods: int = 8):
+        self.entries = entries
+        n = len(entries)
+        self.day = [entry.get('day_of_week', 0) or 0 for entry in entries]
+        self.period = [entry.get('period_number', 0) or 0 for entry in entries]
+        self.days = max([min_days] + [d + 1 for d in self.day])
+        self.periods = max([min_periods] + [p + 1 for p in self.period])
+
+        teacher_ids: Dict[str, int] = {}
+        class_ids: Dict[str, int] = {}
+        key_ids: Dict[Tuple[str, str], int] = {}
+        self.teacher = [-1] * n
+        self.klass = [0] * n
+        self.key = [0] * n
+        for i, entry in enumerate(entries):
+            teacher = entry.get('teacher_name', '')
+            if teacher and teacher != UNASSIGNED_TEACHER:
+                self.teacher[i] = teacher_ids.setdefault(teacher, len(teacher_ids))
+            class_name = entry.get('class_name', '')
+            self.klass[i] = class_ids.setdefault(class_name, len(class_ids))
+            self.key[i] = key_ids.setdefault((class_name, entry.get('subject_name', '')), len(key_ids))
+
+        slots = self.days * self.periods
+        # Professeurs: effectif par créneau, H = somme des (effectif - 1)
+        self._teacher_count = [0] * (len(teacher_ids) * slots)
+        self.teacher_conflicts = 0
+        # Classes: effectif par période et masque par (classe, jour), S = lignes trouées
+        self._class_count = [0] * (len(class_ids) * slots)
+        self._class_mask = [0] * (len(class_ids) * self.days)
+        self.gap_rows = 0
+        # Blocs: effectif, masque et contribution par (classe, matière, jour)
+        self._key_count = [0] * (len(key_ids) * slots)
+        self._key_mask = [0] * (len(key_ids) * self.days)
+        self._key_len = [0] * (len(key_ids) * self.days)
+        self._key_bonus = [0.0] * (len(key_ids) * self.days)
+        self.block_bonus = 0.0
+        self.block_rows = 0
+
+        for i in range(n):
+            self._place(i, 1)
+        self._last: Optional[Move] = None
+
+    # ------------------------------------------------------------------
+    # Mise à jour incrémentale
+    # ------------------------------------------------------------------
+
+    def _place(self, i: int, sign: int) -> None:
+        """Ajoute (sign=1) ou retire (sign=-1) l'entrée i à sa position courante"""
+        day, period = self.day[i], self.period[i]
+        bit = 1 << period
+        slot = day * self.periods + period
+
+        teacher = self.teacher[i]
+        if teacher >= 0:
+            cell = teacher * self.days * self.periods + slot
+            count = self._teacher_count[cell]
+            if sign > 0:
+                if count >= 1:
+                    self.teacher_conflicts += 1
+            elif count >= 2:
+                self.teacher_conflicts -= 1
+            self._teacher_count[cell] = count + sign
+
+        row = self.klass[i] * self.days + day
+        cell = self.klass[i] * self.days * self.periods + slot
+        count = self._class_count[cell] + sign
+        self._class_count[cell] = count
+        if count == 0 or (count == 1 and sign > 0):
+            mask = self._class_mask[row]
+            before = _has_gap(mask)
+            mask = mask | bit if count else mask & ~bit
+            self._class_mask[row] = mask
+            self.gap_rows += _has_gap(mask) - before
+
+        row = self.key[i] * self.days + day
+        cell = self.key[i] * self.days * self.periods + slot
+        count = self._key_count[cell] + sign
+        self._key_count[cell] = count
+        length = self._key_len[row]
+        if length == 0:
+            self.block_rows += 1
+        length += sign
+        self._key_len[row] = length
+        if length == 0:
+            self.block_rows -= 1
+        mask = self._key_mask[row]
+        if count == 0:
+            mask &= ~bit
+        elif count == 1 and sign > 0:
+            mask |= bit
+        self._key_mask[row] = mask
+        consecutive = (mask & (mask >> 1)).bit_count()
+        bonus = consecutive / length if consecutive else 0.0
+        self.block_bonus += bonus - self._key_bonus[row]
+        self._key_bonus[row] = bonus
+
+    def _set(self, i: int, day: int, period: int) -> None:
+        self._place(i, -1)
+        self.day[i], self.period[i] = day, period
+        self._place(i, 1)
+
+    def score(self) -> float:
+        """total_score de analyze_schedule_quality pour l'état courant"""
+        hard = max(0.0, 1.0 - self.teacher_conflicts / 10)
+        soft = max(0.0, 1.0 - self.gap_rows / 20)
+        pedagogical = min(1.0, self.block_bonus / self.block_rows) if self.block_rows else 1.0
+        return hard * 0.4 + soft * 0.3 + pedagogical * 0.3
+
+    def apply(self, move: Move) -> float:
+        """Applique un mouvement en place et renvoie la variation de score"""
+        before = self.score()
+        if move[0] == 'move':
+            _, i, day, period = move
+            self._last = ('move', i, self.day[i], self.period[i])
+            if (day, period) != (self.day[i], self.period[i]):
+                self._set(i, day, period)
+        else:
+            _, i, j = move
+            self._last = move
+            self._swap(i, j)
+        return self.score() - before
+
+    def _swap(self, i: int, j: int) -> None:
+        if i == j or (self.day[i], self.period[i]) == (self.day[j], self.period[j]):
+            return
+        self._place(i, -1)
+        self._place(j, -1)
+        self.day[i], self.day[j] = self.day[j], self.day[i]
+        self.period[i], self.period[j] = self.period[j], self.period[i]
+        self._place(i, 1)
+        self._place(j, 1)
+
+    def undo(self) -> None:
+        """Annule le dernier mouvement appliqué"""
+        move, self._last = self._last, None
+        if move is None:
+            return
+        if move[0] == 'move':
+            _, i, day, period = move
+            if (day, period) != (self.day[i], self.period[i]):
+                self._set(i, day, period)
+        else:
+            self._swap(move[1], move[2])
+
+    def signature(self, move: Move) -> Tuple:
+        """Signature tabou: première entrée modifiée, position de départ et d'arrivée"""
+        if move[0] == 'move':
+            _, i, day, period = move
+        else:
+            _, a, b = move
+            i, j = min(a, b), max(a, b)
+            day, period = self.day[j], self.period[j]
+        if (day, period) == (self.day[i], self.period[i]):
+            return ('no_change',)
+        return (i, self.day[i], self.period[i], day, period)
+
+    # ------------------------------------------------------------------
+    # Instantanés
+    # ------------------------------------------------------------------
+
+    def positions(self) -> Tuple[List[int], List[int]]:
+        return list(self.day), list(self.period)
+
+    def to_schedule(self, schedule: Dict[str, Any],
+                    positions: Optional[Tuple[List[int], List[int]]] = None) -> Dict[str, Any]:
+        """Copie de `schedule` dont les entrées portent les positions données (ou courantes)"""
+        days, periods = positions or (self.day, self.period)
+        entries = [
+            dict(entry, day_of_week=days[i], period_number=periods[i])
+            for i, entry in enumerate(self.entries)
+        ]
+        return dict(schedule, entries=entries)
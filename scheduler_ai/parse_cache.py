@@ -0,0 +1,234 @@
+"""
+scheduler_ai/parse_cache.py - Cache des contraintes parsées par LLMRouter
+Une même phrase (« Cohen ne peut pas le vendredi ») revient souvent: le résultat
+du LLM est gardé dans un LRU en mémoire, doublé de Redis (TTL) quand REDIS_URL
+est défini, sous une clé (version du parseur, modèle, langue, texte normalisé).
+
+Avant le cache, un chemin rapide applique les patterns de
+LLMRouter._load_constraint_patterns marqués "fast_path": si la phrase entière
+correspond et que le complément ne contient que des jours, la contrainte est
+construite sans appel LLM.
+
+Taux de succès et latence économisée: ParseCache.stats() et métriques Prometheus.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter, Histogram
+
+try:
+    import redis
+except ImportError:  # cache mémoire seul
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand le prompt ou le post-traitement change: invalide le cache
+PARSER_VERSION = 1
+REDIS_TTL = 7 * 24 * 3600
+REDIS_RETRY_DELAY = 30
+
+PARSE_REQUESTS = Counter(
+    "llm_parse_requests", "Contraintes parsées, par source du résultat", ["source"],
+)
+PARSE_SAVED_SECONDS = Counter(
+    "llm_parse_saved_seconds", "Latence LLM évitée par le cache et le chemin rapide",
+)
+LLM_PARSE_SECONDS = Histogram(
+    "llm_parse_seconds", "Temps d'un parsing par LLM", ["model"],
+    buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+
+# Jours de la semaine scolaire (0 = dimanche)
+DAYS = {
+    "dimanche": 0, "lundi": 1, "mardi": 2, "mercredi": 3, "jeudi": 4, "vendredi": 5,
+    "ראשון": 0, "שני": 1, "שלישי": 2, "רביעי": 3, "חמישי": 4, "שישי": 5,
+}
+DAY_NAMES_FR = ["dimanche", "lundi", "mardi", "mercredi", "jeudi", "vendredi"]
+# Mots admis autour des jours dans un complément « simple »
+FILLER_WORDS = {
+    "le", "les", "la", "et", "ni", "ou", "de", "du", "en", "jour", "jours",
+    "enseigner", "venir", "travailler", "être", "présent", "disponible",
+    "יום", "ימי", "ימים", "ו", "או", "ב", "ה", "ללמד", "להגיע", "לעבוד",
+}
+# Préfixes hébreux collés au mot (ב-, ה-, ו-, וב-...)
+HEBREW_PREFIXES = ("וב", "וה", "ב", "ה", "ו")
+ENTITY_TITLES = re.compile(
+    r"^(?:le |la |l')?(?:professeure?|prof\.?|enseignante?|m\.|mme|monsieur|madame)\s+|^ה?מורה\s+",
+    re.IGNORECASE,
+)
+
+
+def normalize_text(text: str) -> str:
+    """Forme canonique d'une phrase: NFKC, casse, espaces et ponctuation finale"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(text.split()).rstrip(" .!?;")
+
+
+def _day_of(word: str) -> Optional[int]:
+    candidates = [word, word.rstrip("s")]
+    candidates += [word[len(prefix):] for prefix in HEBREW_PREFIXES if word.startswith(prefix)]
+    return next((DAYS[c] for c in candidates if c in DAYS), None)
+
+
+def fast_parse(text: str, patterns: Dict[str, Dict]) -> Optional[Dict[str, Any]]:
+    """
+    Parsing sans LLM pour les phrases simples, ou None.
+
+    Seuls les types marqués "fast_path" sont essayés; le pattern doit couvrir
+    toute la phrase et son complément ne contenir que des jours (et mots de
+    liaison), sinon la phrase est laissée au LLM.
+    """
+    cleaned = " ".join(unicodedata.normalize("NFKC", text).split()).rstrip(" .!?;")
+    for constraint_type, config in patterns.items():
+        if not config.get("fast_path"):
+            continue
+        for pattern in config.get("patterns", []):
+            match = re.fullmatch(pattern, cleaned, re.IGNORECASE)
+            if not match or len(match.groups()) < 2:
+                continue
+            entity = ENTITY_TITLES.sub("", match.group(1).strip()).strip()
+            days, others = [], []
+            for word in re.findall(r"\w+", match.group(2).casefold()):
+                day = _day_of(word)
+                if day is not None:
+                    days.append(day)
+                elif word not in FILLER_WORDS:
+                    others.append(word)
+            if not entity or not days or others:
+                continue
+            days = sorted(set(days))
+            return {
+                "constraint": {
+                    "type": constraint_type,
+                    "entity": entity,
+                    "data": {"unavailable_days": days, "original_text": text},
+                    "priority": 3,
+                },
+                "confidence": 0.9,
+                "summary": f"{entity} indisponible: {', '.join(DAY_NAMES_FR[d] for d in days)}",
+                "alternatives": [],
+                "model_used": "regex",
+            }
+    return None
+
+
+class ParseCache:
+    """
+    LRU en mémoire + Redis optionnel pour les résultats de parsing LLM.
+
+    Args:
+        max_entries: taille du LRU local
+        redis_url: URL Redis (None = mémoire seule)
+        ttl: durée de vie des entrées Redis (secondes)
+    """
+
+    def __init__(self, max_entries: int = 1024, redis_url: Optional[str] = None,
+                 ttl: int = REDIS_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+        self.counts = {"lru": 0, "redis": 0, "regex": 0, "llm": 0}
+        self.saved_seconds = 0.0
+        self.llm_seconds = 0.0
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5,
+                                               socket_connect_timeout=0.5)
+        elif redis_url:
+            logger.warning("⚠️ Module redis non installé - cache de parsing en mémoire seulement")
+
+    def _redis_call(self, method: str, *args):
+        """Appel Redis tolérant aux pannes (None si indisponible)"""
+        if self._redis is None or time.monotonic() < self._redis_down_until:
+            return None
+        try:
+            return getattr(self._redis, method)(*args)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis indisponible pour le cache de parsing: {e}")
+            self._redis_down_until = time.monotonic() + REDIS_RETRY_DELAY
+            return None
+
+    @staticmethod
+    def key(text: str, language: str, model: str) -> str:
+        digest = hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"llm_parse:v{PARSER_VERSION}:{model}:{language}:{digest}"
+
+    def _count(self, source: str, saved: float = 0.0) -> None:
+        with self._lock:
+            self.counts[source] += 1
+            self.saved_seconds += saved
+        PARSE_REQUESTS.labels(source).inc()
+        if saved:
+            PARSE_SAVED_SECONDS.inc(saved)
+
+    def average_llm_seconds(self) -> float:
+        with self._lock:
+            return self.llm_seconds / self.counts["llm"] if self.counts["llm"] else 0.0
+
+    def get(self, text: str, language: str, model: str) -> Optional[Dict[str, Any]]:
+        """Résultat en cache (copie), ou None"""
+        key = self.key(text, language, model)
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+        source = "lru"
+        if entry is None:
+            raw = self._redis_call("get", key)
+            if raw is None:
+                return None
+            entry = json.loads(raw)
+            self._store_local(key, entry)
+            source = "redis"
+        self._count(source, entry["latency"])
+        return json.loads(json.dumps(entry["result"]))
+
+    def put(self, text: str, language: str, model: str, result: Dict[str, Any],
+            latency: float) -> None:
+        """Enregistre un parsing LLM et sa latence"""
+        key = self.key(text, language, model)
+        # Copie: l'appelant complète souvent le résultat retourné
+        entry = {"result": json.loads(json.dumps(result, default=str)), "latency": latency}
+        with self._lock:
+            self.llm_seconds += latency
+        self._count("llm")
+        LLM_PARSE_SECONDS.labels(model).observe(latency)
+        self._store_local(key, entry)
+        self._redis_call("setex", key, self.ttl, json.dumps(entry, ensure_ascii=False))
+
+    def record_fast_path(self) -> None:
+        """Un parsing servi par le chemin rapide: latence évitée = moyenne LLM observée"""
+        self._count("regex", self.average_llm_seconds())
+
+    def _store_local(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            served = self.counts["lru"] + self.counts["redis"] + self.counts["regex"]
+            total = served + self.counts["llm"]
+            return {
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "lru_hits": self.counts["lru"],
+                "redis_hits": self.counts["redis"],
+                "fast_path_hits": self.counts["regex"],
+                "llm_calls": self.counts["llm"],
+                "hit_rate": round(served / total, 3) if total else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "redis": self._redis is not None,
+            }
@@ -1,18 +1,38 @@
 # schedule_advisor_agent.py - Agent AI conseiller pour l'optimisation d'emploi du temps
 import json
 import logging
+import os
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 from dataclasses import dataclass, asdict
 from enum import Enum
 from hebrew_language_processor import HebrewLanguageProcessor, analyze_hebrew_input
 from advanced_scheduling_algorithms import AdvancedSchedulingEngine, OptimizationObjective
 from ai_training_system import AITrainingSystem, ProblemPattern
 
+try:
+    import redis
+except ImportError:
+    redis = None
+
 logger = logging.getLogger(__name__)
 
+# Époque des vues d'emploi du temps mises en cache par le solveur (solver/timetable_views.py)
+TIMETABLE_EPOCH_KEY = "timetable:epoch"
+
+
+def invalidate_timetable_views() -> None:
+    """Signale au solveur que les entrées d'un emploi du temps sauvegardé ont changé"""
+    redis_url = os.environ.get('REDIS_URL')
+    if not redis_url or redis is None:
+        return
+    try:
+        redis.Redis.from_url(redis_url, socket_timeout=0.5).incr(TIMETABLE_EPOCH_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ Invalidation des vues d'emploi du temps impossible: {e}")
+
 class ChangeType(Enum):
     MOVE_COURSE = "move_course"
     SWAP_COURSES = "swap_courses" 
@@ -92,7 +112,7 @@ class ScheduleAdvisorAgent:
         conn = None
         cur = None
         try:
-            conn = psycopg2.connect(**self.db_config)
+            conn = get_connection(self.db_config)
             cur = conn.cursor(cursor_factory=RealDictCursor)
             
             # Créer la table si elle n'existe pas
@@ -628,7 +648,7 @@ class ScheduleAdvisorAgent:
         conn = None
         cur = None
         try:
-            conn = psycopg2.connect(**self.db_config)
+            conn = get_connection(self.db_config)
             cur = conn.cursor()
             
             cur.execute("""
@@ -695,7 +715,7 @@ class ScheduleAdvisorAgent:
         conn = None
         cur = None
         try:
-            conn = psycopg2.connect(**self.db_config)
+            conn = get_connection(self.db_config)
             cur = conn.cursor(cursor_factory=RealDictCursor)
             
             # Récupérer les entrées d'emploi du temps actuelles
@@ -1023,7 +1043,7 @@ class ScheduleAdvisorAgent:
     def _apply_move_course_change(self, change: ScheduleChange) -> bool:
         """Applique un déplacement de cours"""
         try:
-            conn = psycopg2.connect(**self.db_config)
+            conn = get_connection(self.db_config)
             cur = conn.cursor()
             
             # Récupérer les informations du changement
@@ -1058,6 +1078,7 @@ class ScheduleAdvisorAgent:
             
             conn.commit()
             conn.close()
+            invalidate_timetable_views()
             return True
             
         except Exception as e:
@@ -1102,7 +1123,7 @@ class ScheduleAdvisorAgent:
     def _get_current_schedule_data(self) -> Optional[Dict]:
         """Récupère les données actuelles de l'emploi du temps"""
         try:
-            conn = psycopg2.connect(**self.db_config)
+            conn = get_connection(self.db_config)
             cur = conn.cursor(cursor_factory=RealDictCursor)
             
             # Récupérer les entrées d'emploi du temps
@@ -1,7 +1,10 @@
 ﻿# solver_engine_fixed.py - Version corrigֳ©e avec les 3 bugs rֳ©solus
 from ortools.sat.python import cp_model
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
+from slot_domains import SlotDomains
+from constraint_registry import CompiledConstraintSet, SlotExclusion, load_constraints
+from infeasibility import ConstraintGates, minimal_core
 import logging
 from datetime import datetime
 import json
@@ -21,7 +24,7 @@ class ScheduleSolver:
         self.subjects = []
         self.time_slots = []
         self.teacher_loads = []
-        self.constraints = []
+        self.constraints = CompiledConstraintSet([], [])  # constraints + institutional_constraints compilées
         
         # Donnֳ©es spֳ©cifiques aux cours parallֳ¨les
         self.parallel_groups = []
@@ -30,6 +33,9 @@ class ScheduleSolver:
         # Variables de dֳ©cision
         self.schedule_vars = {}
         self.parallel_vars = {}
+        self.domains = None  # SlotDomains: créneaux interdits par professeur
+        self.gates = None  # ConstraintGates pendant explain_infeasibility
+        self.conflict = None  # InfeasibilityCore du dernier échec INFEASIBLE
         
         # Connection DB
         self.db_config = {
@@ -41,7 +47,7 @@ class ScheduleSolver:
     
     def load_data_from_db(self):
         """Charge toutes les donnֳ©es incluant les groupes parallֳ¨les"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -85,9 +91,8 @@ class ScheduleSolver:
             """)
             self.parallel_details = cur.fetchall()
             
-            # Charger les contraintes
-            cur.execute("SELECT * FROM constraints WHERE is_active = TRUE")
-            self.constraints = cur.fetchall()
+            # Charger les contraintes (compilées une fois par version des tables)
+            self.constraints = load_constraints(self.db_config)
             
             # נ“ Log les statistiques importantes
             logger.info(
@@ -123,6 +128,15 @@ class ScheduleSolver:
         """Crֳ©e les variables pour les cours individuels et parallֳ¨les"""
         teacher_id_map = {t["teacher_name"]: t["teacher_id"] for t in self.teachers}
         
+        # Disponibilités et exclusions du registre (constraint_registry): les
+        # créneaux interdits ne reçoivent aucune variable
+        if self.gates is None:
+            self.domains = SlotDomains(self.time_slots, self.teachers, self.constraints)
+        else:
+            # Explication: exclusions posées en contraintes conditionnées (_add_gated_exclusions)
+            self.domains = SlotDomains(self.time_slots)
+        pruned = 0
+        
         # 1. Variables pour les cours individuels (non parallֳ¨les)
         for load in self.teacher_loads:
             teacher_name = load["teacher_name"]
@@ -132,16 +146,20 @@ class ScheduleSolver:
             
             subject = load["subject"]
             class_list = load.get("class_list", "")
+            blocked = self.domains.blocked_for(None, [teacher_name])
+            slots = [slot for slot in self.time_slots if slot["slot_id"] not in blocked]
             
             # Cours pour une seule classe
             if class_list and "," not in class_list:
-                for slot in self.time_slots:
+                pruned += len(self.time_slots) - len(slots)
+                for slot in slots:
                     var_name = f"t_{teacher_id}_c_{class_list}_s_{subject}_slot_{slot['slot_id']}"
                     self.schedule_vars[var_name] = self.model.NewBoolVar(var_name)
             
             # Rֳ©unions (pas de classe)
             elif not class_list:
-                for slot in self.time_slots:
+                pruned += len(self.time_slots) - len(slots)
+                for slot in slots:
                     var_name = f"t_{teacher_id}_meeting_{subject}_slot_{slot['slot_id']}"
                     self.schedule_vars[var_name] = self.model.NewBoolVar(var_name)
         
@@ -155,8 +173,13 @@ class ScheduleSolver:
             if not group_details:
                 continue
             
+            # Le groupe n'a lieu que sur les créneaux où tous ses profs sont disponibles
+            blocked = self.domains.blocked_for(None, [d["teacher_name"] for d in group_details])
+            slots = [slot for slot in self.time_slots if slot["slot_id"] not in blocked]
+            pruned += len(self.time_slots) - len(slots)
+            
             # Crֳ©er une variable principale pour chaque crֳ©neau
-            for slot in self.time_slots:
+            for slot in slots:
                 # Variable du groupe (tous les profs enseignent ensemble)
                 group_var_name = f"parallel_g{group_id}_slot_{slot['slot_id']}"
                 group_var = self.model.NewBoolVar(group_var_name)
@@ -185,6 +208,8 @@ class ScheduleSolver:
                             self.schedule_vars[class_var_name] = class_var
                             # Lier au groupe
                             self.model.Add(class_var == group_var)
+        
+        logger.info(f"{len(self.schedule_vars)} variables, {pruned} (cours, créneau) indisponibles écartés")
     
     def add_hard_constraints(self):
         """Ajoute les contraintes dures incluant les contraintes parallֳ¨les"""
@@ -192,6 +217,7 @@ class ScheduleSolver:
         # 1. Un professeur ne peut ֳ×tre qu'ֳ  un endroit ֳ  la fois
         for teacher in self.teachers:
             teacher_id = teacher["teacher_id"]
+            self._tag(f"Conflits du professeur {teacher['teacher_name']}")
             for slot in self.time_slots:
                 slot_id = slot["slot_id"]
                 teacher_vars = [
@@ -204,6 +230,7 @@ class ScheduleSolver:
         # 2. Une classe ne peut avoir qu'un cours ֳ  la fois
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
+            self._tag(f"Conflits de la classe {class_name}")
             for slot in self.time_slots:
                 slot_id = slot["slot_id"]
                 class_vars = [
@@ -214,6 +241,7 @@ class ScheduleSolver:
                     self.model.Add(sum(class_vars) <= 1)
         
         # נ”§ FIX BUG #2: Limiter le nombre total de cours simultanֳ©s
+        self._tag("Nombre de cours simultanés")
         for slot in self.time_slots:
             slot_id = slot["slot_id"]
             # Compter tous les cours actifs ֳ  ce crֳ©neau (sauf rֳ©unions)
@@ -240,6 +268,7 @@ class ScheduleSolver:
                 
             subject = load["subject"]
             class_list = load.get("class_list", "")
+            self._tag(f"Heures de {teacher_name}: {subject} ({class_list or 'réunion'})")
             
             # Cours individuel
             if class_list and "," not in class_list:
@@ -262,6 +291,7 @@ class ScheduleSolver:
         # 4. Respecter le nombre d'heures pour les groupes parallֳ¨les
         for group in self.parallel_groups:
             group_id = group["group_id"]
+            self._tag(f"Heures du groupe parallèle {group_id} ({group['subject']})")
             
             # Obtenir les heures depuis les dֳ©tails
             group_details = [d for d in self.parallel_details if d["group_id"] == group_id]
@@ -277,65 +307,58 @@ class ScheduleSolver:
                     self.model.Add(sum(group_vars) == hours)
         
         # 5. Appliquer les contraintes personnalisֳ©es
+        if self.gates is not None:
+            self._add_gated_work_days()
         for constraint in self.constraints:
+            self._tag(f"Contrainte {constraint.source} #{constraint.constraint_id} "
+                      f"({constraint.constraint_type}{', ' + constraint.entity if constraint.entity else ''})")
             self._apply_custom_constraint(constraint)
+        if self.gates is not None:
+            self.gates.close()
+    
+    def _tag(self, label):
+        """Section de contraintes conditionnée par une hypothèse (explain_infeasibility uniquement)"""
+        if self.gates is not None:
+            self.gates.begin(label)
     
     def _apply_custom_constraint(self, constraint):
-        """Applique une contrainte personnalisֳ©e"""
-        if constraint["constraint_type"] == "teacher_availability":
-            self._apply_availability_constraint(constraint)
-        elif constraint["constraint_type"] == "friday_early_end":
-            self._apply_friday_constraint(constraint)
-        elif constraint["constraint_type"] == "morning_prayer":
+        """Applique une contrainte compilée non exprimable par élagage"""
+        # Les exclusions de créneaux (disponibilités, vendredi court, horaires) sont
+        # déjà appliquées dans create_variables; les variables nommées de ce moteur
+        # ne passent pas par post_to_model (ModelIndex/VarStore)
+        if constraint.constraint_type == "morning_prayer" and constraint.source == "constraints":
             self._apply_morning_prayer_constraint(constraint)
-        # Ajouter d'autres types selon les besoins
+        elif isinstance(constraint, SlotExclusion):
+            if self.gates is not None and constraint.hard:
+                self._exclude(constraint.entity, constraint.excluded_slots(self.time_slots))
+        else:
+            logger.warning(f"Contrainte {constraint.constraint_type} non appliquée par ce moteur")
     
-    def _apply_availability_constraint(self, constraint):
-        """Applique une contrainte de disponibilitֳ©"""
-        data = constraint["constraint_data"]
-        teacher_name = constraint["entity_name"]
-        
-        teacher_id = next((t["teacher_id"] for t in self.teachers 
-                          if t["teacher_name"] == teacher_name), None)
-        if not teacher_id:
-            return
-        
-        # Jours non disponibles
-        if "unavailable_days" in data:
-            for day in data["unavailable_days"]:
-                for slot in self.time_slots:
-                    if slot["day_of_week"] == day:
-                        for var_name, var in self.schedule_vars.items():
-                            if f"t_{teacher_id}" in var_name and f"slot_{slot['slot_id']}" in var_name:
-                                self.model.Add(var == 0)
-        
-        # Pֳ©riodes non disponibles
-        if "unavailable_periods" in data:
-            for period in data["unavailable_periods"]:
-                for slot in self.time_slots:
-                    if slot["period_number"] == period:
-                        for var_name, var in self.schedule_vars.items():
-                            if f"t_{teacher_id}" in var_name and f"slot_{slot['slot_id']}" in var_name:
-                                self.model.Add(var == 0)
+    def _add_gated_work_days(self):
+        """Explication: jours de travail posés en contraintes, une hypothèse par professeur"""
+        for teacher_name, blocked in SlotDomains(self.time_slots, self.teachers).blocked_by_teacher.items():
+            self._tag(f"Jours de travail du professeur {teacher_name}")
+            self._exclude(teacher_name, blocked)
     
-    def _apply_friday_constraint(self, constraint):
-        """Applique la contrainte du vendredi court"""
-        data = constraint["constraint_data"]
-        last_period = data.get("last_period", 6)
-        
-        for slot in self.time_slots:
-            if slot["day_of_week"] == 5 and slot["period_number"] > last_period:
-                # Bloquer toutes les variables
-                for var in self.schedule_vars.values():
-                    if f"slot_{slot['slot_id']}" in str(var):
-                        self.model.Add(var == 0)
-                for var in self.parallel_vars.values():
-                    if f"slot_{slot['slot_id']}" in str(var):
-                        self.model.Add(var == 0)
+    def _exclude(self, teacher_name, slot_ids):
+        """Interdit des créneaux à un professeur (ou à tous si teacher_name est None)"""
+        if teacher_name:
+            teacher_id = next((t["teacher_id"] for t in self.teachers if t["teacher_name"] == teacher_name), None)
+            if teacher_id is None:
+                return
+            prefix = f"t_{teacher_id}_"
+        else:
+            prefix = ""
+        suffixes = tuple(f"_slot_{slot_id}" for slot_id in slot_ids)
+        if not suffixes:
+            return
+        for name, var in self.schedule_vars.items():
+            if name.startswith(prefix) and name.endswith(suffixes):
+                self.model.Add(var == 0)
     
     def _apply_morning_prayer_constraint(self, constraint):
         """Rֳ©serve les premiֳ¨res pֳ©riodes pour la priֳ¨re"""
-        data = constraint["constraint_data"]
+        data = constraint.data
         duration = data.get("duration", 1)  # Nombre de pֳ©riodes
         
         for day in range(5):  # Dimanche ֳ  Jeudi
@@ -418,10 +441,10 @@ class ScheduleSolver:
             return self._extract_solution()
         else:
             logger.error(f"No solution found. Status: {status}")
-            self._analyze_failure()
+            self._analyze_failure(status, time_limit)
             return None
     
-    def _analyze_failure(self):
+    def _analyze_failure(self, status=None, time_limit=60):
         """Analyse pourquoi le solver a ֳ©chouֳ©"""
         logger.error("Analyzing failure reasons...")
         
@@ -448,7 +471,28 @@ class ScheduleSolver:
         
         if (total_hours_needed + parallel_slots_needed) > total_slots_available:
             logger.error("INFEASIBLE: More hours needed than slots available!")
+        
+        if status == cp_model.INFEASIBLE:
+            self.conflict = self.explain_infeasibility(time_limit=min(time_limit, 60))
     
+    def explain_infeasibility(self, time_limit=60):
+        """
+        Reconstruit le modèle avec chaque famille de contraintes et chaque entité
+        (professeur, classe, charge, contrainte personnalisée) conditionnée par une
+        hypothèse, puis en extrait un ensemble minimal de contraintes incompatibles.
+        """
+        saved = self.model, self.schedule_vars, self.parallel_vars, self.domains
+        self.model = cp_model.CpModel()
+        self.schedule_vars, self.parallel_vars = {}, {}
+        self.gates = ConstraintGates(self.model)
+        try:
+            self.create_variables()
+            self.add_hard_constraints()
+            return minimal_core(self.model, self.gates, time_limit)
+        finally:
+            self.gates = None
+            self.model, self.schedule_vars, self.parallel_vars, self.domains = saved
+
     def _extract_solution(self):
         """Extrait la solution incluant les cours parallֳ¨les"""
         schedule = []
@@ -546,7 +590,7 @@ class ScheduleSolver:
         if not schedule:
             raise ValueError("Schedule is empty")
         
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
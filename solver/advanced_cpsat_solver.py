@@ -8,16 +8,18 @@ Solveur CP-SAT avancé pour emploi du temps scolaire
 """
 
 from ortools.sat.python import cp_model
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 import logging
 import json
 from datetime import datetime
 from typing import Dict, List, Set, Tuple, Any
 from collections import defaultdict
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("advanced_cpsat")
 class AdvancedCPSATSolver:
     def __init__(self, db_config=None):
         """Initialise le solveur CP-SAT avancé"""
@@ -57,7 +59,7 @@ class AdvancedCPSATSolver:
         
     def load_data_from_db(self):
         """Charge les données depuis la base"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -5,8 +5,8 @@ Ce module expose les fonctionnalités avancées via l'API FastAPI
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, Optional, List
 import logging
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
@@ -46,7 +46,7 @@ advanced_system = None
 
 def get_db_connection():
     """Obtenir une connexion à la base de données"""
-    return psycopg2.connect(**db_config)
+    return get_connection(db_config)
 
 @router.post("/optimize")
 async def optimize_schedule(request: Dict[str, Any] = {}):
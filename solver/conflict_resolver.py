@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from enum import Enum
 import json
 
+from schedule_metrics import Occupancy, cells
+
 logger = logging.getLogger(__name__)
 
 class IssueType(Enum):
@@ -68,6 +70,9 @@ class ConflictResolver:
                 "he": "למורה {teacher} יש משרה של {amplitude} שעות ביום {day} (מומלץ: מקסימום {max_amplitude} שעות)"
             }
         }
+        
+        # Tenseurs d'occupation partagés par les détecteurs (voir _occupancy)
+        self._occupancy_cache = None
     
     def analyze_schedule_quality(self, solution: Dict) -> Dict:
         """
@@ -92,25 +97,29 @@ class ConflictResolver:
             "recommendations": []
         }
         
-        # 1. Analyser les trous dans les emplois du temps
-        gaps = self._detect_teacher_gaps(solution)
-        analysis["issues"].extend(gaps)
-        
-        # 2. Détecter les cours isolés
-        isolated = self._detect_isolated_hours(solution)
-        analysis["issues"].extend(isolated)
-        
-        # 3. Analyser l'amplitude journalière
-        amplitude_issues = self._detect_excessive_amplitude(solution)
-        analysis["issues"].extend(amplitude_issues)
-        
-        # 4. Détecter la surcharge (trop de cours consécutifs)
-        overload_issues = self._detect_overload(solution)
-        analysis["issues"].extend(overload_issues)
-        
-        # 5. Analyser l'équilibre hebdomadaire
-        weekly_issues = self._detect_weekly_gaps(solution)
-        analysis["issues"].extend(weekly_issues)
+        self._occupancy_cache = {}
+        try:
+            # 1. Analyser les trous dans les emplois du temps
+            gaps = self._detect_teacher_gaps(solution)
+            analysis["issues"].extend(gaps)
+            
+            # 2. Détecter les cours isolés
+            isolated = self._detect_isolated_hours(solution)
+            analysis["issues"].extend(isolated)
+            
+            # 3. Analyser l'amplitude journalière
+            amplitude_issues = self._detect_excessive_amplitude(solution)
+            analysis["issues"].extend(amplitude_issues)
+            
+            # 4. Détecter la surcharge (trop de cours consécutifs)
+            overload_issues = self._detect_overload(solution)
+            analysis["issues"].extend(overload_issues)
+            
+            # 5. Analyser l'équilibre hebdomadaire
+            weekly_issues = self._detect_weekly_gaps(solution)
+            analysis["issues"].extend(weekly_issues)
+        finally:
+            self._occupancy_cache = None
         
         # 6. Vérifier le placement des matières difficiles
         late_difficult = self._detect_late_difficult_subjects(solution)
@@ -131,155 +140,118 @@ class ConflictResolver:
         
         return analysis
     
+    def _occupancy(self, solution: Dict, kind: str) -> Occupancy:
+        """
+        Tenseur d'occupation de la solution: "teacher", "class" ou "class_subject".
+        Pendant analyze_schedule_quality, chaque tenseur n'est construit qu'une fois.
+        """
+        cache = self._occupancy_cache
+        if cache is not None and kind in cache:
+            return cache[kind]
+        
+        if kind == "teacher":
+            records = ((teacher_name, entry["day"], entry["period"])
+                       for teacher_name, teacher_schedule in solution.get("by_teacher", {}).items()
+                       for entry in teacher_schedule)
+        elif kind == "class":
+            records = ((class_name, entry["day"], entry["period"])
+                       for class_name, class_schedule in solution.get("by_class", {}).items()
+                       for entry in class_schedule)
+        else:
+            records = (((class_name, entry["subject"]), entry["day"], entry["period"])
+                       for class_name, class_schedule in solution.get("by_class", {}).items()
+                       for entry in class_schedule)
+        
+        occupancy = Occupancy.build(records)
+        if cache is not None:
+            cache[kind] = occupancy
+        return occupancy
+    
     def _detect_teacher_gaps(self, solution: Dict) -> List[ScheduleIssue]:
         """Détecte les trous dans les emplois du temps des professeurs"""
         issues = []
-        
-        for teacher_name, teacher_schedule in solution.get("by_teacher", {}).items():
-            # Regrouper par jour
-            by_day = {}
-            for entry in teacher_schedule:
-                day = entry["day"]
-                if day not in by_day:
-                    by_day[day] = []
-                by_day[day].append(entry["period"])
-            
-            # Analyser chaque jour
-            for day, periods in by_day.items():
-                if len(periods) <= 1:
-                    continue
-                
-                periods_sorted = sorted(periods)
-                gaps = []
-                
-                for i in range(len(periods_sorted) - 1):
-                    gap_size = periods_sorted[i+1] - periods_sorted[i] - 1
-                    if gap_size > 0:
-                        gaps.append({
-                            "start_period": periods_sorted[i],
-                            "end_period": periods_sorted[i+1],
-                            "size": gap_size
-                        })
-                
-                # Créer des issues pour chaque trou
-                for gap in gaps:
-                    issues.append(ScheduleIssue(
-                        type=IssueType.TROU,
-                        severity=SeverityLevel.CRITICAL,
-                        entity=teacher_name,
-                        details={
-                            "teacher": teacher_name,
-                            "day": day,
-                            "gap_start": gap["start_period"],
-                            "gap_end": gap["end_period"],
-                            "gap_size": gap["size"]
-                        },
-                        suggestion=f"Regrouper les cours de {teacher_name} le jour {day}",
-                        auto_fixable=True
-                    ))
+        occupancy = self._occupancy(solution, "teacher")
+        runs = occupancy.runs()
+        
+        # Un trou sépare deux blocs successifs du même professeur le même jour
+        same_day = (runs.group[1:] == runs.group[:-1]) & (runs.day[1:] == runs.day[:-1])
+        gap_starts = runs.end[:-1][same_day]
+        gap_ends = runs.start[1:][same_day]
+        
+        for group, day, start, end in zip(runs.group[1:][same_day].tolist(), runs.day[1:][same_day].tolist(),
+                                          gap_starts.tolist(), gap_ends.tolist()):
+            teacher_name = occupancy.keys[group]
+            issues.append(ScheduleIssue(
+                type=IssueType.TROU,
+                severity=SeverityLevel.CRITICAL,
+                entity=teacher_name,
+                details={
+                    "teacher": teacher_name,
+                    "day": day,
+                    "gap_start": start,
+                    "gap_end": end,
+                    "gap_size": end - start - 1
+                },
+                suggestion=f"Regrouper les cours de {teacher_name} le jour {day}",
+                auto_fixable=True
+            ))
         
         return issues
     
     def _detect_isolated_hours(self, solution: Dict) -> List[ScheduleIssue]:
         """Détecte les heures de cours isolées (non groupées en blocs)"""
         issues = []
-        
-        for class_name, class_schedule in solution.get("by_class", {}).items():
-            # Regrouper par matière
-            by_subject = {}
-            for entry in class_schedule:
-                subject = entry["subject"]
-                if subject not in by_subject:
-                    by_subject[subject] = []
-                by_subject[subject].append((entry["day"], entry["period"]))
-            
-            # Analyser chaque matière
-            for subject, time_slots in by_subject.items():
-                if len(time_slots) < 2:
-                    continue
-                
-                # Trier par jour et période
-                sorted_slots = sorted(time_slots)
-                isolated_slots = []
-                
-                i = 0
-                while i < len(sorted_slots):
-                    current_day, current_period = sorted_slots[i]
-                    
-                    # Vérifier si fait partie d'un bloc
-                    is_part_of_block = False
-                    
-                    # Vérifier avec le slot suivant
-                    if i < len(sorted_slots) - 1:
-                        next_day, next_period = sorted_slots[i + 1]
-                        if current_day == next_day and next_period == current_period + 1:
-                            is_part_of_block = True
-                    
-                    # Vérifier avec le slot précédent
-                    if i > 0:
-                        prev_day, prev_period = sorted_slots[i - 1]
-                        if current_day == prev_day and current_period == prev_period + 1:
-                            is_part_of_block = True
-                    
-                    if not is_part_of_block:
-                        isolated_slots.append((current_day, current_period))
-                    
-                    i += 1
-                
-                # Créer des issues pour les heures isolées
-                for day, period in isolated_slots:
-                    issues.append(ScheduleIssue(
-                        type=IssueType.COURS_ISOLE,
-                        severity=SeverityLevel.HIGH,
-                        entity=f"{class_name}_{subject}",
-                        details={
-                            "class": class_name,
-                            "subject": subject,
-                            "day": day,
-                            "period": period
-                        },
-                        suggestion=f"Regrouper {subject} en blocs de 2h pour {class_name}",
-                        auto_fixable=True
-                    ))
+        occupancy = self._occupancy(solution, "class_subject")
+        
+        # Seules les matières avec au moins 2 heures peuvent former des blocs
+        eligible = occupancy.counts.sum(axis=(1, 2)) >= 2
+        isolated = occupancy.isolated() & eligible[:, None, None]
+        
+        for group, day, period in cells(isolated):
+            class_name, subject = occupancy.keys[group]
+            # Une entrée par cours (plusieurs cours possibles sur un même créneau)
+            for _ in range(int(occupancy.counts[group, day, period])):
+                issues.append(ScheduleIssue(
+                    type=IssueType.COURS_ISOLE,
+                    severity=SeverityLevel.HIGH,
+                    entity=f"{class_name}_{subject}",
+                    details={
+                        "class": class_name,
+                        "subject": subject,
+                        "day": day,
+                        "period": period
+                    },
+                    suggestion=f"Regrouper {subject} en blocs de 2h pour {class_name}",
+                    auto_fixable=True
+                ))
         
         return issues
     
     def _detect_excessive_amplitude(self, solution: Dict) -> List[ScheduleIssue]:
         """Détecte les amplitudes journalières excessives pour les professeurs"""
         issues = []
-        
-        for teacher_name, teacher_schedule in solution.get("by_teacher", {}).items():
-            by_day = {}
-            for entry in teacher_schedule:
-                day = entry["day"]
-                if day not in by_day:
-                    by_day[day] = []
-                by_day[day].append(entry["period"])
-            
-            for day, periods in by_day.items():
-                if len(periods) <= 1:
-                    continue
-                
-                min_period = min(periods)
-                max_period = max(periods)
-                amplitude = max_period - min_period + 1
-                
-                if amplitude > self.thresholds["max_teacher_amplitude"]:
-                    issues.append(ScheduleIssue(
-                        type=IssueType.AMPLITUDE_EXCESSIVE,
-                        severity=SeverityLevel.MEDIUM,
-                        entity=teacher_name,
-                        details={
-                            "teacher": teacher_name,
-                            "day": day,
-                            "amplitude": amplitude,
-                            "first_period": min_period,
-                            "last_period": max_period,
-                            "max_recommended": self.thresholds["max_teacher_amplitude"]
-                        },
-                        suggestion=f"Réduire l'amplitude de {teacher_name} le jour {day}",
-                        auto_fixable=False
-                    ))
+        occupancy = self._occupancy(solution, "teacher")
+        amplitude = occupancy.amplitude()
+        first = occupancy.occupied.argmax(axis=2)
+        
+        for group, day in cells(amplitude > self.thresholds["max_teacher_amplitude"]):
+            teacher_name = occupancy.keys[group]
+            first_period = int(first[group, day])
+            issues.append(ScheduleIssue(
+                type=IssueType.AMPLITUDE_EXCESSIVE,
+                severity=SeverityLevel.MEDIUM,
+                entity=teacher_name,
+                details={
+                    "teacher": teacher_name,
+                    "day": day,
+                    "amplitude": int(amplitude[group, day]),
+                    "first_period": first_period,
+                    "last_period": first_period + int(amplitude[group, day]) - 1,
+                    "max_recommended": self.thresholds["max_teacher_amplitude"]
+                },
+                suggestion=f"Réduire l'amplitude de {teacher_name} le jour {day}",
+                auto_fixable=False
+            ))
         
         return issues
     
@@ -288,77 +260,54 @@ class ConflictResolver:
         issues = []
         
         # Analyser pour les classes
-        for class_name, class_schedule in solution.get("by_class", {}).items():
-            by_day = {}
-            for entry in class_schedule:
-                day = entry["day"]
-                if day not in by_day:
-                    by_day[day] = []
-                by_day[day].append(entry["period"])
-            
-            for day, periods in by_day.items():
-                periods_sorted = sorted(periods)
-                consecutive_count = 1
-                max_consecutive = 1
-                
-                for i in range(1, len(periods_sorted)):
-                    if periods_sorted[i] == periods_sorted[i-1] + 1:
-                        consecutive_count += 1
-                        max_consecutive = max(max_consecutive, consecutive_count)
-                    else:
-                        consecutive_count = 1
-                
-                if max_consecutive > self.thresholds["max_consecutive_hours"]:
-                    issues.append(ScheduleIssue(
-                        type=IssueType.SURCHARGE,
-                        severity=SeverityLevel.MEDIUM,
-                        entity=class_name,
-                        details={
-                            "class": class_name,
-                            "day": day,
-                            "consecutive_hours": max_consecutive,
-                            "max_recommended": self.thresholds["max_consecutive_hours"]
-                        },
-                        suggestion=f"Réduire les heures consécutives pour {class_name} le jour {day}",
-                        auto_fixable=False
-                    ))
+        occupancy = self._occupancy(solution, "class")
+        max_run = occupancy.max_run()
+        
+        for group, day in cells(max_run > self.thresholds["max_consecutive_hours"]):
+            class_name = occupancy.keys[group]
+            issues.append(ScheduleIssue(
+                type=IssueType.SURCHARGE,
+                severity=SeverityLevel.MEDIUM,
+                entity=class_name,
+                details={
+                    "class": class_name,
+                    "day": day,
+                    "consecutive_hours": int(max_run[group, day]),
+                    "max_recommended": self.thresholds["max_consecutive_hours"]
+                },
+                suggestion=f"Réduire les heures consécutives pour {class_name} le jour {day}",
+                auto_fixable=False
+            ))
         
         return issues
     
     def _detect_weekly_gaps(self, solution: Dict) -> List[ScheduleIssue]:
         """Détecte les gaps hebdomadaires (trop de jours sans une matière)"""
         issues = []
-        
-        for class_name, class_schedule in solution.get("by_class", {}).items():
-            by_subject = {}
-            for entry in class_schedule:
-                subject = entry["subject"]
-                day = entry["day"]
-                if subject not in by_subject:
-                    by_subject[subject] = set()
-                by_subject[subject].add(day)
-            
-            for subject, days in by_subject.items():
-                days_list = sorted(days)
-                
-                # Chercher des gaps de plus de X jours
-                for i in range(len(days_list) - 1):
-                    gap = days_list[i+1] - days_list[i] - 1
-                    if gap >= self.thresholds["max_weekly_gap"]:
-                        issues.append(ScheduleIssue(
-                            type=IssueType.GAP_HEBDO,
-                            severity=SeverityLevel.LOW,
-                            entity=f"{class_name}_{subject}",
-                            details={
-                                "class": class_name,
-                                "subject": subject,
-                                "from_day": days_list[i],
-                                "to_day": days_list[i+1],
-                                "gap_days": gap
-                            },
-                            suggestion=f"Mieux répartir {subject} sur la semaine pour {class_name}",
-                            auto_fixable=False
-                        ))
+        occupancy = self._occupancy(solution, "class_subject")
+        
+        # Chercher des gaps de plus de X jours
+        groups, from_days, to_days = occupancy.day_gaps()
+        gap_days = to_days - from_days - 1
+        selected = gap_days >= self.thresholds["max_weekly_gap"]
+        
+        for group, from_day, to_day, gap in zip(groups[selected].tolist(), from_days[selected].tolist(),
+                                                to_days[selected].tolist(), gap_days[selected].tolist()):
+            class_name, subject = occupancy.keys[group]
+            issues.append(ScheduleIssue(
+                type=IssueType.GAP_HEBDO,
+                severity=SeverityLevel.LOW,
+                entity=f"{class_name}_{subject}",
+                details={
+                    "class": class_name,
+                    "subject": subject,
+                    "from_day": from_day,
+                    "to_day": to_day,
+                    "gap_days": gap
+                },
+                suggestion=f"Mieux répartir {subject} sur la semaine pour {class_name}",
+                auto_fixable=False
+            ))
         
         return issues
     
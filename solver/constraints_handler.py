@@ -1,10 +1,11 @@
 # constraints_handler.py
-import psycopg2
 from psycopg2.extras import RealDictCursor, Json
+from db_pool import get_connection
 import json
 import re
 from typing import Dict, List, Any, Optional
 from models import CONSTRAINT_TYPES, DAYS_MAPPING
+from constraint_registry import compile_constraint
 import logging
 
 logger = logging.getLogger(__name__)
@@ -43,7 +44,7 @@ class ConstraintsManager:
     
     def add_constraint(self, constraint_type: str, entity: str, data: Dict[str, Any], priority: int = 2) -> int:
         """Ajoute une contrainte dans la base de données"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -181,7 +182,7 @@ class ConstraintsManager:
     
     def validate_all_constraints(self) -> Dict[str, Any]:
         """Valide toutes les contraintes actives"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         errors = []
@@ -239,6 +240,13 @@ class ConstraintsManager:
                 if field not in constraint['constraint_data']:
                     errors.append(f"Champ manquant '{field}' pour contrainte {constraint['constraint_type']}")
         
+        # Type que les moteurs ne savent pas appliquer (constraint_registry)
+        try:
+            if compile_constraint(constraint) is None:
+                warnings.append(f"Contrainte {constraint['constraint_type']} non appliquée par le solveur")
+        except (TypeError, ValueError) as e:
+            errors.append(f"Données invalides pour contrainte {constraint['constraint_type']}: {e}")
+        
         return {"errors": errors, "warnings": warnings}
     
     def _check_constraint_conflicts(self, constraints: List[Dict]) -> List[str]:
@@ -287,7 +295,7 @@ class ConstraintsManager:
     
     def get_constraint_statistics(self) -> Dict[str, Any]:
         """Retourne des statistiques sur les contraintes"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
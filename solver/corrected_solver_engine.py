@@ -3,16 +3,18 @@ corrected_solver_engine.py - Moteur de solver avec logique parallèle corrigée
 Utilise uniquement les tables teachers, solver_input, et classes
 """
 import logging
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 from ortools.sat.python import cp_model
 from typing import List, Dict, Any, Optional
 import json
 from datetime import datetime
 from simple_parallel_handler import SimpleParallelHandler
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("corrected")
 class CorrectedScheduleSolver:
     """
     Solver d'emploi du temps corrigé qui comprend les cours parallèles :
@@ -29,10 +31,11 @@ class CorrectedScheduleSolver:
         self.schedule_vars = {}
         self.solution = None
         self.solve_time = 0
+        self.num_workers = 0  # Workers CP-SAT (0: tous les cœurs; réduit dans le portefeuille)
         
     def load_data_from_db(self):
         """Charge les données depuis les tables teachers, solver_input, classes"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -187,6 +190,7 @@ class CorrectedScheduleSolver:
         
         # Configuration du solver
         self.solver.parameters.max_time_in_seconds = time_limit
+        self.solver.parameters.num_search_workers = self.num_workers
         self.solver.parameters.search_branching = cp_model.AUTOMATIC_SEARCH
         self.solver.parameters.cp_model_presolve = True
         
@@ -259,7 +263,7 @@ class CorrectedScheduleSolver:
     
     def save_schedule(self, schedule: List[Dict]) -> int:
         """Sauvegarde l'emploi du temps en base"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
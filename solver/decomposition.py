@@ -0,0 +1,255 @@
+"""
+decomposition.py - Résolution par décomposition en groupes de classes
+Les classes ne sont couplées que par les professeurs partagés et les cours
+parallèles / multi-classes. On construit ce graphe de couplage à partir de
+solver_input, on le découpe en composantes (ou, à défaut, en groupes par niveau),
+on résout chaque sous-modèle dans son propre processus, puis une passe de
+réparation sur le modèle complet élimine les conflits de professeurs restants.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from model_index import split_names
+from warm_start import WarmStart
+
+logger = logging.getLogger(__name__)
+
+
+class _DisjointSet:
+    """Union-find sur les noms de classes"""
+
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+
+    def add(self, item: str) -> None:
+        self.parent.setdefault(item, item)
+
+    def find(self, item: str) -> str:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:  # compression de chemin
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, items: List[str]) -> None:
+        for item in items:
+            self.add(item)
+        if len(items) > 1:
+            root = self.find(items[0])
+            for item in items[1:]:
+                self.parent[self.find(item)] = root
+
+    def groups(self) -> List[List[str]]:
+        result = defaultdict(list)
+        for item in self.parent:
+            result[self.find(item)].append(item)
+        return sorted((sorted(group) for group in result.values()), key=lambda g: g[0])
+
+
+def _course_classes(course: Dict[str, Any]) -> List[str]:
+    return split_names(course.get("class_list") or course.get("class_name"))
+
+
+def _course_teachers(course: Dict[str, Any]) -> List[str]:
+    return split_names(course.get("teacher_names") or course.get("teacher_name"))
+
+
+def find_class_clusters(courses: List[Dict[str, Any]], split_by_grade: bool = True) -> Tuple[List[List[str]], bool]:
+    """
+    Découpe les classes en groupes résolubles séparément.
+
+    Retourne (clusters, exact): `exact` vaut True quand les groupes ne partagent
+    aucun professeur (composantes connexes), False pour un découpage par niveau
+    qui nécessite une passe de réparation. Un cours sans classe (réunion...)
+    couple les classes de ses professeurs.
+    """
+    # 1. Couplages forts: cours multi-classes et groupes parallèles
+    hard = _DisjointSet()
+    classes_by_group: Dict[Any, List[str]] = defaultdict(list)
+    classes_by_teacher: Dict[str, List[str]] = defaultdict(list)
+    classless_teachers: List[List[str]] = []
+    grade_of: Dict[str, str] = {}
+    for course in courses:
+        classes = _course_classes(course)
+        if not classes:
+            classless_teachers.append(_course_teachers(course))
+            continue
+        hard.union(classes)
+        if course.get("group_id"):
+            classes_by_group[course["group_id"]].extend(classes)
+        for teacher in _course_teachers(course):
+            classes_by_teacher[teacher].extend(classes)
+        for class_name in classes:
+            if not grade_of.get(class_name):
+                grade_of[class_name] = str(course.get("grade") or "")
+    for classes in classes_by_group.values():
+        hard.union(classes)
+
+    # 2. Couplage par professeurs partagés: composantes exactes
+    full = _DisjointSet()
+    for class_name in hard.parent:
+        full.union([class_name, hard.find(class_name)])
+    for classes in classes_by_teacher.values():
+        full.union(classes)
+    for teachers in classless_teachers:
+        full.union([c for teacher in teachers for c in classes_by_teacher.get(teacher, [])])
+    components = full.groups()
+    if len(components) > 1 or not split_by_grade:
+        return components, True
+
+    # 3. Une seule composante: regrouper les composantes fortes par niveau
+    by_grade: Dict[str, List[str]] = defaultdict(list)
+    for group in hard.groups():
+        grade = min(grade_of.get(c, "") for c in group)
+        by_grade[grade].extend(group)
+    return [sorted(group) for _, group in sorted(by_grade.items())], False
+
+
+def assign_courses(courses: List[Dict[str, Any]], clusters: List[List[str]]) -> List[List[Dict]]:
+    """
+    Répartit les cours entre les groupes de classes.
+
+    Un cours va dans le groupe de sa première classe; un cours sans classe
+    rejoint le groupe d'un de ses professeurs, sinon le groupe le moins chargé.
+    """
+    cluster_of = {c: i for i, group in enumerate(clusters) for c in group}
+    cluster_courses: List[List[Dict]] = [[] for _ in clusters]
+    cluster_of_teacher: Dict[str, int] = {}
+    classless = []
+    for course in courses:
+        classes = _course_classes(course)
+        if not classes:
+            classless.append(course)
+            continue
+        i = cluster_of[classes[0]]
+        cluster_courses[i].append(dict(course))
+        for teacher in _course_teachers(course):
+            cluster_of_teacher.setdefault(teacher, i)
+
+    for course in classless:
+        i = next(
+            (cluster_of_teacher[t] for t in _course_teachers(course) if t in cluster_of_teacher),
+            min(range(len(clusters)), key=lambda j: sum(c.get("hours") or 0 for c in cluster_courses[j])),
+        )
+        cluster_courses[i].append(dict(course))
+    return cluster_courses
+
+
+def _solve_cluster(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Point d'entrée d'un processus: résout le sous-modèle d'un groupe de classes"""
+    logging.basicConfig(level=logging.INFO)
+    from solver_engine_with_constraints import ScheduleSolverWithConstraints
+
+    solver = ScheduleSolverWithConstraints(payload["db_config"])
+    solver.teachers = payload["teachers"]
+    solver.classes = payload["classes"]
+    solver.time_slots = payload["time_slots"]
+    solver.courses = payload["courses"]
+    solver.sync_groups = payload["sync_groups"]
+    solver.constraints = payload["constraints"]
+    solver.num_workers = payload["num_workers"]
+    solver.build_index()
+
+    start = time.perf_counter()
+    schedule = solver.solve(time_limit=payload["time_limit"])
+    return {
+        "cluster": payload["cluster"],
+        "schedule": schedule,
+        "wall_time": time.perf_counter() - start,
+    }
+
+
+def _teacher_conflicts(schedule: List[Dict], teachers_by_course: Dict[Any, List[str]]) -> Set[str]:
+    """Professeurs placés deux fois sur le même créneau"""
+    seen: Dict[Tuple[str, int, int], Any] = {}
+    conflicts = set()
+    for entry in schedule:
+        course_id = entry.get("course_id")
+        for teacher in teachers_by_course.get(course_id, []):
+            key = (teacher, entry["day_of_week"], entry["period_number"])
+            if key in seen and seen[key] != course_id:
+                conflicts.add(teacher)
+            seen.setdefault(key, course_id)
+    return conflicts
+
+
+def solve_decomposed(solver, time_limit: int = 600, max_workers: Optional[int] = None,
+                     repair_share: float = 0.3, on_solution=None) -> Optional[List[Dict]]:
+    """
+    Résout le modèle de `solver` (données déjà chargées) par décomposition.
+
+    Chaque groupe de classes est résolu dans son propre processus avec une part
+    des cœurs; si les groupes partagent des professeurs, une passe de réparation
+    sur le modèle complet repart de la solution assemblée et ne laisse libres que
+    les classes des professeurs en conflit. Sans décomposition possible (un seul
+    groupe) ou si un sous-modèle échoue, on revient à solver.solve().
+    """
+    clusters, exact = find_class_clusters(solver.courses)
+    if len(clusters) < 2:
+        logger.info("Décomposition: un seul groupe de classes, résolution monolithique")
+        return solver.solve(time_limit=time_limit, on_solution=on_solution)
+
+    cpu_count = os.cpu_count() or 1
+    max_workers = min(max_workers or cpu_count, len(clusters))
+    cluster_time = time_limit if exact else max(int(time_limit * (1 - repair_share)), 1)
+    logger.info(
+        f"=== DÉCOMPOSITION: {len(clusters)} groupes ({'exacts' if exact else 'par niveau'}), "
+        f"{max_workers} processus, {cluster_time}s par groupe ==="
+    )
+
+    index = solver.index or solver.build_index()
+    cluster_courses = assign_courses(solver.courses, clusters)
+
+    payloads = []
+    for i, group in enumerate(clusters):
+        course_ids = {c["course_id"] for c in cluster_courses[i]}
+        payloads.append({
+            "cluster": i,
+            "db_config": solver.db_config,
+            "teachers": [dict(t) for t in solver.teachers],
+            "classes": [dict(c) for c in solver.classes if c["class_name"] in set(group)],
+            "time_slots": [dict(s) for s in solver.time_slots],
+            "courses": cluster_courses[i],
+            "sync_groups": {
+                gid: ids for gid, ids in solver.sync_groups.items()
+                if any(cid in course_ids for cid in ids)
+            },
+            "constraints": solver.constraints,
+            "num_workers": max(1, cpu_count // max_workers),
+            "time_limit": cluster_time,
+        })
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        for result in pool.map(_solve_cluster, payloads):
+            logger.info(
+                f"✓ Groupe {result['cluster']} ({len(clusters[result['cluster']])} classes): "
+                f"{len(result['schedule'] or [])} créneaux en {result['wall_time']:.1f}s"
+            )
+            results.append(result)
+    solver.timings["decomposition_time"] = time.perf_counter() - start
+
+    if any(not r["schedule"] for r in results):
+        logger.warning("Un sous-modèle a échoué - résolution monolithique")
+        return solver.solve(time_limit=time_limit, on_solution=on_solution)
+
+    schedule = [entry for r in results for entry in r["schedule"]]
+    teachers_by_course = {c["course_id"]: index.teachers_of(c) for c in solver.courses}
+    conflicts = _teacher_conflicts(schedule, teachers_by_course)
+    if not conflicts:
+        logger.info(f"✅ Décomposition sans conflit: {len(schedule)} créneaux")
+        return schedule
+
+    # Passe de réparation sur le modèle complet
+    logger.info(f"Réparation: {len(conflicts)} professeurs en conflit entre groupes")
+    solver.warm_start = WarmStart(schedule, fix_untouched=True, touched_teachers=conflicts)
+    repair_time = max(time_limit - cluster_time, 30)
+    return solver.solve(time_limit=repair_time, on_solution=on_solution)
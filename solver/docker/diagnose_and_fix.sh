@@ -123,3 +123,4 @@ fi
 echo ""
 echo "Pour lancer la génération avec un time_limit augmenté:"
 echo "curl -X POST 'http://localhost:8000/generate_schedule' -H 'Content-Type: application/json' -d '{\"time_limit\": 1200}'"
+echo "puis suivre le job: curl http://localhost:8000/api/jobs/<job_id>"
@@ -153,6 +153,7 @@ elif (( $(echo "$TAUX_FINAL > 85" | bc -l) )); then
     echo "curl -X POST 'http://localhost:8000/generate_schedule' \\"
     echo "  -H 'Content-Type: application/json' \\"
     echo "  -d '{\"time_limit\": 1800}'"
+    echo "puis suivre le job: curl http://localhost:8000/api/jobs/<job_id>"
 else
     echo "✅ FAISABLE (< 85%)"
     echo ""
@@ -160,6 +161,7 @@ else
     echo "curl -X POST 'http://localhost:8000/generate_schedule' \\"
     echo "  -H 'Content-Type: application/json' \\"
     echo "  -d '{\"time_limit\": 600}'"
+    echo "puis suivre le job: curl http://localhost:8000/api/jobs/<job_id>"
 fi
 
 echo ""
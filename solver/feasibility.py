@@ -0,0 +1,253 @@
+"""
+feasibility.py - Analyse de faisabilité avant la résolution
+Un jeu de données à 95% d'utilisation pouvait occuper le solver 600 s (puis
+1200 s au second essai) avant de répondre INFEASIBLE. Cette analyse, sur les
+cours, les domaines de créneaux (slot_domains) et les groupes parallèles,
+tourne en une fraction de seconde et vérifie des conditions nécessaires:
+    - heures d'un cours ≤ créneaux autorisés
+    - heures identiques dans un groupe parallèle, professeur/classe présents
+      une seule fois par groupe
+    - couplage (flot maximal) heures de cours → créneaux, par classe et par
+      professeur: une violation donne l'ensemble exact de cours en cause
+    - limite quotidienne par matière: heures ≤ Σ jours min(limite, créneaux du jour)
+Quand une borne est atteinte avec égalité (classe saturée, cours sans marge),
+elle est transmise au modèle sous forme de contraintes d'égalité.
+"""
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FeasibilityReport:
+    """Résultat de l'analyse: erreurs (infaisabilité certaine), avertissements et bornes serrées"""
+
+    def __init__(self):
+        self.errors: List[Dict[str, Any]] = []
+        self.warnings: List[Dict[str, Any]] = []
+        # (type, cours, créneaux, valeur): bornes atteintes avec égalité
+        self.tight: List[Tuple[str, List[Any], List[Any], int]] = []
+        self.stats: Dict[str, Any] = {}
+        self.elapsed = 0.0
+
+    @property
+    def feasible(self) -> bool:
+        return not self.errors
+
+    def error(self, code: str, message: str, **details) -> None:
+        self.errors.append({"code": code, "message": message, **details})
+
+    def warning(self, code: str, message: str, **details) -> None:
+        self.warnings.append({"code": code, "message": message, **details})
+
+    def explanation(self, limit: int = 10) -> str:
+        lines = [e["message"] for e in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"... et {len(self.errors) - limit} autre(s) problème(s)")
+        return "\n".join(lines)
+
+    def apply_bounds(self, vars) -> int:
+        """Ajoute au modèle de `vars` (VarStore) les égalités déduites des bornes serrées"""
+        posted = 0
+        for kind, course_ids, slot_ids, value in self.tight:
+            if kind == "per_slot":
+                # Entité saturée: chaque créneau de son domaine est occupé exactement une fois
+                for slot_id in slot_ids:
+                    slot_vars = vars.vars_for(course_ids, [slot_id])
+                    if slot_vars:
+                        vars.model.Add(sum(slot_vars) == 1)
+                        posted += 1
+            else:
+                window_vars = vars.vars_for(course_ids, slot_ids)
+                if window_vars:
+                    vars.model.Add(sum(window_vars) == value)
+                    posted += 1
+        return posted
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "feasible": self.feasible,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "tight_bounds": len(self.tight),
+            "stats": self.stats,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+        }
+
+
+def max_assignment(demands: Dict[Any, int], allowed: Dict[Any, Set[Any]]) -> Tuple[int, Set[Any]]:
+    """
+    Flot maximal « unités → créneaux » (chaque unité demande `demands[u]`
+    créneaux distincts parmi `allowed[u]`, chaque créneau sert une fois).
+
+    Retourne (heures placées, unités atteignables depuis la source dans le
+    graphe résiduel). Si le flot est incomplet, ces unités forment un
+    ensemble de Hall violé: leurs demandes dépassent leurs créneaux communs.
+    """
+    assigned: Dict[Any, Any] = {}  # créneau -> unité
+    load = {unit: 0 for unit in demands}
+
+    def augment(start) -> bool:
+        # BFS unité -> créneau; un créneau occupé mène à son unité, qui peut se reporter ailleurs
+        parent = {start: None}  # unité -> (unité qui veut son créneau, ce créneau)
+        queue = deque([start])
+        while queue:
+            unit = queue.popleft()
+            for slot in allowed.get(unit, ()):
+                owner = assigned.get(slot)
+                if owner is None:
+                    # Créneau libre: décaler chaque unité du chemin
+                    while True:
+                        assigned[slot] = unit
+                        if parent[unit] is None:
+                            return True
+                        unit, slot = parent[unit]
+                elif owner not in parent:
+                    parent[owner] = (unit, slot)
+                    queue.append(owner)
+        return False
+
+    placed = 0
+    for unit, demand in demands.items():
+        while load[unit] < demand and augment(unit):
+            load[unit] += 1
+            placed += 1
+
+    if placed == sum(demands.values()):
+        return placed, set()
+    # Unités non saturées et tout ce qui leur est atteignable dans le résiduel
+    reachable = {unit for unit in demands if load[unit] < demands[unit]}
+    queue = deque(reachable)
+    while queue:
+        unit = queue.popleft()
+        for slot in allowed.get(unit, ()):
+            owner = assigned.get(slot)
+            if owner is not None and owner not in reachable:
+                reachable.add(owner)
+                queue.append(owner)
+    return placed, reachable
+
+
+def analyze(courses: List[Dict], index, allowed: Dict[Any, Set[Any]],
+            sync_groups: Optional[Dict[Any, List[Any]]] = None,
+            daily_limit: Optional[Callable[[str], int]] = None,
+            classes: Optional[Set[str]] = None, teachers: Optional[Set[str]] = None) -> FeasibilityReport:
+    """
+    Analyse de faisabilité.
+
+    Args:
+        courses: cours (course_id, hours, ...)
+        index: ModelIndex des cours et créneaux
+        allowed: domaine (ensemble de slot_id) de chaque cours (SlotDomains.compute)
+        sync_groups: groupes parallèles {group_id: [course_id]}
+        daily_limit: limite quotidienne d'heures par matière pour une classe
+        classes / teachers: entités soumises aux contraintes de conflit (toutes si None)
+    """
+    start = time.perf_counter()
+    report = FeasibilityReport()
+    hours = {course["course_id"]: int(course.get("hours") or 0) for course in courses}
+    by_id = {course["course_id"]: course for course in courses}
+    slot_day = {slot["slot_id"]: slot["day_of_week"] for slot in index.time_slots}
+
+    def label(course_id) -> str:
+        course = by_id[course_id]
+        return f"{index.subject_of(course)} ({course.get('class_list') or '-'}, {course.get('teacher_names') or '-'})"
+
+    # 1. Chaque cours seul
+    for course_id, needed in hours.items():
+        available = len(allowed.get(course_id, ()))
+        if needed > available:
+            report.error("course_capacity",
+                         f"Cours {course_id} {label(course_id)}: {needed}h demandées, "
+                         f"{available} créneau(x) autorisé(s)",
+                         course_id=course_id, required=needed, available=available)
+        elif needed and needed == available:
+            # Aucune marge: le cours occupe chacun de ses créneaux
+            report.tight.append(("per_slot", [course_id], sorted(allowed[course_id], key=str), 1))
+
+    # 2. Groupes parallèles: mêmes heures, chaque professeur / classe une seule fois
+    for group_id, course_ids in (sync_groups or {}).items():
+        members = [course_id for course_id in course_ids if course_id in by_id]
+        group_hours = {hours[course_id] for course_id in members}
+        if len(group_hours) > 1:
+            detail = ", ".join(f"{course_id}: {hours[course_id]}h" for course_id in members)
+            report.error("parallel_hours",
+                         f"Groupe parallèle {group_id}: heures différentes entre cours synchronisés ({detail})",
+                         group_id=group_id, hours={str(c): hours[c] for c in members})
+        for role, names_of in (("professeur", index.teachers_of), ("classe", index.classes_of)):
+            seen: Dict[str, Any] = {}
+            for course_id in members:
+                for name in names_of(by_id[course_id]):
+                    if name in seen and seen[name] != course_id:
+                        report.error("parallel_duplicate",
+                                     f"Groupe parallèle {group_id}: {role} {name} dans deux cours "
+                                     f"synchronisés ({seen[name]} et {course_id})",
+                                     group_id=group_id, entity=name)
+                    seen.setdefault(name, course_id)
+
+    # 3. Couplage heures → créneaux, par classe puis par professeur
+    entities = (("classe", index.courses_by_class, classes), ("professeur", index.courses_by_teacher, teachers))
+    for role, courses_by_entity, known in entities:
+        for name, entity_courses in courses_by_entity.items():
+            if known is not None and name not in known:
+                continue
+            demands = {c["course_id"]: hours[c["course_id"]] for c in entity_courses if hours[c["course_id"]]}
+            if not demands:
+                continue
+            domain = {c: allowed.get(c, set()) for c in demands}
+            union = set().union(*domain.values())
+            placed, violators = max_assignment(demands, domain)
+            total = sum(demands.values())
+            if placed < total:
+                slots = set().union(*(domain[c] for c in violators))
+                needed = sum(demands[c] for c in violators)
+                report.error(f"{'class' if role == 'classe' else 'teacher'}_capacity",
+                             f"{role.capitalize()} {name}: {needed}h pour {len(violators)} cours "
+                             f"({', '.join(label(c) for c in sorted(violators, key=str)[:5])}) "
+                             f"mais seulement {len(slots)} créneau(x) utilisable(s)",
+                             entity=name, required=needed, available=len(slots),
+                             course_ids=sorted(violators, key=str))
+            elif total == len(union):
+                report.tight.append(("per_slot", list(demands), sorted(union, key=str), 1))
+
+    # 4. Limite quotidienne par matière (pigeonnier sur les jours)
+    if daily_limit is not None:
+        for (class_name, subject), subject_courses in index.courses_by_class_subject.items():
+            if not subject or (classes is not None and class_name not in classes):
+                continue
+            course_ids = [c["course_id"] for c in subject_courses]
+            needed = sum(hours[c] for c in course_ids)
+            if not needed:
+                continue
+            limit = daily_limit(class_name)
+            per_day: Dict[int, Set[Any]] = {}
+            for course_id in course_ids:
+                for slot_id in allowed.get(course_id, ()):
+                    per_day.setdefault(slot_day[slot_id], set()).add(slot_id)
+            capacity = sum(min(limit, len(slots)) for slots in per_day.values())
+            if needed > capacity:
+                report.error("daily_limit",
+                             f"Classe {class_name}, {subject}: {needed}h par semaine mais au plus "
+                             f"{limit}h/jour sur {len(per_day)} jour(s) = {capacity}h",
+                             entity=class_name, subject=subject, required=needed, available=capacity)
+            elif needed == capacity:
+                for day, slots in per_day.items():
+                    report.tight.append(("window", course_ids, sorted(slots, key=str), min(limit, len(slots))))
+
+    total_hours = sum(hours.values())
+    report.stats = {
+        "courses": len(courses),
+        "total_hours": total_hours,
+        "allowed_pairs": sum(len(allowed.get(c, ())) for c in hours),
+        "tight_bounds": len(report.tight),
+    }
+    report.elapsed = time.perf_counter() - start
+    if report.feasible:
+        logger.info(f"✓ Analyse de faisabilité: aucune impossibilité, {len(report.tight)} borne(s) serrée(s) "
+                    f"({report.elapsed * 1000:.0f} ms)")
+    else:
+        logger.error(f"❌ Données infaisables ({len(report.errors)} problème(s), "
+                     f"{report.elapsed * 1000:.0f} ms):\n{report.explanation()}")
+    return report
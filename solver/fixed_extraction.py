@@ -16,11 +16,8 @@ def extract_solution_without_conflicts(solver_instance):
     class_slot_occupied = set()  # {(class_name, slot_id)}
     
     # Parcourir toutes les variables actives
-    for var_name, var in solver_instance.schedule_vars.items():
+    for (course_id, slot_id), var in solver_instance.schedule_vars.items():
         if solver_instance.solver.Value(var) == 1:
-            parts = var_name.split("_")
-            course_id = int(parts[1])
-            slot_id = int(parts[3])
             
             course = next((c for c in solver_instance.courses if c["course_id"] == course_id), None)
             slot = next((s for s in solver_instance.time_slots if s["slot_id"] == slot_id), None)
@@ -1,14 +1,16 @@
 # fixed_solver_engine.py - Version corrigée pour éliminer les conflits et trous
 from ortools.sat.python import cp_model
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 import logging
 from datetime import datetime
 import json
 from parallel_course_handler import ParallelCourseHandler
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("fixed")
 class FixedScheduleSolver:
     """Solver amélioré qui traite globalement les classes et évite les conflits"""
     
@@ -42,7 +44,7 @@ class FixedScheduleSolver:
         
     def load_data_from_db(self):
         """Charge les données depuis solver_input et les contraintes"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -430,7 +432,7 @@ class FixedScheduleSolver:
         if not schedule:
             raise ValueError("Schedule vide")
 
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         try:
             # Supprimer l'ancien schedule actif
@@ -7,8 +7,11 @@ import logging
 import json
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
+
+from schedule_persistence import insert_schedule_entries
+from slot_index import SlotOccupancy, entry_teachers
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +28,7 @@ class IncrementalScheduler:
         self.current_schedule = None
         self.schedule_id = None
         self.schedule_entries = []
+        self.occupancy = SlotOccupancy()
         self.modifications_log = []
     
     def load_existing_schedule(self, schedule_id: Optional[int] = None) -> Dict[str, Any]:
@@ -34,7 +38,7 @@ class IncrementalScheduler:
         """
         logger.info("Chargement d'un emploi du temps existant...")
         
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         try:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             
@@ -80,6 +84,7 @@ class IncrementalScheduler:
             
             self.schedule_id = schedule_id
             self.schedule_entries = [dict(entry) for entry in entries]
+            self.occupancy = SlotOccupancy(self.schedule_entries)
             self.current_schedule = {
                 'schedule_id': schedule_id,
                 'info': dict(schedule_info),
@@ -118,14 +123,7 @@ class IncrementalScheduler:
         logger.info(f"  Vers: Jour {new_day} période {new_slot}")
         
         # Trouver l'entrée à déplacer
-        course_to_move = None
-        for entry in self.schedule_entries:
-            if (entry['class_name'] == class_name and 
-                entry['subject'] == subject and
-                entry['day_of_week'] == old_day and 
-                entry['slot_index'] == old_slot):
-                course_to_move = entry
-                break
+        course_to_move = self.occupancy.find(class_name, subject, old_day, old_slot)
         
         if not course_to_move:
             logger.error("Cours à déplacer non trouvé")
@@ -147,9 +145,11 @@ class IncrementalScheduler:
         old_slot_id = course_to_move['slot_id']
         new_slot_id = self._get_slot_id(new_day, new_slot)
         
+        self.occupancy.remove(course_to_move)
         course_to_move['day_of_week'] = new_day
         course_to_move['slot_index'] = new_slot
         course_to_move['slot_id'] = new_slot_id
+        self.occupancy.add(course_to_move)
         
         # Enregistrer la modification
         modification = {
@@ -184,14 +184,7 @@ class IncrementalScheduler:
         logger.info(f"  Nouveaux professeurs: {new_teachers}")
         
         # Trouver l'entrée à modifier
-        course_to_modify = None
-        for entry in self.schedule_entries:
-            if (entry['class_name'] == class_name and 
-                entry['subject'] == subject and
-                entry['day_of_week'] == day and 
-                entry['slot_index'] == slot):
-                course_to_modify = entry
-                break
+        course_to_modify = self.occupancy.find(class_name, subject, day, slot)
         
         if not course_to_modify:
             return {"success": False, "error": "Cours non trouvé"}
@@ -207,7 +200,9 @@ class IncrementalScheduler:
         
         # Appliquer le changement
         old_teachers = course_to_modify['teacher_names'].copy() if isinstance(course_to_modify['teacher_names'], list) else [course_to_modify['teacher_names']]
+        self.occupancy.remove(course_to_modify)
         course_to_modify['teacher_names'] = new_teachers
+        self.occupancy.add(course_to_modify)
         
         # Enregistrer la modification
         modification = {
@@ -263,6 +258,7 @@ class IncrementalScheduler:
         }
         
         self.schedule_entries.append(new_entry)
+        self.occupancy.add(new_entry)
         
         # Enregistrer la modification
         modification = {
@@ -294,20 +290,14 @@ class IncrementalScheduler:
         logger.info(f"  Créneau: Jour {day} période {slot}")
         
         # Trouver l'entrée à supprimer
-        course_to_remove = None
-        for i, entry in enumerate(self.schedule_entries):
-            if (entry['class_name'] == class_name and 
-                entry['subject'] == subject and
-                entry['day_of_week'] == day and 
-                entry['slot_index'] == slot):
-                course_to_remove = entry
-                break
+        course_to_remove = self.occupancy.find(class_name, subject, day, slot)
         
         if not course_to_remove:
             return {"success": False, "error": "Cours non trouvé"}
         
         # Supprimer l'entrée
         self.schedule_entries.remove(course_to_remove)
+        self.occupancy.remove(course_to_remove)
         
         # Enregistrer la modification
         modification = {
@@ -336,7 +326,7 @@ class IncrementalScheduler:
         
         logger.info("Sauvegarde des modifications...")
         
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         try:
             cursor = conn.cursor()
             
@@ -367,22 +357,23 @@ class IncrementalScheduler:
                 WHERE schedule_id = %s
             """, (self.schedule_id,))
             
-            # Sauvegarder toutes les entrées modifiées
-            for entry in self.schedule_entries:
-                cursor.execute("""
-                    INSERT INTO schedule_entries 
-                    (schedule_id, class_name, day_of_week, slot_index, subject, teacher_names, kind, slot_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    new_schedule_id,
-                    entry['class_name'],
-                    entry['day_of_week'],
-                    entry['slot_index'],
-                    entry['subject'],
-                    entry['teacher_names'] if isinstance(entry['teacher_names'], list) else [entry['teacher_names']],
-                    entry['kind'],
-                    entry['slot_id']
-                ))
+            # Sauvegarder toutes les entrées modifiées (par lots, même transaction)
+            insert_schedule_entries(
+                cursor, new_schedule_id,
+                ("class_name", "day_of_week", "slot_index", "subject", "teacher_names", "kind", "slot_id"),
+                (
+                    (
+                        entry['class_name'],
+                        entry['day_of_week'],
+                        entry['slot_index'],
+                        entry['subject'],
+                        entry['teacher_names'] if isinstance(entry['teacher_names'], list) else [entry['teacher_names']],
+                        entry['kind'],
+                        entry['slot_id']
+                    )
+                    for entry in self.schedule_entries
+                )
+            )
             
             conn.commit()
             
@@ -438,70 +429,64 @@ class IncrementalScheduler:
     def _check_conflicts_at_slot(self, day: int, slot: int, class_name: str, teachers: List[str]) -> List[Dict]:
         """Vérifie les conflits à un créneau donné"""
         conflicts = []
-        
-        for entry in self.schedule_entries:
-            if entry['day_of_week'] == day and entry['slot_index'] == slot:
-                # Conflit de classe
-                if entry['class_name'] == class_name:
+        if not (self.occupancy.class_busy(class_name, day, slot) or
+                any(self.occupancy.teacher_busy(teacher, day, slot) for teacher in teachers)):
+            return conflicts
+        
+        for entry in self.occupancy.entries_at(day, slot):
+            # Conflit de classe
+            if entry['class_name'] == class_name:
+                conflicts.append({
+                    'type': 'class_conflict',
+                    'message': f"Classe {class_name} a déjà {entry['subject']} à ce créneau"
+                })
+            
+            # Conflit de professeur
+            existing_teachers = entry_teachers(entry)
+            for teacher in teachers:
+                if teacher in existing_teachers:
                     conflicts.append({
-                        'type': 'class_conflict',
-                        'message': f"Classe {class_name} a déjà {entry['subject']} à ce créneau"
+                        'type': 'teacher_conflict',
+                        'message': f"Professeur {teacher} enseigne déjà à {entry['class_name']} à ce créneau"
                     })
-                
-                # Conflit de professeur
-                existing_teachers = entry['teacher_names'] if isinstance(entry['teacher_names'], list) else [entry['teacher_names']]
-                for teacher in teachers:
-                    if teacher in existing_teachers:
-                        conflicts.append({
-                            'type': 'teacher_conflict',
-                            'message': f"Professeur {teacher} enseigne déjà à {entry['class_name']} à ce créneau"
-                        })
         
         return conflicts
     
     def _check_teacher_availability(self, teachers: List[str], day: int, slot: int) -> List[Dict]:
         """Vérifie la disponibilité des professeurs"""
         conflicts = []
+        if not any(self.occupancy.teacher_busy(teacher, day, slot) for teacher in teachers):
+            return conflicts
         
-        for entry in self.schedule_entries:
-            if entry['day_of_week'] == day and entry['slot_index'] == slot:
-                existing_teachers = entry['teacher_names'] if isinstance(entry['teacher_names'], list) else [entry['teacher_names']]
-                for teacher in teachers:
-                    if teacher in existing_teachers:
-                        conflicts.append({
-                            'teacher': teacher,
-                            'conflict_with': entry['class_name'],
-                            'subject': entry['subject']
-                        })
+        for entry in self.occupancy.entries_at(day, slot):
+            existing_teachers = entry_teachers(entry)
+            for teacher in teachers:
+                if teacher in existing_teachers:
+                    conflicts.append({
+                        'teacher': teacher,
+                        'conflict_with': entry['class_name'],
+                        'subject': entry['subject']
+                    })
         
         return conflicts
     
     def _suggest_alternative_slots(self, class_name: str, subject: str, preferred_day: int) -> List[Dict]:
         """Suggère des créneaux alternatifs"""
-        suggestions = []
+        # Chercher des créneaux libres le même jour (12 périodes par jour)
+        suggestions = [
+            {'day': day, 'slot': slot, 'reason': 'Même jour, créneau libre'}
+            for day, slot in self.occupancy.free_slots(class_name, [preferred_day], range(12))
+        ]
         
-        # Chercher des créneaux libres le même jour
-        for slot in range(12):  # 12 périodes par jour
-            if not self._check_conflicts_at_slot(preferred_day, slot, class_name, []):
+        # Si pas de place le même jour, chercher les autres jours
+        if len(suggestions) < 3:
+            other_days = [day for day in range(5) if day != preferred_day]  # Lundi à jeudi
+            for day, slot in self.occupancy.free_slots(class_name, other_days, range(12)):
                 suggestions.append({
-                    'day': preferred_day,
+                    'day': day,
                     'slot': slot,
-                    'reason': 'Même jour, créneau libre'
+                    'reason': 'Autre jour, créneau libre'
                 })
-        
-        # Si pas de place le même jour, chercher les autres jours
-        if len(suggestions) < 3:
-            for day in range(5):  # Lundi à jeudi
-                if day != preferred_day:
-                    for slot in range(12):
-                        if not self._check_conflicts_at_slot(day, slot, class_name, []):
-                            suggestions.append({
-                                'day': day,
-                                'slot': slot,
-                                'reason': 'Autre jour, créneau libre'
-                            })
-                            if len(suggestions) >= 5:
-                                break
                 if len(suggestions) >= 5:
                     break
         
@@ -0,0 +1,155 @@
+"""
+infeasibility.py - Explication d'un échec INFEASIBLE par littéraux d'hypothèse
+Après un INFEASIBLE, le modèle est reconstruit avec chaque famille de
+contraintes (et chaque entité: cours, professeur, classe, ligne de la table
+constraints) conditionnée par un littéral d'hypothèse. Un solve de suivi donne
+un sous-ensemble suffisant d'hypothèses (SufficientAssumptionsForInfeasibility),
+réduit ensuite par suppression jusqu'à un ensemble minimal: retirer n'importe
+lequel de ses éléments rend le problème faisable.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from ortools.sat.python import cp_model
+
+logger = logging.getLogger(__name__)
+
+# Types de contraintes CP-SAT acceptant un littéral d'activation
+GATEABLE = ("linear", "bool_or", "bool_and")
+
+
+def _gateable(constraint) -> bool:
+    # ConstraintProto protobuf (ortools 9.7) ou wrapper natif (versions récentes)
+    if hasattr(constraint, "WhichOneof"):
+        return constraint.WhichOneof("constraint") in GATEABLE
+    return any(getattr(constraint, f"has_{kind}")() for kind in GATEABLE)
+
+
+class ConstraintGates:
+    """
+    Littéraux d'hypothèse par section de contraintes.
+
+    begin(label) ouvre une section: toutes les contraintes ajoutées au modèle
+    jusqu'à la section suivante (ou close()) sont conditionnées par le littéral
+    de `label`. Un même label peut couvrir plusieurs sections.
+    """
+
+    def __init__(self, model: cp_model.CpModel):
+        self.model = model
+        self.literals: Dict[str, Any] = {}
+        self.labels: Dict[int, str] = {}  # index du littéral -> label
+        self.gated = 0
+        self._label: Optional[str] = None
+        self._start = 0
+
+    def literal(self, label: str):
+        if label not in self.literals:
+            literal = self.model.NewBoolVar(f"assume_{len(self.literals)}")
+            self.literals[label] = literal
+            self.labels[literal.Index()] = label
+        return self.literals[label]
+
+    def begin(self, label: str) -> None:
+        self.close()
+        self._label = label
+        self._start = len(self.model.Proto().constraints)
+
+    def close(self) -> None:
+        if self._label is None:
+            return
+        constraints = self.model.Proto().constraints
+        if len(constraints) == self._start:
+            # Section vide: pas d'hypothèse
+            self._label = None
+            return
+        literal = self.literal(self._label).Index()
+        for position in range(self._start, len(constraints)):
+            constraint = constraints[position]
+            if _gateable(constraint):
+                constraint.enforcement_literal.append(literal)
+                self.gated += 1
+        self._label = None
+
+
+class InfeasibilityCore:
+    """Ensemble de contraintes incompatibles retourné par minimal_core"""
+
+    def __init__(self, status: str, labels: List[str], minimal: bool, solves: int, elapsed: float):
+        self.status = status  # INFEASIBLE (conflit isolé), FEASIBLE (aucun conflit entre sections), UNKNOWN
+        self.labels = labels
+        self.minimal = minimal
+        self.solves = solves
+        self.elapsed = elapsed
+
+    def explanation(self) -> str:
+        if self.status != "INFEASIBLE":
+            return "Aucun ensemble de contraintes incompatibles isolé"
+        if not self.labels:
+            return "Infaisable même sans les contraintes conditionnées (domaines des variables)"
+        header = "Contraintes incompatibles" + ("" if self.minimal else " (ensemble non minimal)")
+        return header + ":\n" + "\n".join(f"  - {label}" for label in self.labels)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "conflict": self.labels,
+            "minimal": self.minimal,
+            "solves": self.solves,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+        }
+
+
+def minimal_core(model: cp_model.CpModel, gates: ConstraintGates, time_limit: float = 60.0,
+                 num_workers: int = 8) -> InfeasibilityCore:
+    """
+    Ensemble minimal de sections incompatibles.
+
+    Un premier solve sous toutes les hypothèses donne un noyau suffisant; chaque
+    élément est ensuite retiré à tour de rôle: s'il reste INFEASIBLE, l'élément
+    est superflu (et le noyau se réduit à celui du nouveau solve), sinon il est
+    conservé. Un solve non conclu dans le temps imparti conserve l'élément et
+    le noyau est alors signalé non minimal.
+    """
+    gates.close()
+    start = time.perf_counter()
+    deadline = start + time_limit
+    solves = 0
+
+    def solve(labels):
+        nonlocal solves
+        model.ClearAssumptions()
+        model.AddAssumptions([gates.literals[label] for label in labels])
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(deadline - time.perf_counter(), 0.1)
+        solver.parameters.num_workers = num_workers
+        status = solver.Solve(model)
+        solves += 1
+        if status != cp_model.INFEASIBLE:
+            return solver.StatusName(status), None
+        # Noyau vide: l'infaisabilité ne dépend d'aucune hypothèse (contraintes non conditionnées)
+        core = {gates.labels[index] for index in solver.SufficientAssumptionsForInfeasibility()}
+        return "INFEASIBLE", [label for label in labels if label in core]
+
+    status, core = solve(list(gates.literals))
+    if core is None:
+        logger.warning(f"⚠️ Modèle conditionné {status}: aucun conflit isolé entre sections")
+        return InfeasibilityCore(status, [], False, solves, time.perf_counter() - start)
+
+    minimal = True
+    position = 0
+    while position < len(core):
+        if time.perf_counter() >= deadline:
+            minimal = False
+            break
+        trial = core[:position] + core[position + 1:]
+        status, smaller = solve(trial)
+        if smaller is not None:
+            core = smaller
+        else:
+            minimal = minimal and status in ("OPTIMAL", "FEASIBLE")
+            position += 1
+
+    result = InfeasibilityCore("INFEASIBLE", core, minimal, solves, time.perf_counter() - start)
+    logger.error(f"❌ {result.explanation()}\n   ({solves} solves, {result.elapsed:.1f}s)")
+    return result
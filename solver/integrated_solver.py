@@ -3,17 +3,20 @@ integrated_solver.py - Solver intégré avec toutes les optimisations
 Combine: synchronisation parallèle, élimination des trous, blocs pédagogiques
 """
 import logging
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 from ortools.sat.python import cp_model
 from typing import Dict, List, Tuple, Optional, Set
 import time
 from datetime import datetime
 import json
 from parallel_course_handler import ParallelCourseHandler
+from var_store import VarStore
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("integrated")
 class IntegratedScheduleSolver:
     """
     Solver intégré avec toutes les optimisations:
@@ -28,9 +31,10 @@ class IntegratedScheduleSolver:
         self.db_config = db_config
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
+        self.num_workers = 8  # Workers CP-SAT (réduit quand plusieurs moteurs tournent en parallèle)
         
         # Variables du modèle
-        self.schedule_vars = {}  # (course_id, slot_id) -> BoolVar
+        self.schedule_vars = VarStore(self.model, [], [])  # (course_id, slot_id) -> BoolVar
         self.parallel_sync_vars = {}  # (group_id, slot_id) -> BoolVar
         self.class_start_vars = {}  # (class, day) -> IntVar (première période)
         self.class_end_vars = {}  # (class, day) -> IntVar (dernière période)
@@ -57,7 +61,7 @@ class IntegratedScheduleSolver:
         
     def load_data(self):
         """Charger toutes les données depuis la DB"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -126,12 +130,16 @@ class IntegratedScheduleSolver:
         logger.info("Création des variables du modèle...")
         
         # 1. Variables de placement des cours
+        self.schedule_vars = VarStore(
+            self.model,
+            [course['course_id'] for course in self.courses],
+            [slot['slot_id'] for slot in self.time_slots]
+        )
         for course in self.courses:
             course_id = course['course_id']
             for slot in self.time_slots:
                 slot_id = slot['slot_id']
-                var_name = f"course_{course_id}_slot_{slot_id}"
-                self.schedule_vars[var_name] = self.model.NewBoolVar(var_name)
+                self.schedule_vars.add(course_id, slot_id)
         
         logger.info(f"  → {len(self.schedule_vars)} variables de placement créées")
         
@@ -192,9 +200,9 @@ class IntegratedScheduleSolver:
             course_vars = []
             for slot in self.time_slots:
                 slot_id = slot['slot_id']
-                var_name = f"course_{course_id}_slot_{slot_id}"
-                if var_name in self.schedule_vars:
-                    course_vars.append(self.schedule_vars[var_name])
+                var = self.schedule_vars.get(course_id, slot_id)
+                if var is not None:
+                    course_vars.append(var)
             
             # Le cours doit être placé exactement 'hours' fois
             if course_vars:
@@ -220,9 +228,8 @@ class IntegratedScheduleSolver:
                     
                     # Si le groupe est actif sur ce créneau, TOUS les cours doivent y être
                     for course_id in course_ids:
-                        course_var_name = f"course_{course_id}_slot_{slot_id}"
-                        if course_var_name in self.schedule_vars:
-                            course_var = self.schedule_vars[course_var_name]
+                        course_var = self.schedule_vars.get(course_id, slot_id)
+                        if course_var is not None:
                             # Contrainte bidirectionnelle: group_var == course_var
                             self.model.Add(course_var == group_var)
             
@@ -255,9 +262,9 @@ class IntegratedScheduleSolver:
                 for course in self.courses:
                     classes = [c.strip() for c in (course.get('class_list') or '').split(',')]
                     if class_name in classes:
-                        var_name = f"course_{course['course_id']}_slot_{slot_id}"
-                        if var_name in self.schedule_vars:
-                            class_courses_vars.append(self.schedule_vars[var_name])
+                        var = self.schedule_vars.get(course['course_id'], slot_id)
+                        if var is not None:
+                            class_courses_vars.append(var)
                 
                 # Maximum 1 cours à la fois pour cette classe
                 if class_courses_vars:
@@ -279,9 +286,9 @@ class IntegratedScheduleSolver:
                 # Collecter tous les cours de ce prof sur ce créneau
                 teacher_vars = []
                 for course_id in course_ids:
-                    var_name = f"course_{course_id}_slot_{slot_id}"
-                    if var_name in self.schedule_vars:
-                        teacher_vars.append(self.schedule_vars[var_name])
+                    var = self.schedule_vars.get(course_id, slot_id)
+                    if var is not None:
+                        teacher_vars.append(var)
                 
                 # Maximum 1 cours à la fois pour ce prof
                 if teacher_vars:
@@ -301,9 +308,9 @@ class IntegratedScheduleSolver:
             if grade in ['ז', 'ח', 'ט']:
                 # Interdire les créneaux après-midi du lundi
                 for slot in monday_slots_afternoon:
-                    var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                    if var_name in self.schedule_vars:
-                        self.model.Add(self.schedule_vars[var_name] == 0)
+                    var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                    if var is not None:
+                        self.model.Add(var == 0)
         
         # 3. Professeurs de חינוך et שיח בוקר présents le lundi
         monday_slots = [s for s in self.time_slots if s['day_of_week'] == 1]
@@ -314,9 +321,9 @@ class IntegratedScheduleSolver:
                 # Au moins un cours le lundi
                 monday_vars = []
                 for slot in monday_slots:
-                    var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                    if var_name in self.schedule_vars:
-                        monday_vars.append(self.schedule_vars[var_name])
+                    var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                    if var is not None:
+                        monday_vars.append(var)
                 
                 if monday_vars:
                     self.model.Add(sum(monday_vars) >= 1)
@@ -344,9 +351,9 @@ class IntegratedScheduleSolver:
                     for course in self.courses:
                         classes = [c.strip() for c in (course.get('class_list') or '').split(',')]
                         if class_name in classes:
-                            var_name = f"course_{course['course_id']}_slot_{slot_id}"
-                            if var_name in self.schedule_vars:
-                                class_vars.append(self.schedule_vars[var_name])
+                            var = self.schedule_vars.get(course['course_id'], slot_id)
+                            if var is not None:
+                                class_vars.append(var)
                     
                     if class_vars:
                         # Variable indiquant si la classe a cours à cette période
@@ -411,12 +418,10 @@ class IntegratedScheduleSolver:
                             
                             if slot2['period_number'] == slot1['period_number'] + 1:
                                 # Variables pour un bloc de 2h
-                                var1_name = f"course_{course_id}_slot_{slot1['slot_id']}"
-                                var2_name = f"course_{course_id}_slot_{slot2['slot_id']}"
+                                var1 = self.schedule_vars.get(course_id, slot1['slot_id'])
+                                var2 = self.schedule_vars.get(course_id, slot2['slot_id'])
                                 
-                                if var1_name in self.schedule_vars and var2_name in self.schedule_vars:
-                                    var1 = self.schedule_vars[var1_name]
-                                    var2 = self.schedule_vars[var2_name]
+                                if var1 is not None and var2 is not None:
                                     
                                     # Créer une variable pour ce bloc potentiel
                                     block_var = self.model.NewBoolVar(
@@ -440,7 +445,7 @@ class IntegratedScheduleSolver:
         
         # Configuration du solver
         self.solver.parameters.max_time_in_seconds = time_limit
-        self.solver.parameters.num_search_workers = 8  # Parallélisation
+        self.solver.parameters.num_search_workers = self.num_workers  # Parallélisation
         self.solver.parameters.log_search_progress = True
         
         # Objectif: Minimiser les trous et maximiser les blocs de 2h
@@ -467,10 +472,10 @@ class IntegratedScheduleSolver:
             
             for slot in self.time_slots:
                 slot_id = slot['slot_id']
-                var_name = f"course_{course_id}_slot_{slot_id}"
+                var = self.schedule_vars.get(course_id, slot_id)
                 
-                if var_name in self.schedule_vars:
-                    if self.solver.Value(self.schedule_vars[var_name]) == 1:
+                if var is not None:
+                    if self.solver.Value(var) == 1:
                         # Ce cours est placé sur ce créneau
                         classes = [c.strip() for c in (course.get('class_list') or '').split(',')]
                         teachers = [t.strip() for t in (course.get('teacher_names') or '').split(',')]
@@ -568,7 +573,7 @@ class IntegratedScheduleSolver:
     
     def save_schedule(self, schedule: List[Dict]) -> int:
         """Sauvegarder l'emploi du temps dans la base de données"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -1,7 +1,7 @@
 ﻿# Ajouter ces lignes au début de votre main.py dans ./solver/main.py
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
 import pandas as pd
@@ -9,13 +9,17 @@ from solver_engine_with_constraints import ScheduleSolverWithConstraints as Sche
 from fixed_solver_engine import FixedScheduleSolver
 from constraints_handler import ConstraintsManager
 from ortools.sat.python import cp_model
+import asyncio
 import json
 import logging
 from datetime import datetime
 from prometheus_fastapi_instrumentator import Instrumentator
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection, get_connection_async, pool_stats, close_all as close_db_pools
 from api_constraints import register_constraint_routes  # Import du module
+from schedule_persistence import save_parallel_schedule_to_db
+from solve_jobs import SolveJobManager, FINAL_STATUSES as FINAL_JOB_STATUSES
+import timetable_views
 try:
     # Optionnel: modules d'optimisation avancée
     from advanced_main import AdvancedSchedulingSystem  # type: ignore
@@ -179,6 +183,27 @@ db_config = {
     "user": "admin", 
     "password": "school123"
 }
+
+# Jobs de génération exécutés hors de la boucle d'événements
+solve_jobs = SolveJobManager(db_config)
+
+
+@app.on_event("startup")
+async def recover_solve_jobs():
+    """Crée la table solve_jobs et marque les jobs interrompus par un redémarrage"""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, solve_jobs.ensure_table)
+    except Exception as e:
+        logger.warning(f"⚠️ Table solve_jobs indisponible: {e}")
+
+
+@app.on_event("shutdown")
+async def close_connection_pools():
+    """Arrête les solves en cours et ferme les connexions PostgreSQL du pool"""
+    solve_jobs.shutdown()
+    close_db_pools()
+
+
 class GenerateScheduleRequest(BaseModel):
     constraints: Optional[List[Any]] = None  # réservée pour usage futur
     time_limit: int = 600
@@ -188,6 +213,18 @@ class GenerateScheduleRequest(BaseModel):
     avoid_late_hard: bool = True
     minimize_gaps: bool = True
     friday_short: bool = True
+    # True: attendre le résultat final; par défaut 202 + job_id (suivi via /api/jobs/{job_id})
+    wait: bool = False
+    # Démarrage à chaud depuis le dernier schedule actif (ou warm_start_schedule_id)
+    warm_start: bool = False
+    warm_start_schedule_id: Optional[int] = None
+    fix_untouched: bool = False  # figer les classes hors touched_classes / touched_teachers
+    touched_classes: Optional[List[str]] = None
+    touched_teachers: Optional[List[str]] = None
+    # Résoudre par groupes de classes indépendants en parallèle (voie standard)
+    decompose: bool = False
+    # Retourner le schedule déjà généré pour des entrées et paramètres identiques
+    reuse_cached: bool = True
 
 # ------------------------------------------------------------
 # Routes d'état et d'optimisation avancée
@@ -224,12 +261,11 @@ async def advanced_optimize():
         result = system.run_full_analysis()
 
         # Récupérer le dernier schedule_id actif (sauvegardé par l'optimiseur)
-        import psycopg2
         from psycopg2.extras import RealDictCursor
 
         schedule_id = None
         try:
-            conn = psycopg2.connect(**db_config)
+            conn = await get_connection_async(db_config)
             cur = conn.cursor(cursor_factory=RealDictCursor)
             cur.execute("SELECT MAX(schedule_id) AS latest_id FROM schedules WHERE status = 'active'")
             row = cur.fetchone()
@@ -297,7 +333,7 @@ async def generate_schedule_from_solver_input(payload: GenerateScheduleRequest):
         logger.info(f"Paramètres: time_limit={payload.time_limit}s")
         
         # Récupérer les données depuis solver_input
-        conn = psycopg2.connect(**db_config)
+        conn = await get_connection_async(db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         # Statistiques
@@ -418,7 +454,7 @@ async def generate_schedule_fixed_endpoint(payload: GenerateScheduleRequest):
                 "notes": ["fixed_solver", "no_conflicts", "no_gaps"]
             }
             
-            conn = psycopg2.connect(**db_config)
+            conn = await get_connection_async(db_config)
             cur = conn.cursor()
             try:
                 cur.execute(
@@ -429,6 +465,7 @@ async def generate_schedule_fixed_endpoint(payload: GenerateScheduleRequest):
             finally:
                 cur.close()
                 conn.close()
+            timetable_views.invalidate(schedule_id)
                 
         except Exception as e:
             logger.error(f"Erreur sauvegarde schedule fixé: {e}", exc_info=True)
@@ -543,7 +580,7 @@ async def health_check():
     """Health check endpoint pour Docker"""
     try:
         # Test de connexion à la DB
-        conn = psycopg2.connect(**db_config)
+        conn = await get_connection_async(db_config)
         cur = conn.cursor()
         cur.execute("SELECT 1")
         cur.close()
@@ -555,10 +592,17 @@ async def health_check():
     return {
         "status": "healthy",
         "database": db_status,
+        "db_pool": pool_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
 
+@app.get("/api/db/pool")
+async def get_db_pool_stats():
+    """Métriques du pool de connexions (prêts, attentes, connexions remplacées)"""
+    return pool_stats()
+
+
     
 
 @app.post("/generate_schedule_ultimate")
@@ -616,7 +660,7 @@ async def generate_schedule_corrected_endpoint():
                 "solver_version": "corrected_v1"
             }
             
-            conn = psycopg2.connect(**db_config)
+            conn = await get_connection_async(db_config)
             cur = conn.cursor()
             try:
                 cur.execute(
@@ -627,6 +671,7 @@ async def generate_schedule_corrected_endpoint():
             finally:
                 cur.close()
                 conn.close()
+            timetable_views.invalidate(schedule_id)
             
             # Générer le résumé
             summary = solver.get_schedule_summary(schedule)
@@ -767,7 +812,7 @@ async def parse_excel(file: UploadFile = File(...)):
 @app.get("/api/parallel/groups")
 async def get_parallel_groups():
     """Retourne tous les groupes d'enseignement parallֳ¨le"""
-    conn = psycopg2.connect(**db_config)
+    conn = await get_connection_async(db_config)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -796,7 +841,7 @@ async def get_parallel_groups():
 @app.get("/api/parallel/check")
 async def check_parallel_consistency():
     """Vֳ©rifie la cohֳ©rence des cours parallֳ¨les"""
-    conn = psycopg2.connect(**db_config)
+    conn = await get_connection_async(db_config)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -816,7 +861,7 @@ async def check_parallel_consistency():
 @app.get("/api/parallel/teacher/{teacher_name}")
 async def get_teacher_parallel_courses(teacher_name: str):
     """Retourne les cours parallֳ¨les d'un professeur"""
-    conn = psycopg2.connect(**db_config)
+    conn = await get_connection_async(db_config)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -906,88 +951,55 @@ async def analyze_for_parallel(data: dict):
 # ENDPOINTS DE VISUALISATION AMֳ‰LIORֳ‰S
 # ============================================
 
+def _latest_schedule_id(query: str):
+    """schedule_id renvoyé par une requête d'une ligne (None si aucune)"""
+    conn = get_connection(db_config)
+    cur = conn.cursor()
+    try:
+        cur.execute(query)
+        row = cur.fetchone()
+        return row[0] if row else None
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _view_response(request: Request, view: "timetable_views.CachedView") -> Response:
+    """Vue sérialisée avec ETag; 304 si le client a déjà cette version"""
+    headers = {"ETag": view.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match == "*" or view.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=view.body, media_type="application/json", headers=headers)
+
+
 @app.get("/api/schedule/{view_type}/{name}")
-async def get_schedule_enhanced(view_type: str, name: str):
-    """Version simplifiée qui fonctionne sans erreurs SQL"""
-    conn = psycopg2.connect(**db_config)
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
+async def get_schedule_enhanced(view_type: str, name: str, request: Request):
+    """Vue d'une classe ou d'un professeur dans le dernier emploi du temps actif (mise en cache)"""
+    if view_type not in ("class", "teacher"):
+        return {"error": "Type de vue non supporté. Utilisez 'class' ou 'teacher'"}
+
     try:
-        # Récupérer le dernier schedule_id actif
-        cur.execute("SELECT MAX(schedule_id) as latest_id FROM schedules WHERE status = 'active'")
-        result = cur.fetchone()
-        
-        if not result or not result['latest_id']:
+        schedule_id = _latest_schedule_id(
+            "SELECT MAX(schedule_id) FROM schedules WHERE status = 'active'"
+        )
+        if not schedule_id:
             return {"schedule": [], "view_type": view_type, "name": name, "message": "Aucun emploi du temps actif"}
-        
-        schedule_id = result['latest_id']
-        
-        if view_type == "class":
-            # Pour une classe, récupérer toutes les entrées
-            cur.execute("""
-                SELECT 
-                    entry_id,
-                    teacher_name,
-                    class_name,
-                    subject_name,
-                    day_of_week,
-                    period_number,
-                    is_parallel_group,
-                    group_id
-                FROM schedule_entries
-                WHERE schedule_id = %s AND class_name = %s
-                ORDER BY day_of_week, period_number
-            """, (schedule_id, name))
-            
-        elif view_type == "teacher":
-            # Pour un professeur
-            cur.execute("""
-                SELECT 
-                    entry_id,
-                    teacher_name,
-                    class_name,
-                    subject_name,
-                    day_of_week,
-                    period_number,
-                    is_parallel_group,
-                    group_id
-                FROM schedule_entries
-                WHERE schedule_id = %s AND teacher_name LIKE %s
-                ORDER BY day_of_week, period_number
-            """, (schedule_id, f"%{name}%"))
-        else:
-            return {"error": "Type de vue non supporté. Utilisez 'class' ou 'teacher'"}
-        
-        schedule = cur.fetchall()
-        
-        # Enrichir les données
-        for entry in schedule:
-            if entry.get("is_parallel_group") and entry.get("group_id"):
-                entry["display_type"] = "parallel"
-                entry["display_info"] = f"Cours parallèle - Groupe {entry['group_id']}"
-            else:
-                entry["display_type"] = "individual"
-                entry["display_info"] = "Cours individuel"
-        
-        return {
-            "schedule": schedule, 
-            "view_type": view_type, 
-            "name": name,
-            "total_lessons": len(schedule),
-            "schedule_id": schedule_id
-        }
-        
+
+        view = timetable_views.get_view(
+            db_config, schedule_id, f"{view_type}:{name}",
+            timetable_views.build_named, view_type, name
+        )
+        return _view_response(request, view)
+
     except Exception as e:
         logger.error(f"Erreur get_schedule_enhanced: {str(e)}")
         return {"error": str(e), "schedule": []}
-    finally:
-        cur.close()
-        conn.close()
 
 @app.get("/api/stats/parallel")
 async def get_parallel_statistics():
     """Statistiques spֳ©cifiques aux cours parallֳ¨les"""
-    conn = psycopg2.connect(**db_config)
+    conn = await get_connection_async(db_config)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -1543,67 +1555,6 @@ async def generate_schedule_realistic_endpoint(payload: GenerateScheduleRequest)
         logger.error(f"Erreur solver réaliste: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
 
-def save_parallel_schedule_to_db(schedule: list, conn) -> int:
-    """Sauvegarde un emploi du temps avec synchronisation parallèle en base"""
-    from datetime import datetime
-    
-    cur = conn.cursor()
-    try:
-        # Créer un nouvel emploi du temps
-        cur.execute("""
-            INSERT INTO schedules (academic_year, term, status, created_at, metadata)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING schedule_id
-        """, (
-            "2024-2025", 
-            1, 
-            "active", 
-            datetime.now(),
-            json.dumps({
-                "solver": "parallel_sync",
-                "sync_status": "PERFECT",
-                "conflicts": 0,
-                "quality": "Synchronisation parfaite des cours parallèles"
-            })
-        ))
-        
-        schedule_id = cur.fetchone()[0]
-        
-        # Sauvegarder les entrées
-        for entry in schedule:
-            # Traiter les professeurs (peut être une liste ou une string)
-            teacher_names = entry.get('teacher_names', [])
-            if isinstance(teacher_names, list):
-                teacher_name = ", ".join(teacher_names) if teacher_names else ""
-            else:
-                teacher_name = str(teacher_names) if teacher_names else ""
-            
-            cur.execute("""
-                INSERT INTO schedule_entries 
-                (schedule_id, teacher_name, class_name, subject_name, 
-                 day_of_week, period_number, is_parallel_group)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                schedule_id,
-                teacher_name,
-                entry.get('class_name', ''),
-                entry.get('subject', ''),
-                entry.get('day', 0),
-                entry.get('slot_index', 0),
-                entry.get('kind') == 'parallel'
-            ))
-        
-        conn.commit()
-        logger.info(f"Schedule sauvegardé: ID={schedule_id}, {len(schedule)} entrées")
-        return schedule_id
-        
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Erreur sauvegarde schedule: {e}")
-        raise e
-    finally:
-        cur.close()
-
 @app.post("/generate_schedule_parallel_sync")
 async def generate_schedule_parallel_sync_endpoint(payload: GenerateScheduleRequest):
     """Génère un emploi du temps avec SYNCHRONISATION PARFAITE des cours parallèles"""
@@ -1622,7 +1573,7 @@ async def generate_schedule_parallel_sync_endpoint(payload: GenerateScheduleRequ
             )
         
         # Connexion DB
-        conn = psycopg2.connect(**db_config)
+        conn = await get_connection_async(db_config)
         
         try:
             solver = SyncSolver()
@@ -1696,7 +1647,7 @@ async def generate_schedule_parallel_sync_v2_endpoint(payload: GenerateScheduleR
             )
         
         # Connexion DB
-        conn = psycopg2.connect(**db_config)
+        conn = await get_connection_async(db_config)
         
         try:
             solver = SyncSolverV2()
@@ -1937,7 +1888,7 @@ async def analyze_schedule_pedagogical_endpoint(schedule_id: Optional[int] = Non
         logger.info(f"🔍 Analyse pédagogique de l'emploi du temps {schedule_id or 'le plus récent'}")
         
         # Connexion DB
-        conn = psycopg2.connect(**db_config)
+        conn = await get_connection_async(db_config)
         
         try:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -2122,7 +2073,7 @@ def analyze_schedule_simple(entries: List[Dict], schedule_id: int) -> Dict[str,
 @app.get("/api/classes")
 async def get_classes():
     """Retourne la liste de toutes les classes"""
-    conn = psycopg2.connect(**db_config)
+    conn = await get_connection_async(db_config)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -2136,7 +2087,7 @@ async def get_classes():
 @app.get("/api/teachers")
 async def get_teachers():
     """Retourne la liste de tous les professeurs"""
-    conn = psycopg2.connect(**db_config)
+    conn = await get_connection_async(db_config)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -2696,7 +2647,7 @@ async def intelligent_assistant_interface():
 @app.get("/api/stats")
 async def get_general_stats():
     """Retourne les statistiques générales"""
-    conn = psycopg2.connect(**db_config)
+    conn = await get_connection_async(db_config)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -2754,125 +2705,39 @@ async def get_general_stats():
         conn.close()
 
 @app.get("/api/schedule_entries")
-async def get_schedule_entries(version: str = "latest"):
-    """Retourne les entrées d'emploi du temps selon le contrat spécifié"""
-    conn = psycopg2.connect(**db_config)
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
-    try:
-        # Récupérer le dernier schedule_id
-        if version == "latest":
-            cur.execute("""
-                SELECT schedule_id, metadata, created_at 
-                FROM schedules 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            """)
-            schedule_result = cur.fetchone()
-            
-            if not schedule_result:
-                return {
-                    "version": version,
-                    "time_slots": [],
-                    "entries": [],
-                    "meta": {
-                        "solve_status": "ERROR",
-                        "walltime_sec": 0,
-                        "advanced": False,
-                        "notes": ["Aucun emploi du temps trouvé"]
-                    }
+async def get_schedule_entries(request: Request, version: str = "latest"):
+    """Retourne les entrées d'emploi du temps selon le contrat spécifié (mise en cache)"""
+    if version == "latest":
+        schedule_id = _latest_schedule_id(
+            "SELECT schedule_id FROM schedules ORDER BY created_at DESC LIMIT 1"
+        )
+        if schedule_id is None:
+            return {
+                "version": version,
+                "time_slots": [],
+                "entries": [],
+                "meta": {
+                    "solve_status": "ERROR",
+                    "walltime_sec": 0,
+                    "advanced": False,
+                    "notes": ["Aucun emploi du temps trouvé"]
                 }
-            
-            schedule_id = schedule_result['schedule_id']
-        else:
-            schedule_id = int(version)
-            cur.execute("SELECT metadata, created_at FROM schedules WHERE schedule_id = %s", (schedule_id,))
-            schedule_result = cur.fetchone()
-            if not schedule_result:
-                raise HTTPException(status_code=404, detail=f"Schedule {schedule_id} not found")
-        
-        # Récupérer les time_slots
-        cur.execute("""
-            SELECT 
-                ts.slot_id,
-                ts.day_of_week as day,
-                ts.period_number - 1 as index,
-                ts.start_time::text as start,
-                ts.end_time::text as end
-            FROM time_slots ts
-            ORDER BY ts.day_of_week, ts.period_number
-        """)
-        time_slots = cur.fetchall()
-        
-        # Récupérer les entrées d'emploi du temps
-        cur.execute("""
-            SELECT 
-                se.class_name,
-                se.day_of_week as day,
-                CASE 
-                    WHEN se.period_number = 0 THEN 0  -- Period 0 reste 0 (shich boker)
-                    ELSE se.period_number              -- Les autres restent tels quels
-                END as slot_index,
-                COALESCE(se.subject_name, se.subject) as subject,
-                se.teacher_name,
-                se.room
-            FROM schedule_entries se
-            WHERE se.schedule_id = %s
-            ORDER BY se.day_of_week, se.period_number, se.class_name
-        """, (schedule_id,))
-        entries_raw = cur.fetchall()
-        
-        # Transformer les données selon le contrat
-        entries = []
-        for entry in entries_raw:
-            # Gestion des teacher_names (split si string)
-            teacher_names = entry['teacher_name']
-            if isinstance(teacher_names, str):
-                teacher_names = [name.strip() for name in teacher_names.split(',') if name.strip()]
-            elif not isinstance(teacher_names, list):
-                teacher_names = [str(teacher_names)] if teacher_names else []
-            
-            entries.append({
-                "class_name": entry['class_name'],
-                "day": entry['day'],
-                "slot_index": entry['slot_index'],
-                "subject": entry['subject'] or '',
-                "teacher_names": teacher_names,
-                "room": entry['room'] or ''
-            })
-        
-        # Extraire metadata
-        metadata = {}
-        if schedule_result['metadata']:
-            try:
-                if isinstance(schedule_result['metadata'], str):
-                    metadata = json.loads(schedule_result['metadata'])
-                else:
-                    metadata = schedule_result['metadata']
-            except:
-                metadata = {}
-        
-        # Construire la réponse selon le contrat
-        return {
-            "version": version,
-            "time_slots": [dict(slot) for slot in time_slots],
-            "entries": entries,
-            "meta": {
-                "solve_status": metadata.get("solve_status", "OPTIMAL"),
-                "walltime_sec": metadata.get("walltime_sec", 0),
-                "advanced": metadata.get("advanced", False),
-                "notes": metadata.get("notes", [])
             }
-        }
-        
-    finally:
-        cur.close()
-        conn.close()
+    else:
+        schedule_id = int(version)
+
+    view = timetable_views.get_view(
+        db_config, schedule_id, f"entries:{version}",
+        timetable_views.build_entries, version
+    )
+    if view is None:
+        raise HTTPException(status_code=404, detail=f"Schedule {schedule_id} not found")
+    return _view_response(request, view)
 
 @app.get("/api/last_schedule_info")
 async def get_last_schedule_info():
     """Retourne les informations du dernier emploi du temps généré"""
-    conn = psycopg2.connect(**db_config)
+    conn = await get_connection_async(db_config)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
@@ -2937,179 +2802,142 @@ from typing import Optional, List, Any
 
 @app.post("/generate_schedule")
 async def generate_schedule_endpoint(payload: GenerateScheduleRequest):
-    """Génère un emploi du temps complet avec gestion améliorée"""
-    try:
-        logger.info("=== DÉBUT GÉNÉRATION EMPLOI DU TEMPS ===")
-        logger.info(f"Paramètres: time_limit={payload.time_limit}s, advanced={payload.advanced}")
-        
-        # Si mode avancé demandé, utiliser le solver pédagogique V2
-        if payload.advanced and _advanced_modules_available and PedagogicalScheduleSolverV2:
-            logger.info("Mode avancé activé - utilisation du solver pédagogique V2")
-            try:
-                # Utiliser le nouveau solver pédagogique
-                solver = PedagogicalScheduleSolverV2(db_config=db_config)
-                # Configurer selon les options demandées AVANT la création des variables
-                solver.config.update({
-                    "zero_gaps": payload.minimize_gaps,
-                    "prefer_2h_blocks": True,
-                    "two_hour_blocks_strict": True,
-                    "friday_short": payload.friday_short,
-                    "friday_off": True,        # Désactiver complètement le vendredi
-                    "sunday_enabled": True     # Toujours activer le dimanche
-                })
-                solver.load_data()
-                solver.create_variables()
-                solver.add_constraints()
-                
-                # Résoudre
-                schedule = solver.solve(time_limit=payload.time_limit)
-                
-                if schedule:
-                    # Sauvegarder
-                    schedule_id = solver.save_schedule(schedule)
-                    quality_score = solver.get_quality_score()
-                    # Mettre à jour les métadonnées pour l'API de visualisation
-                    try:
-                        conn = psycopg2.connect(**db_config)
-                        cur = conn.cursor()
-                        metadata = {
-                            "solve_status": "OPTIMAL",
-                            "walltime_sec": getattr(solver, 'solve_time', 0),
-                            "advanced": True,
-                            "notes": ["advanced_v2"],
-                            "config": solver.config,
-                        }
-                        cur.execute(
-                            "UPDATE schedules SET metadata = %s WHERE schedule_id = %s",
-                            (json.dumps(metadata), schedule_id)
-                        )
-                        conn.commit()
-                    finally:
-                        try:
-                            cur.close()
-                        except Exception:
-                            pass
-                        try:
-                            conn.close()
-                        except Exception:
-                            pass
-
-                    return {
-                        "success": True,
-                        "schedule_id": schedule_id,
-                        "message": "Emploi du temps optimisé généré avec succès",
-                        "quality_score": quality_score,
-                        "advanced": True,
-                        "total_entries": len(schedule),
-                        "features_applied": {
-                            "zero_gaps": True,
-                            "parallel_sync": True,
-                            "subject_grouping": True,
-                            "sunday_enabled": True,
-                            "friday_off": True
-                        }
-                    }
-                else:
-                    logger.warning("Solver pédagogique échoué, fallback sur méthode standard")
-            except Exception as e:
-                logger.error(f"Erreur solver pédagogique: {e}", exc_info=True)
-        
-        # Méthode standard (ou fallback)
-        solver = ScheduleSolver(db_config)
-        
-        # Charger les données
-        logger.info("Chargement des données...")
-        solver.load_data_from_db()
-        
-        # IMPORTANT: Utiliser un temps suffisant vu le taux d'utilisation de 95%
-        time_limit = max(payload.time_limit, 600)  # Minimum 10 minutes
-        logger.info(f"Génération avec time_limit={time_limit}s")
-        
-        # Appliquer les contraintes avancées si demandées
-        if payload.advanced:
-            logger.info("Application des contraintes avancées")
-            # TODO: Implémenter l'application des contraintes spécifiques
-            # payload.limit_consecutive, payload.avoid_late_hard, etc.
-        
-        # Résoudre
-        schedule = solver.solve(time_limit=time_limit)
-        
-        if schedule is None:
-            logger.error("Aucune solution trouvée")
-            
-            # Essayer avec des paramètres plus permissifs
-            logger.info("Tentative avec paramètres assouplis...")
-            solver.solver.parameters.search_branching = cp_model.PORTFOLIO_SEARCH
-            solver.solver.parameters.linearization_level = 2
-            solver.solver.parameters.cp_model_presolve = True
-            
-            schedule = solver.solve(time_limit=time_limit * 2)  # Doubler le temps
-            
-            if schedule is None:
-                raise HTTPException(
-                    status_code=500, 
-                    detail="Impossible de générer un emploi du temps. Vérifiez les contraintes."
-                )
-        
-        # Sauvegarder systématiquement si une solution existe
-        schedule_id = None
-        try:
-            schedule_id = solver.save_schedule(schedule)
-            logger.info(f"Schedule sauvegardé avec ID: {schedule_id}")
-            
-            # Sauvegarder les métadonnées pour l'API schedule_entries
-            # IMPORTANT: nous sommes dans la voie standard (fallback). Marquer advanced=False
-            metadata = {
-                "solve_status": "OPTIMAL" if schedule else "INFEASIBLE",
-                "walltime_sec": getattr(solver, 'solve_time', 0),
-                "advanced": False,
-                "notes": ["standard_solver"]
-            }
-            
-            # Mettre à jour les métadonnées dans la DB
-            conn = psycopg2.connect(**db_config)
-            cur = conn.cursor()
-            try:
-                cur.execute(
-                    "UPDATE schedules SET metadata = %s WHERE schedule_id = %s",
-                    (json.dumps(metadata), schedule_id)
-                )
-                conn.commit()
-            finally:
-                cur.close()
-                conn.close()
-                
-        except Exception as e:
-            logger.error(f"Erreur sauvegarde schedule: {e}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"Erreur de sauvegarde: {e}")
-        
-        # Générer le résumé
-        summary = solver.get_schedule_summary(schedule)
-        
-        logger.info("=== GÉNÉRATION TERMINÉE ===")
-        logger.info(f"Résultat: {len(schedule)} créneaux générés")
-        logger.info(f"Jours utilisés: {summary.get('days_used', [])}")
-        logger.info(f"Classes couvertes: {summary.get('classes_covered', 0)}")
-        
-        return {
+    """
+    Génère un emploi du temps complet.
+
+    Le solve tourne dans un processus de travail (solve_jobs.SolveJobManager) pour ne
+    pas bloquer la boucle d'événements. Par défaut (wait=False) la réponse 202
+    contient le job_id à suivre via /api/jobs/{job_id}; avec wait=True elle
+    contient le résultat final.
+    """
+    params = payload.dict()
+    wait = params.pop("wait", False)
+    if params["advanced"] and not _advanced_modules_available:
+        logger.warning("⚠️ Modules avancés indisponibles: génération par la voie standard")
+        params["advanced"] = False
+    job = solve_jobs.submit(params)
+
+    if not wait:
+        return JSONResponse(status_code=202, content={
             "success": True,
-            "schedule": schedule,
-            "summary": summary,
-            "schedule_id": schedule_id,
-            "advanced": payload.advanced,
-            "total_entries": len(schedule),
-            "message": f"Emploi du temps généré: {len(schedule)} créneaux"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Erreur génération: {str(e)}", exc_info=True)
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "queue_position": solve_jobs.queue_position(job["job_id"]),
+            "status_url": f"/api/jobs/{job['job_id']}"
+        })
+
+    job = await solve_jobs.wait(job["job_id"])
+    if job["status"] != "succeeded":
         raise HTTPException(
-            status_code=500, 
-            detail=f"Erreur lors de la génération: {str(e)}"
+            status_code=500,
+            detail=job["error"] or f"Génération {job['status']}"
         )
 
+    result = dict(solve_jobs.full_result(job["job_id"]) or job["result"] or {})
+    result["job_id"] = job["job_id"]
+    return result
+
+
+def _job_response(job: dict) -> dict:
+    """Vue sérialisable d'un job (sans le résultat complet)"""
+    return {
+        "job_id": job["job_id"],
+        "job_type": job.get("job_type"),
+        "status": job["status"],
+        "stage": job.get("stage"),
+        "progress": job.get("progress", 0),
+        "schedule_id": job.get("schedule_id"),
+        "error": job.get("error"),
+        "result": job.get("result"),
+        "draft_schedule_id": job.get("draft_schedule_id"),
+        "latest_solution": (job.get("solutions") or [None])[-1],
+        "solutions_found": len(job.get("solutions") or []),
+        "created_at": job["created_at"].isoformat() if job.get("created_at") else None,
+        "started_at": job["started_at"].isoformat() if job.get("started_at") else None,
+        "finished_at": job["finished_at"].isoformat() if job.get("finished_at") else None,
+    }
+
+
+@app.get("/api/jobs")
+async def list_solve_jobs(limit: int = 50):
+    """Liste les jobs de génération connus de ce processus"""
+    return {"jobs": [_job_response(job) for job in solve_jobs.list_jobs(limit)]}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_solve_job(job_id: str):
+    """État, étape et progression d'un job de génération"""
+    job = await asyncio.get_running_loop().run_in_executor(None, solve_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    response = _job_response(job)
+    if job["status"] == "queued":
+        response["queue_position"] = solve_jobs.queue_position(job_id)
+    return response
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_solve_job(job_id: str):
+    """
+    Flux Server-Sent Events d'un job: événements `status`, `progress` et `solution`
+    (objectif, borne, temps, draft_schedule_id). Le flux se ferme à la fin du job.
+    """
+    job = solve_jobs.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable ou terminé avant le redémarrage")
+
+    def sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    queue = solve_jobs.subscribe(job_id)
+
+    async def event_stream():
+        try:
+            # Rejouer l'état courant et les solutions déjà trouvées
+            yield sse("status", _job_response(job))
+            for event in job["solutions"]:
+                yield sse("solution", event)
+            if job["status"] in FINAL_JOB_STATUSES:
+                return
+            while True:
+                try:
+                    kind, data = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse(kind, data)
+                if kind == "status" and data["status"] in FINAL_JOB_STATUSES:
+                    return
+        finally:
+            solve_jobs.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/jobs/{job_id}/accept")
+async def accept_solve_job(job_id: str):
+    """Accepte la dernière solution intermédiaire sans attendre la fin du solve"""
+    try:
+        job = await solve_jobs.accept(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    return _job_response(job)
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_solve_job(job_id: str):
+    """Annule un job en attente ou arrête le processus de solve en cours"""
+    job = await solve_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    return _job_response(job)
+
 
 @app.get("/get_schedule_by_class/{schedule_id}")
 async def get_schedule_by_class(schedule_id: int):
@@ -3117,8 +2945,7 @@ async def get_schedule_by_class(schedule_id: int):
     Récupère l'emploi du temps organisé par classe
     """
     try:
-        import psycopg2
-        conn = psycopg2.connect(**db_config)
+        conn = await get_connection_async(db_config)
         cur = conn.cursor()
         
         # Récupérer toutes les classes
@@ -3177,8 +3004,7 @@ async def get_schedule_by_teacher(schedule_id: int):
     Récupère l'emploi du temps organisé par professeur
     """
     try:
-        import psycopg2
-        conn = psycopg2.connect(**db_config)
+        conn = await get_connection_async(db_config)
         cur = conn.cursor()
         
         # Récupérer tous les professeurs
@@ -3234,277 +3060,43 @@ async def get_schedule_by_teacher(schedule_id: int):
 
 
 @app.get("/get_schedule/{schedule_id}")
-async def get_schedule_data(schedule_id: int):
+async def get_schedule_data(schedule_id: int, request: Request):
     """
-    Récupère les données complètes d'un emploi du temps pour affichage
+    Récupère les données complètes d'un emploi du temps pour affichage (mise en cache)
     """
     try:
-        import psycopg2
-        conn = psycopg2.connect(**db_config)
-        cur = conn.cursor()
-        
-        # Récupérer les entrées de l'emploi du temps
-        cur.execute("""
-            SELECT 
-                day_of_week,
-                period_number,
-                class_name,
-                subject_name,
-                teacher_name,
-                room,
-                is_parallel_group
-            FROM schedule_entries 
-            WHERE schedule_id = %s
-            ORDER BY day_of_week, period_number, class_name
-        """, (schedule_id,))
-        
-        entries = cur.fetchall()
-        cur.close()
-        conn.close()
-        
-        if not entries:
+        view = timetable_views.get_view(db_config, schedule_id, "grid", timetable_views.build_grid)
+        if view is None:
             return {"success": False, "error": "Emploi du temps non trouvé"}
-        
-        # Organiser les données par jour et période
-        schedule_grid = {}
-        days = ['Dimanche', 'Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi']
-        
-        for entry in entries:
-            day_name = days[entry[0] - 1] if entry[0] <= len(days) else f"Jour {entry[0]}"
-            period = entry[1]
-            
-            if day_name not in schedule_grid:
-                schedule_grid[day_name] = {}
-            if period not in schedule_grid[day_name]:
-                schedule_grid[day_name][period] = []
-                
-            schedule_grid[day_name][period].append({
-                'class_name': entry[2],
-                'subject': entry[3],
-                'teacher_name': entry[4],
-                'room': entry[5],
-                'is_parallel': entry[6]
-            })
-        
-        return {
-            "success": True,
-            "schedule_id": schedule_id,
-            "schedule_grid": schedule_grid,
-            "total_entries": len(entries),
-            "days": days
-        }
-        
+        return _view_response(request, view)
+
     except Exception as e:
         logger.error(f"Erreur récupération emploi du temps {schedule_id}: {e}")
         return {"success": False, "error": str(e)}
 
 @app.get("/api/schedule_by_class/{schedule_id}")
-async def get_schedule_by_class_new(schedule_id: int):
-    """Retourne l'emploi du temps organisé par classe (format amélioré)"""
-    conn = psycopg2.connect(**db_config)
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
+async def get_schedule_by_class_new(schedule_id: int, request: Request):
+    """Retourne l'emploi du temps organisé par classe (format amélioré, mis en cache)"""
     try:
-        # Vérifier que le schedule existe
-        cur.execute("SELECT COUNT(*) as count FROM schedules WHERE schedule_id = %s", (schedule_id,))
-        if cur.fetchone()['count'] == 0:
-            raise HTTPException(status_code=404, detail="Emploi du temps non trouvé")
-        
-        # Récupérer les entrées par classe
-        cur.execute("""
-            SELECT 
-                se.class_name,
-                se.day_of_week,
-                se.period_number,
-                COALESCE(se.subject, se.subject_name) as subject,
-                se.teacher_name,
-                CASE 
-                    WHEN se.period_number IS NOT NULL THEN 
-                        (6 + se.period_number)::text || ':00'
-                    ELSE '00:00'
-                END as start_time,
-                COALESCE(se.is_parallel_group, false) as is_parallel,
-                se.group_id
-            FROM schedule_entries se
-            WHERE se.schedule_id = %s
-            ORDER BY se.class_name, se.day_of_week, se.period_number
-        """, (schedule_id,))
-        
-        entries = cur.fetchall()
-        
-        if not entries:
-            return {
-                "success": False,
-                "message": "Aucune donnée d'emploi du temps trouvée",
-                "schedule_id": schedule_id,
-                "classes": {}
-            }
-        
-        # Organiser par classe
-        classes_schedule = {}
-        day_names = ['Dimanche', 'Lundi', 'Mardi', 'Mercredi', 'Jeudi']
-        hebrew_days = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי']
-        
-        for entry in entries:
-            class_name = entry['class_name']
-            day = entry['day_of_week']
-            period = entry['period_number']
-            
-            if class_name not in classes_schedule:
-                classes_schedule[class_name] = {
-                    'class_name': class_name,
-                    'days': {},
-                    'stats': {'total_hours': 0, 'subjects': set(), 'teachers': set()}
-                }
-            
-            day_name = day_names[day] if day < len(day_names) else f'Jour {day}'
-            hebrew_day = hebrew_days[day] if day < len(hebrew_days) else f'יום {day}'
-            
-            if day_name not in classes_schedule[class_name]['days']:
-                classes_schedule[class_name]['days'][day_name] = {
-                    'hebrew_name': hebrew_day,
-                    'periods': {}
-                }
-            
-            classes_schedule[class_name]['days'][day_name]['periods'][period] = {
-                'subject': entry['subject'],
-                'teacher': entry['teacher_name'],
-                'time': entry['start_time'],
-                'is_parallel': bool(entry['is_parallel']),
-                'group_id': entry['group_id']
-            }
-            
-            # Statistiques
-            classes_schedule[class_name]['stats']['total_hours'] += 1
-            classes_schedule[class_name]['stats']['subjects'].add(entry['subject'])
-            classes_schedule[class_name]['stats']['teachers'].add(entry['teacher_name'])
-        
-        # Convertir sets en listes pour JSON
-        for class_name in classes_schedule:
-            stats = classes_schedule[class_name]['stats']
-            stats['subjects'] = list(stats['subjects'])
-            stats['teachers'] = list(stats['teachers'])
-            stats['subjects_count'] = len(stats['subjects'])
-            stats['teachers_count'] = len(stats['teachers'])
-        
-        return {
-            "success": True,
-            "schedule_id": schedule_id,
-            "total_classes": len(classes_schedule),
-            "classes": classes_schedule,
-            "view_type": "by_class"
-        }
-        
+        view = timetable_views.get_view(db_config, schedule_id, "by_class", timetable_views.build_by_class)
     except Exception as e:
         logger.error(f"Erreur récupération emploi du temps par classe: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cur.close()
-        conn.close()
+    if view is None:
+        raise HTTPException(status_code=404, detail="Emploi du temps non trouvé")
+    return _view_response(request, view)
 
 @app.get("/api/schedule_by_teacher/{schedule_id}")
-async def get_schedule_by_teacher_new(schedule_id: int):
-    """Retourne l'emploi du temps organisé par professeur (format amélioré)"""
-    conn = psycopg2.connect(**db_config)
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
+async def get_schedule_by_teacher_new(schedule_id: int, request: Request):
+    """Retourne l'emploi du temps organisé par professeur (format amélioré, mis en cache)"""
     try:
-        # Vérifier que le schedule existe
-        cur.execute("SELECT COUNT(*) as count FROM schedules WHERE schedule_id = %s", (schedule_id,))
-        if cur.fetchone()['count'] == 0:
-            raise HTTPException(status_code=404, detail="Emploi du temps non trouvé")
-        
-        # Récupérer les entrées par professeur
-        cur.execute("""
-            SELECT 
-                se.teacher_name,
-                se.day_of_week,
-                se.period_number,
-                COALESCE(se.subject, se.subject_name) as subject,
-                se.class_name,
-                CASE 
-                    WHEN se.period_number IS NOT NULL THEN 
-                        (6 + se.period_number)::text || ':00'
-                    ELSE '00:00'
-                END as start_time,
-                COALESCE(se.is_parallel_group, false) as is_parallel,
-                se.group_id
-            FROM schedule_entries se
-            WHERE se.schedule_id = %s
-            ORDER BY se.teacher_name, se.day_of_week, se.period_number
-        """, (schedule_id,))
-        
-        entries = cur.fetchall()
-        
-        if not entries:
-            return {
-                "success": False,
-                "message": "Aucune donnée d'emploi du temps trouvée",
-                "schedule_id": schedule_id,
-                "teachers": {}
-            }
-        
-        # Organiser par professeur
-        teachers_schedule = {}
-        day_names = ['Dimanche', 'Lundi', 'Mardi', 'Mercredi', 'Jeudi']
-        hebrew_days = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי']
-        
-        for entry in entries:
-            teacher_name = entry['teacher_name']
-            day = entry['day_of_week']
-            period = entry['period_number']
-            
-            if teacher_name not in teachers_schedule:
-                teachers_schedule[teacher_name] = {
-                    'teacher_name': teacher_name,
-                    'days': {},
-                    'stats': {'total_hours': 0, 'subjects': set(), 'classes': set()}
-                }
-            
-            day_name = day_names[day] if day < len(day_names) else f'Jour {day}'
-            hebrew_day = hebrew_days[day] if day < len(hebrew_days) else f'יום {day}'
-            
-            if day_name not in teachers_schedule[teacher_name]['days']:
-                teachers_schedule[teacher_name]['days'][day_name] = {
-                    'hebrew_name': hebrew_day,
-                    'periods': {}
-                }
-            
-            teachers_schedule[teacher_name]['days'][day_name]['periods'][period] = {
-                'subject': entry['subject'],
-                'class': entry['class_name'],
-                'time': entry['start_time'],
-                'is_parallel': bool(entry['is_parallel']),
-                'group_id': entry['group_id']
-            }
-            
-            # Statistiques
-            teachers_schedule[teacher_name]['stats']['total_hours'] += 1
-            teachers_schedule[teacher_name]['stats']['subjects'].add(entry['subject'])
-            teachers_schedule[teacher_name]['stats']['classes'].add(entry['class_name'])
-        
-        # Convertir sets en listes pour JSON
-        for teacher_name in teachers_schedule:
-            stats = teachers_schedule[teacher_name]['stats']
-            stats['subjects'] = list(stats['subjects'])
-            stats['classes'] = list(stats['classes'])
-            stats['subjects_count'] = len(stats['subjects'])
-            stats['classes_count'] = len(stats['classes'])
-        
-        return {
-            "success": True,
-            "schedule_id": schedule_id,
-            "total_teachers": len(teachers_schedule),
-            "teachers": teachers_schedule,
-            "view_type": "by_teacher"
-        }
-        
+        view = timetable_views.get_view(db_config, schedule_id, "by_teacher", timetable_views.build_by_teacher)
     except Exception as e:
         logger.error(f"Erreur récupération emploi du temps par professeur: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cur.close()
-        conn.close()
+    if view is None:
+        raise HTTPException(status_code=404, detail="Emploi du temps non trouvé")
+    return _view_response(request, view)
 
 
 if __name__ == "__main__":
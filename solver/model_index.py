@@ -0,0 +1,126 @@
+"""
+model_index.py - Index précalculé pour la construction des modèles CP-SAT
+Construit une seule fois les correspondances professeur/classe/matière → cours
+et les tables de créneaux par jour, pour que chaque famille de contraintes
+lise directement les cours concernés au lieu de rebalayer toute la liste.
+"""
+import logging
+from typing import Dict, List, Tuple, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def split_names(value: Optional[str]) -> List[str]:
+    """Découpe une liste 'a, b, c' (teacher_names / class_list) en noms nettoyés"""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if v and str(v).strip()]
+    return [name.strip() for name in str(value).split(",") if name.strip()]
+
+
+def course_subject(course: Dict[str, Any]) -> str:
+    """Retourne le nom de matière normalisé d'un cours (subject ou subject_name)"""
+    return (course.get("subject") or course.get("subject_name") or "").strip()
+
+
+class ModelIndex:
+    """
+    Index des cours et créneaux utilisé par les moteurs CP-SAT.
+
+    Toutes les chaînes teacher_names / class_list sont découpées une seule fois
+    ici; les contraintes consultent ensuite les dictionnaires en O(1).
+    """
+
+    def __init__(self, courses: List[Dict], time_slots: List[Dict]):
+        self.courses = courses
+        self.time_slots = time_slots
+
+        # Positions compactes (utilisées aussi comme indices de tableaux)
+        self.course_pos: Dict[Any, int] = {}
+        self.slot_pos: Dict[Any, int] = {}
+
+        # Noms découpés par cours (même ordre que self.courses)
+        self.course_teachers: List[List[str]] = []
+        self.course_classes: List[List[str]] = []
+        self.course_subjects: List[str] = []
+
+        # Cours par entité
+        self.courses_by_teacher: Dict[str, List[Dict]] = {}
+        self.courses_by_class: Dict[str, List[Dict]] = {}
+        self.courses_by_class_subject: Dict[Tuple[str, str], List[Dict]] = {}
+        self.subjects_by_class: Dict[str, List[str]] = {}
+        self.class_to_grade: Dict[str, str] = {}
+
+        # Créneaux par jour, triés par période
+        self.slots_by_day: Dict[int, List[Dict]] = {}
+        self.days: List[int] = []
+
+        self._build()
+
+    def _build(self):
+        for pos, slot in enumerate(self.time_slots):
+            self.slot_pos[slot["slot_id"]] = pos
+            self.slots_by_day.setdefault(slot["day_of_week"], []).append(slot)
+        for day_slots in self.slots_by_day.values():
+            day_slots.sort(key=lambda s: s["period_number"])
+        self.days = sorted(self.slots_by_day)
+
+        for pos, course in enumerate(self.courses):
+            self.course_pos[course["course_id"]] = pos
+
+            teachers = split_names(course.get("teacher_names"))
+            classes = split_names(course.get("class_list"))
+            subject = course_subject(course)
+            self.course_teachers.append(teachers)
+            self.course_classes.append(classes)
+            self.course_subjects.append(subject)
+
+            for teacher in dict.fromkeys(teachers):
+                self.courses_by_teacher.setdefault(teacher, []).append(course)
+
+            grade = (course.get("grade") or "").strip()
+            for class_name in dict.fromkeys(classes):
+                self.courses_by_class.setdefault(class_name, []).append(course)
+                self.courses_by_class_subject.setdefault((class_name, subject), []).append(course)
+                self.class_to_grade.setdefault(class_name, grade)
+                if not self.class_to_grade[class_name] and grade:
+                    self.class_to_grade[class_name] = grade
+
+        for (class_name, subject) in self.courses_by_class_subject:
+            self.subjects_by_class.setdefault(class_name, []).append(subject)
+
+        logger.info(
+            f"✓ Index construit: {len(self.courses)} cours, {len(self.time_slots)} créneaux, "
+            f"{len(self.courses_by_teacher)} professeurs, {len(self.courses_by_class)} classes, "
+            f"{len(self.courses_by_class_subject)} couples classe/matière"
+        )
+
+    # ------------------------------------------------------------------
+    # Accesseurs
+    # ------------------------------------------------------------------
+
+    def day_slots(self, day: int) -> List[Dict]:
+        """Créneaux d'un jour triés par période (liste vide si aucun)"""
+        return self.slots_by_day.get(day, [])
+
+    def teacher_courses(self, teacher_name: str) -> List[Dict]:
+        return self.courses_by_teacher.get(teacher_name, [])
+
+    def class_courses(self, class_name: str) -> List[Dict]:
+        return self.courses_by_class.get(class_name, [])
+
+    def class_subject_courses(self, class_name: str, subject: str) -> List[Dict]:
+        return self.courses_by_class_subject.get((class_name, subject), [])
+
+    def class_subjects(self, class_name: str) -> List[str]:
+        return self.subjects_by_class.get(class_name, [])
+
+    def teachers_of(self, course: Dict) -> List[str]:
+        return self.course_teachers[self.course_pos[course["course_id"]]]
+
+    def classes_of(self, course: Dict) -> List[str]:
+        return self.course_classes[self.course_pos[course["course_id"]]]
+
+    def subject_of(self, course: Dict) -> str:
+        return self.course_subjects[self.course_pos[course["course_id"]]]
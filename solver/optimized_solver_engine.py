@@ -1,14 +1,16 @@
 # optimized_solver_engine.py - Version optimisée avec toutes les améliorations
 from ortools.sat.python import cp_model
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 import logging
 from datetime import datetime
 import json
 from parallel_course_handler import ParallelCourseHandler
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("optimized")
 class OptimizedScheduleSolver:
     def __init__(self, db_config=None):
         """Initialise le solver avec optimisations pour la compacité"""
@@ -38,7 +40,7 @@ class OptimizedScheduleSolver:
 
     def load_data_from_db(self):
         """Charge les données depuis solver_input et les contraintes"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -3,14 +3,15 @@ optimizer_advanced.py - Module d'optimisation avancé pour emplois du temps
 Priorité maximale : ZÉRO trou et blocs de 2h consécutives
 """
 from ortools.sat.python import cp_model
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 import logging
 from datetime import datetime
 import json
 from typing import Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass
 from enum import Enum
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,7 @@ class CourseBlock:
     classes: List[str]
     duration: int  # 1 ou 2 heures
     
+@instrument_engine("optimizer_advanced")
 class AdvancedScheduleOptimizer:
     def __init__(self, db_config=None):
         """Initialise l'optimiseur avancé avec contraintes anti-trous"""
@@ -85,7 +87,7 @@ class AdvancedScheduleOptimizer:
     
     def load_data_from_db(self):
         """Charge les données depuis la base"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -614,7 +616,7 @@ class AdvancedScheduleOptimizer:
     
     def _save_solution_to_db(self, solution):
         """Sauvegarde la solution optimisée dans la base de données"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -91,7 +91,7 @@ class ParallelCourseHandler:
         
         Args:
             model: Modèle OR-Tools
-            schedule_vars: Variables du modèle
+            schedule_vars: VarStore des variables du modèle (course_id, slot_id)
             sync_groups: Dictionnaire des groupes à synchroniser
             time_slots: Liste des créneaux
         """
@@ -109,26 +109,25 @@ class ParallelCourseHandler:
             # Cas normal: Plusieurs cours doivent être synchronisés
             logger.info(f"  → Synchronisation de {len(course_ids)} cours")
             
-            # Variable de groupe pour chaque créneau (indicateur qu'un créneau est utilisé par le groupe)
-            group_slot_vars = []
-            
+            # Variable de groupe pour chaque créneau (indicateur qu'un créneau est utilisé par le groupe).
+            # Le nombre de créneaux actifs découle des heures de chaque cours (sum == hours):
+            # l'imposer à 1 rendait infaisable tout groupe synchronisé de plus d'une heure
             for slot in time_slots:
                 # Exclure vendredi
                 if slot["day_of_week"] == 5:
                     continue
                     
                 slot_id = slot["slot_id"]
-                group_active = model.NewBoolVar(f"group_{group_id}_active_{slot_id}")
-                group_slot_vars.append(group_active)
                 
                 # Collecter TOUTES les variables de cours du groupe sur ce créneau
                 group_course_vars = []
                 for course_id in course_ids:
-                    var_name = f"course_{course_id}_slot_{slot_id}"
-                    if var_name in schedule_vars:
-                        group_course_vars.append(schedule_vars[var_name])
+                    var = schedule_vars.get(course_id, slot_id)
+                    if var is not None:
+                        group_course_vars.append(var)
                 
                 if group_course_vars:
+                    group_active = model.NewBoolVar(f"group_{group_id}_active_{slot_id}")
                     # CONTRAINTE: Si le groupe est actif sur ce créneau, 
                     # alors TOUS les cours du groupe doivent être sur ce créneau
                     for course_var in group_course_vars:
@@ -136,12 +135,6 @@ class ParallelCourseHandler:
                         constraint_count += 1
                     
                     logger.debug(f"    → Slot {slot_id}: {len(group_course_vars)} cours synchronisés")
-            
-            # CONTRAINTE FONDAMENTALE: Le groupe doit être actif sur exactement UN créneau
-            if group_slot_vars:
-                model.Add(sum(group_slot_vars) == 1)
-                constraint_count += 1
-                logger.info(f"  → Exactement 1 créneau actif parmi {len(group_slot_vars)} possibles")
         
         logger.info(f"✓ {constraint_count} contraintes de synchronisation ajoutées")
         return constraint_count
@@ -8,9 +8,11 @@ import time
 from typing import Dict, List, Any, Optional
 from ortools.sat.python import cp_model
 from simple_parallel_handler import SimpleParallelHandler
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("parallel_sync")
 class ParallelSyncSolver:
     """
     Solver avec synchronisation parfaite des cours parallèles
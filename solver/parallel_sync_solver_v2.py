@@ -9,10 +9,14 @@ from typing import Dict, List, Any, Optional, Tuple
 from ortools.sat.python import cp_model
 from collections import defaultdict
 from datetime import datetime
-import psycopg2
+from db_pool import get_connection
+from var_store import VarStore
+from schedule_metrics import count_gaps
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("parallel_sync_v2")
 class ParallelSyncSolverV2:
     """
     Solver amélioré avec:
@@ -24,9 +28,10 @@ class ParallelSyncSolverV2:
     def __init__(self):
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
+        self.num_workers = 8  # Workers CP-SAT (réduit quand plusieurs moteurs tournent en parallèle)
         self.courses = []
         self.time_slots = []
-        self.schedule_vars = {}
+        self.schedule_vars = VarStore(self.model, [], [])  # (course_id, slot_id) -> BoolVar
         self.db_config = {
             "host": "localhost",
             "database": "school_scheduler", 
@@ -40,7 +45,7 @@ class ParallelSyncSolverV2:
         logger.info("Chargement des données V2 avec analyse des heures supplémentaires...")
         
         if not db_connection:
-            db_connection = psycopg2.connect(**self.db_config)
+            db_connection = get_connection(self.db_config)
             
         cursor = db_connection.cursor()
         
@@ -139,12 +144,16 @@ class ParallelSyncSolverV2:
         logger.info("Création du modèle V2 avec gestion des heures supplémentaires...")
         
         # 1. Créer les variables de base
+        self.schedule_vars = VarStore(
+            self.model,
+            [course['course_id'] for course in self.courses],
+            [slot['slot_id'] for slot in self.time_slots]
+        )
         for course in self.courses:
             course_id = course['course_id']
             for slot in self.time_slots:
                 slot_id = slot['slot_id']
-                var_name = f"course_{course_id}_slot_{slot_id}"
-                self.schedule_vars[var_name] = self.model.NewBoolVar(var_name)
+                self.schedule_vars.add(course_id, slot_id)
         
         constraint_count = 0
         
@@ -155,9 +164,9 @@ class ParallelSyncSolverV2:
             
             course_vars = []
             for slot in self.time_slots:
-                var_name = f"course_{course_id}_slot_{slot['slot_id']}"
-                if var_name in self.schedule_vars:
-                    course_vars.append(self.schedule_vars[var_name])
+                var = self.schedule_vars.get(course_id, slot['slot_id'])
+                if var is not None:
+                    course_vars.append(var)
             
             if course_vars and hours_needed > 0:
                 self.model.Add(sum(course_vars) == hours_needed)
@@ -183,13 +192,13 @@ class ParallelSyncSolverV2:
                 base_course = group_courses[0]
                 for other_course in group_courses[1:]:
                     for slot in self.time_slots:
-                        base_var = f"course_{base_course['course_id']}_slot_{slot['slot_id']}"
-                        other_var = f"course_{other_course['course_id']}_slot_{slot['slot_id']}"
+                        base_var = self.schedule_vars.get(base_course['course_id'], slot['slot_id'])
+                        other_var = self.schedule_vars.get(other_course['course_id'], slot['slot_id'])
                         
-                        if base_var in self.schedule_vars and other_var in self.schedule_vars:
+                        if base_var is not None and other_var is not None:
                             # Les deux doivent avoir la même valeur
                             self.model.Add(
-                                self.schedule_vars[base_var] == self.schedule_vars[other_var]
+                                base_var == other_var
                             )
                             constraint_count += 1
         
@@ -198,10 +207,10 @@ class ParallelSyncSolverV2:
         for course in self.courses:
             for class_name in course.get('classes', []):
                 for slot in self.time_slots:
-                    var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                    if var_name in self.schedule_vars:
+                    var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                    if var is not None:
                         key = (class_name, slot['slot_id'])
-                        class_slot_courses[key].append(self.schedule_vars[var_name])
+                        class_slot_courses[key].append(var)
         
         for (class_name, slot_id), course_vars in class_slot_courses.items():
             if len(course_vars) > 1:
@@ -213,10 +222,10 @@ class ParallelSyncSolverV2:
         for course in self.courses:
             for teacher in course.get('teachers', []):
                 for slot in self.time_slots:
-                    var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                    if var_name in self.schedule_vars:
+                    var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                    if var is not None:
                         key = (teacher, slot['slot_id'])
-                        teacher_slot_courses[key].append(self.schedule_vars[var_name])
+                        teacher_slot_courses[key].append(var)
         
         for (teacher, slot_id), course_vars in teacher_slot_courses.items():
             if len(course_vars) > 1:
@@ -249,9 +258,9 @@ class ParallelSyncSolverV2:
                 # Interdire lundi après période 4
                 for slot in self.time_slots:
                     if slot['day_of_week'] == 1 and slot['period_number'] > 4:
-                        var_name = f"course_{course_id}_slot_{slot['slot_id']}"
-                        if var_name in self.schedule_vars:
-                            self.model.Add(self.schedule_vars[var_name] == 0)
+                        var = self.schedule_vars.get(course_id, slot['slot_id'])
+                        if var is not None:
+                            self.model.Add(var == 0)
                             constraint_count += 1
         
         return constraint_count
@@ -304,16 +313,16 @@ class ParallelSyncSolverV2:
                         
                         for course in self.courses:
                             if class_name in course.get('classes', []):
-                                before_var = f"course_{course['course_id']}_slot_{day_slots[i-1]['slot_id']}"
-                                current_var = f"course_{course['course_id']}_slot_{day_slots[i]['slot_id']}"
-                                after_var = f"course_{course['course_id']}_slot_{day_slots[i+1]['slot_id']}"
+                                before_var = self.schedule_vars.get(course['course_id'], day_slots[i-1]['slot_id'])
+                                current_var = self.schedule_vars.get(course['course_id'], day_slots[i]['slot_id'])
+                                after_var = self.schedule_vars.get(course['course_id'], day_slots[i+1]['slot_id'])
                                 
-                                if before_var in self.schedule_vars:
-                                    before_vars.append(self.schedule_vars[before_var])
-                                if current_var in self.schedule_vars:
-                                    current_vars.append(self.schedule_vars[current_var])
-                                if after_var in self.schedule_vars:
-                                    after_vars.append(self.schedule_vars[after_var])
+                                if before_var is not None:
+                                    before_vars.append(before_var)
+                                if current_var is not None:
+                                    current_vars.append(current_var)
+                                if after_var is not None:
+                                    after_vars.append(after_var)
                         
                         if before_vars and current_vars and after_vars:
                             # Un trou existe si: cours avant ET après, mais PAS au milieu
@@ -348,20 +357,20 @@ class ParallelSyncSolverV2:
                     
                     for i in range(len(day_slots) - 1):
                         if day_slots[i+1]['period_number'] == day_slots[i]['period_number'] + 1:
-                            var1_name = f"course_{course_id}_slot_{day_slots[i]['slot_id']}"
-                            var2_name = f"course_{course_id}_slot_{day_slots[i+1]['slot_id']}"
+                            var1 = self.schedule_vars.get(course_id, day_slots[i]['slot_id'])
+                            var2 = self.schedule_vars.get(course_id, day_slots[i+1]['slot_id'])
                             
-                            if var1_name in self.schedule_vars and var2_name in self.schedule_vars:
+                            if var1 is not None and var2 is not None:
                                 block_var = self.model.NewBoolVar(f"block_{course_id}_day_{day}_pos_{i}")
                                 
                                 self.model.AddBoolAnd([
-                                    self.schedule_vars[var1_name],
-                                    self.schedule_vars[var2_name]
+                                    var1,
+                                    var2
                                 ]).OnlyEnforceIf(block_var)
                                 
                                 self.model.AddBoolOr([
-                                    self.schedule_vars[var1_name].Not(),
-                                    self.schedule_vars[var2_name].Not()
+                                    var1.Not(),
+                                    var2.Not()
                                 ]).OnlyEnforceIf(block_var.Not())
                                 
                                 # Bonus pour les blocs (négatif car on minimise)
@@ -380,14 +389,14 @@ class ParallelSyncSolverV2:
                 
                 # Bonus fort pour les créneaux de bord
                 for slot in self.time_slots:
-                    var_name = f"course_{course_id}_slot_{slot['slot_id']}"
-                    if var_name in self.schedule_vars:
+                    var = self.schedule_vars.get(course_id, slot['slot_id'])
+                    if var is not None:
                         if slot['is_edge']:
                             # Bonus pour utiliser ce créneau de bord (négatif car on minimise)
-                            edge_terms.append(self.schedule_vars[var_name] * (-200))
+                            edge_terms.append(var * (-200))
                         else:
                             # Pénalité légère pour utiliser le milieu
-                            edge_terms.append(self.schedule_vars[var_name] * 50)
+                            edge_terms.append(var * 50)
         
         return edge_terms
     
@@ -396,7 +405,7 @@ class ParallelSyncSolverV2:
         logger.info(f"Résolution V2 (limite: {time_limit_seconds}s)...")
         
         self.solver.parameters.max_time_in_seconds = time_limit_seconds
-        self.solver.parameters.num_search_workers = 8
+        self.solver.parameters.num_search_workers = self.num_workers
         self.solver.parameters.log_search_progress = True
         
         start_time = time.time()
@@ -438,9 +447,9 @@ class ParallelSyncSolverV2:
             course_type = course.get('type', 'individual')
             
             for slot in self.time_slots:
-                var_name = f"course_{course_id}_slot_{slot['slot_id']}"
-                if var_name in self.schedule_vars:
-                    if self.solver.Value(self.schedule_vars[var_name]) == 1:
+                var = self.schedule_vars.get(course_id, slot['slot_id'])
+                if var is not None:
+                    if self.solver.Value(var) == 1:
                         
                         # Statistiques selon le type de créneau
                         if slot['is_edge']:
@@ -489,27 +498,8 @@ class ParallelSyncSolverV2:
         }
     
     def _count_gaps_in_solution(self, schedule):
-        """Compte les trous dans la solution générée"""
-        gaps = 0
-        
-        # Organiser par classe et jour
-        class_day_periods = defaultdict(lambda: defaultdict(list))
-        for entry in schedule:
-            class_name = entry['class_name']
-            day = entry['day']
-            period = entry['slot_index']
-            class_day_periods[class_name][day].append(period)
-        
-        # Compter les trous
-        for class_name, days in class_day_periods.items():
-            for day, periods in days.items():
-                if len(periods) >= 2:
-                    periods.sort()
-                    for i in range(periods[0], periods[-1]):
-                        if i not in periods:
-                            gaps += 1
-        
-        return gaps
+        """Compte les trous dans la solution générée (par classe et jour)"""
+        return count_gaps((entry['class_name'], entry['day'], entry['slot_index']) for entry in schedule)
 
 
 def main():
@@ -10,7 +10,9 @@ from collections import defaultdict, Counter
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import numpy as np
 from incremental_scheduler import IncrementalScheduler
+from schedule_metrics import Occupancy, cells
 
 logger = logging.getLogger(__name__)
 
@@ -77,12 +79,13 @@ class PedagogicalAnalyzer:
         
         total_score = 0
         max_possible_score = 0
+        tensors = self._class_tensors(schedule_by_class)
         
         # Analyser chaque classe
         for class_name, class_schedule in schedule_by_class.items():
             logger.info(f"📚 Analyse de la classe {class_name}")
             
-            class_analysis = self._analyze_class_schedule(class_name, class_schedule)
+            class_analysis = self._analyze_class_schedule(class_name, class_schedule, tensors)
             analysis_results['issues_found'].extend(class_analysis['issues'])
             
             # Calculer le score pédagogique
@@ -143,7 +146,44 @@ class PedagogicalAnalyzer:
         
         return dict(schedule_by_class)
     
-    def _analyze_class_schedule(self, class_name: str, class_schedule: Dict) -> Dict[str, Any]:
+    def _class_tensors(self, schedule_by_class: Dict[str, Dict]) -> Dict[str, Any]:
+        """
+        Métriques vectorisées de toutes les classes (voir schedule_metrics):
+        - holes: (classe, jour) -> périodes de trou
+        - blocks: (classe, jour) -> blocs (matière, taille) dans l'ordre de la journée
+        Un bloc est une suite de cours consécutifs de la même matière dans la journée.
+        """
+        class_index, subject_index = {}, {}
+        records = [(class_index.setdefault(class_name, len(class_index)), day, entry['slot_index'],
+                    subject_index.setdefault((class_name, entry['subject']), len(subject_index)), rank)
+                   for class_name, class_schedule in schedule_by_class.items()
+                   for day, day_schedule in class_schedule.items()
+                   for rank, entry in enumerate(day_schedule)]
+        classes, days, slots, subjects, ranks = zip(*records) if records else ((),) * 5
+        
+        occupancy = Occupancy.from_arrays(list(class_index), classes, days, slots)
+        # Axe "période" = rang du cours dans la journée triée
+        by_subject = Occupancy.from_arrays(list(subject_index), subjects, days, ranks)
+        
+        # Blocs triés par classe, jour puis rang de début
+        runs = by_subject.runs()
+        subject_class = np.fromiter((class_index[class_name] for class_name, _ in subject_index),
+                                    dtype=np.int64, count=len(subject_index))
+        order = np.lexsort((runs.start, runs.day, subject_class[runs.group]))
+        blocks = defaultdict(list)
+        for group, day, length in zip(runs.group[order].tolist(), runs.day[order].tolist(),
+                                      runs.length[order].tolist()):
+            class_name, subject = by_subject.keys[group]
+            blocks[(class_name, day)].append((subject, length))
+        
+        holes = defaultdict(list)
+        for group, day, period in cells(occupancy.holes()):
+            holes[(occupancy.keys[group], day)].append(period)
+        
+        return {'holes': holes, 'blocks': blocks}
+    
+    def _analyze_class_schedule(self, class_name: str, class_schedule: Dict,
+                                tensors: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Analyse approfondie de l'emploi du temps d'une classe"""
         issues = []
         recommendations = []
@@ -155,6 +195,9 @@ class PedagogicalAnalyzer:
         subjects_distribution = defaultdict(list)
         daily_hours = []
         
+        if tensors is None:
+            tensors = self._class_tensors({class_name: class_schedule})
+        
         # Analyser chaque jour
         for day, day_schedule in class_schedule.items():
             if not day_schedule:
@@ -166,28 +209,27 @@ class PedagogicalAnalyzer:
             daily_hours.append(day_hours)
             
             # Détecter les trous dans la journée
-            slots = [entry['slot_index'] for entry in day_schedule]
-            if slots:
-                slots.sort()
-                day_gaps = 0
-                for i in range(slots[0], slots[-1]):
-                    if i not in slots:
-                        day_gaps += 1
-                        total_gaps += 1
-                        issues.append({
-                            'type': 'gap',
-                            'severity': 'critical',
-                            'day': day,
-                            'slot': i,
-                            'message': f'Trou détecté jour {day+1} période {i+1}'
-                        })
-                
-                if day_gaps > 0:
-                    main_issues.append(f'{day_gaps} trous jour {day+1}')
+            day_holes = tensors['holes'].get((class_name, day), [])
+            for i in day_holes:
+                issues.append({
+                    'type': 'gap',
+                    'severity': 'critical',
+                    'day': day,
+                    'slot': i,
+                    'message': f'Trou détecté jour {day+1} période {i+1}'
+                })
+            total_gaps += len(day_holes)
+            
+            if day_holes:
+                main_issues.append(f'{len(day_holes)} trous jour {day+1}')
+            
+            # Blocs de matières de la journée
+            blocks = defaultdict(list)
+            for subject, length in tensors['blocks'].get((class_name, day), []):
+                blocks[subject].append(length)
             
             # Analyser la répartition des matières
-            day_subjects = [entry['subject'] for entry in day_schedule]
-            unique_subjects = set(day_subjects)
+            unique_subjects = set(blocks)
             
             if len(unique_subjects) > self.PEDAGOGICAL_RULES['max_subjects_per_day']:
                 issues.append({
@@ -200,7 +242,6 @@ class PedagogicalAnalyzer:
                 })
             
             # Analyser les blocs de matières
-            blocks = self._detect_subject_blocks(day_schedule)
             for subject, block_sizes in blocks.items():
                 subjects_distribution[subject].extend(block_sizes)
                 
@@ -278,34 +319,6 @@ class PedagogicalAnalyzer:
             'subjects_distribution': dict(subjects_distribution)
         }
     
-    def _detect_subject_blocks(self, day_schedule: List[Dict]) -> Dict[str, List[int]]:
-        """Détecte les blocs de matières consécutives"""
-        blocks = defaultdict(list)
-        
-        if not day_schedule:
-            return blocks
-        
-        current_subject = None
-        current_block_size = 0
-        
-        for entry in day_schedule:
-            subject = entry['subject']
-            
-            if subject == current_subject:
-                current_block_size += 1
-            else:
-                if current_subject and current_block_size > 0:
-                    blocks[current_subject].append(current_block_size)
-                
-                current_subject = subject
-                current_block_size = 1
-        
-        # Ajouter le dernier bloc
-        if current_subject and current_block_size > 0:
-            blocks[current_subject].append(current_block_size)
-        
-        return dict(blocks)
-    
     def _calculate_blocks_score(self, subjects_distribution: Dict[str, List[int]]) -> float:
         """Calcule le score basé sur la qualité des blocs"""
         score = 100
@@ -423,39 +436,26 @@ class PedagogicalAnalyzer:
     
     def _analyze_teacher_usage(self, entries: List[Dict]) -> Dict[str, Dict]:
         """Analyse l'utilisation des professeurs"""
-        teacher_schedules = defaultdict(lambda: defaultdict(list))
-        
-        for entry in entries:
-            teachers = entry['teacher_names'] if isinstance(entry['teacher_names'], list) else [entry['teacher_names']]
-            day = entry['day_of_week']
-            slot = entry['slot_index']
-            
-            for teacher in teachers:
-                if teacher and teacher != 'לא משובץ':
-                    teacher_schedules[teacher][day].append(slot)
+        occupancy = Occupancy.build(
+            (teacher, entry['day_of_week'], entry['slot_index'])
+            for entry in entries
+            for teacher in (entry['teacher_names'] if isinstance(entry['teacher_names'], list) else [entry['teacher_names']])
+            if teacher and teacher != 'לא משובץ'
+        )
         
         # Calculer les statistiques pour chaque professeur
-        teacher_analysis = {}
-        for teacher, schedule in teacher_schedules.items():
-            total_gaps = 0
-            total_hours = 0
-            
-            for day, slots in schedule.items():
-                if slots:
-                    slots.sort()
-                    total_hours += len(slots)
-                    # Compter les trous
-                    for i in range(slots[0], slots[-1]):
-                        if i not in slots:
-                            total_gaps += 1
-            
-            teacher_analysis[teacher] = {
-                'total_hours': total_hours,
-                'gaps': total_gaps,
-                'days_active': len([d for d in schedule.values() if d])
-            }
+        total_hours = occupancy.counts.sum(axis=(1, 2)).tolist()
+        total_gaps = occupancy.gaps().sum(axis=1).tolist()
+        days_active = occupancy.occupied.any(axis=2).sum(axis=1).tolist()
         
-        return teacher_analysis
+        return {
+            teacher: {
+                'total_hours': total_hours[group],
+                'gaps': total_gaps[group],
+                'days_active': days_active[group]
+            }
+            for group, teacher in enumerate(occupancy.keys)
+        }
     
     def _classify_issues_by_priority(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Classe les problèmes par priorité et faisabilité de correction automatique"""
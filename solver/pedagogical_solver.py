@@ -3,15 +3,17 @@ pedagogical_solver.py - Solveur pédagogique intelligent
 Crée des emplois du temps logiques avec regroupement des cours et blocs de 2h
 """
 import logging
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 from ortools.sat.python import cp_model
 from typing import Dict, List, Tuple, Optional
 import time
 from datetime import datetime
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("pedagogical")
 class PedagogicalScheduleSolver:
     """
     Solveur qui privilégie la logique pédagogique :
@@ -48,7 +50,7 @@ class PedagogicalScheduleSolver:
         
     def load_data(self):
         """Charger toutes les données nécessaires depuis la DB"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -492,7 +494,7 @@ class PedagogicalScheduleSolver:
     
     def save_to_database(self, schedule_entries: List[Dict]) -> int:
         """Sauvegarder la solution en base de données"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
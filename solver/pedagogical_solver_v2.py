@@ -3,16 +3,21 @@ pedagogical_solver_v2.py - Solveur pédagogique amélioré avec toutes les contr
 Inclut: synchronisation parallèle, zéro trou, regroupement matières, support dimanche
 """
 import logging
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 from ortools.sat.python import cp_model
 from typing import Dict, List, Tuple, Optional, Set
 import time
 from datetime import datetime
 import json
+from var_store import VarStore
+from warm_start import WarmStart
+from schedule_persistence import write_schedule
+from solver_metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
+@instrument_engine("pedagogical_v2")
 class PedagogicalScheduleSolverV2:
     """
     Solveur pédagogique complet avec:
@@ -26,9 +31,10 @@ class PedagogicalScheduleSolverV2:
         self.db_config = db_config
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
+        self.num_workers = 8  # Workers CP-SAT (réduit quand plusieurs moteurs tournent en parallèle)
         
         # Variables du modèle
-        self.schedule_vars = {}  # course_id, slot_id -> BoolVar
+        self.schedule_vars = VarStore(self.model, [], [])  # (course_id, slot_id) -> BoolVar
         self.block_vars = {}     # class_name, subject, day, period -> BoolVar (blocs 2h)
         self.parallel_sync_vars = {}  # group_id, slot_id -> BoolVar
         
@@ -65,10 +71,11 @@ class PedagogicalScheduleSolverV2:
         }
         
         self.solve_time = 0
+        self.warm_start = None  # WarmStart optionnel (voir warm_start.py)
         
     def load_data(self):
         """Charger toutes les données depuis la DB"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -165,6 +172,11 @@ class PedagogicalScheduleSolverV2:
         logger.info("=== CRÉATION DES VARIABLES ===")
         
         # 1. Variables principales : assignation cours-créneau
+        self.schedule_vars = VarStore(
+            self.model,
+            [course["course_id"] for course in self.courses],
+            [slot["slot_id"] for slot in self.time_slots]
+        )
         for course in self.courses:
             course_id = course["course_id"]
             for slot in self.time_slots:
@@ -174,8 +186,7 @@ class PedagogicalScheduleSolverV2:
                    (self.config["friday_short"] and slot["day_of_week"] == 5 and slot["period_number"] >= 5):
                     continue
                     
-                var_name = f"course_{course_id}_slot_{slot_id}"
-                self.schedule_vars[var_name] = self.model.NewBoolVar(var_name)
+                self.schedule_vars.add(course_id, slot_id)
         
         # 2. Variables pour synchronisation des groupes parallèles
         # IMPORTANT: se baser EXCLUSIVEMENT sur `solver_input` (self.courses), pas sur la table parallel_groups
@@ -287,12 +298,12 @@ class PedagogicalScheduleSolverV2:
                         slot1_course_vars = []
                         slot2_course_vars = []
                         for course in subject_courses:
-                            v1 = f"course_{course['course_id']}_slot_{slot1['slot_id']}"
-                            v2 = f"course_{course['course_id']}_slot_{slot2['slot_id']}"
-                            if v1 in self.schedule_vars:
-                                slot1_course_vars.append(self.schedule_vars[v1])
-                            if v2 in self.schedule_vars:
-                                slot2_course_vars.append(self.schedule_vars[v2])
+                            v1 = self.schedule_vars.get(course['course_id'], slot1['slot_id'])
+                            v2 = self.schedule_vars.get(course['course_id'], slot2['slot_id'])
+                            if v1 is not None:
+                                slot1_course_vars.append(v1)
+                            if v2 is not None:
+                                slot2_course_vars.append(v2)
 
                         if not slot1_course_vars or not slot2_course_vars:
                             continue
@@ -358,9 +369,9 @@ class PedagogicalScheduleSolverV2:
                     if (self.config.get("friday_off") and slot["day_of_week"] == 5) or \
                        (self.config["friday_short"] and slot["day_of_week"] == 5 and slot["period_number"] >= 5):
                         continue
-                    var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                    if var_name in self.schedule_vars:
-                        vars_for_cls_subject.append(self.schedule_vars[var_name])
+                    var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                    if var is not None:
+                        vars_for_cls_subject.append(var)
             if vars_for_cls_subject:
                 self.model.Add(sum(vars_for_cls_subject) == total_hours)
         
@@ -371,9 +382,9 @@ class PedagogicalScheduleSolverV2:
                 slot_vars = []
                 for course in self.courses:
                     if teacher_name in (course.get("_teachers") or []):
-                        var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                        if var_name in self.schedule_vars:
-                            slot_vars.append(self.schedule_vars[var_name])
+                        var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                        if var is not None:
+                            slot_vars.append(var)
                 
                 if slot_vars:
                     self.model.Add(sum(slot_vars) <= 1)
@@ -385,9 +396,9 @@ class PedagogicalScheduleSolverV2:
                 slot_vars = []
                 for course in self.courses:
                     if class_name in (course.get("_classes") or []):
-                        var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                        if var_name in self.schedule_vars:
-                            slot_vars.append(self.schedule_vars[var_name])
+                        var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                        if var is not None:
+                            slot_vars.append(var)
                 
                 if slot_vars:
                     self.model.Add(sum(slot_vars) <= 1)
@@ -441,9 +452,9 @@ class PedagogicalScheduleSolverV2:
                     sync_key = f"parallel_sync_{group_id}_slot_{slot_id}"
                     course_vars = []
                     for course in group_courses:
-                        var_name = f"course_{course['course_id']}_slot_{slot_id}"
-                        if var_name in self.schedule_vars:
-                            course_vars.append(self.schedule_vars[var_name])
+                        var = self.schedule_vars.get(course['course_id'], slot_id)
+                        if var is not None:
+                            course_vars.append(var)
                     if course_vars:
                         # Tous les cours de ce groupe doivent être 1 si sync=1, 0 sinon
                         for v in course_vars:
@@ -468,9 +479,9 @@ class PedagogicalScheduleSolverV2:
                             if course in group_courses:
                                 continue
                             if course.get("subject") == subject and course.get("grade") == grade:
-                                var_name = f"course_{course['course_id']}_slot_{slot_id}"
-                                if var_name in self.schedule_vars:
-                                    other_vars.append(self.schedule_vars[var_name])
+                                var = self.schedule_vars.get(course['course_id'], slot_id)
+                                if var is not None:
+                                    other_vars.append(var)
                         if other_vars:
                             # sum(other_vars) == 0 quand sync=1
                             self.model.Add(sum(other_vars) == 0).OnlyEnforceIf(self.parallel_sync_vars[sync_key])
@@ -501,9 +512,9 @@ class PedagogicalScheduleSolverV2:
                     course_vars = []
                     for course in self.courses:
                         if class_name in (course.get("_classes") or []):
-                            var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                            if var_name in self.schedule_vars:
-                                course_vars.append(self.schedule_vars[var_name])
+                            var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                            if var is not None:
+                                course_vars.append(var)
                     
                     if course_vars:
                         # occupied = OR(course_vars)
@@ -585,9 +596,9 @@ class PedagogicalScheduleSolverV2:
                         for course in courses:
                             for slot in self.time_slots:
                                 if slot["day_of_week"] == day:
-                                    var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                    if var_name in self.schedule_vars:
-                                        day_vars.append(self.schedule_vars[var_name])
+                                    var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                                    if var is not None:
+                                        day_vars.append(var)
                         
                         if day_vars:
                             # day_has_subject = 1 si au moins un cours ce jour
@@ -628,9 +639,9 @@ class PedagogicalScheduleSolverV2:
             teachers = set(t.strip() for t in (course.get("teacher_names") or "").split(",") if t.strip())
             if teachers & homeroom_teachers:
                 for slot in monday_afternoon:
-                    var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                    if var_name in self.schedule_vars:
-                        self.model.Add(self.schedule_vars[var_name] == 0)
+                    var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                    if var is not None:
+                        self.model.Add(var == 0)
         
         # 2. Limite quotidienne par matière (3h ou 4h pour lycée)
         hs_grades = {"י", "יא", "יב"}
@@ -657,9 +668,9 @@ class PedagogicalScheduleSolverV2:
                             course.get("subject") == subject):
                             for slot in self.time_slots:
                                 if slot["day_of_week"] == day:
-                                    var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                    if var_name in self.schedule_vars:
-                                        day_vars.append(self.schedule_vars[var_name])
+                                    var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                                    if var is not None:
+                                        day_vars.append(var)
                     
                     if day_vars:
                         self.model.Add(sum(day_vars) <= daily_limit)
@@ -692,13 +703,13 @@ class PedagogicalScheduleSolverV2:
                     if class_name in (course.get("class_list") or "").split(","):
                         # Toutes les variables du jour
                         for slot in day_slots:
-                            var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                            if var_name in self.schedule_vars:
-                                all_day_vars.append(self.schedule_vars[var_name])
+                            var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                            if var is not None:
+                                all_day_vars.append(var)
                                 
                                 # Variables de la première période
                                 if slot["slot_id"] == first_slot["slot_id"]:
-                                    first_period_vars.append(self.schedule_vars[var_name])
+                                    first_period_vars.append(var)
                 
                 if all_day_vars and first_period_vars:
                     # has_any_course = 1 si au moins un cours ce jour
@@ -731,10 +742,10 @@ class PedagogicalScheduleSolverV2:
             if subj_raw not in exempt_subjects and any(s in subject for s in difficult_subjects):
                 for slot in self.time_slots:
                     if slot["period_number"] >= 7:  # Après-midi
-                        var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                        if var_name in self.schedule_vars:
+                        var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                        if var is not None:
                             penalty = (slot["period_number"] - 6) * 15
-                            penalties.append(self.schedule_vars[var_name] * penalty)
+                            penalties.append(var * penalty)
         
         # 3. Équilibrer la charge hebdomadaire des classes
         for class_obj in self.classes:
@@ -747,9 +758,9 @@ class PedagogicalScheduleSolverV2:
                     if class_name in (course.get("class_list") or "").split(","):
                         for slot in self.time_slots:
                             if slot["day_of_week"] == day:
-                                var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                if var_name in self.schedule_vars:
-                                    day_vars.append(self.schedule_vars[var_name])
+                                var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                                if var is not None:
+                                    day_vars.append(var)
                 
                 if day_vars:
                     # Variable pour excès de charge
@@ -769,9 +780,9 @@ class PedagogicalScheduleSolverV2:
                 if class_name in (course.get("class_list") or "").split(","):
                     for slot in self.time_slots:
                         if slot["day_of_week"] == 0:  # Dimanche
-                            var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                            if var_name in self.schedule_vars:
-                                sunday_vars.append(self.schedule_vars[var_name])
+                            var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                            if var is not None:
+                                sunday_vars.append(var)
             
             if sunday_vars:
                 # Pénaliser si moins de 4 cours le dimanche
@@ -786,16 +797,32 @@ class PedagogicalScheduleSolverV2:
             self.model.Minimize(sum(penalties))
             logger.info(f"  ✓ {len(penalties)} composantes d'objectif ajoutées")
     
+    def use_warm_start(self, schedule_id=None, fix_untouched=False,
+                       touched_classes=None, touched_teachers=None):
+        """Indications (AddHint) depuis un schedule enregistré, par défaut le dernier actif"""
+        self.warm_start = WarmStart.from_db(
+            self.db_config, schedule_id,
+            fix_untouched=fix_untouched,
+            touched_classes=touched_classes,
+            touched_teachers=touched_teachers
+        )
+        return self.warm_start
+
     def solve(self, time_limit=600):
         """Résoudre le problème d'optimisation"""
         logger.info(f"\n=== RÉSOLUTION (limite: {time_limit}s) ===")
         
         self.solver.parameters.max_time_in_seconds = time_limit
-        self.solver.parameters.num_search_workers = 8
+        self.solver.parameters.num_search_workers = self.num_workers
         self.solver.parameters.log_search_progress = True
         
         start_time = time.time()
+        if self.warm_start is not None:
+            self.warm_start.apply(self.model, self.schedule_vars, self.courses, self.time_slots)
         status = self.solver.Solve(self.model)
+        if status == cp_model.INFEASIBLE and self.warm_start is not None \
+                and self.warm_start.relax(self.model):
+            status = self.solver.Solve(self.model)
         self.solve_time = time.time() - start_time
         
         logger.info(f"Statut: {self.solver.StatusName(status)}")
@@ -816,9 +843,9 @@ class PedagogicalScheduleSolverV2:
             assigned_slots = []
             
             for slot in self.time_slots:
-                var_name = f"course_{course_id}_slot_{slot['slot_id']}"
-                if var_name in self.schedule_vars:
-                    if self.solver.Value(self.schedule_vars[var_name]) == 1:
+                var = self.schedule_vars.get(course_id, slot['slot_id'])
+                if var is not None:
+                    if self.solver.Value(var) == 1:
                         assigned_slots.append(slot)
             
             # Créer une entrée pour chaque créneau assigné
@@ -907,8 +934,7 @@ class PedagogicalScheduleSolverV2:
         if not schedule:
             return None
             
-        conn = psycopg2.connect(**self.db_config)
-        cur = conn.cursor()
+        conn = get_connection(self.db_config)
         
         try:
             # Créer un nouveau schedule
@@ -920,46 +946,33 @@ class PedagogicalScheduleSolverV2:
                 "timestamp": datetime.now().isoformat()
             }
             
-            cur.execute("""
-                INSERT INTO schedules (status, metadata)
-                VALUES ('active', %s)
-                RETURNING schedule_id
-            """, (json.dumps(metadata),))
-            
-            schedule_id = cur.fetchone()[0]
-            
-            # Insérer les entrées
-            for entry in schedule:
-                cur.execute("""
-                    INSERT INTO schedule_entries (
-                        schedule_id, teacher_name, subject_name, class_name,
-                        day_of_week, period_number, room,
-                        is_parallel_group, group_id
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s
+            # Schedule + toutes les entrées en une transaction (insertion par lots)
+            schedule_id, count = write_schedule(
+                conn,
+                {"status": "active", "metadata": json.dumps(metadata)},
+                ("teacher_name", "subject_name", "class_name", "day_of_week",
+                 "period_number", "room", "is_parallel_group", "group_id"),
+                (
+                    (
+                        entry.get("teacher_name", ""),
+                        entry.get("subject", ""),
+                        entry.get("class_name", ""),
+                        entry.get("day_of_week"),
+                        entry.get("period_number"),
+                        entry.get("room", ""),
+                        entry.get("is_parallel", False),
+                        entry.get("group_id")
                     )
-                """, (
-                    schedule_id,
-                    entry.get("teacher_name", ""),
-                    entry.get("subject", ""),
-                    entry.get("class_name", ""),
-                    entry.get("day_of_week"),
-                    entry.get("period_number"),
-                    entry.get("room", ""),
-                    entry.get("is_parallel", False),
-                    entry.get("group_id")
-                ))
-            
-            conn.commit()
-            logger.info(f"✓ Schedule sauvegardé avec ID: {schedule_id}")
+                    for entry in schedule
+                )
+            )
+            logger.info(f"✓ Schedule sauvegardé avec ID: {schedule_id} ({count} entrées)")
             return schedule_id
             
         except Exception as e:
-            conn.rollback()
             logger.error(f"Erreur sauvegarde: {e}")
             raise
         finally:
-            cur.close()
             conn.close()
     
     def get_quality_score(self):
@@ -0,0 +1,306 @@
+"""
+portfolio.py - Portefeuille de moteurs exécutés en parallèle
+Chaque moteur (corrected, pédagogique V2, parallel-sync V2, intégré) tourne dans
+son propre processus avec une part des cœurs; le budget de temps est celui de
+tout le portefeuille (chargement et modèle compris). Le parent suit le meilleur
+score obtenu, arrête les moteurs restants dès que l'objectif de qualité est
+atteint, et ne fait sauvegarder que l'emploi du temps gagnant.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Marge accordée au-delà du time_limit avant d'arrêter les moteurs
+DEADLINE_GRACE = 60
+# Part du time_limit réservée au chargement et à la construction du modèle
+SETUP_SHARE = 0.2
+
+
+# ----------------------------------------------------------------------
+# Adaptateurs: (résultat sans schedule_id, fonction de sauvegarde)
+# ----------------------------------------------------------------------
+
+def _run_corrected(db_config: Dict, time_limit: int, num_workers: int) -> Tuple[Optional[Dict], Callable[[], int]]:
+    from corrected_solver_engine import CorrectedScheduleSolver
+
+    solver = CorrectedScheduleSolver(db_config)
+    solver.num_workers = num_workers
+    solver.load_data_from_db()
+    solver.create_variables()
+    solver.add_constraints()
+    schedule = solver.solve(time_limit=time_limit)
+    if not schedule:
+        return None, None
+    return {
+        'success': True,
+        'schedule': schedule,
+        'summary': solver.get_schedule_summary(schedule),
+        'solve_time': solver.solve_time,
+        'algorithm': 'corrected'
+    }, lambda: solver.save_schedule(schedule)
+
+
+def _run_pedagogical_v2(db_config: Dict, time_limit: int, num_workers: int) -> Tuple[Optional[Dict], Callable[[], int]]:
+    from pedagogical_solver_v2 import PedagogicalScheduleSolverV2
+
+    solver = PedagogicalScheduleSolverV2(db_config=db_config)
+    solver.num_workers = num_workers
+    solver.load_data()
+    solver.create_variables()
+    solver.add_constraints()
+    schedule = solver.solve(time_limit=time_limit)
+    if not schedule:
+        return None, None
+    return {
+        'success': True,
+        'schedule': schedule,
+        'summary': {
+            'total_lessons': len(schedule),
+            'parallel_lessons': sum(1 for e in schedule if e.get('is_parallel')),
+        },
+        'quality_score': solver.get_quality_score(),
+        'solve_time': solver.solve_time,
+        'features': {'pedagogical_optimization': True},
+        'algorithm': 'pedagogical_v2'
+    }, lambda: solver.save_schedule(schedule)
+
+
+def _run_parallel_sync_v2(db_config: Dict, time_limit: int, num_workers: int) -> Tuple[Optional[Dict], Callable[[], int]]:
+    from parallel_sync_solver_v2 import ParallelSyncSolverV2
+    from schedule_persistence import save_parallel_schedule_to_db
+
+    conn = get_connection(db_config)
+    try:
+        solver = ParallelSyncSolverV2()
+        solver.num_workers = num_workers
+        solver.load_data(conn)
+    finally:
+        conn.close()
+    solver.create_model()
+    result = solver.solve(time_limit_seconds=time_limit)
+    if not result or not result.get('success'):
+        return None, None
+
+    stats = result['stats']
+
+    def save() -> int:
+        save_conn = get_connection(db_config)
+        try:
+            return save_parallel_schedule_to_db(result['schedule'], save_conn)
+        finally:
+            save_conn.close()
+
+    return {
+        'success': True,
+        'schedule': result['schedule'],
+        'summary': {
+            'total_lessons': stats['total_entries'],
+            'parallel_lessons': stats['parallel_main_courses'] + stats['parallel_extra_courses'],
+        },
+        'stats': stats,
+        'quality_score': result['quality_score'],
+        'solve_time': stats['solve_time'],
+        'features': {
+            'corrected_parallel_logic': True,
+            'no_gaps': stats['gaps_detected'] == 0,
+        },
+        'algorithm': 'parallel_sync_v2'
+    }, save
+
+
+def _run_integrated(db_config: Dict, time_limit: int, num_workers: int) -> Tuple[Optional[Dict], Callable[[], int]]:
+    from integrated_solver import IntegratedScheduleSolver
+
+    solver = IntegratedScheduleSolver(db_config=db_config)
+    solver.num_workers = num_workers
+    solver.load_data()
+    solver.create_variables()
+    solver.add_constraints()
+    schedule = solver.solve(time_limit=time_limit)
+    if not schedule:
+        return None, None
+    summary = solver.get_summary()
+    metrics = summary['quality_metrics']
+    return {
+        'success': True,
+        'schedule': schedule,
+        'summary': {
+            'total_lessons': len(schedule),
+            'parallel_lessons': sum(1 for e in schedule if e.get('is_parallel')),
+            **summary,
+        },
+        'quality_score': metrics.get('quality_score'),
+        'solve_time': solver.solve_time,
+        'features': {
+            'corrected_parallel_logic': bool(metrics.get('parallel_sync_ok')),
+            'no_gaps': metrics.get('gaps_count') == 0,
+        },
+        'algorithm': 'integrated'
+    }, lambda: solver.save_schedule(schedule)
+
+
+PORTFOLIO_ENGINES = {
+    'corrected': _run_corrected,
+    'pedagogical_v2': _run_pedagogical_v2,
+    'parallel_sync_v2': _run_parallel_sync_v2,
+    'integrated': _run_integrated,
+}
+
+
+def _engine_worker(engine: str, run: Callable, db_config: Dict, time_limit: int, num_workers: int, conn) -> None:
+    """
+    Processus d'un moteur: résout avec l'adaptateur `run`, envoie le résultat,
+    puis attend l'ordre 'save' (gagnant) ou la fermeture du pipe (perdant).
+    """
+    logging.basicConfig(level=logging.INFO)
+    try:
+        result, save = run(db_config, time_limit, num_workers)
+        if result is None:
+            conn.send(("failed", "Aucune solution trouvée"))
+            return
+        conn.send(("result", result))
+
+        try:
+            command = conn.recv()
+        except EOFError:
+            return
+        if command == "save":
+            conn.send(("saved", save()))
+    except Exception as e:
+        logger.error(f"Erreur moteur {engine}: {e}", exc_info=True)
+        try:
+            conn.send(("failed", str(e)))
+        except Exception:
+            pass
+    finally:
+        conn.close()
+
+
+class PortfolioRunner:
+    """
+    Lance les moteurs sélectionnés simultanément et garde le meilleur.
+
+    Args:
+        db_config: configuration psycopg2
+        engines: noms de PORTFOLIO_ENGINES
+        time_limit: budget total du portefeuille (les moteurs tournent en même temps)
+        quality_target: score à partir duquel les moteurs restants sont arrêtés
+        score: fonction résultat -> score de qualité (0-100)
+    """
+
+    def __init__(self, db_config: Dict, engines: List[str], time_limit: int,
+                 quality_target: float, score: Callable[[Dict], float],
+                 poll_interval: float = 0.5):
+        self.db_config = db_config
+        self.engines = [e for e in engines if e in PORTFOLIO_ENGINES]
+        self.time_limit = time_limit
+        self.quality_target = quality_target
+        self.score = score
+        self.poll_interval = poll_interval
+        self.best_quality: Optional[float] = None  # aucun résultat: même un score de 0 gagne
+        self.best_engine: Optional[str] = None
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    async def run(self) -> List[Dict[str, Any]]:
+        """Retourne [{'algorithm', 'result', 'quality'}] pour les moteurs ayant réussi"""
+        if not self.engines:
+            return []
+
+        ctx = multiprocessing.get_context("spawn")
+        # Les moteurs se partagent les cœurs; leur résolution laisse la place au chargement
+        num_workers = max(1, (os.cpu_count() or 1) // len(self.engines))
+        solve_limit = max(int(self.time_limit * (1 - SETUP_SHARE)), 1)
+        running: Dict[str, Tuple[Any, Any]] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        start = time.perf_counter()
+
+        for engine in self.engines:
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_engine_worker,
+                # Adaptateur résolu ici: le processus spawn réimporte le module
+                args=(engine, PORTFOLIO_ENGINES[engine], self.db_config, solve_limit, num_workers, child_conn),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            running[engine] = (process, parent_conn)
+            self.timings[engine] = {"status": "running"}
+        logger.info(
+            f"🚀 Portefeuille lancé: {', '.join(self.engines)} "
+            f"({solve_limit}s de résolution et {num_workers} workers chacun, budget {self.time_limit}s)"
+        )
+
+        deadline = start + self.time_limit + DEADLINE_GRACE
+        finished: Dict[str, Tuple[Any, Any]] = {}
+        while running:
+            for engine, (process, conn) in list(running.items()):
+                message = None
+                if conn.poll():
+                    try:
+                        message = conn.recv()
+                    except EOFError:
+                        message = ("failed", "Processus terminé sans résultat")
+                elif not process.is_alive():
+                    message = ("failed", f"Processus terminé (code {process.exitcode})")
+                if message is None:
+                    continue
+
+                elapsed = round(time.perf_counter() - start, 2)
+                del running[engine]
+                if message[0] == "result":
+                    quality = self.score(message[1])
+                    results[engine] = {'algorithm': engine, 'result': message[1], 'quality': quality}
+                    finished[engine] = (process, conn)
+                    self.timings[engine] = {"status": "succeeded", "wall_time": elapsed, "quality": quality}
+                    logger.info(f"✅ {engine}: qualité {quality:.1f}% en {elapsed}s")
+                    if self.best_quality is None or quality > self.best_quality:
+                        self.best_quality, self.best_engine = quality, engine
+                else:
+                    self.timings[engine] = {"status": "failed", "wall_time": elapsed, "error": message[1]}
+                    logger.warning(f"❌ {engine}: {message[1]}")
+                    conn.close()
+
+            if running and self.best_quality is not None and self.best_quality >= self.quality_target:
+                logger.info(f"🏁 Objectif {self.quality_target}% atteint par {self.best_engine}, arrêt des autres moteurs")
+                self._stop(running, "stopped", start)
+            elif running and time.perf_counter() > deadline:
+                logger.warning("⏱️ Délai du portefeuille dépassé, arrêt des moteurs restants")
+                self._stop(running, "timeout", start)
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+        await self._save_winner(results, finished)
+        return list(results.values())
+
+    def _stop(self, running: Dict[str, Tuple[Any, Any]], status: str, start: float) -> None:
+        for engine, (process, conn) in running.items():
+            process.terminate()
+            conn.close()
+            self.timings[engine] = {"status": status, "wall_time": round(time.perf_counter() - start, 2)}
+        running.clear()
+
+    async def _save_winner(self, results: Dict[str, Dict], finished: Dict[str, Tuple[Any, Any]]) -> None:
+        """Fait sauvegarder le meilleur résultat par son processus, libère les autres"""
+        loop = asyncio.get_running_loop()
+        for engine, (process, conn) in finished.items():
+            if engine == self.best_engine:
+                try:
+                    conn.send("save")
+                    reply = await loop.run_in_executor(None, conn.recv)
+                    if reply[0] == "saved":
+                        results[engine]['result']['schedule_id'] = reply[1]
+                        logger.info(f"💾 {engine}: schedule {reply[1]} sauvegardé")
+                    else:
+                        logger.error(f"Sauvegarde {engine} échouée: {reply[1]}")
+                except Exception as e:
+                    logger.error(f"Sauvegarde {engine} échouée: {e}")
+            conn.close()
+            await loop.run_in_executor(None, process.join, 10)
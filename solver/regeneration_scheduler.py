@@ -0,0 +1,175 @@
+"""
+regeneration_scheduler.py - Régénération automatique différée et regroupée
+Chaque contrainte critique créée ou activée demandait une régénération complète:
+cinq modifications rapprochées lançaient cinq solves concurrents. Les demandes
+sont maintenant regroupées: la régénération part `debounce` secondes après la
+dernière demande (au plus `max_delay` secondes après la première), avec l'union
+des classes/professeurs touchés. Une demande qui arrive pendant une
+régénération l'annule (son résultat serait déjà périmé) et reprend son
+périmètre dans la prochaine.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_seconds(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"{name} invalide, valeur par défaut {default}")
+        return default
+
+
+class RegenerationRequest:
+    """Périmètre cumulé des demandes regroupées dans une même régénération"""
+
+    def __init__(self):
+        self.touched_classes = set()
+        self.touched_teachers = set()
+        self.global_scope = False  # une demande sans classe/professeur: tout régénérer
+        self.reasons = []
+        self.triggers = 0
+        self.first_at = time.monotonic()
+
+    def add(self, entity_type: Optional[str], entity_name: Optional[str],
+            reason: Optional[str] = None) -> None:
+        if entity_type == "class" and entity_name:
+            self.touched_classes.add(entity_name)
+        elif entity_type == "teacher" and entity_name:
+            self.touched_teachers.add(entity_name)
+        else:
+            self.global_scope = True
+        if reason:
+            self.reasons.append(reason)
+        self.triggers += 1
+
+    def merge(self, other: "RegenerationRequest") -> None:
+        """
+        Reprend le périmètre de `other` (solve remplacé). first_at reste celui de
+        cette demande: le délai repart de la demande qui remplace le solve, sinon
+        max_delay serait déjà écoulé et chaque modification relancerait aussitôt
+        """
+        self.touched_classes |= other.touched_classes
+        self.touched_teachers |= other.touched_teachers
+        self.global_scope = self.global_scope or other.global_scope
+        self.reasons = other.reasons + self.reasons
+        self.triggers += other.triggers
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "touched_classes": sorted(self.touched_classes),
+            "touched_teachers": sorted(self.touched_teachers),
+            "global": self.global_scope,
+            "triggers": self.triggers,
+            "reasons": self.reasons[-10:],
+        }
+
+
+class RegenerationScheduler:
+    """
+    Planificateur de régénérations, à utiliser depuis la boucle asyncio du serveur.
+
+    Args:
+        run: coroutine exécutant une régénération pour un RegenerationRequest
+        debounce: délai d'attente après la dernière demande (REGENERATION_DEBOUNCE)
+        max_delay: délai maximal après la première demande (REGENERATION_MAX_DELAY)
+    """
+
+    def __init__(self, run: Callable[[RegenerationRequest], Awaitable[Dict[str, Any]]],
+                 debounce: Optional[float] = None, max_delay: Optional[float] = None):
+        self.run = run
+        self.debounce = debounce if debounce is not None else _env_seconds("REGENERATION_DEBOUNCE", 5.0)
+        self.max_delay = max_delay if max_delay is not None else _env_seconds("REGENERATION_MAX_DELAY", 30.0)
+        self._pending: Optional[RegenerationRequest] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._fire_at: Optional[float] = None
+        self._running: Optional[asyncio.Task] = None
+        self._running_request: Optional[RegenerationRequest] = None
+        self._running_since: Optional[datetime] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.counts = {"triggers": 0, "runs": 0, "coalesced": 0, "superseded": 0, "failed": 0}
+
+    def request(self, entity_type: Optional[str] = None, entity_name: Optional[str] = None,
+                reason: Optional[str] = None) -> Dict[str, Any]:
+        """Enregistre une demande et (re)programme la régénération; retourne l'état de la file"""
+        if self._pending is None:
+            self._pending = RegenerationRequest()
+        else:
+            self.counts["coalesced"] += 1
+        self._pending.add(entity_type, entity_name, reason)
+        self.counts["triggers"] += 1
+
+        if self._running is not None and not self._running.done() and self._running_request is not None:
+            # Résultat périmé: arrêter le solve et reprendre son périmètre
+            logger.info("⏭️ Régénération en cours remplacée par une demande plus récente")
+            self._pending.merge(self._running_request)
+            self._pending.first_at = time.monotonic()
+            self._running_request = None
+            self.counts["superseded"] += 1
+            self._running.cancel()
+
+        delay = min(self.debounce, max(0.0, self._pending.first_at + self.max_delay - time.monotonic()))
+        if self._timer is not None:
+            self._timer.cancel()
+        self._fire_at = time.monotonic() + delay
+        self._timer = asyncio.get_running_loop().create_task(self._fire_after(delay))
+        return self.status()
+
+    async def _fire_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        if self._running is not None and not self._running.done():
+            # Solve remplacé: attendre la fin de son annulation avant d'en lancer un autre
+            await asyncio.wait({self._running})
+        request, self._pending = self._pending, None
+        self._timer = self._fire_at = None
+        if request is None:
+            return
+        self._running_request = request
+        self._running_since = datetime.now()
+        self._running = asyncio.get_running_loop().create_task(self._execute(request))
+
+    async def _execute(self, request: RegenerationRequest) -> None:
+        self.counts["runs"] += 1
+        logger.info(f"🔄 Régénération automatique ({request.triggers} demande(s) regroupée(s))")
+        try:
+            result = await self.run(request)
+        except asyncio.CancelledError:
+            logger.info("🛑 Régénération annulée")
+            raise
+        except Exception as e:
+            logger.error(f"Erreur régénération automatique: {e}", exc_info=True)
+            result = {"success": False, "error": str(e)}
+        if not result.get("success"):
+            self.counts["failed"] += 1
+        self.last_result = {**result, "request": request.to_dict()}
+        self.last_finished_at = datetime.now()
+        self._running_request = self._running_since = None
+
+    async def wait_idle(self) -> None:
+        """Attend qu'aucune régénération ne soit programmée ni en cours"""
+        while True:
+            task = self._timer if self._timer is not None else self._running
+            if task is None or task.done():
+                return
+            await asyncio.wait({task})
+
+    def status(self) -> Dict[str, Any]:
+        running = self._running is not None and not self._running.done()
+        return {
+            "pending": self._pending.to_dict() if self._pending else None,
+            "scheduled_in": round(max(0.0, self._fire_at - time.monotonic()), 2) if self._fire_at else None,
+            "running": self._running_request.to_dict() if running and self._running_request else None,
+            "running_since": self._running_since.isoformat() if running and self._running_since else None,
+            "last_result": self.last_result,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "debounce": self.debounce,
+            "max_delay": self.max_delay,
+            **self.counts,
+        }
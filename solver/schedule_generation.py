@@ -0,0 +1,350 @@
+"""
+schedule_generation.py - Pipeline de génération d'emploi du temps (hors FastAPI)
+Contient la logique de /generate_schedule sous forme de fonction synchrone
+pour qu'elle puisse tourner dans un processus de travail (voir solve_jobs.py)
+sans bloquer la boucle d'événements de l'API.
+"""
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from ortools.sat.python import cp_model
+
+from solver_engine_with_constraints import ScheduleSolverWithConstraints as ScheduleSolver
+from db_pool import get_connection
+from decomposition import solve_decomposed
+from solve_cache import find_cached_schedule, problem_fingerprint, request_fingerprint
+from warm_start import load_previous_schedule
+import timetable_views
+
+try:
+    from pedagogical_solver_v2 import PedagogicalScheduleSolverV2  # type: ignore
+except Exception:
+    PedagogicalScheduleSolverV2 = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, int], None]
+SolutionCallback = Callable[[Dict[str, Any]], None]
+
+
+class ScheduleGenerationError(Exception):
+    """Échec de génération à remonter tel quel au client (HTTP 500)"""
+
+
+class InfeasibleInputError(ScheduleGenerationError):
+    """Données rejetées par l'analyse de faisabilité, avant tout solve"""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__(
+            "Données infaisables, génération annulée:\n" + report.explanation()
+        )
+
+
+class InfeasibleModelError(ScheduleGenerationError):
+    """Modèle prouvé INFEASIBLE par CP-SAT, avec l'ensemble minimal de contraintes en conflit"""
+
+    def __init__(self, core):
+        self.core = core
+        super().__init__(
+            "Impossible de générer un emploi du temps (INFEASIBLE).\n" + core.explanation()
+        )
+
+
+def _noop_progress(stage: str, percent: int) -> None:
+    pass
+
+
+def _update_schedule_metadata(db_config: Dict, schedule_id: int, metadata: Dict) -> None:
+    """Met à jour les métadonnées d'un schedule pour l'API de visualisation"""
+    conn = get_connection(db_config)
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "UPDATE schedules SET metadata = %s WHERE schedule_id = %s",
+            (json.dumps(metadata), schedule_id)
+        )
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    timetable_views.invalidate(schedule_id)
+
+
+def _delete_schedule(db_config: Dict, schedule_id: int) -> None:
+    """Supprime un brouillon devenu inutile (solution finale sauvegardée)"""
+    conn = get_connection(db_config)
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM schedule_entries WHERE schedule_id = %s", (schedule_id,))
+        cur.execute("DELETE FROM schedules WHERE schedule_id = %s AND status = 'draft'", (schedule_id,))
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _apply_warm_start(solver, params: Dict[str, Any]):
+    """Active le démarrage à chaud demandé dans params (warm_start=True)"""
+    if not params.get("warm_start"):
+        return None
+    try:
+        return solver.use_warm_start(
+            schedule_id=params.get("warm_start_schedule_id"),
+            fix_untouched=params.get("fix_untouched", False),
+            touched_classes=params.get("touched_classes"),
+            touched_teachers=params.get("touched_teachers")
+        )
+    except Exception as e:
+        logger.warning(f"Démarrage à chaud impossible, résolution complète: {e}")
+        return None
+
+
+def _cached_result(solver, db_config: Dict, fingerprints: Dict[str, str],
+                   params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Résultat d'un schedule déjà généré pour les mêmes entrées, ou None"""
+    # Démarrage à chaud sur des données inchangées: le schedule existant est la réponse
+    field = "problem_fingerprint" if params.get("warm_start") else "input_fingerprint"
+    try:
+        schedule_id = find_cached_schedule(db_config, fingerprints[field], field)
+        if schedule_id is None:
+            return None
+        schedule_id, schedule = load_previous_schedule(db_config, schedule_id)
+    except Exception as e:
+        logger.warning(f"Recherche du schedule en cache impossible: {e}")
+        return None
+    if not schedule:
+        return None
+    logger.info(f"♻️ Entrées identiques au schedule {schedule_id}: résultat réutilisé sans solve")
+    return {
+        "success": True,
+        "schedule": schedule,
+        "summary": solver.get_schedule_summary(schedule),
+        "schedule_id": schedule_id,
+        "cached": True,
+        "total_entries": len(schedule),
+        **fingerprints,
+        "message": f"Emploi du temps identique déjà généré (ID {schedule_id}): {len(schedule)} créneaux"
+    }
+
+
+def _run_advanced(params: Dict[str, Any], db_config: Dict, progress: ProgressCallback,
+                  fingerprints: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+    """Voie avancée (solver pédagogique V2). Retourne None pour basculer sur la voie standard."""
+    logger.info("Mode avancé activé - utilisation du solver pédagogique V2")
+    try:
+        solver = PedagogicalScheduleSolverV2(db_config=db_config)
+        # Configurer selon les options demandées AVANT la création des variables
+        solver.config.update({
+            "zero_gaps": params.get("minimize_gaps", True),
+            "prefer_2h_blocks": True,
+            "two_hour_blocks_strict": True,
+            "friday_short": params.get("friday_short", True),
+            "friday_off": True,        # Désactiver complètement le vendredi
+            "sunday_enabled": True     # Toujours activer le dimanche
+        })
+        progress("loading", 5)
+        solver.load_data()
+        warm_start = _apply_warm_start(solver, params)
+        progress("building", 15)
+        solver.create_variables()
+        solver.add_constraints()
+
+        progress("solving", 25)
+        schedule = solver.solve(time_limit=params.get("time_limit", 600))
+
+        if not schedule:
+            logger.warning("Solver pédagogique échoué, fallback sur méthode standard")
+            return None
+
+        progress("saving", 90)
+        schedule_id = solver.save_schedule(schedule)
+        quality_score = solver.get_quality_score()
+        try:
+            _update_schedule_metadata(db_config, schedule_id, {
+                "solve_status": "OPTIMAL",
+                "walltime_sec": getattr(solver, 'solve_time', 0),
+                "advanced": True,
+                "notes": ["advanced_v2"],
+                "config": solver.config,
+                **(fingerprints or {}),
+            })
+        except Exception as e:
+            logger.warning(f"Métadonnées non mises à jour: {e}")
+
+        return {
+            "success": True,
+            "schedule_id": schedule_id,
+            "message": "Emploi du temps optimisé généré avec succès",
+            "quality_score": quality_score,
+            "advanced": True,
+            "total_entries": len(schedule),
+            "warm_start": warm_start.stats if warm_start else None,
+            "features_applied": {
+                "zero_gaps": True,
+                "parallel_sync": True,
+                "subject_grouping": True,
+                "sunday_enabled": True,
+                "friday_off": True
+            }
+        }
+    except Exception as e:
+        logger.error(f"Erreur solver pédagogique: {e}", exc_info=True)
+        return None
+
+
+def run_generate_schedule(params: Dict[str, Any], db_config: Dict,
+                          progress: Optional[ProgressCallback] = None,
+                          on_solution: Optional[SolutionCallback] = None) -> Dict[str, Any]:
+    """
+    Génère un emploi du temps complet (voie avancée puis standard en fallback).
+
+    Args:
+        params: champs de GenerateScheduleRequest (time_limit, advanced, ...)
+        db_config: configuration psycopg2
+        progress: callback(stage, percent) appelé à chaque étape
+        on_solution: callback(event) appelé pour chaque solution intermédiaire de la
+            voie standard; la dernière est enregistrée comme schedule 'draft'
+            (event["draft_schedule_id"]) jusqu'à la sauvegarde finale
+
+    Raises:
+        ScheduleGenerationError: aucune solution ou échec de sauvegarde
+    """
+    progress = progress or _noop_progress
+    advanced = bool(params.get("advanced", False))
+
+    logger.info("=== DÉBUT GÉNÉRATION EMPLOI DU TEMPS ===")
+    logger.info(f"Paramètres: time_limit={params.get('time_limit')}s, advanced={advanced}")
+
+    solver = ScheduleSolver(db_config)
+
+    logger.info("Chargement des données...")
+    progress("loading", 5)
+    solver.load_data_from_db()
+
+    # Mêmes entrées et paramètres qu'un schedule déjà enregistré: le retourner tel quel
+    problem = problem_fingerprint(solver)
+    fingerprints = {"input_fingerprint": request_fingerprint(problem, params), "problem_fingerprint": problem}
+    if params.get("reuse_cached", True):
+        cached = _cached_result(solver, db_config, fingerprints, params)
+        if cached is not None:
+            progress("done", 100)
+            return cached
+
+    # Impossibilités évidentes (capacités, groupes parallèles, limites quotidiennes)
+    # détectées en moins d'une seconde au lieu d'un solve complet, quelle que soit la voie
+    progress("checking", 10)
+    feasibility = solver.check_feasibility()
+    if not feasibility.feasible:
+        raise InfeasibleInputError(feasibility)
+
+    # Si mode avancé demandé, utiliser le solver pédagogique V2
+    if advanced and PedagogicalScheduleSolverV2:
+        result = _run_advanced(params, db_config, progress, fingerprints)
+        if result:
+            progress("done", 100)
+            return result
+
+    # Méthode standard (ou fallback)
+    warm_start = _apply_warm_start(solver, params)
+
+    if warm_start is not None:
+        # Partir de l'emploi du temps précédent: le temps demandé suffit
+        time_limit = params.get("time_limit", 600)
+    else:
+        # IMPORTANT: Utiliser un temps suffisant vu le taux d'utilisation de 95%
+        time_limit = max(params.get("time_limit", 600), 600)  # Minimum 10 minutes
+    logger.info(f"Génération avec time_limit={time_limit}s")
+
+    if advanced:
+        logger.info("Application des contraintes avancées")
+        # TODO: Implémenter l'application des contraintes spécifiques
+        # limit_consecutive, avoid_late_hard, etc.
+
+    draft = {"schedule_id": None}
+    record_solution = None
+    if on_solution is not None:
+        def record_solution(event: Dict[str, Any], intermediate) -> None:
+            try:
+                draft["schedule_id"] = solver.save_draft_schedule(
+                    intermediate, draft["schedule_id"],
+                    {"solve_status": "FEASIBLE", "intermediate": True, **event}
+                )
+                event["draft_schedule_id"] = draft["schedule_id"]
+            except Exception as e:
+                logger.warning(f"Brouillon non enregistré: {e}")
+            on_solution(event)
+
+    progress("solving", 20)
+    if params.get("decompose"):
+        schedule = solve_decomposed(solver, time_limit=time_limit, on_solution=record_solution)
+    else:
+        schedule = solver.solve(time_limit=time_limit, on_solution=record_solution)
+
+    if schedule is None:
+        logger.error("Aucune solution trouvée")
+        if solver.status_name == "INFEASIBLE":
+            # Infaisabilité prouvée par CP-SAT: doubler le temps ne changerait rien,
+            # un solve de suivi sous hypothèses isole les contraintes en conflit
+            progress("explaining", 50)
+            raise InfeasibleModelError(solver.explain_infeasibility(time_limit=min(time_limit, 60)))
+
+        # Essayer avec des paramètres plus permissifs
+        logger.info("Tentative avec paramètres assouplis...")
+        solver.solver.parameters.search_branching = cp_model.PORTFOLIO_SEARCH
+        solver.solver.parameters.linearization_level = 2
+        solver.solver.parameters.cp_model_presolve = True
+
+        progress("retrying", 50)
+        schedule = solver.solve(time_limit=time_limit * 2, on_solution=record_solution)  # Doubler le temps
+
+        if schedule is None:
+            raise ScheduleGenerationError(
+                "Impossible de générer un emploi du temps. Vérifiez les contraintes."
+            )
+
+    # Sauvegarder systématiquement si une solution existe
+    progress("saving", 90)
+    try:
+        schedule_id = solver.save_schedule(schedule)
+        logger.info(f"Schedule sauvegardé avec ID: {schedule_id}")
+
+        # IMPORTANT: nous sommes dans la voie standard (fallback). Marquer advanced=False
+        _update_schedule_metadata(db_config, schedule_id, {
+            "solve_status": "OPTIMAL" if schedule else "INFEASIBLE",
+            "walltime_sec": getattr(solver, 'solve_time', 0),
+            "advanced": False,
+            "notes": ["standard_solver"],
+            **fingerprints
+        })
+    except Exception as e:
+        logger.error(f"Erreur sauvegarde schedule: {e}", exc_info=True)
+        raise ScheduleGenerationError(f"Erreur de sauvegarde: {e}")
+
+    if draft["schedule_id"] is not None:
+        try:
+            _delete_schedule(db_config, draft["schedule_id"])
+        except Exception as e:
+            logger.warning(f"Brouillon {draft['schedule_id']} non supprimé: {e}")
+
+    summary = solver.get_schedule_summary(schedule)
+
+    logger.info("=== GÉNÉRATION TERMINÉE ===")
+    logger.info(f"Résultat: {len(schedule)} créneaux générés")
+    logger.info(f"Jours utilisés: {summary.get('days_used', [])}")
+    logger.info(f"Classes couvertes: {summary.get('classes_covered', 0)}")
+
+    progress("done", 100)
+    return {
+        "success": True,
+        "schedule": schedule,
+        "summary": summary,
+        "schedule_id": schedule_id,
+        "advanced": advanced,
+        "total_entries": len(schedule),
+        "warm_start": warm_start.stats if warm_start else None,
+        "feasibility": feasibility.to_dict(),
+        **fingerprints,
+        "message": f"Emploi du temps généré: {len(schedule)} créneaux"
+    }
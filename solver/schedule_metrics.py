@@ -0,0 +1,147 @@
+"""
+schedule_metrics.py - Noyau vectorisé des métriques de qualité d'un emploi du temps
+Un emploi du temps est converti en tenseur d'occupation dense
+groupe × jour × période (groupe = classe, professeur, (classe, matière)...),
+à partir duquel trous, amplitudes, blocs consécutifs et heures isolées sont
+calculés par opérations NumPy, sans boucle Python par jour ou par période.
+Utilisé par ConflictResolver, PedagogicalAnalyzer et les comptages de trous
+des solveurs.
+"""
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class Runs(NamedTuple):
+    """Suites de périodes consécutives occupées, triées par (groupe, jour, début)"""
+    group: np.ndarray
+    day: np.ndarray
+    start: np.ndarray
+    length: np.ndarray
+
+    @property
+    def end(self) -> np.ndarray:
+        return self.start + self.length - 1
+
+
+class Occupancy:
+    """
+    Tenseur d'occupation counts[groupe, jour, période] (nombre d'entrées).
+
+    `keys` donne la clé de chaque groupe dans l'ordre de première apparition;
+    les dimensions jour/période couvrent au moins les valeurs observées.
+    """
+
+    def __init__(self, keys: List[Hashable], counts: np.ndarray):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.counts = counts
+        self.occupied = counts > 0
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[Hashable, int, int]],
+              days: int = 0, periods: int = 0) -> "Occupancy":
+        """Construit le tenseur à partir de triplets (clé, jour, période)"""
+        records = list(records)
+        if not records:
+            return cls.from_arrays([], [], [], [], days, periods)
+        index: Dict[Hashable, int] = {}
+        keys, day_list, period_list = zip(*records)
+        groups = [index.setdefault(key, len(index)) for key in keys]
+        return cls.from_arrays(list(index), groups, day_list, period_list, days, periods)
+
+    @classmethod
+    def from_arrays(cls, keys: List[Hashable], groups: Sequence[int], day_list: Sequence[int],
+                    period_list: Sequence[int], days: int = 0, periods: int = 0) -> "Occupancy":
+        """Construit le tenseur à partir de colonnes (indice de groupe dans `keys`, jour, période)"""
+        g = np.asarray(groups, dtype=np.int64)
+        d = np.asarray(day_list, dtype=np.int64)
+        p = np.asarray(period_list, dtype=np.int64)
+        days = max(days, int(d.max()) + 1 if d.size else 0)
+        periods = max(periods, int(p.max()) + 1 if p.size else 0)
+
+        shape = (len(keys), days, periods)
+        flat = (g * days + d) * periods + p
+        counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(keys, counts)
+
+    # ------------------------------------------------------------------
+    # Métriques par (groupe, jour)
+    # ------------------------------------------------------------------
+
+    def hours(self) -> np.ndarray:
+        """Nombre d'entrées par (groupe, jour)"""
+        return self.counts.sum(axis=2)
+
+    def holes(self) -> np.ndarray:
+        """Périodes libres situées entre la première et la dernière période occupée"""
+        before = np.maximum.accumulate(self.occupied, axis=2)
+        after = np.maximum.accumulate(self.occupied[..., ::-1], axis=2)[..., ::-1]
+        return before & after & ~self.occupied
+
+    def gaps(self) -> np.ndarray:
+        """Nombre de périodes de trou par (groupe, jour)"""
+        return self.holes().sum(axis=2)
+
+    def amplitude(self) -> np.ndarray:
+        """Dernière - première période occupée + 1 par (groupe, jour), 0 si jour libre"""
+        periods = self.occupied.shape[2]
+        first = self.occupied.argmax(axis=2)
+        last = periods - 1 - self.occupied[..., ::-1].argmax(axis=2)
+        return np.where(self.occupied.any(axis=2), last - first + 1, 0)
+
+    def _shifted(self) -> Tuple[np.ndarray, np.ndarray]:
+        previous = np.zeros_like(self.occupied)
+        previous[..., 1:] = self.occupied[..., :-1]
+        following = np.zeros_like(self.occupied)
+        following[..., :-1] = self.occupied[..., 1:]
+        return previous, following
+
+    def runs(self) -> Runs:
+        """Blocs de périodes consécutives occupées"""
+        previous, following = self._shifted()
+        group, day, start = np.nonzero(self.occupied & ~previous)
+        _, _, end = np.nonzero(self.occupied & ~following)
+        return Runs(group, day, start, end - start + 1)
+
+    def max_run(self) -> np.ndarray:
+        """Plus long bloc consécutif par (groupe, jour)"""
+        runs = self.runs()
+        longest = np.zeros(self.occupied.shape[:2], dtype=np.int64)
+        np.maximum.at(longest, (runs.group, runs.day), runs.length)
+        return longest
+
+    def isolated(self) -> np.ndarray:
+        """Cellules occupées sans voisine occupée à la période précédente ou suivante"""
+        previous, following = self._shifted()
+        return self.occupied & ~previous & ~following
+
+    def day_gaps(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Écarts entre jours successifs de présence d'un groupe:
+        (groupe, jour de départ, jour d'arrivée), pour chaque paire de jours consécutifs
+        """
+        group, day = np.nonzero(self.occupied.any(axis=2))
+        same = group[1:] == group[:-1]
+        return group[1:][same], day[:-1][same], day[1:][same]
+
+
+def count_gaps(records: Iterable[Tuple[Hashable, int, int]], keys: Optional[Iterable[Hashable]] = None,
+               days: Optional[int] = None) -> int:
+    """
+    Nombre total de périodes de trou d'un emploi du temps (triplets clé, jour, période).
+    `keys` restreint le comptage à certains groupes, `days` aux premiers jours.
+    """
+    occupancy = Occupancy.build(records)
+    gaps = occupancy.gaps()
+    if keys is not None:
+        rows = sorted({occupancy.index[key] for key in keys if key in occupancy.index})
+        gaps = gaps[rows]
+    if days is not None:
+        gaps = gaps[:, :days]
+    return int(gaps.sum())
+
+
+def cells(mask: np.ndarray) -> List[Tuple[Any, ...]]:
+    """Indices (en int Python) des cellules vraies d'un masque"""
+    return list(zip(*(axis.tolist() for axis in np.nonzero(mask))))
@@ -0,0 +1,119 @@
+"""
+schedule_persistence.py - Sauvegarde des emplois du temps en base
+Fonctions partagées par l'API et les processus de travail (sans dépendance à FastAPI).
+Les entrées sont écrites par lots (execute_values) dans une seule transaction au
+lieu d'un INSERT par cours.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+# Taille des lots envoyés au serveur par execute_values
+DEFAULT_PAGE_SIZE = 1000
+
+
+def insert_schedule_entries(cur, schedule_id: int, columns: Sequence[str],
+                            rows: Iterable[Sequence[Any]],
+                            page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """
+    Insère les entrées d'un emploi du temps par lots, sur le curseur fourni
+    (la transaction reste à la charge de l'appelant).
+
+    Args:
+        columns: colonnes de schedule_entries, hors schedule_id
+        rows: tuples de valeurs dans l'ordre de `columns`
+
+    Returns:
+        nombre de lignes insérées
+    """
+    values = [(schedule_id, *row) for row in rows]
+    if not values:
+        return 0
+    execute_values(
+        cur,
+        f"INSERT INTO schedule_entries (schedule_id, {', '.join(columns)}) VALUES %s",
+        values,
+        page_size=page_size
+    )
+    return len(values)
+
+
+def write_schedule(conn, schedule_fields: Dict[str, Any], columns: Sequence[str],
+                   rows: Iterable[Sequence[Any]],
+                   page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[int, int]:
+    """
+    Crée la ligne schedules puis toutes ses entrées en une transaction.
+
+    Args:
+        schedule_fields: colonnes -> valeurs de la ligne schedules
+        columns / rows: voir insert_schedule_entries
+
+    Returns:
+        (schedule_id, nombre d'entrées)
+    """
+    names = list(schedule_fields)
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"INSERT INTO schedules ({', '.join(names)}) "
+            f"VALUES ({', '.join(['%s'] * len(names))}) RETURNING schedule_id",
+            [schedule_fields[name] for name in names]
+        )
+        schedule_id = cur.fetchone()[0]
+        count = insert_schedule_entries(cur, schedule_id, columns, rows, page_size)
+        conn.commit()
+        return schedule_id, count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _joined_teachers(teacher_names) -> str:
+    """Professeurs (liste ou chaîne) -> 'a, b'"""
+    if isinstance(teacher_names, list):
+        return ", ".join(teacher_names) if teacher_names else ""
+    return str(teacher_names) if teacher_names else ""
+
+
+def save_parallel_schedule_to_db(schedule: list, conn) -> int:
+    """Sauvegarde un emploi du temps avec synchronisation parallèle en base"""
+    try:
+        schedule_id, count = write_schedule(
+            conn,
+            {
+                "academic_year": "2024-2025",
+                "term": 1,
+                "status": "active",
+                "created_at": datetime.now(),
+                "metadata": json.dumps({
+                    "solver": "parallel_sync",
+                    "sync_status": "PERFECT",
+                    "conflicts": 0,
+                    "quality": "Synchronisation parfaite des cours parallèles"
+                })
+            },
+            ("teacher_name", "class_name", "subject_name", "day_of_week", "period_number", "is_parallel_group"),
+            (
+                (
+                    _joined_teachers(entry.get('teacher_names', [])),
+                    entry.get('class_name', ''),
+                    entry.get('subject', ''),
+                    entry.get('day', 0),
+                    entry.get('slot_index', 0),
+                    entry.get('kind') == 'parallel'
+                )
+                for entry in schedule
+            )
+        )
+        logger.info(f"Schedule sauvegardé: ID={schedule_id}, {count} entrées")
+        return schedule_id
+    except Exception as e:
+        logger.error(f"Erreur sauvegarde schedule: {e}")
+        raise e
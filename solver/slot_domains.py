@@ -0,0 +1,135 @@
+"""
+slot_domains.py - Créneaux autorisés par cours, calculés avant la construction du modèle
+Au lieu de créer une variable pour chaque couple (cours, créneau) puis d'ajouter
+des milliers de `var == 0` (vendredi, réunions, indisponibilités), on calcule
+d'abord le domaine de chaque cours à partir de:
+    - time_slots (horaires des créneaux)
+    - teachers.work_days (jours de travail, ex. "0,1,2,3,4")
+    - contraintes compilées (constraint_registry): disponibilités, vendredi
+      court, horaires d'ouverture, plages réservées
+    - règles propres au moteur (block_all / block_course)
+et seules les variables des couples réalisables sont créées.
+"""
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Jours hébreux (א' = dimanche) acceptés dans work_days
+HEBREW_DAYS = {"א": 0, "ב": 1, "ג": 2, "ד": 3, "ה": 4, "ו": 5}
+
+
+def parse_work_days(value: Any) -> Optional[Set[int]]:
+    """Jours de travail ("0,1,2,3,4", "א,ב,ג", [0, 1]...), ou None si non renseignés/illisibles"""
+    if value is None or value == "":
+        return None
+    tokens = value if isinstance(value, (list, tuple, set)) else str(value).replace(";", ",").replace(" ", ",").split(",")
+    days = set()
+    for token in tokens:
+        token = str(token).strip().strip("'\"׳")
+        if token.isdigit() and 0 <= int(token) <= 6:
+            days.add(int(token))
+        elif token in HEBREW_DAYS:
+            days.add(HEBREW_DAYS[token])
+    return days or None
+
+
+class SlotDomains:
+    """
+    Créneaux interdits par source, puis domaine autorisé de chaque cours.
+
+    Args:
+        time_slots: créneaux (slot_id, day_of_week, period_number, start_time, end_time)
+        teachers: lignes de la table teachers (teacher_name, work_days)
+        constraints: contraintes compilées (CompiledConstraint.restrict)
+    """
+
+    def __init__(self, time_slots: List[Dict], teachers: Iterable[Dict] = (), constraints: Iterable = ()):
+        self.time_slots = time_slots
+        self.slot_ids = [slot["slot_id"] for slot in time_slots]
+        # Créneaux interdits à tous, et par professeur / par cours (avec leur origine)
+        self.blocked_all: Dict[Any, str] = {}
+        self.blocked_by_teacher: Dict[str, Dict[Any, str]] = {}
+        self.blocked_by_course: Dict[Any, Dict[Any, str]] = {}
+        self.pruned = Counter()  # couples (cours, créneau) retirés, par origine
+
+        for teacher in teachers:
+            self._add_work_days(teacher)
+        for constraint in constraints:
+            constraint.restrict(self)
+
+    # ------------------------------------------------------------------
+    # Sources
+    # ------------------------------------------------------------------
+
+    def slots_where(self, predicate: Callable[[Dict], bool]) -> List[Any]:
+        return [slot["slot_id"] for slot in self.time_slots if predicate(slot)]
+
+    def block_all(self, slot_ids: Iterable[Any], reason: str) -> None:
+        """Interdit des créneaux à tous les cours"""
+        for slot_id in slot_ids:
+            self.blocked_all.setdefault(slot_id, reason)
+
+    def block_teacher(self, teacher_name: str, slot_ids: Iterable[Any], reason: str) -> None:
+        blocked = self.blocked_by_teacher.setdefault(teacher_name, {})
+        for slot_id in slot_ids:
+            blocked.setdefault(slot_id, reason)
+
+    def block_course(self, course_id: Any, slot_ids: Iterable[Any], reason: str) -> None:
+        blocked = self.blocked_by_course.setdefault(course_id, {})
+        for slot_id in slot_ids:
+            blocked.setdefault(slot_id, reason)
+
+    def _add_work_days(self, teacher: Dict) -> None:
+        work_days = parse_work_days(teacher.get("work_days"))
+        if work_days is None or not teacher.get("teacher_name"):
+            return
+        self.block_teacher(teacher["teacher_name"],
+                           self.slots_where(lambda s: s["day_of_week"] not in work_days), "work_days")
+
+    # ------------------------------------------------------------------
+    # Domaines
+    # ------------------------------------------------------------------
+
+    def blocked_for(self, course_id: Any, teachers: Iterable[str]) -> Dict[Any, str]:
+        """Créneaux interdits à un cours (slot_id -> origine)"""
+        blocked = dict(self.blocked_all)
+        for teacher in teachers:
+            for slot_id, reason in self.blocked_by_teacher.get(teacher, {}).items():
+                blocked.setdefault(slot_id, reason)
+        for slot_id, reason in self.blocked_by_course.get(course_id, {}).items():
+            blocked.setdefault(slot_id, reason)
+        return blocked
+
+    def compute(self, courses: List[Dict], teachers_of: Callable[[Dict], List[str]],
+                sync_groups: Optional[Dict[Any, List[Any]]] = None) -> Dict[Any, Set[Any]]:
+        """
+        Domaine autorisé (ensemble de slot_id) de chaque cours.
+
+        Les cours d'un même groupe parallèle ont lieu ensemble: leur domaine est
+        l'intersection des domaines des membres.
+        """
+        blocked = {course["course_id"]: self.blocked_for(course["course_id"], teachers_of(course))
+                   for course in courses}
+        for course_ids in (sync_groups or {}).values():
+            members = [course_id for course_id in course_ids if course_id in blocked]
+            union = {}
+            for course_id in members:
+                union.update(blocked[course_id])
+            for course_id in members:
+                for slot_id in union:
+                    blocked[course_id].setdefault(slot_id, "parallel_sync")
+
+        domains = {}
+        self.pruned = Counter()
+        for course_id, course_blocked in blocked.items():
+            domains[course_id] = {slot_id for slot_id in self.slot_ids if slot_id not in course_blocked}
+            self.pruned.update(course_blocked.values())
+        self.blocked = blocked
+        self.allowed = domains
+        logger.info(
+            f"✓ Domaines: {sum(len(d) for d in domains.values())}/{len(domains) * len(self.slot_ids)} "
+            f"couples (cours, créneau) réalisables; retirés: {dict(self.pruned)}"
+        )
+        return domains
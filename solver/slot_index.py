@@ -0,0 +1,87 @@
+"""
+slot_index.py - Index d'occupation des créneaux d'un emploi du temps chargé
+(jour, période) -> entrées, et occupation par classe / par professeur, tenus à
+jour à chaque modification. Les vérifications de conflits et les suggestions de
+créneaux de l'IncrementalScheduler ne parcourent plus toutes les entrées.
+"""
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Slot = Tuple[int, int]
+
+
+def entry_teachers(entry: Dict[str, Any]) -> List[str]:
+    """teacher_names d'une entrée, toujours sous forme de liste"""
+    teachers = entry.get('teacher_names')
+    return teachers if isinstance(teachers, list) else [teachers]
+
+
+class SlotOccupancy:
+    """
+    Occupation des créneaux, indexée par (day_of_week, slot_index).
+
+    Les entrées sont les dicts de IncrementalScheduler.schedule_entries; l'index
+    garde des références et doit être prévenu avant toute modification de
+    jour, de période ou de professeurs (remove, puis add après la modification).
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, Any]] = ()):
+        self._by_slot: Dict[Slot, List[Dict[str, Any]]] = defaultdict(list)
+        # Compteurs: une classe peut avoir plusieurs entrées sur un créneau (groupes)
+        self._classes: Dict[str, Counter] = defaultdict(Counter)
+        self._teachers: Dict[str, Counter] = defaultdict(Counter)
+        for entry in entries:
+            self.add(entry)
+
+    @staticmethod
+    def _slot(entry: Dict[str, Any]) -> Slot:
+        return entry['day_of_week'], entry['slot_index']
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        slot = self._slot(entry)
+        self._by_slot[slot].append(entry)
+        self._classes[entry['class_name']][slot] += 1
+        for teacher in entry_teachers(entry):
+            self._teachers[teacher][slot] += 1
+
+    def remove(self, entry: Dict[str, Any]) -> None:
+        slot = self._slot(entry)
+        entries = self._by_slot[slot]
+        for i, existing in enumerate(entries):
+            if existing is entry:
+                del entries[i]
+                break
+        else:
+            return
+        self._decrement(self._classes[entry['class_name']], slot)
+        for teacher in entry_teachers(entry):
+            self._decrement(self._teachers[teacher], slot)
+
+    @staticmethod
+    def _decrement(counter: Counter, slot: Slot) -> None:
+        counter[slot] -= 1
+        if counter[slot] <= 0:
+            del counter[slot]
+
+    def entries_at(self, day: int, slot: int) -> List[Dict[str, Any]]:
+        return self._by_slot.get((day, slot), [])
+
+    def find(self, class_name: str, subject: str, day: int, slot: int) -> Optional[Dict[str, Any]]:
+        for entry in self.entries_at(day, slot):
+            if entry['class_name'] == class_name and entry['subject'] == subject:
+                return entry
+        return None
+
+    def class_busy(self, class_name: str, day: int, slot: int) -> bool:
+        counter = self._classes.get(class_name)
+        return bool(counter) and (day, slot) in counter
+
+    def teacher_busy(self, teacher: str, day: int, slot: int) -> bool:
+        counter = self._teachers.get(teacher)
+        return bool(counter) and (day, slot) in counter
+
+    def free_slots(self, class_name: str, days: Iterable[int], slots: Iterable[int]) -> List[Slot]:
+        """Créneaux (jour, période) où la classe n'a aucun cours, dans l'ordre jour puis période"""
+        busy = self._classes.get(class_name, {})
+        slots = list(slots)
+        return [(day, slot) for day in days for slot in slots if (day, slot) not in busy]
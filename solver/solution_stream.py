@@ -0,0 +1,111 @@
+"""
+solution_stream.py - Solutions intermédiaires CP-SAT
+Callback de solution qui enregistre chaque solution améliorante (objectif, borne,
+temps écoulé) et la transmet pendant la recherche, pour pouvoir afficher et
+accepter un emploi du temps suffisant avant la fin du temps limite.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+logger = logging.getLogger(__name__)
+
+# on_solution(event, schedule)
+SolutionHandler = Callable[[Dict[str, Any], List[Dict[str, Any]]], None]
+
+
+class SolutionRecorder(cp_model.CpSolverSolutionCallback):
+    """
+    Enregistre les solutions trouvées par CP-SAT.
+
+    Chaque solution est résumée dans `solutions` (index, objective, bound, gap,
+    wall_time). L'emploi du temps est extrait dans le callback (seul endroit où
+    les valeurs sont lisibles), puis transmis à `on_solution(event, schedule)` par
+    un thread séparé: la recherche n'attend jamais le consommateur (écriture en
+    base...). Au plus une transmission toutes les `min_interval` secondes; une
+    solution arrivée pendant ce délai n'est pas perdue, la plus récente est
+    transmise à la fin du délai ou par close() à la fin du solve.
+    """
+
+    def __init__(self, extract: Callable[[Any], List[Dict[str, Any]]],
+                 on_solution: Optional[SolutionHandler] = None,
+                 min_interval: float = 5.0):
+        super().__init__()
+        self._extract = extract  # extract(values) avec values.Value(var)
+        self._on_solution = on_solution
+        self.min_interval = min_interval
+        self.solutions: List[Dict[str, Any]] = []
+        self.latest_schedule: Optional[List[Dict[str, Any]]] = None
+        self._start = time.perf_counter()
+
+        # Dernière solution pas encore transmise, partagée avec le thread d'émission
+        self._condition = threading.Condition()
+        self._pending: Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]] = None
+        self._closed = False
+        self._last_emit: Optional[float] = None
+        self._emitter: Optional[threading.Thread] = None
+        if on_solution is not None:
+            self._emitter = threading.Thread(target=self._emit_loop, name="solution-emitter", daemon=True)
+            self._emitter.start()
+
+    def on_solution_callback(self):
+        objective = self.ObjectiveValue()
+        bound = self.BestObjectiveBound()
+        event = {
+            "index": len(self.solutions) + 1,
+            "objective": objective,
+            "bound": bound,
+            "gap": abs(objective - bound) / max(abs(objective), 1.0),
+            "wall_time": round(time.perf_counter() - self._start, 3),
+        }
+        self.solutions.append(event)
+        logger.info(
+            f"💡 Solution #{event['index']}: objectif={objective:g} "
+            f"borne={bound:g} ({event['wall_time']:.1f}s)"
+        )
+
+        if self._on_solution is None:
+            return
+        schedule = self._extract(self)
+        event["total_entries"] = len(schedule)
+        with self._condition:
+            self.latest_schedule = schedule
+            self._pending = (event, schedule)  # remplace une solution plus ancienne non transmise
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Fin du solve: transmet la solution en attente et arrête le thread d'émission"""
+        if self._emitter is None:
+            return
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._emitter.join()
+        self._emitter = None
+
+    def _emit_loop(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._pending is not None:
+                        if self._closed or self._last_emit is None:
+                            break
+                        remaining = self._last_emit + self.min_interval - time.perf_counter()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    elif self._closed:
+                        return
+                    else:
+                        self._condition.wait()
+                event, schedule = self._pending
+                self._pending = None
+            self._last_emit = time.perf_counter()
+            try:
+                self._on_solution(event, schedule)
+            except Exception as e:
+                # Ne jamais interrompre la recherche à cause d'un consommateur
+                logger.warning(f"Transmission de la solution #{event['index']} impossible: {e}")
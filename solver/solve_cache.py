@@ -0,0 +1,181 @@
+"""
+solve_cache.py - Empreinte des entrées du solver et réutilisation des résultats
+Deux demandes de génération identiques (mêmes solver_input, time_slots,
+professeurs, classes, contraintes actives et paramètres) relançaient un solve
+complet. L'empreinte SHA-256 des entrées normalisées est enregistrée dans les
+métadonnées de chaque schedule sauvegardé:
+    - une demande de même empreinte retourne directement ce schedule (un
+      démarrage à chaud sur des données inchangées aussi, quels que soient
+      ses paramètres: il repartirait de ce schedule)
+    - le CpModelProto construit est sérialisé sur disque (ModelCache): un
+      nouveau solve des mêmes données avec un autre time_limit saute la
+      construction du modèle
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+from psycopg2.extras import RealDictCursor
+
+from db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Paramètres de GenerateScheduleRequest qui changent le résultat
+RESULT_PARAMS = ("advanced", "minimize_gaps", "friday_short", "limit_consecutive",
+                 "avoid_late_hard", "decompose", "time_limit")
+
+# Modules dont le code détermine le modèle construit
+MODEL_MODULES = ("solver_engine_with_constraints.py", "parallel_course_handler.py", "constraint_registry.py",
+                 "slot_domains.py", "feasibility.py", "var_store.py", "model_index.py")
+
+# Lecture binaire d'un CpModelProto: message protobuf (ortools 9.7). Le wrapper
+# natif des versions récentes n'a qu'une lecture texte, plus lente que la construction
+BINARY_PROTO = hasattr(cp_model.CpModel().Proto(), "ParseFromString")
+
+_code_version: Optional[str] = None
+
+
+def _canonical_rows(rows) -> List[str]:
+    """Lignes sérialisées de façon stable, indépendamment de leur ordre"""
+    return sorted(json.dumps(row, sort_keys=True, default=str) for row in rows)
+
+
+def code_version() -> str:
+    """Empreinte du code des modules qui construisent le modèle (calculée une fois)"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in MODEL_MODULES:
+            try:
+                with open(os.path.join(directory, name), "rb") as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(name.encode())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def problem_fingerprint(solver) -> str:
+    """Empreinte des données chargées par le solver (cours, créneaux, entités, contraintes)"""
+    constraints = [
+        {**constraint.describe(), "data": constraint.data,
+         "days": sorted(constraint.days) if constraint.days else None}
+        for constraint in solver.constraints
+    ]
+    payload = {
+        "code": code_version(),
+        "courses": _canonical_rows(solver.courses),
+        "sync_groups": {str(group_id): sorted(map(str, course_ids))
+                        for group_id, course_ids in solver.sync_groups.items()},
+        "time_slots": _canonical_rows(solver.time_slots),
+        "teachers": _canonical_rows(solver.teachers),
+        "classes": _canonical_rows(solver.classes),
+        "constraints": _canonical_rows(constraints),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def request_fingerprint(problem: str, params: Dict[str, Any]) -> str:
+    """Empreinte d'une demande: données + paramètres qui changent le résultat"""
+    payload = {"problem": problem, "params": {name: params.get(name) for name in RESULT_PARAMS}}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def find_cached_schedule(db_config: Dict, fingerprint: str, field: str = "input_fingerprint") -> Optional[int]:
+    """
+    Dernier schedule actif dont les métadonnées portent cette empreinte, ou None.
+    `field`: input_fingerprint (demande complète) ou problem_fingerprint (données seules)
+    """
+    conn = get_connection(db_config)
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT schedule_id FROM schedules
+            WHERE status = 'active' AND metadata::jsonb ->> %s = %s
+            ORDER BY schedule_id DESC
+            LIMIT 1
+        """, (field, fingerprint))
+        row = cur.fetchone()
+        return row["schedule_id"] if row else None
+    finally:
+        cur.close()
+        conn.close()
+
+
+class ModelCache:
+    """
+    CpModelProto sérialisés sur disque, avec la correspondance
+    (course_id, slot_id) -> indice de variable, indexés par empreinte du problème.
+
+    Args:
+        directory: répertoire du cache (SOLVER_MODEL_CACHE_DIR)
+        max_entries: nombre de modèles conservés, les plus anciens sont supprimés
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: Optional[int] = None):
+        self.directory = directory or os.getenv(
+            "SOLVER_MODEL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "solver_model_cache")
+        )
+        self.max_entries = max_entries or int(os.getenv("SOLVER_MODEL_CACHE_SIZE", "8"))
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".pb", base + ".vars.json"
+
+    def load(self, key: str) -> Optional[Tuple[cp_model.CpModel, List[Tuple[Any, Any, int]]]]:
+        """(modèle, [(course_id, slot_id, indice)]) ou None si absent / illisible"""
+        model_path, vars_path = self._paths(key)
+        if not BINARY_PROTO or not os.path.exists(model_path):
+            return None
+        try:
+            model = cp_model.CpModel()
+            with open(model_path, "rb") as f:
+                model.Proto().ParseFromString(f.read())
+            with open(vars_path, encoding="utf-8") as f:
+                entries = [tuple(entry) for entry in json.load(f)]
+        except Exception as e:
+            logger.warning(f"⚠️ Modèle en cache illisible ({key[:12]}): {e}")
+            return None
+        os.utime(model_path)  # Récemment utilisé: dernier évincé
+        return model, entries
+
+    def store(self, key: str, model: cp_model.CpModel, entries: List[Tuple[Any, Any, int]]) -> bool:
+        if not BINARY_PROTO:
+            return False
+        model_path, vars_path = self._paths(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Écriture dans des fichiers temporaires puis renommage: un lecteur
+            # concurrent (autre job) ne voit jamais un fichier partiel
+            with open(vars_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump([list(entry) for entry in entries], f)
+            with open(model_path + ".tmp", "wb") as f:
+                f.write(model.Proto().SerializeToString())
+            os.replace(vars_path + ".tmp", vars_path)
+            os.replace(model_path + ".tmp", model_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Modèle non mis en cache: {e}")
+            return False
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        try:
+            models = sorted(
+                (os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".pb")),
+                key=os.path.getmtime
+            )
+        except OSError:
+            return  # Fichier supprimé entre-temps par un autre job
+        for model_path in models[:max(len(models) - self.max_entries, 0)]:
+            for path in (model_path, model_path[:-3] + ".vars.json"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,492 @@
+"""
+solve_jobs.py - File de jobs de génération exécutés dans des processus séparés
+Chaque génération tourne dans son propre processus (concurrence bornée par un
+sémaphore), pour que la boucle uvicorn continue de servir /health et les lectures
+pendant un solve de 10 minutes. L'état des jobs est persisté dans la table solve_jobs.
+Les solutions intermédiaires sont diffusées aux abonnés (flux SSE) et la dernière
+peut être acceptée avant la fin de la recherche. Les contraintes sont compilées
+dans le processus serveur et transmises au job: le cache du registre de
+contraintes est conservé d'un job à l'autre.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from psycopg2.extras import RealDictCursor
+from constraint_registry import CompiledConstraintSet, load_constraints, prime_cache
+from db_pool import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Statuts possibles d'un job
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+FINAL_STATUSES = {SUCCEEDED, FAILED, CANCELLED, INTERRUPTED}
+
+SOLVE_JOBS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS solve_jobs (
+        job_id VARCHAR(36) PRIMARY KEY,
+        job_type VARCHAR(50) NOT NULL DEFAULT 'generate_schedule',
+        status VARCHAR(20) NOT NULL,
+        stage VARCHAR(50),
+        progress INTEGER DEFAULT 0,
+        params JSONB DEFAULT '{}',
+        result JSONB,
+        error TEXT,
+        schedule_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP
+    );
+"""
+
+
+def _terminate_worker(signum, frame) -> None:
+    for child in multiprocessing.active_children():
+        child.terminate()
+    os._exit(128 + signum)
+
+
+def _job_worker(params: Dict[str, Any], db_config: Dict, conn,
+                constraints: Optional[CompiledConstraintSet] = None) -> None:
+    """Point d'entrée du processus de travail: exécute la génération et renvoie
+    la progression puis le résultat par le pipe."""
+    logging.basicConfig(level=logging.INFO)
+    if constraints is not None:
+        # Compilées par le serveur: load_constraints ne relit que les empreintes
+        prime_cache(constraints)
+    # Processus non daémonique (solve_decomposed lance ses propres processus):
+    # à l'arrêt du job, arrêter aussi ces sous-processus
+    signal.signal(signal.SIGTERM, _terminate_worker)
+    from schedule_generation import run_generate_schedule, ScheduleGenerationError
+
+    def progress(stage: str, percent: int) -> None:
+        conn.send(("progress", stage, percent))
+
+    def on_solution(event: Dict[str, Any]) -> None:
+        conn.send(("solution", event))
+
+    try:
+        result = run_generate_schedule(params, db_config, progress=progress, on_solution=on_solution)
+        conn.send(("result", result))
+    except ScheduleGenerationError as e:
+        conn.send(("error", str(e)))
+    except Exception as e:
+        logger.error(f"Erreur job de génération: {e}", exc_info=True)
+        conn.send(("error", f"Erreur lors de la génération: {e}"))
+    finally:
+        conn.close()
+
+
+class SolveJobManager:
+    """
+    Gestionnaire des jobs de génération.
+
+    - submit() retourne immédiatement un job (statut 'queued')
+    - au plus `max_concurrent` processus de solve tournent simultanément
+    - get()/list_jobs() lisent l'état en mémoire, puis la table solve_jobs
+    - cancel() retire un job en attente ou termine le processus en cours
+    - subscribe() reçoit les événements (status, progress, solution) d'un job
+    - accept() arrête la recherche et active le dernier brouillon enregistré
+    - shutdown() termine les processus encore actifs (arrêt du serveur)
+
+    Les jobs terminés restent en mémoire au plus `max_retained` (les plus anciens
+    sont retirés, get() les relit alors dans solve_jobs); le résultat complet
+    (avec l'emploi du temps) n'est gardé que `result_ttl` secondes.
+    """
+
+    def __init__(self, db_config: Dict, max_concurrent: Optional[int] = None,
+                 poll_interval: float = 0.5, max_retained: Optional[int] = None,
+                 result_ttl: Optional[float] = None):
+        self.db_config = db_config
+        self.max_concurrent = max_concurrent or int(os.getenv("SOLVER_MAX_CONCURRENT_JOBS", "1"))
+        self.poll_interval = poll_interval
+        self.max_retained = max_retained or int(os.getenv("SOLVER_JOBS_RETAINED", "100"))
+        self.result_ttl = result_ttl if result_ttl is not None else float(os.getenv("SOLVER_JOB_RESULT_TTL", "900"))
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._accepting = set()  # jobs dont le processus est arrêté par accept()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._ctx = multiprocessing.get_context("spawn")
+        self._table_ready = False
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def ensure_table(self) -> None:
+        """Crée la table solve_jobs si besoin et marque les jobs orphelins
+        (serveur redémarré pendant un solve) comme interrompus."""
+        if self._table_ready:
+            return
+        conn = get_connection(self.db_config)
+        cur = conn.cursor()
+        try:
+            cur.execute(SOLVE_JOBS_TABLE_SQL)
+            cur.execute("""
+                UPDATE solve_jobs
+                SET status = %s, finished_at = %s, error = 'Serveur redémarré pendant le job'
+                WHERE status IN (%s, %s)
+            """, (INTERRUPTED, datetime.now(), QUEUED, RUNNING))
+            conn.commit()
+            self._table_ready = True
+        finally:
+            cur.close()
+            conn.close()
+
+    def _persist(self, job: Dict[str, Any]) -> None:
+        try:
+            self.ensure_table()
+            conn = get_connection(self.db_config)
+            cur = conn.cursor()
+            try:
+                cur.execute("""
+                    INSERT INTO solve_jobs (
+                        job_id, job_type, status, stage, progress, params, result,
+                        error, schedule_id, created_at, started_at, finished_at
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (job_id) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        stage = EXCLUDED.stage,
+                        progress = EXCLUDED.progress,
+                        result = EXCLUDED.result,
+                        error = EXCLUDED.error,
+                        schedule_id = EXCLUDED.schedule_id,
+                        started_at = EXCLUDED.started_at,
+                        finished_at = EXCLUDED.finished_at
+                """, (
+                    job["job_id"], job["job_type"], job["status"], job["stage"], job["progress"],
+                    json.dumps(job["params"]),
+                    json.dumps(job["result"], default=str) if job["result"] is not None else None,
+                    job["error"], job["schedule_id"],
+                    job["created_at"], job["started_at"], job["finished_at"]
+                ))
+                conn.commit()
+            finally:
+                cur.close()
+                conn.close()
+        except Exception as e:
+            # La persistance ne doit jamais faire échouer le job lui-même
+            logger.warning(f"Persistance du job {job['job_id']} impossible: {e}")
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        snapshot = dict(job)
+        await asyncio.get_running_loop().run_in_executor(None, self._persist, snapshot)
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            conn = get_connection(self.db_config)
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            try:
+                cur.execute("SELECT * FROM solve_jobs WHERE job_id = %s", (job_id,))
+                row = cur.fetchone()
+                return dict(row) if row else None
+            finally:
+                cur.close()
+                conn.close()
+        except Exception as e:
+            logger.warning(f"Lecture du job {job_id} impossible: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # API publique
+    # ------------------------------------------------------------------
+
+    def submit(self, params: Dict[str, Any], job_type: str = "generate_schedule") -> Dict[str, Any]:
+        """Enregistre un job et planifie son exécution (à appeler depuis la boucle asyncio)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "job_type": job_type,
+            "status": QUEUED,
+            "stage": "queued",
+            "progress": 0,
+            "params": params,
+            "result": None,
+            "error": None,
+            "schedule_id": None,
+            "created_at": datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "solutions": [],
+            "draft_schedule_id": None,
+        }
+        self._prune()
+        self.jobs[job_id] = job
+        self._done_events[job_id] = asyncio.Event()
+        asyncio.get_running_loop().create_task(self._run(job_id))
+        logger.info(f"Job {job_id} mis en file ({self.queue_position(job_id)} en attente)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id) or self._load(job_id)
+
+    def full_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Résultat complet (avec l'emploi du temps) tant que le job est en mémoire"""
+        return self._results.get(job_id)
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        jobs = sorted(self.jobs.values(), key=lambda j: j["created_at"], reverse=True)
+        return jobs[:limit]
+
+    def queue_position(self, job_id: str) -> int:
+        queued = [j for j in self.jobs.values() if j["status"] == QUEUED]
+        queued.sort(key=lambda j: j["created_at"])
+        for position, job in enumerate(queued):
+            if job["job_id"] == job_id:
+                return position
+        return 0
+
+    async def wait(self, job_id: str) -> Dict[str, Any]:
+        """Attend la fin d'un job sans bloquer la boucle d'événements"""
+        job = self.jobs[job_id]
+        await self._done_events[job_id].wait()
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] in FINAL_STATUSES:
+            return job
+
+        self._stop_process(job_id)
+        self._finish(job, CANCELLED, error="Annulé par l'utilisateur")
+        await self._save(job)
+        return job
+
+    async def accept(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Accepte la dernière solution intermédiaire: arrête le solve et passe le
+        brouillon en 'active'. Lève ValueError si aucun brouillon n'est disponible.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job["status"] != RUNNING or job["draft_schedule_id"] is None:
+            raise ValueError("Aucune solution intermédiaire à accepter pour ce job")
+
+        self._accepting.add(job_id)
+        self._stop_process(job_id)
+        schedule_id = job["draft_schedule_id"]
+        latest = job["solutions"][-1] if job["solutions"] else {}
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._activate_schedule, schedule_id)
+        except Exception as e:
+            self._finish(job, FAILED, error=f"Activation du brouillon impossible: {e}")
+            await self._save(job)
+            raise
+        finally:
+            self._accepting.discard(job_id)
+        if job["status"] in FINAL_STATUSES:  # le solve s'est terminé entre-temps
+            return job
+
+        job["schedule_id"] = schedule_id
+        job["result"] = {
+            "success": True,
+            "schedule_id": schedule_id,
+            "accepted_early": True,
+            "objective": latest.get("objective"),
+            "bound": latest.get("bound"),
+            "total_entries": latest.get("total_entries"),
+            "message": "Solution intermédiaire acceptée"
+        }
+        self._finish(job, SUCCEEDED)
+        await self._save(job)
+        logger.info(f"Job {job_id}: solution intermédiaire acceptée (schedule {schedule_id})")
+        return job
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(job_id, [])
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self._subscribers.pop(job_id, None)
+
+    def _prune(self) -> None:
+        """Retire les résultats expirés et les jobs terminés au-delà de max_retained"""
+        now = datetime.now()
+        finished = sorted(
+            (job for job in self.jobs.values() if job["status"] in FINAL_STATUSES),
+            key=lambda job: job["finished_at"] or job["created_at"]
+        )
+        for job in finished:
+            if job["job_id"] in self._results and (now - job["finished_at"]) > timedelta(seconds=self.result_ttl):
+                del self._results[job["job_id"]]
+        for job in finished[:max(len(finished) - self.max_retained, 0)]:
+            job_id = job["job_id"]
+            if self._subscribers.get(job_id):
+                continue  # flux SSE encore ouvert
+            self.jobs.pop(job_id, None)
+            self._results.pop(job_id, None)
+            self._done_events.pop(job_id, None)
+
+    def _publish(self, job_id: str, kind: str, data: Dict[str, Any]) -> None:
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait((kind, data))
+
+    def _stop_process(self, job_id: str) -> None:
+        process = self._processes.get(job_id)
+        if process is not None and process.is_alive():
+            logger.info(f"Arrêt du processus {process.pid} (job {job_id})")
+            process.terminate()
+
+    def shutdown(self) -> None:
+        """Termine les processus de solve encore actifs (arrêt du serveur)"""
+        for job_id, process in list(self._processes.items()):
+            if process.is_alive():
+                logger.info(f"Arrêt du processus {process.pid} (job {job_id}, serveur arrêté)")
+                process.terminate()
+        for process in list(self._processes.values()):
+            process.join(timeout=5)
+
+    def _activate_schedule(self, schedule_id: int) -> None:
+        conn = get_connection(self.db_config)
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "UPDATE schedules SET status = 'active' WHERE schedule_id = %s",
+                (schedule_id,)
+            )
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        if job["status"] in FINAL_STATUSES:
+            return
+        job["status"] = status
+        job["error"] = error
+        job["finished_at"] = datetime.now()
+        if status == SUCCEEDED:
+            job["progress"] = 100
+            job["stage"] = "done"
+        self._done_events[job["job_id"]].set()
+        self._publish(job["job_id"], "status", {
+            "status": status, "error": error, "schedule_id": job["schedule_id"]
+        })
+        self._prune()
+
+    def _compile_constraints(self) -> Optional[CompiledConstraintSet]:
+        """Contraintes compilées dans ce processus (cache conservé entre les jobs)"""
+        try:
+            return load_constraints(self.db_config)
+        except Exception as e:
+            logger.warning(f"⚠️ Contraintes non précompilées, le job les chargera: {e}")
+            return None
+
+    async def _run(self, job_id: str) -> None:
+        job = self.jobs[job_id]
+        await self._save(job)
+
+        async with self._semaphore:
+            constraints = await asyncio.get_running_loop().run_in_executor(None, self._compile_constraints)
+            if job["status"] in FINAL_STATUSES:  # annulé pendant l'attente
+                return
+
+            parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+            process = self._ctx.Process(
+                target=_job_worker,
+                args=(job["params"], self.db_config, child_conn, constraints),
+                # Pas daemon: un processus daémonique ne peut pas lancer le
+                # ProcessPoolExecutor de la décomposition. cancel() et shutdown()
+                # le terminent explicitement
+                daemon=False,
+            )
+            job["status"] = RUNNING
+            job["stage"] = "starting"
+            job["started_at"] = datetime.now()
+            try:
+                process.start()
+            except Exception as e:
+                logger.error(f"Démarrage du job {job_id} impossible: {e}", exc_info=True)
+                parent_conn.close()
+                child_conn.close()
+                self._finish(job, FAILED, error=f"Démarrage du processus impossible: {e}")
+                await self._save(job)
+                return
+            child_conn.close()
+            self._processes[job_id] = process
+            await self._save(job)
+
+            try:
+                await self._pump(job, process, parent_conn)
+            except Exception as e:
+                logger.error(f"Erreur suivi du job {job_id}: {e}", exc_info=True)
+                self._finish(job, FAILED, error=str(e))
+            finally:
+                parent_conn.close()
+                self._processes.pop(job_id, None)
+                if process.is_alive():
+                    process.terminate()
+                process.join(timeout=5)
+
+            if job_id in self._accepting:  # accept() termine le job
+                return
+            if job["status"] not in FINAL_STATUSES:
+                self._finish(job, FAILED, error=f"Processus terminé sans résultat (code {process.exitcode})")
+            await self._save(job)
+            logger.info(f"Job {job_id} terminé: {job['status']}")
+
+    async def _pump(self, job: Dict[str, Any], process, conn) -> None:
+        """Relaye les messages du processus de travail jusqu'à sa fin"""
+        while job["status"] == RUNNING:
+            while conn.poll():
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    return
+                await self._handle_message(job, message)
+                if job["status"] != RUNNING:
+                    return
+            if not process.is_alive() and not conn.poll():
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def _handle_message(self, job: Dict[str, Any], message) -> None:
+        kind = message[0]
+        if kind == "progress":
+            _, stage, percent = message
+            job["stage"] = stage
+            job["progress"] = percent
+            self._publish(job["job_id"], "progress", {"stage": stage, "progress": percent})
+            await self._save(job)
+        elif kind == "solution":
+            event = message[1]
+            job["solutions"].append(event)
+            if event.get("draft_schedule_id") is not None:
+                job["draft_schedule_id"] = event["draft_schedule_id"]
+            self._publish(job["job_id"], "solution", event)
+        elif kind == "result":
+            result = message[1]
+            self._results[job["job_id"]] = result
+            # Ne persister que le résumé: l'emploi du temps est déjà dans schedule_entries
+            job["result"] = {k: v for k, v in result.items() if k != "schedule"}
+            job["schedule_id"] = result.get("schedule_id")
+            self._finish(job, SUCCEEDED)
+        elif kind == "error":
+            self._finish(job, FAILED, error=message[1])
@@ -1,15 +1,35 @@
 # solver_engine_with_constraints.py - Version corrigée avec meilleure distribution
 from ortools.sat.python import cp_model
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
 import logging
+import time
 from datetime import datetime
 import json
 from parallel_course_handler import ParallelCourseHandler
+from model_index import ModelIndex
+from var_store import VarStore
+from slot_domains import SlotDomains
+from constraint_registry import CompiledConstraintSet, load_constraints
+from feasibility import analyze as analyze_feasibility
+from infeasibility import ConstraintGates, minimal_core
+from solve_cache import ModelCache, problem_fingerprint
+from solution_stream import SolutionRecorder
+from warm_start import WarmStart
+from schedule_persistence import insert_schedule_entries, write_schedule
+from schedule_metrics import count_gaps
+from solver_metrics import instrument_engine
 # Removed fixed_extraction import - functions integrated directly
 
 logger = logging.getLogger(__name__)
 
+# Colonnes de schedule_entries écrites par save_schedule (hors schedule_id)
+ENTRY_COLUMNS = (
+    "teacher_name", "class_name", "subject",
+    "day_of_week", "period_number", "is_parallel_group", "group_id"
+)
+
+@instrument_engine("constraints")
 class ScheduleSolverWithConstraints:
     def __init__(self, db_config=None):
         """Initialise le solver avec support des contraintes personnalisées"""
@@ -25,17 +45,29 @@ class ScheduleSolverWithConstraints:
             }
         
         self.db_config = db_config
-        self.schedule_vars = {}
+        self.schedule_vars = VarStore(self.model, [], [])  # (course_id, slot_id) -> BoolVar
         self.teachers = []
         self.classes = []
         self.time_slots = []
         self.courses = []
-        self.constraints = []
+        self.constraints = CompiledConstraintSet([], [])  # constraints + institutional_constraints compilées
         self.sync_groups = {}  # Groupes de cours à synchroniser
+        self.domains = None  # SlotDomains: créneaux autorisés par cours (create_variables)
+        self.feasibility = None  # FeasibilityReport (check_feasibility)
+        self.status_name = None  # Statut CP-SAT du dernier solve (ou INFEASIBLE si rejeté avant)
+        self.gates = None  # ConstraintGates pendant explain_infeasibility
+        self.model_cache = ModelCache()  # Modèles construits, sur disque (None: désactivé)
+        self._model_key = None  # Empreinte des données du modèle construit (réutilisable tel quel)
+        self.index = None  # ModelIndex construit dans load_data_from_db
+        self.timings = {}  # Durées (s) de chargement, construction et résolution
+        self.solution_recorder = None  # Solutions intermédiaires (solve avec on_solution)
+        self.warm_start = None  # WarmStart optionnel (indications depuis le schedule précédent)
+        self.num_workers = 8  # Workers CP-SAT (réduit quand plusieurs sous-modèles tournent en parallèle)
         
     def load_data_from_db(self):
         """Charge les données depuis solver_input et les contraintes"""
-        conn = psycopg2.connect(**self.db_config)
+        load_start = time.perf_counter()
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -69,13 +101,10 @@ class ScheduleSolverWithConstraints:
             logger.info(f"✓ {len(self.courses)} cours après expansion des parallèles")
             logger.info(f"✓ {len(self.sync_groups)} groupes à synchroniser")
             
-            cur.execute("""
-                SELECT * FROM constraints 
-                WHERE is_active = TRUE
-                ORDER BY constraint_type, constraint_id
-            """)
-            self.constraints = cur.fetchall()
-            logger.info(f"✓ {len(self.constraints)} contraintes personnalisées actives")
+            # Contraintes personnalisées et institutionnelles, compilées une fois par version
+            self.constraints = load_constraints(self.db_config)
+            logger.info(f"✓ {len(self.constraints)} contraintes actives compilées, "
+                        f"{len(self.constraints.ignored)} non prises en charge")
             
             # Vérifier la faisabilité
             cur.execute("SELECT SUM(hours) as total_hours FROM solver_input")
@@ -103,116 +132,177 @@ class ScheduleSolverWithConstraints:
             cur.close()
             conn.close()
 
+        self.build_index()
+        self.timings["load_time"] = time.perf_counter() - load_start
+
+    def build_index(self):
+        """Construit l'index cours/créneaux utilisé par toutes les familles de contraintes"""
+        self.index = ModelIndex(self.courses, self.time_slots)
+        return self.index
+
+    def _vars_for(self, courses, slots):
+        """Variables de décision existantes pour les couples (cours, créneau) donnés"""
+        return self.schedule_vars.vars_for(
+            [course["course_id"] for course in courses],
+            [slot["slot_id"] for slot in slots]
+        )
+
+    def _tag(self, label):
+        """Section de contraintes conditionnée par une hypothèse (explain_infeasibility uniquement)"""
+        if self.gates is not None:
+            self.gates.begin(label)
+
+    def compute_domains(self):
+        """Créneaux autorisés de chaque cours (disponibilités, vendredi, réunions du lundi)"""
+        if self.index is None:
+            self.build_index()
+        index = self.index
+        if self.gates is None:
+            self.domains = SlotDomains(self.time_slots, self.teachers, self.constraints)
+        else:
+            # Jours de travail et contraintes personnalisées postées (conditionnées) dans add_constraints
+            self.domains = SlotDomains(self.time_slots)
+        # Plus aucun cours le vendredi
+        self.domains.block_all([slot["slot_id"] for slot in index.day_slots(5)], "friday")
+        for course_id, slots in self._monday_meeting_blocks().items():
+            self.domains.block_course(course_id, slots, "monday_meeting")
+        self.domains.compute(self.courses, index.teachers_of, self.sync_groups)
+        return self.domains
+
+    def check_feasibility(self):
+        """Analyse de faisabilité rapide, avant toute construction du modèle"""
+        domains = self.compute_domains()
+        self.feasibility = analyze_feasibility(
+            self.courses, self.index, domains.allowed, self.sync_groups, self._daily_limit,
+            classes={c["class_name"] for c in self.classes},
+            teachers={t.get("teacher_name", "") for t in self.teachers},
+        )
+        return self.feasibility
+
     def create_variables(self):
-        """Crée les variables de décision"""
+        """Crée les variables de décision des seuls couples (cours, créneau) réalisables"""
         logger.info("=== CRÉATION DES VARIABLES ===")
         
-        for course in self.courses:
-            course_id = course["course_id"]
-            
-            for slot in self.time_slots:
-                slot_id = slot["slot_id"]
-                var_name = f"course_{course_id}_slot_{slot_id}"
-                self.schedule_vars[var_name] = self.model.NewBoolVar(var_name)
-                
-        logger.info(f"✓ {len(self.schedule_vars)} variables créées")
+        self.schedule_vars = VarStore(
+            self.model,
+            [course["course_id"] for course in self.courses],
+            [slot["slot_id"] for slot in self.time_slots]
+        )
+        domains = self.compute_domains()
+        self.schedule_vars.add_all(
+            lambda course_id, slot_id: slot_id not in domains.blocked.get(course_id, ())
+        )
+        pruned = len(self.courses) * len(self.time_slots) - len(self.schedule_vars)
+        logger.info(f"✓ {len(self.schedule_vars)} variables créées ({pruned} couples impossibles écartés)")
 
     def add_constraints(self):
         """Ajoute toutes les contraintes au modèle"""
         logger.info("=== AJOUT DES CONTRAINTES ===")
+        if self.index is None:
+            self.build_index()
+        index = self.index
         constraint_count = 0
         
         # 1. CONTRAINTES DE BASE - Heures exactes pour chaque cours
         for course in self.courses:
-            course_id = course["course_id"]
-            hours = course["hours"]
-            
-            course_vars = []
-            for slot in self.time_slots:
-                var_name = f"course_{course_id}_slot_{slot['slot_id']}"
-                if var_name in self.schedule_vars:
-                    course_vars.append(self.schedule_vars[var_name])
-            
+            self._tag(f"Heures du cours {course['course_id']}: {index.subject_of(course)} "
+                      f"({course.get('class_list') or '-'}, {course.get('teacher_names') or '-'})")
+            course_vars = self._vars_for([course], self.time_slots)
             if course_vars:
-                self.model.Add(sum(course_vars) == hours)
+                self.model.Add(sum(course_vars) == course["hours"])
                 constraint_count += 1
         
         # 2. PAS DE CONFLITS PROFESSEUR
         for teacher in self.teachers:
-            teacher_name = teacher.get("teacher_name", "")
+            teacher_courses = index.teacher_courses(teacher.get("teacher_name", ""))
+            if not teacher_courses:
+                continue
+            self._tag(f"Conflits du professeur {teacher['teacher_name']}")
             for slot in self.time_slots:
-                teacher_slot_vars = []
-                
-                for course in self.courses:
-                    if teacher_name in (course.get("teacher_names") or "").split(","):
-                        var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                        if var_name in self.schedule_vars:
-                            teacher_slot_vars.append(self.schedule_vars[var_name])
-                
+                teacher_slot_vars = self._vars_for(teacher_courses, [slot])
                 if teacher_slot_vars:
                     self.model.Add(sum(teacher_slot_vars) <= 1)
                     constraint_count += 1
         
         # 3. PAS DE CONFLITS CLASSE
         for class_obj in self.classes:
-            class_name = class_obj["class_name"]
+            class_courses = index.class_courses(class_obj["class_name"])
+            if not class_courses:
+                continue
+            self._tag(f"Conflits de la classe {class_obj['class_name']}")
             for slot in self.time_slots:
-                class_slot_vars = []
-                
-                for course in self.courses:
-                    if class_name in (course.get("class_list") or "").split(","):
-                        var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                        if var_name in self.schedule_vars:
-                            class_slot_vars.append(self.schedule_vars[var_name])
-                
+                class_slot_vars = self._vars_for(class_courses, [slot])
                 if class_slot_vars:
                     self.model.Add(sum(class_slot_vars) <= 1)
                     constraint_count += 1
         
-        # 4. VENDREDI INTERDIT (plus aucun cours le vendredi)
-        for course in self.courses:
-            course_id = course["course_id"]
-            for slot in self.time_slots:
-                # Plus aucun cours le vendredi (jour 5)
-                if slot["day_of_week"] == 5:
-                    var_name = f"course_{course_id}_slot_{slot['slot_id']}"
-                    if var_name in self.schedule_vars:
-                        self.model.Add(self.schedule_vars[var_name] == 0)
-                        constraint_count += 1
-        
+        # 4. VENDREDI INTERDIT: aucune variable créée (compute_domains)
+
         logger.info(f"✓ {constraint_count} contraintes de base ajoutées")
+
+        # 4b. CONTRAINTES PERSONNALISÉES / INSTITUTIONNELLES (registre compilé)
+        # Les exclusions de créneaux sont déjà dans les domaines; reste le reste
+        if self.gates is None:
+            custom_count = self.constraints.post_to_model(index, self.schedule_vars)
+        else:
+            custom_count = self._add_gated_exclusions()
+        logger.info(f"✓ {custom_count} contraintes personnalisées ajoutées")
         
         # 5. CONTRAINTES SPÉCIFIQUES DE L'ÉCOLE
         self._add_school_specific_constraints()
         
         # 6. ✅ NOUVELLE: CONTRAINTE DE DISTRIBUTION ÉQUILIBRÉE
+        self._tag("Distribution quotidienne des classes")
         self._add_distribution_constraints()
         
         # 7. LIMITE QUOTIDIENNE PAR MATIÈRE (3h, sauf י/יא/יב: 4h)
+        self._tag("Limite quotidienne par matière")
         self._add_subject_daily_limits()
 
         # 8. SYNCHRONISATION DES COURS PARALLÈLES
+        self._tag("Synchronisation des cours parallèles")
         self._add_parallel_sync_constraints()
 
         # 9. CONTRAINTES FORTES: Blocs de matières consécutives (2×2h minimum)
+        self._tag("Blocs de matières consécutives")
         self._add_subject_block_constraints()
 
         # 10. CONTRAINTES: PAS DE TROUS (dur) + MAX 3 CONSÉCUTIFS (dur)
+        self._tag("Pas de trous")
         self._add_no_gaps_constraints()
+        self._tag("Heures consécutives par matière")
         self._add_subject_run_constraints(max_run=4)  # Augmenté pour permettre 4h d'affilée
         
-        # 11. OBJECTIFS DE QUALITÉ
-        self._add_quality_objectives()
+        # 11. OBJECTIFS DE QUALITÉ (sans objet pour une explication d'infaisabilité)
+        if self.gates is None:
+            self._add_quality_objectives()
         
         # 11. TOUS COMMENCENT À LA PREMIÈRE PÉRIODE (période 0)
+        self._tag("Début à la première période")
         self._add_start_first_period_constraints()
+        if self.gates is not None:
+            self.gates.close()
 
-    def _add_school_specific_constraints(self):
-        """Ajoute les contraintes spécifiques assouplies pour le lundi"""
-        logger.info("=== CONTRAINTES LUNDI (ASSOUPLIES) ===")
-        
-        # Slots du lundi
-        monday_slots = [s for s in self.time_slots if s["day_of_week"] == 1]
+    def _add_gated_exclusions(self):
+        """Mode explication: jours de travail et contraintes personnalisées posés en
+        contraintes (une hypothèse chacun) au lieu d'être retirés des domaines"""
+        index = self.index
+        posted = 0
+        for teacher_name, blocked in SlotDomains(self.time_slots, self.teachers).blocked_by_teacher.items():
+            self._tag(f"Jours de travail du professeur {teacher_name}")
+            course_ids = [course["course_id"] for course in index.teacher_courses(teacher_name)]
+            for var in self.schedule_vars.vars_for(course_ids, list(blocked)):
+                self.model.Add(var == 0)
+                posted += 1
+        for constraint in self.constraints:
+            self._tag(f"Contrainte {constraint.source} #{constraint.constraint_id} "
+                      f"({constraint.constraint_type}{', ' + constraint.entity if constraint.entity else ''})")
+            posted += constraint.post_to_model(index, self.schedule_vars)
+        return posted
+
+    def _monday_meeting_blocks(self):
+        """Créneaux de réunion du lundi (périodes 6-8) interdits aux cours des profs principaux de ז/ח/ט"""
+        index = self.index
         
         # Réunions uniquement pour les profs principaux qui enseignent חינוך ou שיח בוקר
         # On considère qu'un "prof principal" est tout enseignant apparaissant sur des cours
@@ -220,27 +310,32 @@ class ScheduleSolverWithConstraints:
         homeroom_subjects = {"חינוך", "שיח בוקר"}
         homeroom_teachers = set()
         for course in self.courses:
-            subject = (course.get("subject") or course.get("subject_name") or "").strip()
-            if subject in homeroom_subjects:
-                for t in (course.get("teacher_names") or "").split(","):
-                    t = t.strip()
-                    if t:
-                        homeroom_teachers.add(t)
+            if index.subject_of(course) in homeroom_subjects:
+                homeroom_teachers.update(index.teachers_of(course))
         
         # Plages de réunions le lundi à bloquer pour ces enseignants seulement
         # 13:30-15:15 ≈ périodes 6-7, 15:15-16:00 ≈ période 8 (approximatif par périodes)
-        monday_meeting_slots = [s for s in monday_slots if 6 <= s["period_number"] <= 8]
+        monday_meeting_slots = [s["slot_id"] for s in index.day_slots(1) if 6 <= s["period_number"] <= 8]
         
+        blocked_courses = {}
         if homeroom_teachers and monday_meeting_slots:
-            for course in self.courses:
-                # Si un des enseignants de ce cours est homeroom ET la classe est en חטיבה (ז/ח/ט)
-                course_teachers = {(t or "").strip() for t in (course.get("teacher_names") or "").split(",") if (t or "").strip()}
-                course_grade = (course.get("grade") or "").strip()
-                if (course_teachers & homeroom_teachers) and (course_grade in {"ז", "ח", "ט"}):
-                    for slot in monday_meeting_slots:
-                        var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                        if var_name in self.schedule_vars:
-                            self.model.Add(self.schedule_vars[var_name] == 0)
+            # Si un des enseignants de ce cours est homeroom ET la classe est en חטיבה (ז/ח/ט)
+            for teacher in homeroom_teachers:
+                for course in index.teacher_courses(teacher):
+                    if (course.get("grade") or "").strip() in {"ז", "ח", "ט"}:
+                        blocked_courses[course["course_id"]] = monday_meeting_slots
+        return blocked_courses
+
+    def _add_school_specific_constraints(self):
+        """Contraintes spécifiques du lundi"""
+        logger.info("=== CONTRAINTES LUNDI (ASSOUPLIES) ===")
+        # Les créneaux de réunion sont retirés des domaines (compute_domains): rien à poster
+        if self.domains is None:
+            for course_id, slots in self._monday_meeting_blocks().items():
+                for slot_id in slots:
+                    var = self.schedule_vars.get(course_id, slot_id)
+                    if var is not None:
+                        self.model.Add(var == 0)
         
         logger.info("✓ Lundi assoupli: réunions bloquées uniquement pour חינוך/שיח בוקר")
 
@@ -248,49 +343,29 @@ class ScheduleSolverWithConstraints:
         """✅ NOUVELLE MÉTHODE: Force une distribution équilibrée sur tous les jours"""
         logger.info("=== CONTRAINTES DE DISTRIBUTION ===")
         
-        # Pour chaque classe, forcer une présence minimale chaque jour
+        index = self.index
+        
+        # Pour chaque classe, limiter la charge quotidienne
+        # (le vendredi est exclu: ses variables sont déjà forcées à 0)
         for class_obj in self.classes:
-            class_name = class_obj["class_name"]
+            class_courses = index.class_courses(class_obj["class_name"])
+            if not class_courses:
+                continue
             
-            # Compter les cours par jour pour cette classe
-            for day in range(6):  # Dimanche(0) à Vendredi(5)
-                day_courses = []
-                
-                for course in self.courses:
-                    if class_name in (course.get("class_list") or "").split(","):
-                        for slot in self.time_slots:
-                            if slot["day_of_week"] == day:
-                                # Exclure complètement le vendredi
-                                if day == 5:
-                                    continue
-                                var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                if var_name in self.schedule_vars:
-                                    day_courses.append(self.schedule_vars[var_name])
-                
-                if day_courses and day < 5:  # Pas le vendredi
+            for day in range(5):  # Dimanche(0) à Jeudi(4)
+                day_courses = self._vars_for(class_courses, index.day_slots(day))
+                if day_courses:
                     # Limiter à max 10 cours par jour (soft), pas de minimum dur
                     self.model.Add(sum(day_courses) <= 10)
-                elif day == 5 and day_courses:  # Vendredi
-                    # Limiter le vendredi matin à max 5 cours
-                    self.model.Add(sum(day_courses) <= 5)
         
         # Pour chaque professeur, éviter la surcharge sur un seul jour
         for teacher in self.teachers:
-            teacher_name = teacher.get("teacher_name", "")
+            teacher_courses = index.teacher_courses(teacher.get("teacher_name", ""))
+            if not teacher_courses:
+                continue
             
-            for day in range(6):  # Tous les jours
-                day_courses = []
-                
-                for course in self.courses:
-                    if teacher_name in (course.get("teacher_names") or "").split(","):
-                        for slot in self.time_slots:
-                            if slot["day_of_week"] == day:
-                                if day == 5:
-                                    continue
-                                var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                if var_name in self.schedule_vars:
-                                    day_courses.append(self.schedule_vars[var_name])
-                
+            for day in range(5):
+                day_courses = self._vars_for(teacher_courses, index.day_slots(day))
                 if day_courses:
                     # Maximum 6 heures par jour pour un professeur
                     self.model.Add(sum(day_courses) <= 6)
@@ -315,18 +390,16 @@ class ScheduleSolverWithConstraints:
         """CONTRAINTES FORTES pour regrouper les matières en blocs consécutifs (2×2h ou 4h)"""
         logger.info("=== CONTRAINTES: BLOCS DE MATIÈRES CONSÉCUTIFS ===")
         
+        index = self.index
+        
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
             
-            # Regrouper les cours par matière pour cette classe
-            subjects_courses = {}
-            for course in self.courses:
-                if class_name in (course.get("class_list") or "").split(","):
-                    subject = course.get("subject") or course.get("subject_name") or ""
-                    if subject:
-                        subjects_courses.setdefault(subject, []).append(course)
-            
-            for subject, courses in subjects_courses.items():
+            # Cours regroupés par matière pour cette classe (depuis l'index)
+            for subject in index.class_subjects(class_name):
+                if not subject:
+                    continue
+                courses = index.class_subject_courses(class_name, subject)
                 total_hours = sum(c["hours"] for c in courses)
                 
                 # Seulement pour les matières avec assez d'heures (≥2h)
@@ -337,8 +410,7 @@ class ScheduleSolverWithConstraints:
                 
                 # Pour chaque jour, créer des variables de blocs consécutifs
                 for day in range(5):  # Dimanche à Jeudi
-                    day_slots = [s for s in self.time_slots if s["day_of_week"] == day]
-                    day_slots.sort(key=lambda s: s["period_number"])
+                    day_slots = index.day_slots(day)
                     
                     if len(day_slots) < 2:
                         continue
@@ -350,11 +422,7 @@ class ScheduleSolverWithConstraints:
                         has_subject = self.model.NewBoolVar(f"subj_{class_name}_{subject}_{day}_{period}")
                         
                         # Cette période a cette matière si au moins un cours correspondant y est programmé
-                        subject_course_vars = []
-                        for course in courses:
-                            var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                            if var_name in self.schedule_vars:
-                                subject_course_vars.append(self.schedule_vars[var_name])
+                        subject_course_vars = self._vars_for(courses, [slot])
                         
                         if subject_course_vars:
                             # has_subject = 1 ssi au moins un cours de cette matière sur cette période
@@ -440,18 +508,13 @@ class ScheduleSolverWithConstraints:
         penalties.extend(math_penalties)
 
         # 5. ÉTALER SUR 5 JOURS: encourager l'utilisation de tous les jours (dim-jeu)
+        index = self.index
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
+            class_courses = index.class_courses(class_name)
             day_used_vars = []
             for day in range(5):
-                day_vars = []
-                for course in self.courses:
-                    if class_name in (course.get("class_list") or "").split(","):
-                        for slot in self.time_slots:
-                            if slot["day_of_week"] == day:
-                                vname = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                if vname in self.schedule_vars:
-                                    day_vars.append(self.schedule_vars[vname])
+                day_vars = self._vars_for(class_courses, index.day_slots(day))
                 if day_vars:
                     day_has = self.model.NewBoolVar(f"day_used_{class_name}_{day}")
                     self.model.Add(day_has <= len(day_vars))
@@ -463,16 +526,10 @@ class ScheduleSolverWithConstraints:
 
         # 6. FIN TARDIVE: pénaliser fortement l'utilisation des 2 dernières périodes (tout en restant soft)
         for class_obj in self.classes:
-            class_name = class_obj["class_name"]
+            class_courses = index.class_courses(class_obj["class_name"])
             for day in range(5):
-                late_vars = []
-                for course in self.courses:
-                    if class_name in (course.get("class_list") or "").split(","):
-                        for slot in self.time_slots:
-                            if slot["day_of_week"] == day and slot["period_number"] >= 10:  # très tard
-                                vname = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                if vname in self.schedule_vars:
-                                    late_vars.append(self.schedule_vars[vname])
+                late_slots = [s for s in index.day_slots(day) if s["period_number"] >= 10]  # très tard
+                late_vars = self._vars_for(class_courses, late_slots)
                 if late_vars:
                     # Pénalité par occurrence tardive
                     penalties.append(sum(late_vars) * 40)
@@ -486,13 +543,15 @@ class ScheduleSolverWithConstraints:
         """Contraintes RENFORCÉES pour minimiser les trous."""
         logger.info("=== CONTRAINTES: MINIMISATION DES TROUS ===")
         
+        index = self.index
+        
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
+            class_courses = index.class_courses(class_name)
             
             for day in range(5):  # Dimanche(0) à Jeudi(4) - pas le vendredi
-                # Récupérer tous les créneaux du jour, triés par période
-                day_slots = [s for s in self.time_slots if s["day_of_week"] == day]
-                day_slots.sort(key=lambda s: s["period_number"])
+                # Créneaux du jour, triés par période
+                day_slots = index.day_slots(day)
                 
                 if len(day_slots) < 3:
                     continue
@@ -504,12 +563,7 @@ class ScheduleSolverWithConstraints:
                     has_course = self.model.NewBoolVar(f"has_course_{class_name}_{day}_{period}")
                     
                     # Collecter tous les cours de cette classe sur ce créneau
-                    course_vars = []
-                    for course in self.courses:
-                        if class_name in (course.get("class_list") or "").split(","):
-                            var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                            if var_name in self.schedule_vars:
-                                course_vars.append(self.schedule_vars[var_name])
+                    course_vars = self._vars_for(class_courses, [slot])
                     
                     if course_vars:
                         # has_course = 1 si au moins un cours sur cette période
@@ -561,30 +615,19 @@ class ScheduleSolverWithConstraints:
     def _add_subject_run_constraints(self, max_run: int = 3):
         """Limite la longueur des séquences consécutives d'une même matière par classe et par jour."""
         logger.info("=== CONTRAINTES: LONGUEUR DE SÉQUENCE PAR MATIÈRE ===")
-        # Indexer cours par (classe, matière)
+        index = self.index
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
-            # Collecter toutes les matières pour cette classe
-            subjects = set()
-            for course in self.courses:
-                if class_name in (course.get("class_list") or "").split(","):
-                    subjects.add(course.get("subject") or course.get("subject_name") or "")
-            for subject in subjects:
+            # Matières de cette classe et leurs cours, lues depuis l'index (classe, matière)
+            for subject in index.class_subjects(class_name):
+                subject_courses = index.class_subject_courses(class_name, subject)
                 for day in range(5):
-                    day_slots = [s for s in self.time_slots if s["day_of_week"] == day]
-                    day_slots.sort(key=lambda s: s["period_number"])
+                    day_slots = index.day_slots(day)
                     # subject_at[p]
                     subj_vars = []
                     for slot in day_slots:
                         var = self.model.NewBoolVar(f"subj_{class_name}_{day}_{subject}_{slot['period_number']}")
-                        course_vars = []
-                        for course in self.courses:
-                            same_class = class_name in (course.get("class_list") or "").split(",")
-                            same_subject = (course.get("subject") or course.get("subject_name") or "") == subject
-                            if same_class and same_subject:
-                                vname = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                if vname in self.schedule_vars:
-                                    course_vars.append(self.schedule_vars[vname])
+                        course_vars = self._vars_for(subject_courses, [slot])
                         if course_vars:
                             # var == OR(course_vars)
                             self.model.Add(sum(course_vars) >= var)
@@ -602,65 +645,44 @@ class ScheduleSolverWithConstraints:
         """Impose une limite quotidienne d'heures par matière: 3h par jour (par classe),
         sauf pour les classes de lycée (י/יא/יב) où la limite est 4h."""
         logger.info("=== CONTRAINTES: LIMITE QUOTIDIENNE PAR MATIÈRE ===")
-        hs_grades = {"י", "יא", "יב"}
-        # Préparer un mapping classe -> grade (premier grade rencontré)
-        class_to_grade = {}
-        for course in self.courses:
-            grade = (course.get("grade") or "").strip()
-            classes = [c.strip() for c in (course.get("class_list") or "").split(",") if c.strip()]
-            for cn in classes:
-                class_to_grade.setdefault(cn, grade or class_to_grade.get(cn, ""))
+        index = self.index
 
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
-            grade = class_to_grade.get(class_name, "")
-            daily_limit = 4 if grade in hs_grades else 3
-
-            # Récupérer les matières enseignées à cette classe
-            subjects = set()
-            for course in self.courses:
-                if class_name in (course.get("class_list") or "").split(","):
-                    subjects.add((course.get("subject") or course.get("subject_name") or "").strip())
+            daily_limit = self._daily_limit(class_name)
 
-            for subject in subjects:
+            for subject in index.class_subjects(class_name):
                 if not subject:
                     continue
+                subject_courses = index.class_subject_courses(class_name, subject)
                 for day in range(6):  # Dimanche(0) à Vendredi(5)
-                    day_subject_vars = []
-                    for course in self.courses:
-                        same_class = class_name in (course.get("class_list") or "").split(",")
-                        same_subject = ((course.get("subject") or course.get("subject_name") or "").strip() == subject)
-                        if same_class and same_subject:
-                            for slot in self.time_slots:
-                                if slot["day_of_week"] == day:
-                                    vname = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                    if vname in self.schedule_vars:
-                                        day_subject_vars.append(self.schedule_vars[vname])
+                    day_subject_vars = self._vars_for(subject_courses, index.day_slots(day))
                     if day_subject_vars:
                         self.model.Add(sum(day_subject_vars) <= daily_limit)
 
+    def _daily_limit(self, class_name):
+        """Heures maximales d'une matière par jour: 3h, 4h pour le lycée (י/יא/יב)"""
+        grade = self.index.class_to_grade.get(class_name, "")
+        return 4 if grade in {"י", "יא", "יב"} else 3
+
     def _add_start_first_period_constraints(self):
         """Impose: chaque classe commence à la première période (0) chaque jour où elle a cours."""
         logger.info("=== CONTRAINTES: DÉBUT À LA PÉRIODE 0 ===")
+        index = self.index
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
+            class_courses = index.class_courses(class_name)
             for day in range(5):  # Dimanche (0) à Jeudi (4)
-                # Tous les créneaux de ce jour
-                day_slots = [s for s in self.time_slots if s["day_of_week"] == day]
+                # Tous les créneaux de ce jour, triés par période
+                day_slots = index.day_slots(day)
                 if not day_slots:
                     continue
-                day_slots.sort(key=lambda s: s["period_number"])
                 has_vars = []
                 for slot in day_slots:
                     period = slot["period_number"]
                     has_var = self.model.NewBoolVar(f"has_{class_name}_{day}_{period}")
                     # OR de tous les cours de cette classe sur ce créneau
-                    course_vars = []
-                    for course in self.courses:
-                        if class_name in (course.get("class_list") or "").split(","):
-                            vname = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                            if vname in self.schedule_vars:
-                                course_vars.append(self.schedule_vars[vname])
+                    course_vars = self._vars_for(class_courses, [slot])
                     if course_vars:
                         self.model.Add(sum(course_vars) >= has_var)
                         self.model.Add(sum(course_vars) <= len(course_vars) * has_var)
@@ -679,42 +701,8 @@ class ScheduleSolverWithConstraints:
         """Calcule les pénalités pour les trous dans l'emploi du temps"""
         gap_penalties = []
         
-        for class_obj in self.classes:
-            class_name = class_obj["class_name"]
-            
-            for day in range(6):
-                # Créer des variables pour détecter les trous
-                day_slots = [s for s in self.time_slots if s["day_of_week"] == day]
-                day_slots.sort(key=lambda s: s["period_number"])
-                
-                for i in range(1, len(day_slots) - 1):
-                    # Un trou existe si: pas de cours à i, mais cours avant et après
-                    gap = self.model.NewBoolVar(f"gap_{class_name}_{day}_{i}")
-                    
-                    has_before = []
-                    has_current = []
-                    has_after = []
-                    
-                    for course in self.courses:
-                        if class_name in (course.get("class_list") or "").split(","):
-                            # Cours avant
-                            if i > 0:
-                                var_before = f"course_{course['course_id']}_slot_{day_slots[i-1]['slot_id']}"
-                                if var_before in self.schedule_vars:
-                                    has_before.append(self.schedule_vars[var_before])
-                            
-                            # Cours actuel
-                            var_current = f"course_{course['course_id']}_slot_{day_slots[i]['slot_id']}"
-                            if var_current in self.schedule_vars:
-                                has_current.append(self.schedule_vars[var_current])
-                            
-                            # Cours après
-                            if i < len(day_slots) - 1:
-                                var_after = f"course_{course['course_id']}_slot_{day_slots[i+1]['slot_id']}"
-                                if var_after in self.schedule_vars:
-                                    has_after.append(self.schedule_vars[var_after])
-                    
-                    # Désactivé: CP-SAT ne supporte pas directement ces comparaisons booléennes dans Add
+        # Désactivé: CP-SAT ne supporte pas directement ces comparaisons booléennes dans Add.
+        # Les trous sont traités par _add_no_gaps_constraints (dur).
         
         return gap_penalties
 
@@ -724,17 +712,17 @@ class ScheduleSolverWithConstraints:
         
         difficult_subjects = ['מתמטיקה', 'math', 'physique', 'פיזיקה', 'כימיה', 'chimie']
         
+        # Après 14h (période 7+)
+        late_slots = [s for s in self.time_slots if s["period_number"] >= 7]
+        
         for course in self.courses:
-            subject = course.get("subject", course.get("subject_name", "")).lower()
+            subject = self.index.subject_of(course).lower()
             if any(subj in subject for subj in difficult_subjects):
-                for slot in self.time_slots:
-                    # Après 14h (période 7+)
-                    if slot["period_number"] >= 7:
-                        var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                        if var_name in self.schedule_vars:
-                            # Pénalité proportionnelle à l'heure tardive
-                            penalty = (slot["period_number"] - 6) * 20
-                            penalties.append(self.schedule_vars[var_name] * penalty)
+                for slot in late_slots:
+                    for var in self._vars_for([course], [slot]):
+                        # Pénalité proportionnelle à l'heure tardive
+                        penalty = (slot["period_number"] - 6) * 20
+                        penalties.append(var * penalty)
         
         return penalties
 
@@ -742,32 +730,16 @@ class ScheduleSolverWithConstraints:
         """Pénalise l'éparpillement d'une même matière sur plusieurs jours"""
         penalties = []
         
-        # Pour chaque combinaison classe-matière
-        subject_by_class = {}
-        for course in self.courses:
-            classes = [c.strip() for c in (course.get("class_list") or "").split(",")]
-            subject = course.get("subject", course.get("subject_name", ""))
-            
-            for class_name in classes:
-                key = f"{class_name}_{subject}"
-                if key not in subject_by_class:
-                    subject_by_class[key] = []
-                subject_by_class[key].append(course)
-        
-        # Pénaliser si une matière est sur trop de jours différents
-        for key, courses in subject_by_class.items():
+        # Pour chaque combinaison classe-matière (depuis l'index)
+        for (class_name, subject), courses in self.index.courses_by_class_subject.items():
+            key = f"{class_name}_{subject}"
+            # Pénaliser si une matière est sur trop de jours différents
             if len(courses) > 2:  # Si plus de 2 heures de cette matière
                 days_used = []
                 for day in range(6):
                     day_has_course = self.model.NewBoolVar(f"has_{key}_day_{day}")
                     
-                    day_vars = []
-                    for course in courses:
-                        for slot in self.time_slots:
-                            if slot["day_of_week"] == day:
-                                var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                if var_name in self.schedule_vars:
-                                    day_vars.append(self.schedule_vars[var_name])
+                    day_vars = self._vars_for(courses, self.index.day_slots(day))
                     
                     if day_vars:
                         # day_has_course = 1 si au moins un cours ce jour
@@ -787,28 +759,27 @@ class ScheduleSolverWithConstraints:
         
         math_keywords = ['מתמטיקה', 'math', 'mathématiques']
         
+        index = self.index
+        
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
             
             # Trouver les cours de maths pour cette classe
-            math_courses = []
-            for course in self.courses:
-                if class_name in (course.get("class_list") or "").split(","):
-                    subject = course.get("subject", course.get("subject_name", "")).lower()
-                    if any(kw in subject for kw in math_keywords):
-                        math_courses.append(course)
+            math_courses = [
+                course for course in index.class_courses(class_name)
+                if any(kw in index.subject_of(course).lower() for kw in math_keywords)
+            ]
+            if not math_courses:
+                continue
             
             # Pour chaque jour, pénaliser s'il y a 4 heures de maths non consécutives
             for day in range(6):
                 day_math_slots = []
                 
                 for course in math_courses:
-                    for slot in self.time_slots:
-                        if slot["day_of_week"] == day:
-                            var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                            if var_name in self.schedule_vars:
-                                day_math_slots.append((slot["period_number"], 
-                                                      self.schedule_vars[var_name]))
+                    for slot in index.day_slots(day):
+                        for var in self._vars_for([course], [slot]):
+                            day_math_slots.append((slot["period_number"], var))
                 
                 if len(day_math_slots) >= 4:
                     # Trier par période
@@ -834,6 +805,7 @@ class ScheduleSolverWithConstraints:
         
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
+            class_courses = self.index.class_courses(class_name)
             
             # Variables binaires: cette classe a-t-elle des cours le jour X?
             day_used_vars = []
@@ -844,14 +816,7 @@ class ScheduleSolverWithConstraints:
                 day_used = self.model.NewBoolVar(f"day_used_{class_name}_{day}")
                 
                 # Compter les heures ce jour
-                day_hours = []
-                for course in self.courses:
-                    if class_name in (course.get("class_list") or "").split(","):
-                        for slot in self.time_slots:
-                            if slot["day_of_week"] == day:
-                                vname = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                if vname in self.schedule_vars:
-                                    day_hours.append(self.schedule_vars[vname])
+                day_hours = self._vars_for(class_courses, self.index.day_slots(day))
                 
                 if day_hours:
                     # Variable entière: nombre d'heures ce jour
@@ -895,21 +860,17 @@ class ScheduleSolverWithConstraints:
         penalties = []
         
         for class_obj in self.classes:
-            class_name = class_obj["class_name"]
+            class_courses = self.index.class_courses(class_obj["class_name"])
             
             for day in range(5):
-                for course in self.courses:
-                    if class_name in (course.get("class_list") or "").split(","):
-                        for slot in self.time_slots:
-                            if slot["day_of_week"] == day:
-                                period = slot["period_number"]
-                                vname = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                                
-                                if vname in self.schedule_vars:
-                                    # Pénalité progressive selon l'heure tardive
-                                    if period >= 8:  # Après 16h
-                                        late_penalty = (period - 7) * 2
-                                        penalties.append(self.schedule_vars[vname] * late_penalty)
+                # Après 16h
+                late_slots = [s for s in self.index.day_slots(day) if s["period_number"] >= 8]
+                for course in class_courses:
+                    for slot in late_slots:
+                        for var in self._vars_for([course], [slot]):
+                            # Pénalité progressive selon l'heure tardive
+                            late_penalty = (slot["period_number"] - 7) * 2
+                            penalties.append(var * late_penalty)
         
         return penalties
     
@@ -919,20 +880,15 @@ class ScheduleSolverWithConstraints:
         
         for class_obj in self.classes:
             class_name = class_obj["class_name"]
+            class_course_list = self.index.class_courses(class_name)
             
             for day in range(5):
-                day_slots = [s for s in self.time_slots if s["day_of_week"] == day]
-                day_slots.sort(key=lambda s: s["period_number"])
+                day_slots = self.index.day_slots(day)
                 
                 # Variables: cours de cette classe à chaque période
                 period_vars = []
                 for slot in day_slots:
-                    class_courses = []
-                    for course in self.courses:
-                        if class_name in (course.get("class_list") or "").split(","):
-                            vname = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                            if vname in self.schedule_vars:
-                                class_courses.append(self.schedule_vars[vname])
+                    class_courses = self._vars_for(class_course_list, [slot])
                     
                     if class_courses:
                         period_var = self.model.NewBoolVar(f"period_{class_name}_{day}_{slot['period_number']}")
@@ -958,7 +914,7 @@ class ScheduleSolverWithConstraints:
         self.solver.parameters.max_time_in_seconds = time_limit
         
         # Parallélisation maximale
-        self.solver.parameters.num_search_workers = 8
+        self.solver.parameters.num_search_workers = self.num_workers
         
         # Logging pour diagnostics
         self.solver.parameters.log_search_progress = True
@@ -986,23 +942,73 @@ class ScheduleSolverWithConstraints:
         
         logger.info("✓ Solver configuré pour optimisation maximale de la compacité")
 
-    def solve(self, time_limit=600):
-        """Résout le problème avec temps augmenté"""
+    def solve(self, time_limit=600, on_solution=None, min_interval=5.0):
+        """
+        Résout le problème avec temps augmenté.
+
+        Si `on_solution(event, schedule)` est fourni, chaque solution améliorante est
+        transmise pendant la recherche depuis un thread séparé (au plus une
+        transmission toutes les `min_interval` secondes, la dernière à la fin
+        du solve), voir solution_stream.SolutionRecorder.
+        """
         logger.info("\n=== RÉSOLUTION ===")
         
         try:
-            self.create_variables()
-            if not self.schedule_vars:
-                logger.error("Aucune variable créée!")
-                return []
-                
-            self.add_constraints()
+            if self.feasibility is None:
+                self.check_feasibility()
+            if not self.feasibility.feasible:
+                # Impossibilité démontrée: inutile de lancer CP-SAT
+                self.status_name = "INFEASIBLE"
+                return None
+
+            build_start = time.perf_counter()
+            # Les indications / fixations du démarrage à chaud modifient le modèle: pas de réutilisation
+            key = problem_fingerprint(self) if self.warm_start is None else None
+            if key is None or not self._reuse_model(key):
+                self.model = cp_model.CpModel()
+                self.create_variables()
+                if not self.schedule_vars:
+                    logger.error("Aucune variable créée!")
+                    return []
+
+                self.add_constraints()
+                bounds = self.feasibility.apply_bounds(self.schedule_vars)
+                if bounds:
+                    logger.info(f"✓ {bounds} égalités déduites de l'analyse de faisabilité")
+                self._model_key = key
+                if key is not None and self.model_cache is not None:
+                    self.model_cache.store(key, self.model, [
+                        (course_id, slot_id, var.Index()) for (course_id, slot_id), var in self.schedule_vars.items()
+                    ])
+            if self.warm_start is not None:
+                self.warm_start.apply(self.model, self.schedule_vars, self.courses, self.time_slots)
+            self.timings["build_time"] = time.perf_counter() - build_start
+            logger.info(f"⏱️ Construction du modèle: {self.timings['build_time']:.2f}s")
             
             # Configuration optimisée du solver pour la compacité
             self._configure_solver_for_compactness(time_limit)
             
             logger.info(f"Lancement du solver (limite: {time_limit}s)...")
-            status = self.solver.Solve(self.model)
+            solve_start = time.perf_counter()
+            self.solution_recorder = None
+            if on_solution is not None:
+                self.solution_recorder = SolutionRecorder(
+                    self._build_schedule, on_solution, min_interval=min_interval
+                )
+            try:
+                status = self.solver.Solve(self.model, self.solution_recorder)
+                if status == cp_model.INFEASIBLE and self.warm_start is not None \
+                        and self.warm_start.relax(self.model):
+                    status = self.solver.Solve(self.model, self.solution_recorder)
+            finally:
+                if self.solution_recorder is not None:
+                    self.solution_recorder.close()  # dernière solution en attente
+            self.timings["solve_time"] = time.perf_counter() - solve_start
+            self.status_name = self.solver.StatusName(status)
+            logger.info(
+                f"⏱️ Résolution CP-SAT: {self.timings['solve_time']:.2f}s "
+                f"(construction: {self.timings['build_time']:.2f}s)"
+            )
             
             if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
                 logger.info(f"✅ Solution trouvée! Status: {self.solver.StatusName(status)}")
@@ -1020,6 +1026,57 @@ class ScheduleSolverWithConstraints:
             logger.error(f"Erreur lors de la résolution : {e}")
             raise
 
+    def _reuse_model(self, key):
+        """Reprend le modèle déjà construit pour ces données (en mémoire, puis cache disque)"""
+        if self._model_key == key:
+            logger.info("♻️ Modèle déjà construit pour ces données, réutilisé")
+            return True
+        cached = self.model_cache.load(key) if self.model_cache is not None else None
+        if cached is None:
+            return False
+        model, entries = cached
+        store = VarStore(model, [course["course_id"] for course in self.courses],
+                         [slot["slot_id"] for slot in self.time_slots])
+        for course_id, slot_id, var_index in entries:
+            store.attach(course_id, slot_id, model.GetBoolVarFromProtoIndex(var_index))
+        self.model, self.schedule_vars, self._model_key = model, store, key
+        logger.info(f"♻️ Modèle rechargé du cache ({len(store)} variables)")
+        return True
+
+    def explain_infeasibility(self, time_limit=60):
+        """
+        Après un solve INFEASIBLE: reconstruit le modèle avec chaque famille de
+        contraintes et chaque entité (cours, professeur, classe, contrainte
+        personnalisée) conditionnée par une hypothèse, puis extrait un ensemble
+        minimal de contraintes incompatibles. Le modèle résolu est conservé.
+        """
+        logger.info("=== EXPLICATION DE L'INFAISABILITÉ ===")
+        saved = self.model, self.schedule_vars, self.domains
+        self.model = cp_model.CpModel()
+        self.gates = ConstraintGates(self.model)
+        try:
+            self.create_variables()
+            self.add_constraints()
+            logger.info(f"✓ {len(self.gates.literals)} hypothèses sur {self.gates.gated} contraintes")
+            return minimal_core(self.model, self.gates, time_limit, self.num_workers)
+        finally:
+            self.gates = None
+            self.model, self.schedule_vars, self.domains = saved
+
+    def use_warm_start(self, schedule_id=None, fix_untouched=False,
+                       touched_classes=None, touched_teachers=None):
+        """
+        Active le démarrage à chaud depuis un schedule enregistré (par défaut le
+        dernier actif). Retourne le WarmStart, ou None si aucun schedule n'existe.
+        """
+        self.warm_start = WarmStart.from_db(
+            self.db_config, schedule_id,
+            fix_untouched=fix_untouched,
+            touched_classes=touched_classes,
+            touched_teachers=touched_teachers
+        )
+        return self.warm_start
+
     def _log_solution_stats(self, schedule):
         """Affiche les statistiques de la solution trouvée"""
         if not schedule:
@@ -1050,104 +1107,123 @@ class ScheduleSolverWithConstraints:
     def _extract_solution(self):
         """Extrait la solution du solver sans conflits ni doublons"""
         logger.info("Extraction directe de la solution...")
+        schedule = self._build_schedule(self.solver)
+        
+        # Analyser les trous simplement
+        gaps_count = self._simple_gaps_analysis(schedule)
+        if gaps_count > 0:
+            logger.warning(f"⚠️ {gaps_count} trous détectés dans l'emploi du temps")
+        else:
+            logger.info("✅ Aucun trou détecté")
+            
+        return schedule
+
+    def _build_schedule(self, values):
+        """
+        Construit les entrées d'emploi du temps à partir de `values`, qui expose
+        Value(var): le CpSolver après résolution, ou le callback pendant la recherche.
+        """
         schedule = []
         
         # Extraction simple et directe
         for course in self.courses:
             for slot in self.time_slots:
-                var_name = f"course_{course['course_id']}_slot_{slot['slot_id']}"
-                if var_name in self.schedule_vars and self.solver.Value(self.schedule_vars[var_name]) == 1:
+                var = self.schedule_vars.get(course['course_id'], slot['slot_id'])
+                if var is not None and values.Value(var) == 1:
                     schedule_entry = {
                         'teacher_name': course.get('teacher_name', 'Unknown'),
-                        'class_name': course.get('class_name', 'Unknown'),
+                        'class_name': course.get('class_name') or course.get('class_list', 'Unknown'),
                         'subject_name': course.get('subject_name', course.get('subject', 'Unknown')),
                         'day_of_week': slot['day_of_week'],
                         'period_number': slot['period_number'],
                         'is_parallel_group': course.get('is_parallel', False),
-                        'group_id': course.get('group_id')
+                        'group_id': course.get('group_id'),
+                        'course_id': course['course_id']
                     }
                     schedule.append(schedule_entry)
         
-        # Analyser les trous simplement
-        gaps_count = self._simple_gaps_analysis(schedule)
-        if gaps_count > 0:
-            logger.warning(f"⚠️ {gaps_count} trous détectés dans l'emploi du temps")
-        else:
-            logger.info("✅ Aucun trou détecté")
-            
         return schedule
     
     def _simple_gaps_analysis(self, schedule):
-        """Analyse simple des trous"""
-        gaps_count = 0
-        
-        # Grouper par classe et jour
-        for class_info in self.classes:
-            class_name = class_info.get('class_name', class_info)
-            
-            for day in range(5):  # Dimanche-Jeudi
-                # Périodes de cette classe ce jour
-                day_periods = []
-                for entry in schedule:
-                    if entry['class_name'] == class_name and entry['day_of_week'] == day:
-                        day_periods.append(entry['period_number'])
-                
-                if len(day_periods) >= 2:
-                    day_periods.sort()
-                    # Compter trous entre première et dernière période
-                    for period in range(day_periods[0] + 1, day_periods[-1]):
-                        if period not in day_periods:
-                            gaps_count += 1
-        
-        return gaps_count
+        """Analyse simple des trous (classes connues, Dimanche-Jeudi)"""
+        return count_gaps(
+            ((entry['class_name'], entry['day_of_week'], entry['period_number']) for entry in schedule),
+            keys=[class_info.get('class_name', class_info) for class_info in self.classes],
+            days=5
+        )
 
     def save_schedule(self, schedule):
         """Sauvegarde l'emploi du temps dans la base de données"""
         if not schedule:
             raise ValueError("Schedule vide")
 
-        conn = psycopg2.connect(**self.db_config)
-        cur = conn.cursor()
+        conn = get_connection(self.db_config)
         try:
-            cur.execute("""
-                INSERT INTO schedules (academic_year, term, status, created_at)
-                VALUES (%s, %s, %s, %s) RETURNING schedule_id
-            """, ("2024-2025", 1, "active", datetime.now()))
-            schedule_id = cur.fetchone()[0]
+            schedule_id, count = write_schedule(
+                conn,
+                {"academic_year": "2024-2025", "term": 1, "status": "active", "created_at": datetime.now()},
+                ENTRY_COLUMNS,
+                self._entry_rows(schedule)
+            )
+            logger.info(f"✅ Emploi du temps sauvegardé (ID {schedule_id}, {count} entrées)")
+            return schedule_id
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde: {e}")
+            raise
+        finally:
+            conn.close()
 
-            for entry in schedule:
-                # Afficher TOUS les professeurs seulement pour les cours parallèles
-                if entry.get("is_parallel"):
-                    teacher_names_list = entry.get("teacher_names") or []
-                    if isinstance(teacher_names_list, str):
-                        teacher_names_list = [name.strip() for name in teacher_names_list.split(",") if name.strip()]
-                    teacher_name = ", ".join(teacher_names_list) if teacher_names_list else ""
-                else:
-                    # Cours normal : un seul professeur
-                    teacher_name = (entry.get("teacher_names") or [""])[0] if entry.get("teacher_names") else ""
-                
+    def _entry_rows(self, schedule):
+        """Lignes schedule_entries (dans l'ordre de ENTRY_COLUMNS) d'un emploi du temps"""
+        for entry in schedule:
+            # Afficher TOUS les professeurs seulement pour les cours parallèles
+            if entry.get("is_parallel"):
+                teacher_names_list = entry.get("teacher_names") or []
+                if isinstance(teacher_names_list, str):
+                    teacher_names_list = [name.strip() for name in teacher_names_list.split(",") if name.strip()]
+                teacher_name = ", ".join(teacher_names_list) if teacher_names_list else ""
+            else:
+                # Cours normal : un seul professeur
+                teacher_name = (entry.get("teacher_names") or [""])[0] if entry.get("teacher_names") else ""
+            
+            yield (
+                teacher_name,
+                entry.get("class_name"),
+                entry.get("subject_name") or entry.get("subject"),
+                entry.get("day_of_week"),
+                entry.get("period_number"),
+                bool(entry.get("is_parallel", False)),
+                entry.get("group_id")
+            )
+
+    def save_draft_schedule(self, schedule, draft_id=None, metadata=None):
+        """
+        Enregistre une solution intermédiaire comme schedule 'draft'.
+        Le premier appel crée le brouillon, les suivants remplacent ses entrées.
+        Retourne l'ID du brouillon.
+        """
+        conn = get_connection(self.db_config)
+        cur = conn.cursor()
+        try:
+            if draft_id is None:
                 cur.execute("""
-                    INSERT INTO schedule_entries (
-                        schedule_id, teacher_name, class_name, subject,
-                        day_of_week, period_number, is_parallel_group, group_id
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    schedule_id,
-                    teacher_name,
-                    entry.get("class_name"),
-                    entry.get("subject_name") or entry.get("subject"),
-                    entry.get("day_of_week"),
-                    entry.get("period_number"),
-                    bool(entry.get("is_parallel", False)),
-                    entry.get("group_id")
-                ))
+                    INSERT INTO schedules (academic_year, term, status, created_at)
+                    VALUES (%s, %s, %s, %s) RETURNING schedule_id
+                """, ("2024-2025", 1, "draft", datetime.now()))
+                draft_id = cur.fetchone()[0]
+            else:
+                cur.execute("DELETE FROM schedule_entries WHERE schedule_id = %s", (draft_id,))
 
+            insert_schedule_entries(cur, draft_id, ENTRY_COLUMNS, self._entry_rows(schedule))
+            if metadata is not None:
+                cur.execute(
+                    "UPDATE schedules SET metadata = %s WHERE schedule_id = %s",
+                    (json.dumps(metadata), draft_id)
+                )
             conn.commit()
-            logger.info(f"✅ Emploi du temps sauvegardé (ID {schedule_id})")
-            return schedule_id
-        except Exception as e:
+            return draft_id
+        except Exception:
             conn.rollback()
-            logger.error(f"Erreur sauvegarde: {e}")
             raise
         finally:
             cur.close()
@@ -1173,5 +1249,6 @@ class ScheduleSolverWithConstraints:
             "classes_covered": classes_covered,
             "subjects_count": len(set(e.get("subject_name") or e.get("subject") or "" for e in schedule)),
             "distribution_by_day": by_day,
-            "average_per_day": len(schedule) / max(len(days_used), 1)
+            "average_per_day": len(schedule) / max(len(days_used), 1),
+            "timings": {k: round(v, 3) for k, v in self.timings.items()}
         }
\ No newline at end of file
@@ -4,18 +4,21 @@ Générateur d'emploi du temps utilisant UNIQUEMENT les données de solver_input
 Remplace complètement les anciennes données
 """
 
-import psycopg2
 from psycopg2.extras import RealDictCursor, Json
+from db_pool import get_connection
 from ortools.sat.python import cp_model
 import logging
 import json
 from datetime import datetime
 import random
+from solver_metrics import instrument_engine
+import timetable_views
 
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@instrument_engine("input_generator")
 class SolverInputGenerator:
     """Générateur qui utilise UNIQUEMENT solver_input"""
     
@@ -36,7 +39,7 @@ class SolverInputGenerator:
         
     def load_solver_input_data(self):
         """Charge les données depuis solver_input UNIQUEMENT"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
@@ -228,7 +231,7 @@ class SolverInputGenerator:
     
     def save_to_database(self, schedule_entries):
         """Sauvegarde dans la base de données en remplaçant les anciennes données"""
-        conn = psycopg2.connect(**self.db_config)
+        conn = get_connection(self.db_config)
         cur = conn.cursor()
         
         try:
@@ -273,6 +276,8 @@ class SolverInputGenerator:
             
             conn.commit()
             logger.info(f"✅ Sauvegardé {len(schedule_entries)} entrées avec schedule_id={schedule_id}")
+            # Tous les schedules précédents ont été supprimés
+            timetable_views.invalidate()
             return schedule_id
             
         except Exception as e:
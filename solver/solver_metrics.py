@@ -0,0 +1,208 @@
+"""
+solver_metrics.py - Métriques Prometheus des moteurs de résolution
+Un seul point d'instrumentation pour tous les moteurs: le décorateur de classe
+`instrument_engine` mesure le chargement des données, chaque étape de
+construction du modèle (et chaque famille de contraintes `_add_*`), la taille
+du modèle, le temps CP-SAT, le statut, la progression objectif/borne et le
+temps d'enregistrement en base.
+
+Les générations tournent dans des processus séparés (solve_jobs, decomposition):
+si PROMETHEUS_MULTIPROC_DIR est défini, prometheus_client écrit les valeurs
+dans ce répertoire et /metrics les agrège pour tous les processus.
+"""
+import functools
+import glob
+import inspect
+import multiprocessing
+import os
+
+# Le répertoire multiprocessus doit exister avant l'import de prometheus_client;
+# le processus principal efface les valeurs d'une exécution précédente.
+_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if _MULTIPROC_DIR:
+    os.makedirs(_MULTIPROC_DIR, exist_ok=True)
+    if multiprocessing.parent_process() is None:
+        for path in glob.glob(os.path.join(_MULTIPROC_DIR, "*.db")):
+            os.remove(path)
+
+from ortools.sat.python import cp_model
+from prometheus_client import Counter, Gauge, Histogram
+
+# Durées: de la milliseconde (petites familles) à 30 minutes (solve complet)
+_BUILD_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_SOLVE_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 900, 1800)
+
+DATA_LOAD_SECONDS = Histogram(
+    "solver_data_load_seconds", "Temps de chargement des données du moteur",
+    ["engine"], buckets=_BUILD_BUCKETS,
+)
+MODEL_BUILD_SECONDS = Histogram(
+    "solver_model_build_seconds", "Temps d'une étape de construction du modèle",
+    ["engine", "step"], buckets=_BUILD_BUCKETS,
+)
+CONSTRAINT_BUILD_SECONDS = Histogram(
+    "solver_constraint_build_seconds", "Temps de construction d'une famille de contraintes",
+    ["engine", "family"], buckets=_BUILD_BUCKETS,
+)
+MODEL_VARIABLES = Gauge(
+    "solver_model_variables", "Nombre de variables du dernier modèle résolu",
+    ["engine"], multiprocess_mode="mostrecent",
+)
+MODEL_CONSTRAINTS = Gauge(
+    "solver_model_constraints", "Nombre de contraintes du dernier modèle résolu",
+    ["engine"], multiprocess_mode="mostrecent",
+)
+SOLVE_SECONDS = Histogram(
+    "solver_solve_seconds", "Temps mur CP-SAT", ["engine"], buckets=_SOLVE_BUCKETS,
+)
+FIRST_SOLUTION_SECONDS = Histogram(
+    "solver_first_solution_seconds", "Temps CP-SAT jusqu'à la première solution",
+    ["engine"], buckets=_SOLVE_BUCKETS,
+)
+SOLVE_STATUS = Counter(
+    "solver_solve_status", "Résolutions CP-SAT par statut final", ["engine", "status"],
+)
+SOLUTIONS = Counter(
+    "solver_solutions", "Solutions intermédiaires trouvées par CP-SAT", ["engine"],
+)
+OBJECTIVE_VALUE = Gauge(
+    "solver_objective_value", "Meilleur objectif de la résolution en cours (ou dernière)",
+    ["engine"], multiprocess_mode="mostrecent",
+)
+OBJECTIVE_BOUND = Gauge(
+    "solver_objective_bound", "Meilleure borne de la résolution en cours (ou dernière)",
+    ["engine"], multiprocess_mode="mostrecent",
+)
+DB_SAVE_SECONDS = Histogram(
+    "solver_db_save_seconds", "Temps d'enregistrement de l'emploi du temps en base",
+    ["engine"], buckets=_BUILD_BUCKETS,
+)
+
+# Méthodes des moteurs mesurées, par nom
+LOAD_METHODS = {"load_data", "load_data_from_db", "load_solver_input_data"}
+SAVE_METHODS = {"save_schedule", "save_to_database", "_save_solution_to_db"}
+STEP_PREFIXES = ("create_", "add_")
+FAMILY_PREFIXES = ("_add_", "_create_", "_set_")
+
+
+class InstrumentedCpSolver(cp_model.CpSolver):
+    """CpSolver qui publie taille du modèle, temps, statut et progression de l'objectif"""
+
+    def __init__(self, engine: str):
+        super().__init__()
+        self.engine = engine
+        self._observing = False
+
+    def Solve(self, model, solution_callback=None):
+        return self._observe(super().Solve, model, solution_callback)
+
+    def solve(self, model, solution_callback=None):
+        return self._observe(super().solve, model, solution_callback)
+
+    def _observe(self, solve, model, solution_callback):
+        # Selon la version d'OR-Tools, Solve() délègue à solve(): une seule mesure
+        if self._observing:
+            return solve(model, solution_callback)
+        self._observing = True
+        try:
+            return self._observed_solve(solve, model, solution_callback)
+        finally:
+            self._observing = False
+
+    def _observed_solve(self, solve, model, solution_callback):
+        proto = model.Proto()
+        has_objective = model.HasObjective()
+        MODEL_VARIABLES.labels(self.engine).set(len(proto.variables))
+        MODEL_CONSTRAINTS.labels(self.engine).set(len(proto.constraints))
+
+        solutions = SOLUTIONS.labels(self.engine)
+        found = []
+
+        def record(callback):
+            solutions.inc()
+            if not found:
+                found.append(True)
+                FIRST_SOLUTION_SECONDS.labels(self.engine).observe(callback.WallTime())
+            if has_objective:
+                OBJECTIVE_VALUE.labels(self.engine).set(callback.ObjectiveValue())
+                OBJECTIVE_BOUND.labels(self.engine).set(callback.BestObjectiveBound())
+
+        if solution_callback is None:
+            solution_callback = _MetricsCallback(record)
+        else:
+            # Callback de l'appelant (SolutionRecorder...): on l'enveloppe sur l'instance
+            original = solution_callback.on_solution_callback
+
+            def on_solution_callback():
+                record(solution_callback)
+                original()
+
+            solution_callback.on_solution_callback = on_solution_callback
+
+        try:
+            status = solve(model, solution_callback)
+        finally:
+            if not isinstance(solution_callback, _MetricsCallback):
+                del solution_callback.on_solution_callback
+
+        SOLVE_SECONDS.labels(self.engine).observe(self.WallTime())
+        SOLVE_STATUS.labels(self.engine, self.StatusName(status)).inc()
+        if has_objective and status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            OBJECTIVE_VALUE.labels(self.engine).set(self.ObjectiveValue())
+            OBJECTIVE_BOUND.labels(self.engine).set(self.BestObjectiveBound())
+        return status
+
+
+class _MetricsCallback(cp_model.CpSolverSolutionCallback):
+    def __init__(self, record):
+        super().__init__()
+        self._record = record
+
+    def on_solution_callback(self):
+        self._record(self)
+
+
+def _timed(method, histogram, *labels):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with histogram.labels(*labels).time():
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def instrument_engine(engine: str):
+    """
+    Décorateur de classe d'un moteur: remplace son `self.solver` par un
+    InstrumentedCpSolver et mesure les méthodes de chargement, de construction
+    (`create_*`, `add_*` et familles `_add_*`, `_create_*`, `_set_*`) et
+    d'enregistrement.
+    """
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if not inspect.isfunction(method):
+                continue
+            if name in LOAD_METHODS:
+                setattr(cls, name, _timed(method, DATA_LOAD_SECONDS, engine))
+            elif name in SAVE_METHODS:
+                setattr(cls, name, _timed(method, DB_SAVE_SECONDS, engine))
+            elif name.startswith(STEP_PREFIXES):
+                setattr(cls, name, _timed(method, MODEL_BUILD_SECONDS, engine, name))
+            elif name.startswith(FAMILY_PREFIXES):
+                family = name.split("_", 2)[2]
+                setattr(cls, name, _timed(method, CONSTRAINT_BUILD_SECONDS, engine, family))
+
+        init = cls.__init__
+
+        @functools.wraps(init)
+        def __init__(self, *args, **kwargs):
+            init(self, *args, **kwargs)
+            solver = getattr(self, "solver", None)
+            if isinstance(solver, cp_model.CpSolver) and not isinstance(solver, InstrumentedCpSolver):
+                instrumented = InstrumentedCpSolver(engine)
+                instrumented.parameters = solver.parameters
+                self.solver = instrumented
+
+        cls.__init__ = __init__
+        cls.engine_name = engine
+        return cls
+    return decorate
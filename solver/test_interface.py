@@ -37,7 +37,8 @@ def test_api_endpoints():
                 payload = {
                     "time_limit": 60,
                     "advanced": True,
-                    "minimize_gaps": True
+                    "minimize_gaps": True,
+                    "wait": True
                 }
                 response = requests.post(f"{API_BASE}{endpoint}", json=payload, timeout=120)
             
@@ -0,0 +1,576 @@
+"""
+timetable_views.py - Vues d'emploi du temps précalculées par schedule_id
+Un emploi du temps sauvegardé ne change plus: chaque vue (par classe, par
+professeur, grille, entrées du contrat API...) est construite une fois, sérialisée
+en JSON et gardée dans un LRU en mémoire, doublé de Redis quand REDIS_URL est
+défini. Le corps sérialisé porte un ETag pour les réponses 304.
+
+Les brouillons (status 'draft') sont réécrits pendant la résolution: ils ne sont
+jamais mis en cache. Une écriture sur un schedule existant (métadonnées) appelle
+invalidate(schedule_id), qui incrémente l'époque de ce schedule, partagée via
+Redis: ses clés précédentes deviennent inaccessibles, les autres schedules
+restent en cache. Une écriture sur plusieurs schedules (entrées déplacées par
+l'agent conseiller, schedules supprimés) appelle invalidate() sans argument,
+qui incrémente l'époque globale. Les vues qui lisent la table time_slots ont en
+plus l'empreinte de cette table dans leur clé.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+from db_pool import get_connection
+
+try:
+    import redis
+except ImportError:  # cache mémoire seul
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Clé Redis de l'époque globale; partagée avec scheduler_ai (agent conseiller)
+EPOCH_KEY = "timetable:epoch"
+# Clé Redis de l'époque d'un schedule
+SCHEDULE_EPOCH_KEY = "timetable:epoch:{schedule_id}"
+TIME_SLOTS_VERSION_QUERY = """
+    SELECT MD5(COALESCE(STRING_AGG(t::text, '|' ORDER BY t.slot_id), '')) AS version FROM time_slots t
+"""
+REDIS_TTL = 7 * 24 * 3600
+REDIS_RETRY_DELAY = 30
+
+# /get_schedule numérote les jours à partir de 1, les vues /api/* à partir de 0
+DAYS_FR = ['Dimanche', 'Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi']
+WEEK_FR = DAYS_FR[:5]
+WEEK_HE = ['ראשון', 'שני', 'שלישי', 'רביעי', 'חמישי']
+
+
+class CachedView(NamedTuple):
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "CachedView":
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        return cls.from_body(body)
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CachedView":
+        return cls(body, f'"{hashlib.sha1(body).hexdigest()}"')
+
+
+class TimetableViewCache:
+    """
+    LRU en mémoire + Redis optionnel pour les vues sérialisées.
+
+    Args:
+        max_entries: taille du LRU local
+        redis_url: URL Redis (None = mémoire seule)
+    """
+
+    def __init__(self, max_entries: int = 256, redis_url: Optional[str] = None):
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[Tuple, CachedView]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local_epoch = 0
+        self._schedule_epochs: Dict[int, int] = {}
+        self._redis = None
+        self._redis_down_until = 0.0
+        self.hits = self.misses = 0
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5,
+                                               socket_connect_timeout=0.5)
+        elif redis_url:
+            logger.warning("⚠️ Module redis non installé - cache des vues en mémoire seulement")
+
+    def _redis_call(self, method: str, *args):
+        """Appel Redis tolérant aux pannes (None si indisponible)"""
+        if self._redis is None or time.monotonic() < self._redis_down_until:
+            return None
+        try:
+            return getattr(self._redis, method)(*args)
+        except Exception as e:
+            logger.warning(f"⚠️ Redis indisponible pour le cache des vues: {e}")
+            self._redis_down_until = time.monotonic() + REDIS_RETRY_DELAY
+            return None
+
+    def epoch(self, schedule_id: int) -> Tuple[int, int]:
+        """(époque globale, époque du schedule), partagées via Redis si disponible"""
+        shared = self._redis_call("mget", [EPOCH_KEY, SCHEDULE_EPOCH_KEY.format(schedule_id=schedule_id)])
+        if shared is not None:
+            return tuple(int(value) if value is not None else 0 for value in shared)
+        with self._lock:
+            return self._local_epoch, self._schedule_epochs.get(schedule_id, 0)
+
+    def _key(self, schedule_id: int, view: Hashable, epoch: Optional[Tuple[int, int]]) -> Tuple:
+        return (self.epoch(schedule_id) if epoch is None else epoch, schedule_id, view)
+
+    @staticmethod
+    def _redis_key(key: Tuple) -> str:
+        (epoch, schedule_epoch), schedule_id, view = key
+        if isinstance(view, tuple):
+            view = ":".join(map(str, view))
+        return f"timetable:{epoch}.{schedule_epoch}:{schedule_id}:{view}"
+
+    def get(self, schedule_id: int, view: Hashable,
+            epoch: Optional[Tuple[int, int]] = None) -> Optional[CachedView]:
+        key = self._key(schedule_id, view, epoch)
+        with self._lock:
+            cached = self._lru.get(key)
+            if cached is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        body = self._redis_call("get", self._redis_key(key))
+        if body is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        cached = CachedView.from_body(body)
+        self._store_local(key, cached)
+        with self._lock:
+            self.hits += 1
+        return cached
+
+    def put(self, schedule_id: int, view: Hashable, cached: CachedView,
+            epoch: Optional[Tuple[int, int]] = None) -> None:
+        key = self._key(schedule_id, view, epoch)
+        self._store_local(key, cached)
+        self._redis_call("setex", self._redis_key(key), REDIS_TTL, cached.body)
+
+    def _store_local(self, key: Tuple, cached: CachedView) -> None:
+        with self._lock:
+            self._lru[key] = cached
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def invalidate(self, schedule_id: Optional[int] = None) -> None:
+        """
+        Rend obsolètes les vues du schedule, ou toutes les vues si schedule_id
+        est None (ici et dans les autres processus)
+        """
+        with self._lock:
+            if schedule_id is None:
+                self._lru.clear()
+                self._local_epoch += 1
+            else:
+                for key in [key for key in self._lru if key[1] == schedule_id]:
+                    del self._lru[key]
+                self._schedule_epochs[schedule_id] = self._schedule_epochs.get(schedule_id, 0) + 1
+        if schedule_id is None:
+            self._redis_call("incr", EPOCH_KEY)
+        else:
+            # Même durée que les vues: une époque expirée ne peut plus rendre une vue périmée
+            key = SCHEDULE_EPOCH_KEY.format(schedule_id=schedule_id)
+            self._redis_call("incr", key)
+            self._redis_call("expire", key, REDIS_TTL)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "redis": self._redis is not None,
+            }
+
+
+_cache: Optional[TimetableViewCache] = None
+
+
+def get_cache() -> TimetableViewCache:
+    """Cache du processus (TIMETABLE_CACHE_SIZE, REDIS_URL)"""
+    global _cache
+    if _cache is None:
+        _cache = TimetableViewCache(
+            max_entries=int(os.getenv("TIMETABLE_CACHE_SIZE", "256")),
+            redis_url=os.getenv("REDIS_URL"),
+        )
+    return _cache
+
+
+def invalidate(schedule_id: Optional[int] = None) -> None:
+    """
+    À appeler après toute écriture sur un schedule déjà sauvegardé, sans
+    schedule_id si l'écriture touche plusieurs schedules (suppression, mise à jour globale)
+    """
+    get_cache().invalidate(schedule_id)
+    if schedule_id is not None:
+        logger.info(f"♻️ Vues d'emploi du temps invalidées (schedule {schedule_id})")
+    else:
+        logger.info("♻️ Vues d'emploi du temps invalidées (tous les schedules)")
+
+
+def reads_time_slots(build: Callable[..., Any]) -> Callable[..., Any]:
+    """Marque une vue construite depuis la table time_slots: sa clé porte l'empreinte de la table"""
+    build.reads_time_slots = True
+    return build
+
+
+def get_view(db_config: Dict, schedule_id: int, view: Hashable,
+              build: Callable[..., Any], *args) -> Optional[CachedView]:
+    """
+    Vue `view` du schedule, depuis le cache ou construite par
+    build(cur, schedule_id, *args). None si le schedule n'existe pas.
+    """
+    cache = get_cache()
+    # Époque lue avant la construction: une invalidation concurrente gagne
+    epoch = cache.epoch(schedule_id)
+    slots_dependent = getattr(build, "reads_time_slots", False)
+    if not slots_dependent:
+        cached = cache.get(schedule_id, view, epoch)
+        if cached is not None:
+            return cached
+
+    conn = get_connection(db_config)
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        if slots_dependent:
+            # Créneaux modifiés (horaires, périodes): nouvelle clé
+            cur.execute(TIME_SLOTS_VERSION_QUERY)
+            view = (view, cur.fetchone()["version"])
+            cached = cache.get(schedule_id, view, epoch)
+            if cached is not None:
+                return cached
+        cur.execute("SELECT status FROM schedules WHERE schedule_id = %s", (schedule_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        payload = build(cur, schedule_id, *args)
+    finally:
+        cur.close()
+        conn.close()
+
+    cached = CachedView.from_payload(payload)
+    if row["status"] != "draft" and payload.get("success", True):
+        cache.put(schedule_id, view, cached, epoch)
+    return cached
+
+
+# ----------------------------------------------------------------------
+# Construction des vues (curseur RealDictCursor)
+# ----------------------------------------------------------------------
+
+def build_by_class(cur, schedule_id: int) -> Dict[str, Any]:
+    """Vue /api/schedule_by_class/{schedule_id}"""
+    cur.execute("""
+        SELECT
+            se.class_name,
+            se.day_of_week,
+            se.period_number,
+            COALESCE(se.subject, se.subject_name) as subject,
+            se.teacher_name,
+            CASE
+                WHEN se.period_number IS NOT NULL THEN
+                    (6 + se.period_number)::text || ':00'
+                ELSE '00:00'
+            END as start_time,
+            COALESCE(se.is_parallel_group, false) as is_parallel,
+            se.group_id
+        FROM schedule_entries se
+        WHERE se.schedule_id = %s
+        ORDER BY se.class_name, se.day_of_week, se.period_number
+    """, (schedule_id,))
+    entries = cur.fetchall()
+
+    if not entries:
+        return {
+            "success": False,
+            "message": "Aucune donnée d'emploi du temps trouvée",
+            "schedule_id": schedule_id,
+            "classes": {}
+        }
+
+    classes_schedule = {}
+    for entry in entries:
+        class_name = entry['class_name']
+        day = entry['day_of_week']
+        period = entry['period_number']
+
+        if class_name not in classes_schedule:
+            classes_schedule[class_name] = {
+                'class_name': class_name,
+                'days': {},
+                'stats': {'total_hours': 0, 'subjects': set(), 'teachers': set()}
+            }
+
+        day_name = WEEK_FR[day] if day < len(WEEK_FR) else f'Jour {day}'
+        hebrew_day = WEEK_HE[day] if day < len(WEEK_HE) else f'יום {day}'
+
+        if day_name not in classes_schedule[class_name]['days']:
+            classes_schedule[class_name]['days'][day_name] = {
+                'hebrew_name': hebrew_day,
+                'periods': {}
+            }
+
+        classes_schedule[class_name]['days'][day_name]['periods'][period] = {
+            'subject': entry['subject'],
+            'teacher': entry['teacher_name'],
+            'time': entry['start_time'],
+            'is_parallel': bool(entry['is_parallel']),
+            'group_id': entry['group_id']
+        }
+
+        classes_schedule[class_name]['stats']['total_hours'] += 1
+        classes_schedule[class_name]['stats']['subjects'].add(entry['subject'])
+        classes_schedule[class_name]['stats']['teachers'].add(entry['teacher_name'])
+
+    for class_name in classes_schedule:
+        stats = classes_schedule[class_name]['stats']
+        stats['subjects'] = list(stats['subjects'])
+        stats['teachers'] = list(stats['teachers'])
+        stats['subjects_count'] = len(stats['subjects'])
+        stats['teachers_count'] = len(stats['teachers'])
+
+    return {
+        "success": True,
+        "schedule_id": schedule_id,
+        "total_classes": len(classes_schedule),
+        "classes": classes_schedule,
+        "view_type": "by_class"
+    }
+
+
+def build_by_teacher(cur, schedule_id: int) -> Dict[str, Any]:
+    """Vue /api/schedule_by_teacher/{schedule_id}"""
+    cur.execute("""
+        SELECT
+            se.teacher_name,
+            se.day_of_week,
+            se.period_number,
+            COALESCE(se.subject, se.subject_name) as subject,
+            se.class_name,
+            CASE
+                WHEN se.period_number IS NOT NULL THEN
+                    (6 + se.period_number)::text || ':00'
+                ELSE '00:00'
+            END as start_time,
+            COALESCE(se.is_parallel_group, false) as is_parallel,
+            se.group_id
+        FROM schedule_entries se
+        WHERE se.schedule_id = %s
+        ORDER BY se.teacher_name, se.day_of_week, se.period_number
+    """, (schedule_id,))
+    entries = cur.fetchall()
+
+    if not entries:
+        return {
+            "success": False,
+            "message": "Aucune donnée d'emploi du temps trouvée",
+            "schedule_id": schedule_id,
+            "teachers": {}
+        }
+
+    teachers_schedule = {}
+    for entry in entries:
+        teacher_name = entry['teacher_name']
+        day = entry['day_of_week']
+        period = entry['period_number']
+
+        if teacher_name not in teachers_schedule:
+            teachers_schedule[teacher_name] = {
+                'teacher_name': teacher_name,
+                'days': {},
+                'stats': {'total_hours': 0, 'subjects': set(), 'classes': set()}
+            }
+
+        day_name = WEEK_FR[day] if day < len(WEEK_FR) else f'Jour {day}'
+        hebrew_day = WEEK_HE[day] if day < len(WEEK_HE) else f'יום {day}'
+
+        if day_name not in teachers_schedule[teacher_name]['days']:
+            teachers_schedule[teacher_name]['days'][day_name] = {
+                'hebrew_name': hebrew_day,
+                'periods': {}
+            }
+
+        teachers_schedule[teacher_name]['days'][day_name]['periods'][period] = {
+            'subject': entry['subject'],
+            'class': entry['class_name'],
+            'time': entry['start_time'],
+            'is_parallel': bool(entry['is_parallel']),
+            'group_id': entry['group_id']
+        }
+
+        teachers_schedule[teacher_name]['stats']['total_hours'] += 1
+        teachers_schedule[teacher_name]['stats']['subjects'].add(entry['subject'])
+        teachers_schedule[teacher_name]['stats']['classes'].add(entry['class_name'])
+
+    for teacher_name in teachers_schedule:
+        stats = teachers_schedule[teacher_name]['stats']
+        stats['subjects'] = list(stats['subjects'])
+        stats['classes'] = list(stats['classes'])
+        stats['subjects_count'] = len(stats['subjects'])
+        stats['classes_count'] = len(stats['classes'])
+
+    return {
+        "success": True,
+        "schedule_id": schedule_id,
+        "total_teachers": len(teachers_schedule),
+        "teachers": teachers_schedule,
+        "view_type": "by_teacher"
+    }
+
+
+def build_grid(cur, schedule_id: int) -> Dict[str, Any]:
+    """Vue /get_schedule/{schedule_id}: grille jour -> période -> cours"""
+    cur.execute("""
+        SELECT
+            day_of_week,
+            period_number,
+            class_name,
+            subject_name,
+            teacher_name,
+            room,
+            is_parallel_group
+        FROM schedule_entries
+        WHERE schedule_id = %s
+        ORDER BY day_of_week, period_number, class_name
+    """, (schedule_id,))
+    entries = cur.fetchall()
+
+    if not entries:
+        return {"success": False, "error": "Emploi du temps non trouvé"}
+
+    schedule_grid = {}
+    for entry in entries:
+        day = entry['day_of_week']
+        day_name = DAYS_FR[day - 1] if day <= len(DAYS_FR) else f"Jour {day}"
+        period = entry['period_number']
+
+        schedule_grid.setdefault(day_name, {}).setdefault(period, []).append({
+            'class_name': entry['class_name'],
+            'subject': entry['subject_name'],
+            'teacher_name': entry['teacher_name'],
+            'room': entry['room'],
+            'is_parallel': entry['is_parallel_group']
+        })
+
+    return {
+        "success": True,
+        "schedule_id": schedule_id,
+        "schedule_grid": schedule_grid,
+        "total_entries": len(entries),
+        "days": DAYS_FR
+    }
+
+
+def build_named(cur, schedule_id: int, view_type: str, name: str) -> Dict[str, Any]:
+    """Vue /api/schedule/{view_type}/{name} ('class' ou 'teacher')"""
+    if view_type == "class":
+        condition, value = "class_name = %s", name
+    else:
+        condition, value = "teacher_name LIKE %s", f"%{name}%"
+
+    cur.execute(f"""
+        SELECT
+            entry_id,
+            teacher_name,
+            class_name,
+            subject_name,
+            day_of_week,
+            period_number,
+            is_parallel_group,
+            group_id
+        FROM schedule_entries
+        WHERE schedule_id = %s AND {condition}
+        ORDER BY day_of_week, period_number
+    """, (schedule_id, value))
+    schedule = cur.fetchall()
+
+    for entry in schedule:
+        if entry.get("is_parallel_group") and entry.get("group_id"):
+            entry["display_type"] = "parallel"
+            entry["display_info"] = f"Cours parallèle - Groupe {entry['group_id']}"
+        else:
+            entry["display_type"] = "individual"
+            entry["display_info"] = "Cours individuel"
+
+    return {
+        "schedule": schedule,
+        "view_type": view_type,
+        "name": name,
+        "total_lessons": len(schedule),
+        "schedule_id": schedule_id
+    }
+
+
+@reads_time_slots
+def build_entries(cur, schedule_id: int, version: str) -> Dict[str, Any]:
+    """Vue /api/schedule_entries: créneaux + entrées selon le contrat de l'API"""
+    cur.execute("SELECT metadata FROM schedules WHERE schedule_id = %s", (schedule_id,))
+    schedule_result = cur.fetchone()
+
+    cur.execute("""
+        SELECT
+            ts.slot_id,
+            ts.day_of_week as day,
+            ts.period_number - 1 as index,
+            ts.start_time::text as start,
+            ts.end_time::text as end
+        FROM time_slots ts
+        ORDER BY ts.day_of_week, ts.period_number
+    """)
+    time_slots = cur.fetchall()
+
+    cur.execute("""
+        SELECT
+            se.class_name,
+            se.day_of_week as day,
+            CASE
+                WHEN se.period_number = 0 THEN 0  -- Period 0 reste 0 (shich boker)
+                ELSE se.period_number              -- Les autres restent tels quels
+            END as slot_index,
+            COALESCE(se.subject_name, se.subject) as subject,
+            se.teacher_name,
+            se.room
+        FROM schedule_entries se
+        WHERE se.schedule_id = %s
+        ORDER BY se.day_of_week, se.period_number, se.class_name
+    """, (schedule_id,))
+
+    entries = []
+    for entry in cur.fetchall():
+        teacher_names = entry['teacher_name']
+        if isinstance(teacher_names, str):
+            teacher_names = [name.strip() for name in teacher_names.split(',') if name.strip()]
+        elif not isinstance(teacher_names, list):
+            teacher_names = [str(teacher_names)] if teacher_names else []
+
+        entries.append({
+            "class_name": entry['class_name'],
+            "day": entry['day'],
+            "slot_index": entry['slot_index'],
+            "subject": entry['subject'] or '',
+            "teacher_names": teacher_names,
+            "room": entry['room'] or ''
+        })
+
+    metadata = {}
+    if schedule_result and schedule_result['metadata']:
+        try:
+            if isinstance(schedule_result['metadata'], str):
+                metadata = json.loads(schedule_result['metadata'])
+            else:
+                metadata = schedule_result['metadata']
+        except (TypeError, ValueError):
+            metadata = {}
+
+    return {
+        "version": version,
+        "time_slots": [dict(slot) for slot in time_slots],
+        "entries": entries,
+        "meta": {
+            "solve_status": metadata.get("solve_status", "OPTIMAL"),
+            "walltime_sec": metadata.get("walltime_sec", 0),
+            "advanced": metadata.get("advanced", False),
+            "notes": metadata.get("notes", [])
+        }
+    }
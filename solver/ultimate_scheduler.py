@@ -9,6 +9,7 @@ from datetime import datetime
 # Import de tous les solvers disponibles
 from corrected_solver_engine import CorrectedScheduleSolver
 from simple_parallel_handler import SimpleParallelHandler
+from portfolio import PORTFOLIO_ENGINES, PortfolioRunner
 
 # Import des autres modules de façon sécurisée
 try:
@@ -38,6 +39,10 @@ class UltimateScheduler:
         self.algorithms = {
             'corrected': CorrectedScheduleSolver,
         }
+        # Moteurs CP-SAT exécutables en parallèle (processus séparés)
+        for engine_name, runner in PORTFOLIO_ENGINES.items():
+            self.algorithms.setdefault(engine_name, runner)
+        self.engine_timings: Dict[str, Dict[str, Any]] = {}
         
         # Ajouter les algorithmes disponibles
         if ConflictResolver:
@@ -62,32 +67,44 @@ class UltimateScheduler:
         best_schedule = None
         best_quality = 0
         
-        # Phase 1: Essayer les algorithmes sélectionnés
-        for algo_name in selected_algorithms:
-            if algo_name in self.algorithms:
-                try:
-                    logger.info(f"🚀 Lancement algorithme: {algo_name}")
-                    result = await self._run_algorithm(algo_name, options)
-                    
-                    if result and result.get('success'):
-                        quality = self._calculate_quality(result, options)
-                        results.append({
-                            'algorithm': algo_name,
-                            'result': result,
-                            'quality': quality
-                        })
-                        
-                        if quality > best_quality:
-                            best_quality = quality
-                            best_schedule = result
-                            
-                        logger.info(f"✅ {algo_name}: Qualité {quality:.1f}%")
-                    else:
-                        logger.warning(f"❌ {algo_name}: Échec")
-                        
-                except Exception as e:
-                    logger.error(f"❌ {algo_name}: Erreur {e}")
-                    continue
+        # Phase 1: Lancer les algorithmes sélectionnés simultanément
+        portfolio_algorithms = [a for a in selected_algorithms if a in PORTFOLIO_ENGINES]
+        other_algorithms = [
+            a for a in selected_algorithms
+            if a in self.algorithms and a not in PORTFOLIO_ENGINES
+        ]
+
+        runner = PortfolioRunner(
+            self.db_config, portfolio_algorithms, time_limit, quality_target,
+            score=lambda result: self._calculate_quality(result, options)
+        )
+        phase1 = await asyncio.gather(
+            runner.run(),
+            *(self._run_algorithm(algo_name, options) for algo_name in other_algorithms),
+            return_exceptions=True
+        )
+        self.engine_timings.update(runner.timings)
+
+        portfolio_results, other_results = phase1[0], phase1[1:]
+        if isinstance(portfolio_results, Exception):
+            logger.error(f"❌ Portefeuille: Erreur {portfolio_results}")
+            portfolio_results = []
+        results.extend(portfolio_results)
+
+        for algo_name, result in zip(other_algorithms, other_results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ {algo_name}: Erreur {result}")
+            elif result and result.get('success'):
+                quality = self._calculate_quality(result, options)
+                results.append({'algorithm': algo_name, 'result': result, 'quality': quality})
+                logger.info(f"✅ {algo_name}: Qualité {quality:.1f}%")
+            else:
+                logger.warning(f"❌ {algo_name}: Échec")
+
+        for entry in results:
+            if best_schedule is None or entry['quality'] > best_quality:
+                best_quality = entry['quality']
+                best_schedule = entry['result']
         
         # Phase 2: Si pas de solution satisfaisante, essayer tous les autres
         if best_quality < quality_target:
@@ -106,7 +123,7 @@ class UltimateScheduler:
                                 'quality': quality
                             })
                             
-                            if quality > best_quality:
+                            if best_schedule is None or quality > best_quality:
                                 best_quality = quality
                                 best_schedule = result
                                 
@@ -130,24 +147,16 @@ class UltimateScheduler:
     async def _run_algorithm(self, algo_name: str, options: Dict) -> Optional[Dict]:
         """Exécute un algorithme spécifique"""
         try:
-            if algo_name == 'corrected':
-                solver = CorrectedScheduleSolver(self.db_config)
-                solver.load_data_from_db()
-                solver.create_variables()
-                solver.add_constraints()
-                schedule = solver.solve(time_limit=options.get('time_limit', 600))
-                
-                if schedule:
-                    schedule_id = solver.save_schedule(schedule)
-                    summary = solver.get_schedule_summary(schedule)
-                    return {
-                        'success': True,
-                        'schedule_id': schedule_id,
-                        'schedule': schedule,
-                        'summary': summary,
-                        'solve_time': solver.solve_time,
-                        'algorithm': 'corrected'
-                    }
+            if algo_name in PORTFOLIO_ENGINES:
+                # Moteur CP-SAT seul, hors de la boucle d'événements
+                runner = PortfolioRunner(
+                    self.db_config, [algo_name], options.get('time_limit', 600),
+                    options.get('quality_target', 85),
+                    score=lambda result: self._calculate_quality(result, options)
+                )
+                runs = await runner.run()
+                self.engine_timings.update(runner.timings)
+                return runs[0]['result'] if runs else None
                     
             elif algo_name == 'pedagogical':
                 # Appel à l'API pédagogique
@@ -311,6 +320,7 @@ class UltimateScheduler:
                 'algorithms_successful': successful_algorithms,
                 'best_algorithm': best_algorithm,
                 'best_quality': best_quality,
+                'engine_timings': self.engine_timings,
                 'all_results': [
                     {
                         'algorithm': r['algorithm'],
@@ -0,0 +1,139 @@
+"""
+var_store.py - Stockage compact des variables de décision (cours × créneau)
+Remplace les dictionnaires schedule_vars[f"course_{id}_slot_{slot}"]: les variables
+sont rangées dans un tableau 2-D indexé par (position du cours, position du créneau)
+avec un masque de présence, partagé par tous les moteurs CP-SAT.
+"""
+import logging
+from typing import Dict, List, Iterable, Iterator, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+
+class VarStore:
+    """
+    Tableau 2-D de BoolVar indexé par entiers.
+
+    Les identifiants course_id / slot_id ne sont convertis en positions qu'une
+    seule fois (dictionnaires course_pos / slot_pos); les boucles chaudes peuvent
+    ensuite utiliser directement les positions via get_at() ou row().
+    """
+
+    def __init__(self, model, course_ids: Iterable[Any], slot_ids: Iterable[Any]):
+        self.model = model
+        # Doublons ignorés: un même identifiant partage une seule variable
+        self.course_ids: List[Any] = list(dict.fromkeys(course_ids))
+        self.slot_ids: List[Any] = list(dict.fromkeys(slot_ids))
+        self.course_pos: Dict[Any, int] = {cid: i for i, cid in enumerate(self.course_ids)}
+        self.slot_pos: Dict[Any, int] = {sid: j for j, sid in enumerate(self.slot_ids)}
+
+        n_slots = len(self.slot_ids)
+        self._grid: List[List[Any]] = [[None] * n_slots for _ in self.course_ids]
+        self._mask: List[bytearray] = [bytearray(n_slots) for _ in self.course_ids]
+        self._count = 0
+
+    # ------------------------------------------------------------------
+    # Création
+    # ------------------------------------------------------------------
+
+    def add(self, course_id, slot_id):
+        """Crée (ou retourne) la variable booléenne du couple (cours, créneau)"""
+        ci = self.course_pos[course_id]
+        sj = self.slot_pos[slot_id]
+        var = self._grid[ci][sj]
+        if var is None:
+            var = self.model.NewBoolVar(f"course_{course_id}_slot_{slot_id}")
+            self._grid[ci][sj] = var
+            self._mask[ci][sj] = 1
+            self._count += 1
+        return var
+
+    def attach(self, course_id, slot_id, var):
+        """Enregistre une variable déjà présente dans le modèle (modèle rechargé du cache)"""
+        ci = self.course_pos[course_id]
+        sj = self.slot_pos[slot_id]
+        if self._grid[ci][sj] is None:
+            self._count += 1
+        self._grid[ci][sj] = var
+        self._mask[ci][sj] = 1
+        return var
+
+    def add_all(self, allowed=None):
+        """
+        Crée les variables pour tous les couples (cours, créneau).
+        `allowed(course_id, slot_id)` permet d'exclure des couples impossibles.
+        """
+        for course_id in self.course_ids:
+            for slot_id in self.slot_ids:
+                if allowed is None or allowed(course_id, slot_id):
+                    self.add(course_id, slot_id)
+        return self._count
+
+    # ------------------------------------------------------------------
+    # Accès
+    # ------------------------------------------------------------------
+
+    def get(self, course_id, slot_id):
+        """Variable du couple (cours, créneau) ou None si elle n'existe pas"""
+        ci = self.course_pos.get(course_id)
+        sj = self.slot_pos.get(slot_id)
+        if ci is None or sj is None:
+            return None
+        return self._grid[ci][sj]
+
+    def get_at(self, ci: int, sj: int):
+        """Accès direct par positions (aucune conversion d'identifiant)"""
+        return self._grid[ci][sj]
+
+    def has(self, course_id, slot_id) -> bool:
+        ci = self.course_pos.get(course_id)
+        sj = self.slot_pos.get(slot_id)
+        return ci is not None and sj is not None and bool(self._mask[ci][sj])
+
+    def row(self, course_id) -> List[Any]:
+        """Variables existantes d'un cours, tous créneaux confondus"""
+        ci = self.course_pos.get(course_id)
+        if ci is None:
+            return []
+        return [var for var in self._grid[ci] if var is not None]
+
+    def vars_for(self, course_ids: Iterable[Any], slot_ids: Iterable[Any]) -> List[Any]:
+        """Variables existantes pour le produit cours × créneaux donnés"""
+        slot_positions = [self.slot_pos[sid] for sid in slot_ids if sid in self.slot_pos]
+        result = []
+        for course_id in course_ids:
+            ci = self.course_pos.get(course_id)
+            if ci is None:
+                continue
+            grid_row = self._grid[ci]
+            for sj in slot_positions:
+                var = grid_row[sj]
+                if var is not None:
+                    result.append(var)
+        return result
+
+    def items(self) -> Iterator[Tuple[Tuple[Any, Any], Any]]:
+        """Itère sur ((course_id, slot_id), var) pour les variables existantes"""
+        for ci, grid_row in enumerate(self._grid):
+            course_id = self.course_ids[ci]
+            for sj, var in enumerate(grid_row):
+                if var is not None:
+                    yield (course_id, self.slot_ids[sj]), var
+
+    def assigned(self, solver) -> Iterator[Tuple[Any, Any]]:
+        """Couples (course_id, slot_id) dont la variable vaut 1 dans la solution"""
+        for (course_id, slot_id), var in self.items():
+            if solver.Value(var) == 1:
+                yield course_id, slot_id
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: Tuple[Any, Any]) -> bool:
+        return self.has(*key)
+
+    def __getitem__(self, key: Tuple[Any, Any]):
+        var = self.get(*key)
+        if var is None:
+            raise KeyError(key)
+        return var
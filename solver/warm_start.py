@@ -0,0 +1,139 @@
+"""
+warm_start.py - Démarrage à chaud du modèle CP-SAT depuis l'emploi du temps précédent
+Les entrées du dernier schedule actif sont converties en indications (AddHint) sur
+les variables (cours, créneau). Les classes non concernées par une modification
+peuvent en plus être figées via un littéral d'hypothèse: si le modèle devient
+infaisable, l'hypothèse est retirée et la recherche repart avec les seules indications.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from psycopg2.extras import RealDictCursor
+from db_pool import get_connection
+
+from model_index import course_subject, split_names
+
+logger = logging.getLogger(__name__)
+
+
+def load_previous_schedule(db_config: Dict, schedule_id: Optional[int] = None) -> Tuple[Optional[int], List[Dict]]:
+    """Charge les entrées du schedule donné, ou du dernier schedule actif"""
+    conn = get_connection(db_config)
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        if schedule_id is None:
+            cur.execute("SELECT MAX(schedule_id) AS latest_id FROM schedules WHERE status = 'active'")
+            row = cur.fetchone()
+            schedule_id = row["latest_id"] if row else None
+        if schedule_id is None:
+            return None, []
+
+        cur.execute("""
+            SELECT class_name, subject, teacher_name, day_of_week, period_number
+            FROM schedule_entries
+            WHERE schedule_id = %s
+        """, (schedule_id,))
+        return schedule_id, [dict(r) for r in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+
+
+class WarmStart:
+    """
+    Indications de solution tirées d'un emploi du temps précédent.
+
+    Args:
+        entries: entrées de schedule_entries (class_name, subject, day_of_week, period_number)
+        fix_untouched: figer les cours dont aucune classe n'est concernée
+        touched_classes / touched_teachers: entités visées par la modification;
+            sans elles, rien n'est figé (indications seulement)
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, Any]], fix_untouched: bool = False,
+                 touched_classes: Optional[Iterable[str]] = None,
+                 touched_teachers: Optional[Iterable[str]] = None,
+                 source_schedule_id: Optional[int] = None):
+        self.fix_untouched = fix_untouched
+        self.touched_classes: Set[str] = set(touched_classes or [])
+        self.touched_teachers: Set[str] = set(touched_teachers or [])
+        self.source_schedule_id = source_schedule_id
+        self.keep_literal = None
+        self.stats: Dict[str, int] = {}
+
+        # (classe, matière, jour, période) occupés dans l'emploi du temps précédent
+        self._occupied: Set[Tuple[str, str, int, int]] = set()
+        for entry in entries:
+            subject = (entry.get("subject") or entry.get("subject_name") or "").strip()
+            for class_name in split_names(entry.get("class_name")):
+                self._occupied.add((class_name, subject, entry["day_of_week"], entry["period_number"]))
+
+    @classmethod
+    def from_db(cls, db_config: Dict, schedule_id: Optional[int] = None, **kwargs) -> Optional["WarmStart"]:
+        """WarmStart depuis le dernier schedule actif, ou None s'il n'y en a pas"""
+        source_id, entries = load_previous_schedule(db_config, schedule_id)
+        if not entries:
+            logger.info("Démarrage à chaud: aucun emploi du temps précédent")
+            return None
+        logger.info(f"Démarrage à chaud depuis le schedule {source_id} ({len(entries)} entrées)")
+        return cls(entries, source_schedule_id=source_id, **kwargs)
+
+    def _is_hinted(self, classes: List[str], subject: str, slot: Dict) -> bool:
+        day, period = slot["day_of_week"], slot["period_number"]
+        return any((class_name, subject, day, period) in self._occupied for class_name in classes)
+
+    def _is_touched(self, course: Dict, classes: List[str]) -> bool:
+        if self.touched_classes.intersection(classes):
+            return True
+        teachers = split_names(course.get("teacher_names") or course.get("teacher_name"))
+        return bool(self.touched_teachers.intersection(teachers))
+
+    def apply(self, model, schedule_vars, courses: List[Dict], time_slots: List[Dict]) -> Dict[str, int]:
+        """
+        Ajoute les indications (et les fixations) au modèle.
+        À appeler une fois les variables créées, avant la résolution.
+        """
+        can_fix = self.fix_untouched and (self.touched_classes or self.touched_teachers)
+        if can_fix:
+            self.keep_literal = model.NewBoolVar("warm_start_keep_untouched")
+
+        hints = fixed_courses = 0
+        for course in courses:
+            course_id = course["course_id"]
+            classes = split_names(course.get("class_list") or course.get("class_name"))
+            subject = course_subject(course)
+
+            hinted_vars = []
+            for slot in time_slots:
+                var = schedule_vars.get(course_id, slot["slot_id"])
+                if var is None:
+                    continue
+                value = self._is_hinted(classes, subject, slot)
+                model.AddHint(var, value)
+                hints += 1
+                if value:
+                    hinted_vars.append(var)
+
+            # Ne figer que les cours entièrement placés à l'identique
+            if can_fix and hinted_vars and len(hinted_vars) == (course.get("hours") or 0) \
+                    and not self._is_touched(course, classes):
+                for var in hinted_vars:
+                    model.AddImplication(self.keep_literal, var)
+                fixed_courses += 1
+
+        if self.keep_literal is not None:
+            model.AddAssumptions([self.keep_literal])
+
+        self.stats = {"hints": hints, "fixed_courses": fixed_courses}
+        logger.info(f"✓ Démarrage à chaud: {hints} indications, {fixed_courses} cours figés")
+        return self.stats
+
+    def relax(self, model) -> bool:
+        """Retire la fixation des classes non concernées. True si le modèle a changé."""
+        if self.keep_literal is None:
+            return False
+        model.ClearAssumptions()
+        self.keep_literal = None
+        self.stats["fixed_courses"] = 0
+        logger.warning("⚠️ Fixation des classes non concernées infaisable - relance avec indications seules")
+        return True
@@ -0,0 +1,53 @@
+"""
+Tests unitaires pour la boucle asyncio des appels LLM (scheduler_ai/async_llm.py)
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scheduler_ai"))
+
+from async_llm import AsyncLLMRunner
+
+
+class TestAsyncLLMRunner:
+    """Soumission, délai et annulation par session"""
+
+    def test_concurrent_calls_share_one_thread(self):
+        runner = AsyncLLMRunner(timeout=5)
+        threads = set()
+
+        async def call(i):
+            threads.add(threading.get_ident())
+            await asyncio.sleep(0.2)
+            return i
+
+        futures = [runner.submit(call(i), session_id=f"s{i}") for i in range(20)]
+        assert [future.result(timeout=2) for future in futures] == list(range(20))
+        assert len(threads) == 1
+        assert runner.stats()["in_flight"] == 0
+
+    def test_timeout_and_cancel_session(self):
+        runner = AsyncLLMRunner(timeout=0.1)
+        with pytest.raises(TimeoutError):
+            runner.submit(asyncio.sleep(5)).result(timeout=2)
+
+        cancelled = threading.Event()
+
+        async def slow_llm_call():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        future = runner.submit(slow_llm_call(), session_id="sid", timeout=10)
+        other = runner.submit(asyncio.sleep(0.05, result="ok"), session_id="other", timeout=10)
+        assert runner.cancel_session("sid") == 1
+        assert future.cancelled()
+        assert cancelled.wait(2)
+        assert other.result(timeout=2) == "ok"
+        assert runner.stats()["cancelled"] == 1
@@ -0,0 +1,119 @@
+"""
+Tests unitaires pour le registre de contraintes compilées (solver/constraint_registry.py)
+Sans PostgreSQL: curseur factice.
+"""
+import os
+import sys
+
+from ortools.sat.python import cp_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+import constraint_registry
+from constraint_registry import ConsecutiveHoursLimit, TeacherAvailability, compile_rows, load_constraints
+from model_index import ModelIndex
+from var_store import VarStore
+
+CONSTRAINTS = [
+    {"constraint_id": 1, "constraint_type": "teacher_availability", "priority": 2, "entity_name": "כהן",
+     "constraint_data": {"unavailable_days": [1]}, "is_active": True},
+    {"constraint_id": 2, "constraint_type": "consecutive_hours_limit", "priority": 1,
+     "entity_name": "all_teachers", "constraint_data": {"max_consecutive": 2}, "is_active": True},
+    {"constraint_id": 3, "constraint_type": "room_availability", "priority": 3, "entity_name": "מעבדה",
+     "constraint_data": {}, "is_active": True},
+]
+
+
+class FakeCursor:
+    """Rend l'empreinte puis les lignes de la table interrogée"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.description = None
+        self.selects = []
+        self._result = None
+
+    def execute(self, query, params=None):
+        table = next(name for name in ("institutional_constraints", "constraints") if f"FROM {name}" in query)
+        rows = self.tables[table]
+        if "MD5" in query:
+            self._result = [(str(hash(repr(rows))),)]
+        else:
+            self.selects.append(table)
+            self.description = [(column,) for column in rows[0]] if rows else []
+            self._result = [tuple(row.values()) for row in rows]
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, cursor_factory=None):
+        return self._cursor
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestCompileRows:
+    """Compilation des lignes constraints / institutional_constraints"""
+
+    def test_typed_constraints_and_ignored_types(self):
+        compiled = compile_rows(CONSTRAINTS, [
+            {"id": 7, "type": "lunch_break", "priority": 1, "entity": "Global",
+             "data": {"time_slot": "12:15-12:45"}, "is_active": True},
+            {"id": 8, "type": "school_hours", "priority": 0, "data": {}, "is_active": False},
+        ])
+
+        availability, limit, lunch = compiled.constraints
+        assert isinstance(availability, TeacherAvailability) and availability.unavailable_days == {1}
+        assert isinstance(limit, ConsecutiveHoursLimit) and limit.entity is None
+        assert (lunch.start, lunch.end) == (12 * 60 + 15, 12 * 60 + 45)
+        assert availability.hard and limit.hard and not lunch.hard  # institutionnelle priority 1
+        assert compiled.ignored == [{"source": "constraints", "id": 3, "type": "room_availability",
+                                     "reason": "type non pris en charge par les moteurs"}]
+
+    def test_post_to_model(self):
+        slots = [{"slot_id": day * 10 + period, "day_of_week": day, "period_number": period}
+                 for day in range(2) for period in range(1, 5)]
+        courses = [{"course_id": 1, "teacher_names": "כהן", "class_list": "ז-1", "subject": "מתמטיקה"},
+                   {"course_id": 2, "teacher_names": "כהן", "class_list": "ז-2", "subject": "מתמטיקה"}]
+        index = ModelIndex(courses, slots)
+        store = VarStore(cp_model.CpModel(), [1, 2], [slot["slot_id"] for slot in slots])
+        store.add_all()
+
+        posted = compile_rows(CONSTRAINTS[:2]).post_to_model(index, store)
+
+        # Disponibilité: 2 cours × 4 créneaux du lundi; limite: fenêtres de 3 sur 4 périodes × 2 jours
+        assert posted == 8 + 4
+        assert len(store.model.Proto().constraints) == 12
+
+
+class TestLoadConstraints:
+    """Cache par version des tables"""
+
+    def test_compiles_once_per_version(self, monkeypatch):
+        tables = {"constraints": list(CONSTRAINTS[:1]), "institutional_constraints": []}
+        cursor = FakeCursor(tables)
+        monkeypatch.setattr(constraint_registry, "get_connection", lambda config: FakeConnection(cursor))
+        monkeypatch.setattr(constraint_registry, "_cache", {})
+
+        first = load_constraints({})
+        assert load_constraints({}) is first
+        assert cursor.selects == ["constraints", "institutional_constraints"]
+
+        tables["constraints"].append(CONSTRAINTS[1])
+        second = load_constraints({})
+        assert second is not first and len(second) == 2
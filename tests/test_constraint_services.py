@@ -0,0 +1,88 @@
+"""
+Tests unitaires pour le chargement des contraintes par les services IA via le registre
+(scheduler_ai/agent.py, scheduler_ai/constraints_management_api.py)
+Sans PostgreSQL: curseur factice.
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scheduler_ai"))
+
+import agent
+import constraints_management_api
+from agent import ScheduleAIAgent
+from constraint_registry import compile_rows
+from constraints_management_api import ConstraintsManager
+
+USER_ROWS = [
+    {"constraint_id": 1, "constraint_type": "teacher_availability", "priority": 2, "entity_name": "כהן",
+     "constraint_data": {"unavailable_days": [1]}, "is_active": True},
+    {"constraint_id": 2, "constraint_type": "room_availability", "priority": 3, "entity_name": "מעבדה",
+     "constraint_data": {}, "is_active": True},
+]
+INSTITUTIONAL_ROWS = [
+    {"id": 7, "type": "lunch_break", "priority": 0, "entity": "Global",
+     "data": '{"time_slot": "12:15-12:45"}', "is_active": True, "applicable_days": [0, 1]},
+    {"id": 8, "type": "custom", "priority": 1, "entity": "all", "data": {}, "is_active": True},
+]
+
+
+def compiled():
+    return compile_rows(USER_ROWS, INSTITUTIONAL_ROWS, version="abcdef0123:4567")
+
+
+class FakeCursor:
+    """Rend les lignes de la table listée"""
+
+    def __init__(self):
+        self._rows = []
+
+    def execute(self, query, params=None):
+        self._rows = INSTITUTIONAL_ROWS if "FROM institutional_constraints" in query else USER_ROWS
+
+    def fetchall(self):
+        return [dict(row) for row in self._rows]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def cursor(self, cursor_factory=None):
+        return FakeCursor()
+
+    def close(self):
+        pass
+
+
+class TestAgentConstraints:
+    """L'agent lit les contraintes institutionnelles compilées"""
+
+    def test_institutional_constraints_from_registry(self, monkeypatch):
+        monkeypatch.setattr(agent, "load_constraints", lambda config: compiled())
+        ai_agent = ScheduleAIAgent.__new__(ScheduleAIAgent)
+        ai_agent.db_config = {}
+
+        ai_agent._load_institutional_constraints()
+
+        assert ai_agent.constraint_set.version == "abcdef0123:4567"
+        [lunch] = ai_agent.institutional_constraints
+        assert (lunch["id"], lunch["type"], lunch["hard"]) == ("inst_7", "lunch_break", True)
+        assert lunch["data"] == {"time_slot": "12:15-12:45"} and lunch["applicable_days"] == [0, 1]
+        assert [c["id"] for c in ai_agent.constraint_set.ignored] == [2, 8]
+
+
+class TestConstraintsManager:
+    """La liste des contraintes indique celles appliquées par les moteurs"""
+
+    def test_applied_and_ignored(self, monkeypatch):
+        monkeypatch.setattr(constraints_management_api, "get_connection", lambda config: FakeConnection())
+        monkeypatch.setattr(constraints_management_api, "load_constraints", lambda config: compiled())
+
+        result = ConstraintsManager({}).get_all_constraints()
+
+        assert [row["applied"] for row in result["user"]] == [True, False]
+        assert [row["applied"] for row in result["institutional"]] == [True, False]
+        assert result["version"] == "abcdef0123:4567"
+        assert {(c["source"], c["id"]) for c in result["ignored"]} == {("constraints", 2), ("institutional", 8)}
+        assert result["stats"]["applied"] == 2 and result["stats"]["hard_constraints"] == 2
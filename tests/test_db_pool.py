@@ -0,0 +1,161 @@
+"""
+Tests unitaires pour le pool de connexions partagé (solver/db_pool.py)
+Les connexions psycopg2 sont remplacées par des objets factices: aucun serveur requis.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+import db_pool
+
+
+class FakeInfo:
+    def __init__(self):
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    created = []
+
+    def __init__(self, **kwargs):
+        self.closed = 0
+        self.broken = False
+        self.autocommit = False
+        self.info = FakeInfo()
+        self.rollbacks = 0
+        FakeConnection.created.append(self)
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeConnection.created = []
+    monkeypatch.setattr(psycopg2, "connect", FakeConnection)
+    return db_pool.ConnectionPool({"database": "test"}, minconn=1, maxconn=2,
+                                  timeout=0.2, health_check_interval=0)
+
+
+class TestConnectionPool:
+    """Tests pour l'emprunt, la restitution et les métriques"""
+
+    def test_close_returns_connection_for_reuse(self, pool):
+        conn = db_pool.PooledConnection(pool, pool.getconn())
+        conn.cursor().execute("SELECT 1")
+        conn.close()
+        conn.close()  # idempotent
+
+        again = pool.getconn()
+        assert again is FakeConnection.created[0]
+        assert again.rollbacks >= 1  # transaction ouverte annulée au retour
+        assert len(FakeConnection.created) == 1
+        assert pool.stats()["checkouts"] == 2
+
+    def test_waits_for_free_slot_then_times_out(self, pool):
+        first, second = pool.getconn(), pool.getconn()
+        threading.Timer(0.05, pool.putconn, args=(first,)).start()
+        third = pool.getconn()
+        assert third is first
+        assert pool.stats()["waits"] == 1
+
+        with pytest.raises(PoolError):
+            pool.getconn()
+        stats = pool.stats()
+        assert stats["timeouts"] == 1
+        assert stats["in_use"] == 2
+        assert stats["wait_time_max"] >= 0.04
+
+    def test_broken_idle_connection_is_replaced(self, pool):
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.broken = True
+        time.sleep(0.01)
+
+        fresh = pool.getconn()
+        assert fresh is not conn
+        assert conn.closed
+        assert pool.stats()["discarded"] == 1
+
+    def test_get_connection_keeps_one_pool_per_config(self, monkeypatch):
+        monkeypatch.setattr(psycopg2, "connect", FakeConnection)
+        config = {"database": "pool_test", "host": "x"}
+        conn = db_pool.get_connection(config)
+        assert db_pool.get_pool(dict(config)) is conn._pool
+        conn.close()
+        assert db_pool.pool_stats()["pool_test"]["in_use"] == 0
+        db_pool.close_all()
+
+    def test_minconn_opened_and_kept_idle(self, monkeypatch):
+        FakeConnection.created = []
+        monkeypatch.setattr(psycopg2, "connect", FakeConnection)
+        pool = db_pool.ConnectionPool({"database": "test"}, minconn=2, maxconn=3, timeout=0.2)
+        assert len(FakeConnection.created) == 2
+
+        conns = [pool.getconn() for _ in range(3)]
+        for conn in conns:
+            pool.putconn(conn)
+
+        # Au-delà de minconn, les connexions rendues sont fermées
+        assert pool.stats()["idle"] == 2
+        assert [conn.closed for conn in conns].count(1) == 1
+
+    def test_async_wait_does_not_block_event_loop(self, monkeypatch):
+        monkeypatch.setattr(psycopg2, "connect", FakeConnection)
+        monkeypatch.setattr(db_pool, "_env_number", lambda name, default, cast=int: {
+            "DB_POOL_MIN": 1, "DB_POOL_MAX": 1, "DB_POOL_TIMEOUT": 0.3}.get(name, default))
+        config = {"database": "async_test"}
+        held = db_pool.get_connection(config)
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.02)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            try:
+                with pytest.raises(PoolError):
+                    await db_pool.get_connection_async(config)
+            finally:
+                task.cancel()
+            return ticks
+
+        try:
+            # La boucle a continué de tourner pendant l'attente du pool
+            assert asyncio.run(scenario()) >= 5
+        finally:
+            held.close()
+            db_pool.close_all()
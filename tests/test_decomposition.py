@@ -0,0 +1,68 @@
+"""
+Tests unitaires pour le découpage en groupes de classes (solver/decomposition.py)
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from decomposition import assign_courses, find_class_clusters, _teacher_conflicts
+
+
+def _course(course_id, class_list, teachers, grade, group_id=None):
+    return {"course_id": course_id, "class_list": class_list, "teacher_names": teachers,
+            "subject": "מתמטיקה", "hours": 2, "grade": grade, "group_id": group_id}
+
+
+class TestFindClassClusters:
+    """Tests pour le graphe de couplage classes / professeurs"""
+
+    def test_components_without_shared_teachers_are_exact(self):
+        courses = [
+            _course(1, "ז-1", "A", "ז"),
+            _course(2, "ז-2", "A", "ז"),
+            _course(3, "ח-1", "B", "ח"),
+        ]
+        clusters, exact = find_class_clusters(courses)
+        assert exact
+        assert clusters == [["ז-1", "ז-2"], ["ח-1"]]
+
+    def test_shared_teacher_falls_back_to_grade_clusters(self):
+        courses = [
+            _course(1, "ז-1", "A", "ז"),
+            _course(2, "ז-2", "A", "ז", group_id=5),
+            _course(3, "ז-3", "C", "ז", group_id=5),
+            _course(4, "ח-1", "A", "ח"),
+        ]
+        clusters, exact = find_class_clusters(courses)
+        assert not exact
+        assert clusters == [["ז-1", "ז-2", "ז-3"], ["ח-1"]]
+
+    def test_classless_course_couples_its_teachers(self):
+        courses = [
+            _course(1, "ז-1", "A", "ז"),
+            _course(2, "ח-1", "B", "ח"),
+            _course(3, "ט-1", "C", "ט"),
+            _course(4, "", "A, B", ""),
+        ]
+        clusters, exact = find_class_clusters(courses)
+        assert exact
+        assert clusters == [["ז-1", "ח-1"], ["ט-1"]]
+
+    def test_classless_courses_are_assigned(self):
+        courses = [
+            _course(1, "ז-1", "A", "ז"),
+            _course(2, "ח-1", "B", "ח"),
+            _course(3, None, "B", ""),
+            _course(4, None, "D", ""),
+        ]
+        cluster_courses = assign_courses(courses, [["ז-1"], ["ח-1"]])
+        assert [[c["course_id"] for c in group] for group in cluster_courses] == [[1, 4], [2, 3]]
+
+    def test_teacher_conflicts_between_clusters(self):
+        schedule = [
+            {"course_id": 1, "day_of_week": 0, "period_number": 1},
+            {"course_id": 4, "day_of_week": 0, "period_number": 1},
+            {"course_id": 3, "day_of_week": 0, "period_number": 1},
+        ]
+        assert _teacher_conflicts(schedule, {1: ["A"], 3: ["C"], 4: ["A"]}) == {"A"}
@@ -0,0 +1,110 @@
+"""
+Tests unitaires pour l'analyse de faisabilité (solver/feasibility.py)
+"""
+import os
+import sys
+
+import pytest
+from ortools.sat.python import cp_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+import schedule_generation
+from constraint_registry import compile_rows
+from feasibility import analyze, max_assignment
+from model_index import ModelIndex
+from var_store import VarStore
+
+# 2 jours × 3 périodes
+SLOTS = [{"slot_id": day * 10 + period, "day_of_week": day, "period_number": period}
+         for day in range(2) for period in range(1, 4)]
+ALL = {slot["slot_id"] for slot in SLOTS}
+
+
+def course(course_id, hours, teacher="כהן", class_name="ז-1", subject="מתמטיקה"):
+    return {"course_id": course_id, "hours": hours, "teacher_names": teacher,
+            "class_list": class_name, "subject": subject}
+
+
+class TestMaxAssignment:
+    """Couplage heures → créneaux"""
+
+    def test_hall_violator(self):
+        # a et b se partagent 2 créneaux pour 3 heures; c a ses propres créneaux
+        demands = {"a": 2, "b": 1, "c": 2}
+        allowed = {"a": {1, 2}, "b": {1, 2}, "c": {1, 3, 4}}
+
+        placed, violators = max_assignment(demands, allowed)
+
+        assert placed == 4
+        assert violators == {"a", "b"}
+
+    def test_complete_assignment(self):
+        assert max_assignment({"a": 2, "b": 1}, {"a": {1, 2}, "b": {2, 3}}) == (3, set())
+
+
+class TestAnalyze:
+    """Erreurs expliquées et bornes serrées"""
+
+    def test_class_capacity_and_parallel_mismatch(self):
+        courses = [course(1, 4), course(2, 3, teacher="לוי", subject="אנגלית"),
+                   course(3, 2, teacher="לוי", class_name="ז-2")]
+        index = ModelIndex(courses, SLOTS)
+
+        report = analyze(courses, index, {1: ALL, 2: ALL, 3: ALL}, sync_groups={9: [2, 3]})
+
+        codes = {error["code"] for error in report.errors}
+        assert not report.feasible
+        assert {"parallel_hours", "class_capacity", "parallel_duplicate"} <= codes
+        capacity = next(e for e in report.errors if e["code"] == "class_capacity")
+        assert (capacity["entity"], capacity["required"], capacity["available"]) == ("ז-1", 7, 6)
+
+    def test_daily_limit_pigeonhole(self):
+        courses = [course(1, 5)]
+        index = ModelIndex(courses, SLOTS)
+
+        report = analyze(courses, index, {1: ALL}, daily_limit=lambda class_name: 2)
+
+        assert [e["code"] for e in report.errors] == ["daily_limit"]
+        assert report.errors[0]["available"] == 4
+
+    def test_tight_bounds_keep_model_feasible(self):
+        # La classe remplit tous ses créneaux: chaque créneau est occupé exactement une fois
+        courses = [course(1, 4), course(2, 2, teacher="לוי", subject="אנגלית")]
+        index = ModelIndex(courses, SLOTS)
+        report = analyze(courses, index, {1: ALL, 2: ALL}, daily_limit=lambda class_name: 3)
+        assert report.feasible and report.tight
+
+        store = VarStore(cp_model.CpModel(), [1, 2], sorted(ALL))
+        store.add_all()
+        for c in courses:
+            store.model.Add(sum(store.vars_for([c["course_id"]], sorted(ALL))) == c["hours"])
+        for slot_id in ALL:
+            store.model.Add(sum(store.vars_for([1, 2], [slot_id])) <= 1)
+        assert report.apply_bounds(store) > 0
+
+        solver = cp_model.CpSolver()
+        assert solver.Solve(store.model) in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+
+class TestGenerationFeasibility:
+    """La vérification précède les deux voies de génération"""
+
+    def test_infeasible_input_rejected_before_advanced_path(self, monkeypatch):
+        def load_data_from_db(self):
+            self.teachers = [{"teacher_name": "כהן", "work_days": None}]
+            self.classes = [{"class_name": "ז-1"}]
+            self.time_slots = SLOTS
+            self.courses = [course(1, 7)]
+            self.sync_groups = {}
+            self.constraints = compile_rows([])
+
+        def run_advanced(*args):
+            raise AssertionError("voie avancée lancée sur des données impossibles")
+
+        monkeypatch.setattr(schedule_generation.ScheduleSolver, "load_data_from_db", load_data_from_db)
+        monkeypatch.setattr(schedule_generation, "PedagogicalScheduleSolverV2", object)
+        monkeypatch.setattr(schedule_generation, "_run_advanced", run_advanced)
+
+        with pytest.raises(schedule_generation.InfeasibleInputError):
+            schedule_generation.run_generate_schedule({"advanced": True, "reuse_cached": False}, {})
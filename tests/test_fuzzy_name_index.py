@@ -0,0 +1,102 @@
+"""
+Tests unitaires pour l'index flou des noms (scheduler_ai/fuzzy_hebrew_matching.py)
+Sans PostgreSQL: curseur factice.
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scheduler_ai"))
+
+import fuzzy_hebrew_matching
+from fuzzy_hebrew_matching import FuzzyNameIndex, SchoolNameIndex, normalize_name
+
+TEACHERS = ["משה כהן", "שרה לוי", "דוד כהנא", "רחל אברהם", "יוסף מזרחי"]
+
+
+class FakeCursor:
+    """Rend une empreinte puis les lignes de la table interrogée"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.description = None
+        self.selects = []
+        self._result = None
+
+    def execute(self, query, params=None):
+        table = next(name for name in self.tables if f"FROM {name}" in query)
+        rows = self.tables[table]
+        if "MD5" in query:
+            self._result = [(len(rows), "|".join(str(row) for row in rows))]
+        else:
+            self.selects.append(table)
+            self.description = [(column,) for column in rows[0]] if rows else []
+            self._result = [tuple(row.values()) for row in rows]
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, cursor_factory=None):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+class TestFuzzyNameIndex:
+    """Candidats par n-grammes partagés, lettres finales normalisées"""
+
+    def test_normalize_name(self):
+        assert normalize_name("תנ\"ך") == normalize_name("תנכ") == "תנכ"
+        assert normalize_name("  ז-1 ") == "ז 1"
+
+    def test_top_k_ranking(self):
+        index = FuzzyNameIndex()
+        for name in TEACHERS:
+            index.add(name)
+
+        best = index.search("משה כהנ", k=3)
+        assert best[0][:2] == (1.0, "משה כהן")
+        assert [name for _, name, _ in best][1] == "דוד כהנא"
+        assert index.search("כהן", k=1)[0] == (0.8, "משה כהן", "משה כהן")
+        assert index.search("אברהמ רחל", k=1)[0][1] == "רחל אברהם"
+        assert index.search("צצצ") == []
+        assert all(score >= 0.5 for score, _, _ in index.search("כהן", min_score=0.5))
+
+
+class TestSchoolNameIndex:
+    """Index construit depuis la base et reconstruit quand une table change"""
+
+    def test_refresh_when_table_changes(self, monkeypatch):
+        tables = {
+            "teachers": [{"teacher_id": i, "teacher_name": name} for i, name in enumerate(TEACHERS, 1)],
+            "classes": [{"class_id": 1, "class_name": "ז-1"}],
+            "subjects": [{"subject_id": 1, "subject_name": "תנ\"ך"}],
+        }
+        cursor = FakeCursor(tables)
+        monkeypatch.setattr(fuzzy_hebrew_matching, "get_connection", lambda config: FakeConnection(cursor))
+        names = SchoolNameIndex({}, check_interval=0)
+
+        match = names.find_teacher("משה כהן")
+        assert (match["teacher"]["teacher_id"], match["confidence"]) == (1, 1.0)
+        assert names.find_subject("תנך")["subject"]["subject_id"] == 1
+        assert names.find_class("מתמטיקה") is None
+        assert cursor.selects == ["teachers", "classes", "subjects"]
+
+        # Tables inchangées: seules les empreintes sont relues
+        names.search("teachers", "שרה")
+        assert len(cursor.selects) == 3
+
+        tables["teachers"].append({"teacher_id": 6, "teacher_name": "נועה פרידמן"})
+        assert names.find_teacher("נועה פרידמנ")["teacher"]["teacher_id"] == 6
+        assert cursor.selects[3:] == ["teachers"]
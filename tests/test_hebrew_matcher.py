@@ -0,0 +1,45 @@
+"""
+Tests unitaires pour l'automate de mots-clés hébreux (scheduler_ai/hebrew_language_processor.py)
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scheduler_ai"))
+
+from hebrew_language_processor import HebrewLanguageProcessor, KeywordMatcher
+
+
+class TestKeywordMatcher:
+    """Mêmes résultats que `keyword in text`, en une passe"""
+
+    def test_overlapping_and_prefix_keywords(self):
+        words = ["חור", "חורים", "ורים", "יום", "יום שני", "שני", "ב'", "ב-8"]
+        matcher = KeywordMatcher({"words": {word: word for word in words}})
+        for text in ["יש חורים ביום שני", "ב-8 או ב'", "חורחורים", "", "שלום"]:
+            assert matcher.keywords(text) == {word for word in words if word in text}
+
+    def test_find_groups_values_in_vocabulary_order(self):
+        matcher = KeywordMatcher({
+            "days": {"ראשון": 0, "שני": 1, "יום שני": 1},
+            "polite": {"בבקשה": True},
+        })
+        assert matcher.find("יום שני וראשון בבקשה") == {"days": [0, 1, 1], "polite": [True]}
+        assert matcher.find("שלום") == {}
+
+
+class TestHebrewAnalysis:
+    """Extraction complète à partir d'une seule recherche"""
+
+    def test_analyze_hebrew_text(self):
+        processor = HebrewLanguageProcessor()
+        analysis = processor.analyze_hebrew_text("בבקשה להזיז את החורים של ז-1 ביום שני בבוקר, עכשיו")
+        assert set(analysis["actions"]) == {"move", "please", "fix_gaps"}
+        assert analysis["entities"]["classes"][0] == "ז-1"
+        assert analysis["entities"]["days"] == [1]
+        assert analysis["entities"]["times"] == ["morning"]
+        assert analysis["problems_mentioned"] == ["gap"]
+        assert analysis["urgency_level"] == "high"
+        assert analysis["politeness_level"] == "high"
+        assert analysis["main_intent"] == "fix_schedule_gaps"
+        # Appel direct d'un extracteur, sans résultat de recherche préalable
+        assert processor._extract_subjects("שיעור כימיה ופיזיקה") == ["physics", "chemistry"]
@@ -0,0 +1,56 @@
+"""
+Tests unitaires pour l'explication d'infaisabilité (solver/infeasibility.py)
+"""
+import os
+import sys
+
+from ortools.sat.python import cp_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from infeasibility import ConstraintGates, minimal_core
+
+
+def gated_model():
+    """3 créneaux; deux cours de 2h se les partagent, une indisponibilité en retire un"""
+    model = cp_model.CpModel()
+    x = {(course, slot): model.NewBoolVar(f"x_{course}_{slot}") for course in (1, 2) for slot in range(3)}
+    gates = ConstraintGates(model)
+    for course in (1, 2):
+        gates.begin(f"Heures du cours {course}")
+        model.Add(sum(x[course, slot] for slot in range(3)) == 2)
+    gates.begin("Conflits de la classe ז-1")
+    for slot in range(3):
+        model.Add(x[1, slot] + x[2, slot] <= 1)
+    gates.begin("Indisponibilité créneau 0")
+    model.Add(x[1, 0] == 0)
+    model.Add(x[2, 0] == 0)
+    gates.begin("Section vide")
+    return model, gates
+
+
+class TestMinimalCore:
+    """Noyau minimal par suppression"""
+
+    def test_minimal_conflict(self):
+        model, gates = gated_model()
+
+        core = minimal_core(model, gates, time_limit=10, num_workers=1)
+
+        # L'indisponibilité est superflue: 4h pour 3 créneaux suffisent
+        assert core.status == "INFEASIBLE" and core.minimal
+        assert core.labels == ["Heures du cours 1", "Heures du cours 2", "Conflits de la classe ז-1"]
+        assert "Section vide" not in gates.literals
+        assert gates.gated == 7
+
+    def test_feasible_model(self):
+        model = cp_model.CpModel()
+        x = [model.NewBoolVar(f"x_{slot}") for slot in range(3)]
+        gates = ConstraintGates(model)
+        gates.begin("Heures du cours 1")
+        model.Add(sum(x) == 2)
+
+        core = minimal_core(model, gates, time_limit=10, num_workers=1)
+
+        assert core.status == "OPTIMAL" and core.labels == []
+        assert core.explanation() == "Aucun ensemble de contraintes incompatibles isolé"
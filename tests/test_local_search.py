@@ -0,0 +1,84 @@
+"""
+Tests unitaires pour l'état de recherche locale incrémental (scheduler_ai/local_search.py)
+et son utilisation par le Recuit Simulé et la Recherche Tabou
+"""
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scheduler_ai"))
+
+from advanced_scheduling_algorithms import AdvancedSchedulingEngine
+from local_search import LocalSearchState
+
+
+def make_schedule(seed=3, classes=4, lessons=20):
+    rng = random.Random(seed)
+    subjects = ["מתמטיקה", "אנגלית", "תנ״ך", "מדעים"]
+    teachers = ["כהן", "לוי", "מזרחי", "פרץ", "לא משובץ"]
+    entries = [
+        {
+            'class_name': f"ז-{c}",
+            'subject_name': rng.choice(subjects),
+            'teacher_name': rng.choice(teachers),
+            'day_of_week': rng.randrange(5),
+            'period_number': rng.randrange(8),
+        }
+        for c in range(1, classes + 1) for _ in range(lessons)
+    ]
+    return {'schedule_id': 1, 'entries': entries}
+
+
+class TestLocalSearchState:
+    """Le score incrémental suit exactement analyze_schedule_quality"""
+
+    def test_delta_matches_full_evaluation(self):
+        schedule = make_schedule()
+        engine = AdvancedSchedulingEngine({})
+        state = LocalSearchState(schedule['entries'])
+        rng = random.Random(7)
+        score = state.score()
+        assert abs(score - engine.analyze_schedule_quality(schedule)['total_score']) < 1e-9
+
+        n = len(schedule['entries'])
+        for step in range(300):
+            if rng.random() < 0.5:
+                move = ('move', rng.randrange(n), rng.randrange(5), rng.randrange(8))
+            else:
+                move = ('swap', rng.randrange(n), rng.randrange(n))
+            delta = state.apply(move)
+            if step % 3 == 0:
+                state.undo()
+            else:
+                score += delta
+            full = engine.analyze_schedule_quality(state.to_schedule(schedule))['total_score']
+            assert abs(score - full) < 1e-9
+
+    def test_undo_restores_positions(self):
+        schedule = make_schedule(classes=1, lessons=5)
+        state = LocalSearchState(schedule['entries'])
+        before = state.positions()
+        state.apply(('swap', 0, 3))
+        state.undo()
+        assert state.positions() == before
+
+
+class TestMetaheuristics:
+    """Le RS et la RT renvoient la meilleure solution rencontrée"""
+
+    def test_annealing_and_tabu_never_degrade(self):
+        random.seed(11)
+        schedule = make_schedule()
+        engine = AdvancedSchedulingEngine({})
+        engine.simulated_annealing_params['max_iterations'] = 5000
+        engine.tabu_search_params['max_iterations'] = 300
+        initial = engine.analyze_schedule_quality(schedule)['total_score']
+
+        for result in (engine.simulated_annealing_optimization(schedule),
+                       engine.tabu_search_optimization(schedule)):
+            assert result['quality']['total_score'] >= initial - 1e-9
+            assert len(result['solution']['entries']) == len(schedule['entries'])
+            assert result['moves_per_second'] > 0
+
+        # L'emploi du temps d'origine n'est pas modifié
+        assert schedule == make_schedule()
@@ -0,0 +1,62 @@
+"""
+Tests unitaires pour l'index de construction du modèle (solver/model_index.py)
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from model_index import ModelIndex, split_names
+
+
+def _slots():
+    slots = []
+    slot_id = 1
+    for day in range(2):
+        # Ordre volontairement inversé pour vérifier le tri par période
+        for period in reversed(range(3)):
+            slots.append({"slot_id": slot_id, "day_of_week": day, "period_number": period})
+            slot_id += 1
+    return slots
+
+
+def _courses():
+    return [
+        {"course_id": 10, "class_list": "ז-1, ז-2", "teacher_names": "כהן, לוי",
+         "subject": "תנך", "hours": 2, "grade": "ז"},
+        {"course_id": 11, "class_list": "ז-1", "teacher_names": "כהן",
+         "subject_name": " מתמטיקה ", "hours": 3, "grade": "ז"},
+        {"course_id": 12, "class_list": "ח-1", "teacher_names": None,
+         "subject": "אנגלית", "hours": 1, "grade": ""},
+    ]
+
+
+class TestModelIndex:
+    """Tests pour les correspondances entité → cours"""
+
+    def test_split_names_strips_and_skips_empty(self):
+        assert split_names("a, b,,c ") == ["a", "b", "c"]
+        assert split_names(None) == []
+        assert split_names(["x ", ""]) == ["x"]
+
+    def test_courses_by_teacher_and_class(self):
+        index = ModelIndex(_courses(), _slots())
+
+        assert [c["course_id"] for c in index.teacher_courses("כהן")] == [10, 11]
+        assert [c["course_id"] for c in index.teacher_courses("לוי")] == [10]
+        assert [c["course_id"] for c in index.class_courses("ז-2")] == [10]
+        assert index.teacher_courses("inconnu") == []
+
+    def test_class_subject_index_uses_normalized_subject(self):
+        index = ModelIndex(_courses(), _slots())
+
+        assert sorted(index.class_subjects("ז-1")) == ["מתמטיקה", "תנך"]
+        assert [c["course_id"] for c in index.class_subject_courses("ז-1", "מתמטיקה")] == [11]
+        assert index.class_to_grade["ז-2"] == "ז"
+
+    def test_slots_by_day_sorted_by_period(self):
+        index = ModelIndex(_courses(), _slots())
+
+        assert index.days == [0, 1]
+        assert [s["period_number"] for s in index.day_slots(0)] == [0, 1, 2]
+        assert index.day_slots(5) == []
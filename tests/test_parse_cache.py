@@ -0,0 +1,75 @@
+"""
+Tests unitaires pour le cache de parsing LLM et le chemin rapide (scheduler_ai/parse_cache.py)
+Sans Redis: cache mémoire seul.
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scheduler_ai"))
+
+from parse_cache import ParseCache, fast_parse
+
+# Patterns teacher_availability de LLMRouter._load_constraint_patterns
+PATTERNS = {
+    "teacher_availability": {
+        "patterns": [
+            r"(.+) (?:ne peut pas|n'est pas disponible|absent) (?:le |les )?(.+)",
+            r"(.+) (?:לא יכול|לא זמין) (?:ב)?(.+)",
+        ],
+        "fast_path": True,
+    },
+    "parallel_teaching": {
+        "patterns": [r"(.+) (?:et|avec) (.+) (?:enseignent ensemble|en parallèle)"],
+    },
+}
+
+
+class TestFastParse:
+    """Le chemin rapide ne traite que les phrases entité + jours"""
+
+    def test_french_and_hebrew_availability(self):
+        parsed = fast_parse("Le professeur Cohen ne peut pas enseigner le lundi et le vendredi.", PATTERNS)
+        assert parsed["constraint"]["type"] == "teacher_availability"
+        assert parsed["constraint"]["entity"] == "Cohen"
+        assert parsed["constraint"]["data"]["unavailable_days"] == [1, 5]
+        assert parsed["model_used"] == "regex"
+
+        parsed = fast_parse("המורה כהן לא יכול ביום שישי", PATTERNS)
+        assert parsed["constraint"]["entity"] == "כהן"
+        assert parsed["constraint"]["data"]["unavailable_days"] == [5]
+
+    def test_ambiguous_sentences_go_to_llm(self):
+        assert fast_parse("Cohen ne peut pas le vendredi après-midi", PATTERNS) is None
+        assert fast_parse("Cohen ne peut pas venir", PATTERNS) is None
+        assert fast_parse("Cohen et Levi enseignent ensemble le lundi", PATTERNS) is None
+
+
+class TestParseCache:
+    """LRU mémoire: clé normalisée, copies indépendantes, statistiques"""
+
+    def test_normalized_key_and_stats(self):
+        cache = ParseCache(max_entries=2)
+        result = {"constraint": {"type": "custom", "data": {}}, "confidence": 0.8}
+        assert cache.get("Cohen veut  finir tôt", "fr", "gpt-4o") is None
+
+        cache.put("Cohen veut  finir tôt", "fr", "gpt-4o", result, latency=2.0)
+        hit = cache.get("cohen veut finir tôt.", "fr", "gpt-4o")
+        assert hit == result
+        hit["constraint"]["data"]["changed"] = True
+        assert cache.get("Cohen veut finir tôt", "fr", "gpt-4o") == result
+
+        assert cache.get("Cohen veut finir tôt", "he", "gpt-4o") is None
+        assert cache.get("Cohen veut finir tôt", "fr", "claude-4-opus-20240514") is None
+
+        cache.record_fast_path()
+        stats = cache.stats()
+        assert (stats["lru_hits"], stats["fast_path_hits"], stats["llm_calls"]) == (2, 1, 1)
+        assert stats["hit_rate"] == 0.75
+        assert stats["saved_seconds"] == 6.0
+
+    def test_lru_eviction(self):
+        cache = ParseCache(max_entries=2)
+        for text in ("a", "b", "c"):
+            cache.put(text, "fr", "gpt-4o", {"text": text}, latency=1.0)
+        assert cache.get("a", "fr", "gpt-4o") is None
+        assert cache.get("c", "fr", "gpt-4o") == {"text": "c"}
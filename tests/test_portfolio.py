@@ -0,0 +1,101 @@
+"""
+Tests unitaires pour le portefeuille de moteurs (solver/portfolio.py)
+Moteurs factices dans PORTFOLIO_ENGINES: aucun solve ni PostgreSQL.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+import portfolio
+from portfolio import PortfolioRunner
+
+
+def _engine(name, quality, duration=0.0):
+    """Résultat factice; la sauvegarde laisse un marqueur dans db_config['marker_dir']"""
+    def run(db_config, time_limit, num_workers):
+        time.sleep(duration)
+
+        def save():
+            with open(os.path.join(db_config["marker_dir"], name), "w") as f:
+                f.write("saved")
+            return 100 + quality
+        return {"success": True, "quality_score": quality, "time_limit": time_limit, "num_workers": num_workers}, save
+    return run
+
+
+def good_engine(db_config, time_limit, num_workers):
+    return _engine("good", 90)(db_config, time_limit, num_workers)
+
+
+def poor_engine(db_config, time_limit, num_workers):
+    return _engine("poor", 40)(db_config, time_limit, num_workers)
+
+
+def zero_engine(db_config, time_limit, num_workers):
+    return _engine("zero", 0)(db_config, time_limit, num_workers)
+
+
+def hung_engine(db_config, time_limit, num_workers):
+    return _engine("hung", 100, duration=60)(db_config, time_limit, num_workers)
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    for name, run in [("good", good_engine), ("poor", poor_engine), ("zero", zero_engine), ("hung", hung_engine)]:
+        monkeypatch.setitem(portfolio.PORTFOLIO_ENGINES, name, run)
+
+
+def run_portfolio(tmp_path, names, quality_target=80, time_limit=30):
+    runner = PortfolioRunner({"marker_dir": str(tmp_path)}, names, time_limit, quality_target,
+                             score=lambda result: result["quality_score"], poll_interval=0.05)
+    start = time.perf_counter()
+    results = asyncio.run(runner.run())
+    return runner, {r["algorithm"]: r for r in results}, time.perf_counter() - start
+
+
+class TestPortfolioRunner:
+    """Arrêt à l'objectif, délai maximal et sauvegarde du seul gagnant"""
+
+    def test_quality_target_stops_running_engines(self, engines, tmp_path):
+        runner, results, elapsed = run_portfolio(tmp_path, ["poor", "good", "hung"])
+
+        assert elapsed < 30
+        assert runner.best_engine == "good" and runner.best_quality == 90
+        assert runner.timings["hung"]["status"] == "stopped"
+        assert "hung" not in results
+        # Seul le gagnant reçoit 'save'
+        assert results["good"]["result"]["schedule_id"] == 190
+        assert "schedule_id" not in results["poor"]["result"]
+        assert sorted(os.listdir(tmp_path)) == ["good"]
+
+    def test_deadline_terminates_remaining_engines(self, engines, monkeypatch, tmp_path):
+        monkeypatch.setattr(portfolio, "DEADLINE_GRACE", 0)
+
+        runner, results, elapsed = run_portfolio(tmp_path, ["poor", "hung"], time_limit=1)
+
+        assert elapsed < 30
+        assert runner.timings["hung"]["status"] == "timeout"
+        assert runner.best_engine == "poor"
+        assert results["poor"]["result"]["schedule_id"] == 140
+        assert sorted(os.listdir(tmp_path)) == ["poor"]
+
+    def test_engines_share_cores_and_budget(self, engines, monkeypatch, tmp_path):
+        monkeypatch.setattr(portfolio.os, "cpu_count", lambda: 8)
+
+        _, results, _ = run_portfolio(tmp_path, ["poor", "zero"], quality_target=100, time_limit=10)
+
+        for run in results.values():
+            assert run["result"]["num_workers"] == 4
+            assert run["result"]["time_limit"] == 8
+
+    def test_zero_quality_result_is_saved(self, engines, tmp_path):
+        runner, results, _ = run_portfolio(tmp_path, ["zero"])
+
+        assert runner.best_engine == "zero" and runner.best_quality == 0
+        assert results["zero"]["result"]["schedule_id"] == 100
+        assert sorted(os.listdir(tmp_path)) == ["zero"]
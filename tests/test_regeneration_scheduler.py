@@ -0,0 +1,106 @@
+"""
+Tests unitaires pour la régénération différée et regroupée (solver/regeneration_scheduler.py)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from regeneration_scheduler import RegenerationScheduler
+
+
+class FakeSolve:
+    """Régénération factice: enregistre les périmètres et dure `duration` secondes"""
+
+    def __init__(self, duration=0.0):
+        self.duration = duration
+        self.started = []
+        self.cancelled = 0
+
+    async def __call__(self, request):
+        self.started.append(request.to_dict())
+        try:
+            await asyncio.sleep(self.duration)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"success": True, "schedule_id": len(self.started)}
+
+
+class TestRegenerationScheduler:
+    """Regroupement, remplacement du solve en cours et délai maximal"""
+
+    def test_rapid_triggers_coalesce_into_one_solve(self):
+        async def scenario():
+            solve = FakeSolve()
+            scheduler = RegenerationScheduler(solve, debounce=0.05, max_delay=5)
+            for name in ["ז-1", "ז-2", "ח-1"]:
+                scheduler.request("class", name)
+                await asyncio.sleep(0.01)
+            status = scheduler.request("teacher", "כהן")
+            assert status["pending"]["triggers"] == 4 and status["running"] is None
+            await scheduler.wait_idle()
+            return solve, scheduler
+
+        solve, scheduler = asyncio.run(scenario())
+        assert len(solve.started) == 1
+        assert solve.started[0]["touched_classes"] == ["ז-1", "ז-2", "ח-1"]
+        assert solve.started[0]["touched_teachers"] == ["כהן"]
+        assert solve.started[0]["global"] is False
+        status = scheduler.status()
+        assert (status["runs"], status["coalesced"], status["pending"]) == (1, 3, None)
+        assert status["last_result"]["schedule_id"] == 1
+
+    def test_new_trigger_supersedes_running_solve(self):
+        async def scenario():
+            solve = FakeSolve(duration=0.3)
+            scheduler = RegenerationScheduler(solve, debounce=0.02, max_delay=5)
+            scheduler.request("class", "ז-1")
+            await asyncio.sleep(0.1)
+            assert scheduler.status()["running"]["touched_classes"] == ["ז-1"]
+            scheduler.request(None, None, reason="global")
+            await scheduler.wait_idle()
+            return solve, scheduler
+
+        solve, scheduler = asyncio.run(scenario())
+        assert solve.cancelled == 1
+        assert len(solve.started) == 2
+        # Le solve remplacé est repris dans le suivant
+        assert solve.started[1]["touched_classes"] == ["ז-1"]
+        assert solve.started[1]["global"] is True
+        assert scheduler.status()["superseded"] == 1
+
+    def test_max_delay_bounds_debounce(self):
+        async def scenario():
+            solve = FakeSolve()
+            scheduler = RegenerationScheduler(solve, debounce=10, max_delay=0.1)
+            scheduler.request("class", "ז-1")
+            await asyncio.sleep(0.05)
+            assert scheduler.request("class", "ז-2")["scheduled_in"] <= 0.1
+            await asyncio.wait_for(scheduler.wait_idle(), timeout=2)
+            return solve
+
+        assert len(asyncio.run(scenario()).started) == 1
+
+    def test_edits_during_long_solve_are_debounced(self):
+        async def scenario():
+            solve = FakeSolve(duration=5)
+            scheduler = RegenerationScheduler(solve, debounce=0.5, max_delay=1.0)
+            scheduler.request("class", "ז-1")
+            await asyncio.sleep(0.6)
+            assert scheduler.status()["running"] is not None
+            solve.duration = 0
+            for name in ["ז-2", "ז-3", "ח-1", "ח-2"]:
+                status = scheduler.request("class", name)
+                assert status["scheduled_in"] > 0.3
+                await asyncio.sleep(0.2)
+            await asyncio.wait_for(scheduler.wait_idle(), timeout=3)
+            return solve, scheduler
+
+        solve, scheduler = asyncio.run(scenario())
+        # Une seule relance, après la dernière modification, avec tout le périmètre
+        assert len(solve.started) == 2 and solve.cancelled == 1
+        assert solve.started[1]["touched_classes"] == ["ז-1", "ז-2", "ז-3", "ח-1", "ח-2"]
+        status = scheduler.status()
+        assert (status["superseded"], status["coalesced"]) == (1, 3)
@@ -0,0 +1,58 @@
+"""
+Tests unitaires pour le noyau de métriques vectorisé (solver/schedule_metrics.py)
+et les détecteurs de ConflictResolver qui l'utilisent
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from conflict_resolver import ConflictResolver, IssueType
+from schedule_metrics import Occupancy, count_gaps
+
+
+class TestOccupancy:
+    """Tests pour les métriques par (groupe, jour)"""
+
+    def test_gaps_amplitude_and_runs(self):
+        # ז-1 lundi: périodes 0, 1, 2, 5 -> trous en 3 et 4; ז-2 mardi: période 4 seule
+        occupancy = Occupancy.build([
+            ("ז-1", 0, 0), ("ז-1", 0, 1), ("ז-1", 0, 2), ("ז-1", 0, 5), ("ז-2", 1, 4),
+        ])
+        row = occupancy.index["ז-1"]
+
+        assert occupancy.gaps()[row].tolist() == [2, 0]
+        assert occupancy.amplitude()[row, 0] == 6
+        assert occupancy.amplitude()[occupancy.index["ז-2"], 1] == 1
+        assert occupancy.max_run()[row, 0] == 3
+        assert occupancy.isolated()[row, 0].nonzero()[0].tolist() == [5]
+
+        runs = occupancy.runs()
+        assert list(zip(runs.start.tolist(), runs.length.tolist())) == [(0, 3), (5, 1), (4, 1)]
+
+    def test_count_gaps_filters_groups_and_days(self):
+        records = [("א", 0, 0), ("א", 0, 3), ("ב", 0, 0), ("ב", 0, 2), ("א", 5, 1), ("א", 5, 4)]
+        assert count_gaps(records) == 3 + 2
+        assert count_gaps(records, keys=["ב"]) == 1
+        assert count_gaps(records, keys=["א", "ג"], days=5) == 2
+        assert count_gaps([]) == 0
+
+
+class TestConflictResolverDetectors:
+    """Les détecteurs produisent les mêmes problèmes qu'un parcours par jour"""
+
+    def test_teacher_gaps_and_isolated_hours(self):
+        lessons = [("מתמטיקה", 0, 0), ("מתמטיקה", 0, 1), ("אנגלית", 0, 4), ("אנגלית", 2, 4)]
+        entries = [{"subject": subject, "day": day, "period": period} for subject, day, period in lessons]
+        solution = {"by_class": {"ז-1": entries}, "by_teacher": {"כהן": entries}}
+        resolver = ConflictResolver()
+
+        gaps = resolver._detect_teacher_gaps(solution)
+        assert [(issue.details["gap_start"], issue.details["gap_end"], issue.details["gap_size"])
+                for issue in gaps] == [(1, 4, 2)]
+
+        isolated = resolver._detect_isolated_hours(solution)
+        assert sorted((issue.details["day"], issue.details["period"]) for issue in isolated) == [(0, 4), (2, 4)]
+
+        analysis = resolver.analyze_schedule_quality(solution)
+        assert sum(issue.type == IssueType.TROU for issue in analysis["issues"]) == 1
@@ -0,0 +1,143 @@
+"""
+Tests unitaires pour la sauvegarde des emplois du temps (solver/schedule_persistence.py)
+Sans PostgreSQL: curseur factice, execute_values enregistre les lots envoyés.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+import schedule_persistence
+from schedule_persistence import insert_schedule_entries, save_parallel_schedule_to_db, write_schedule
+
+COLUMNS = ("teacher_name", "class_name", "subject_name", "day_of_week", "period_number", "is_parallel_group")
+
+
+class FakeCursor:
+    """Enregistre les requêtes; INSERT INTO schedules retourne `schedule_id`"""
+
+    def __init__(self, schedule_id=42, fail_on=None):
+        self.schedule_id = schedule_id
+        self.fail_on = fail_on
+        self.executed = []
+        self.closed = False
+
+    def execute(self, query, params=None):
+        if self.fail_on and self.fail_on in query:
+            raise RuntimeError("erreur SQL")
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        return (self.schedule_id,)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, cursor_factory=None):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Lots passés à execute_values: (requête, valeurs, page_size)"""
+    calls = []
+
+    def execute_values(cur, query, values, page_size=100):
+        if cur.fail_on and cur.fail_on in query:
+            raise RuntimeError("erreur SQL")
+        calls.append((query, values, page_size))
+
+    monkeypatch.setattr(schedule_persistence, "execute_values", execute_values)
+    return calls
+
+
+class TestInsertScheduleEntries:
+    """Insertion par lots des entrées"""
+
+    def test_schedule_id_prefixes_each_row(self, batches):
+        rows = [("כהן", "ז-1", "מתמטיקה", 0, 1, False), ("לוי, כהן", "ז-2", "אנגלית", 1, 3, True)]
+
+        count = insert_schedule_entries(FakeCursor(), 9, COLUMNS, iter(rows), page_size=50)
+
+        assert count == 2
+        [(query, values, page_size)] = batches
+        assert query == (
+            "INSERT INTO schedule_entries (schedule_id, teacher_name, class_name, subject_name, "
+            "day_of_week, period_number, is_parallel_group) VALUES %s"
+        )
+        assert values == [(9, *rows[0]), (9, *rows[1])]
+        assert page_size == 50
+
+    def test_empty_rows_send_nothing(self, batches):
+        assert insert_schedule_entries(FakeCursor(), 9, COLUMNS, []) == 0
+        assert batches == []
+
+
+class TestWriteSchedule:
+    """Ligne schedules et entrées dans une seule transaction"""
+
+    def test_returns_schedule_id_and_count(self, batches):
+        cur = FakeCursor(schedule_id=42)
+        conn = FakeConnection(cur)
+
+        result = write_schedule(conn, {"academic_year": "2024-2025", "term": 1}, COLUMNS,
+                                [("כהן", "ז-1", "מתמטיקה", 0, 1, False)])
+
+        assert result == (42, 1)
+        [(query, params)] = cur.executed
+        assert query == "INSERT INTO schedules (academic_year, term) VALUES (%s, %s) RETURNING schedule_id"
+        assert params == ["2024-2025", 1]
+        assert batches[0][1] == [(42, "כהן", "ז-1", "מתמטיקה", 0, 1, False)]
+        assert (conn.commits, conn.rollbacks, cur.closed) == (1, 0, True)
+
+    def test_empty_schedule_still_creates_row(self, batches):
+        cur = FakeCursor(schedule_id=5)
+        conn = FakeConnection(cur)
+
+        assert write_schedule(conn, {"term": 1}, COLUMNS, []) == (5, 0)
+        assert batches == [] and conn.commits == 1
+
+    @pytest.mark.parametrize("fail_on", ["INSERT INTO schedules", "INSERT INTO schedule_entries"])
+    def test_rollback_when_insert_fails(self, batches, fail_on):
+        cur = FakeCursor(fail_on=fail_on)
+        conn = FakeConnection(cur)
+
+        with pytest.raises(RuntimeError):
+            write_schedule(conn, {"term": 1}, COLUMNS, [("כהן", "ז-1", "מתמטיקה", 0, 1, False)])
+
+        assert (conn.commits, conn.rollbacks, cur.closed) == (0, 1, True)
+
+
+class TestSaveParallelSchedule:
+    """Conversion des entrées du solveur parallel-sync"""
+
+    def test_normal_and_parallel_entries(self, batches):
+        conn = FakeConnection(FakeCursor(schedule_id=77))
+        schedule = [
+            {"teacher_names": ["כהן"], "class_name": "ז-1", "subject": "מתמטיקה", "day": 0, "slot_index": 2},
+            {"teacher_names": ["לוי", "כהן"], "class_name": "ז-2", "subject": "אנגלית",
+             "day": 3, "slot_index": 5, "kind": "parallel"},
+        ]
+
+        assert save_parallel_schedule_to_db(schedule, conn) == 77
+        [(query, values, _)] = batches
+        assert ", ".join(COLUMNS) in query
+        assert values == [
+            (77, "כהן", "ז-1", "מתמטיקה", 0, 2, False),
+            (77, "לוי, כהן", "ז-2", "אנגלית", 3, 5, True),
+        ]
@@ -0,0 +1,99 @@
+"""
+Tests unitaires pour les domaines de créneaux par cours (solver/slot_domains.py)
+"""
+import datetime
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from constraint_registry import compile_rows
+from slot_domains import SlotDomains, parse_work_days
+from solver_engine_with_constraints import ScheduleSolverWithConstraints
+
+
+def make_slots(days=6, periods=3):
+    """Créneaux de 45 min à partir de 08:00, slot_id = jour * 10 + période"""
+    slots = []
+    for day in range(days):
+        for period in range(1, periods + 1):
+            start = datetime.time(7 + period, 0)
+            slots.append({
+                "slot_id": day * 10 + period, "day_of_week": day, "period_number": period,
+                "start_time": start, "end_time": datetime.time(7 + period, 45),
+            })
+    return slots
+
+
+class TestSlotDomains:
+    """Tests pour le calcul des créneaux autorisés"""
+
+    def test_parse_work_days(self):
+        assert parse_work_days("0,1,2,3,4") == {0, 1, 2, 3, 4}
+        assert parse_work_days("א, ב") == {0, 1}
+        assert parse_work_days([2, "3"]) == {2, 3}
+        assert parse_work_days("") is None
+        assert parse_work_days("tous") is None  # illisible: aucune restriction
+
+    def test_teacher_sources_and_parallel_intersection(self):
+        slots = make_slots()
+        domains = SlotDomains(
+            slots,
+            teachers=[{"teacher_name": "כהן", "work_days": "0,1,2,3,4,5"},
+                      {"teacher_name": "לוי", "work_days": "0,1"}],
+            constraints=compile_rows([{"constraint_type": "teacher_availability", "entity_name": "כהן",
+                                       "constraint_data": '{"unavailable_days": [0], "unavailable_periods": [3]}'}]),
+        )
+        courses = [
+            {"course_id": 1, "teachers": ["כהן"]},
+            {"course_id": 2, "teachers": ["לוי"]},
+            {"course_id": 3, "teachers": []},
+        ]
+
+        result = domains.compute(courses, lambda course: course["teachers"])
+
+        assert result[1] == {s["slot_id"] for s in slots if s["day_of_week"] != 0 and s["period_number"] != 3}
+        assert result[2] == {s["slot_id"] for s in slots if s["day_of_week"] in (0, 1)}
+        assert len(result[3]) == len(slots)
+
+        # Un groupe parallèle a lieu en même temps: intersection des domaines
+        synced = domains.compute(courses, lambda course: course["teachers"], {"g": [1, 2]})
+        assert synced[1] == synced[2] == {11, 12}
+        assert domains.pruned["parallel_sync"] > 0
+
+    def test_institutional_constraints(self):
+        slots = make_slots()
+        domains = SlotDomains(slots, constraints=compile_rows(institutional_rows=[
+            {"type": "school_hours", "priority": 0, "data": {"start": "08:00", "end": "09:45"}},
+            {"type": "friday_early_end", "priority": 0, "data": {"last_period": 1}},
+            # Chevauche le créneau 08:00-08:45 sans le contenir: créneau conservé
+            {"type": "morning_prayer", "priority": 0, "data": {"start": "08:00", "end": "08:30"}},
+            {"type": "lunch_break", "priority": 0, "data": {"start": "08:45", "end": "10:00"},
+             "applicable_days": [2]},
+            {"type": "school_hours", "priority": 1, "data": {"start": "09:00", "end": "10:00"}},
+        ]))
+
+        blocked = domains.blocked_all
+        assert all(blocked[day * 10 + 3] == "school_hours" for day in range(6))  # 10:00-10:45
+        assert blocked[52] == "friday_early_end"
+        assert blocked[22] == "lunch_break" and 12 not in blocked
+        assert not any(day * 10 + 1 in blocked for day in range(6))
+
+
+class TestSolverPruning:
+    """Variables créées par ScheduleSolverWithConstraints"""
+
+    def test_only_feasible_pairs_get_variables(self):
+        solver = ScheduleSolverWithConstraints({})
+        solver.time_slots = make_slots()
+        solver.teachers = [{"teacher_name": "כהן", "work_days": "0,1,2"}]
+        solver.classes = [{"class_name": "ז-1"}]
+        solver.courses = [{"course_id": 1, "class_list": "ז-1", "teacher_names": "כהן",
+                           "subject": "מתמטיקה", "hours": 2, "grade": "ז"}]
+        solver.build_index()
+
+        solver.create_variables()
+
+        assert len(solver.schedule_vars) == 9  # dimanche-mardi, 3 périodes; ni mercredi+ ni vendredi
+        assert solver.schedule_vars.get(1, 31) is None
+        assert solver.domains.pruned == {"friday": 3, "work_days": 6}
@@ -0,0 +1,81 @@
+"""
+Tests unitaires pour l'index d'occupation des créneaux (solver/slot_index.py)
+et son utilisation par IncrementalScheduler (sans base de données)
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from incremental_scheduler import IncrementalScheduler
+from slot_index import SlotOccupancy
+
+
+def make_entry(class_name, subject, teachers, day, slot):
+    return {
+        'entry_id': None,
+        'class_name': class_name,
+        'day_of_week': day,
+        'slot_index': slot,
+        'subject': subject,
+        'teacher_names': teachers,
+        'kind': 'individual',
+        'slot_id': day * 12 + slot + 1,
+    }
+
+
+def loaded_scheduler(entries):
+    scheduler = IncrementalScheduler({})
+    scheduler.schedule_id = 1
+    scheduler.schedule_entries = entries
+    scheduler.current_schedule = {'schedule_id': 1, 'entries': entries}
+    scheduler.occupancy = SlotOccupancy(entries)
+    return scheduler
+
+
+class TestSlotOccupancy:
+    """Tests pour l'index (jour, période) -> classes et professeurs"""
+
+    def test_add_remove_with_shared_slot(self):
+        first = make_entry("ז-1", "מתמטיקה", ["כהן"], 0, 1)
+        second = make_entry("ז-1", "אנגלית", "לוי", 0, 1)  # teacher_names en texte
+        index = SlotOccupancy([first, second])
+
+        assert index.class_busy("ז-1", 0, 1)
+        assert index.teacher_busy("לוי", 0, 1)
+        index.remove(first)
+        assert index.class_busy("ז-1", 0, 1)  # encore occupé par le second cours
+        assert not index.teacher_busy("כהן", 0, 1)
+        assert index.find("ז-1", "אנגלית", 0, 1) is second
+
+        index.remove(second)
+        index.remove(second)  # sans effet
+        assert not index.class_busy("ז-1", 0, 1)
+        assert index.free_slots("ז-1", [0], range(3)) == [(0, 0), (0, 1), (0, 2)]
+
+
+class TestIncrementalSchedulerIndex:
+    """Les modifications maintiennent l'index à jour"""
+
+    def test_move_add_remove_keep_index_in_sync(self):
+        entries = [
+            make_entry("ז-1", "מתמטיקה", ["כהן"], 0, 0),
+            make_entry("ז-2", "תנ״ך", ["לוי"], 0, 1),
+        ]
+        scheduler = loaded_scheduler(entries)
+
+        conflict = scheduler.move_course("ז-1", "מתמטיקה", 0, 0, 0, 1)
+        assert conflict["success"] is True  # classe différente, professeur différent
+
+        blocked = scheduler.add_course("ז-3", "ספורט", ["כהן"], 0, 1)
+        assert blocked["success"] is False
+        assert blocked["conflicts"][0]["type"] == "teacher_conflict"
+
+        assert scheduler.add_course("ז-3", "ספורט", ["כהן"], 0, 0)["success"] is True
+        assert scheduler.remove_course("ז-2", "תנ״ך", 0, 1)["success"] is True
+        assert not scheduler.occupancy.teacher_busy("לוי", 0, 1)
+
+        refused = scheduler.move_course("ז-1", "מתמטיקה", 0, 1, 0, 0)
+        assert refused["success"] is False  # כהן enseigne déjà en 0/0
+        assert refused["suggestions"][0] == {'day': 0, 'slot': 0, 'reason': 'Même jour, créneau libre'}
+        assert len(refused["suggestions"]) == 5
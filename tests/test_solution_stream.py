@@ -0,0 +1,112 @@
+"""
+Tests unitaires pour le callback de solutions intermédiaires (solver/solution_stream.py)
+"""
+import os
+import sys
+import threading
+import time
+
+from ortools.sat.python import cp_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from solution_stream import SolutionRecorder
+
+
+class TestSolutionRecorder:
+    """Tests pour l'enregistrement des solutions améliorantes"""
+
+    def _model(self):
+        model = cp_model.CpModel()
+        xs = [model.NewIntVar(0, 10, f"x{i}") for i in range(3)]
+        model.Add(sum(xs) >= 5)
+        model.Minimize(sum((i + 1) * x for i, x in enumerate(xs)))
+        return model, xs
+
+    def test_records_objective_and_bound(self):
+        model, xs = self._model()
+        received = []
+        recorder = SolutionRecorder(
+            lambda values: [values.Value(x) for x in xs],
+            lambda event, schedule: received.append((event, schedule)),
+            min_interval=0.0,
+        )
+
+        solver = cp_model.CpSolver()
+        solver.parameters.num_search_workers = 1
+        assert solver.Solve(model, recorder) == cp_model.OPTIMAL
+        recorder.close()
+
+        assert recorder.solutions
+        last = recorder.solutions[-1]
+        assert last["objective"] == solver.ObjectiveValue() == 5
+        assert last["index"] == len(recorder.solutions)
+        assert received and received[-1][1] == recorder.latest_schedule
+        objectives = [event["objective"] for event in recorder.solutions]
+        assert objectives == sorted(objectives, reverse=True)
+
+    def test_handler_errors_do_not_stop_search(self):
+        model, xs = self._model()
+
+        def failing_handler(event, schedule):
+            raise RuntimeError("client déconnecté")
+
+        recorder = SolutionRecorder(lambda values: [], failing_handler, min_interval=0.0)
+        solver = cp_model.CpSolver()
+        assert solver.Solve(model, recorder) == cp_model.OPTIMAL
+        recorder.close()
+        assert recorder.solutions
+
+    def test_throttled_solution_is_flushed_at_close(self):
+        model, xs = self._model()
+        received = []
+        recorder = SolutionRecorder(
+            lambda values: [values.Value(x) for x in xs],
+            lambda event, schedule: received.append((event, schedule, threading.current_thread())),
+            min_interval=60.0,
+        )
+
+        solver = cp_model.CpSolver()
+        solver.parameters.num_search_workers = 1
+        assert solver.Solve(model, recorder) == cp_model.OPTIMAL
+        recorder.close()
+
+        # Transmise hors du thread de CP-SAT; la dernière solution n'est pas perdue
+        assert received and len(received) <= 2
+        assert received[-1][0]["objective"] == 5
+        assert all(thread is not threading.main_thread() for _, _, thread in received)
+
+
+class ScriptedRecorder(SolutionRecorder):
+    """Callback appelé à la main, objectifs fournis par le test"""
+
+    def __init__(self, objectives, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.objectives = list(objectives)
+
+    def ObjectiveValue(self):
+        return self.objectives[len(self.solutions)]
+
+    def BestObjectiveBound(self):
+        return 0.0
+
+
+class TestSolutionThrottling:
+    """Solution arrivée pendant le délai minimal entre deux transmissions"""
+
+    def test_latest_solution_sent_when_window_elapses(self):
+        received = []
+        recorder = ScriptedRecorder([30, 20, 10], lambda values: [len(values.solutions)],
+                                    lambda event, schedule: received.append(event["objective"]),
+                                    min_interval=0.3)
+
+        for _ in range(3):
+            recorder.on_solution_callback()
+        deadline = time.monotonic() + 5
+        while received[-1:] != [10]:
+            assert time.monotonic() < deadline, "solution jamais transmise"
+            time.sleep(0.02)
+
+        # Pas de close(): la fin du délai suffit; une solution intermédiaire a été remplacée
+        assert len(received) <= 2
+        recorder.close()
@@ -0,0 +1,109 @@
+"""
+Tests unitaires pour l'empreinte des entrées et le cache des modèles (solver/solve_cache.py)
+Sans PostgreSQL: curseur factice.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+import solve_cache
+from constraint_registry import compile_rows
+from solve_cache import ModelCache, find_cached_schedule, problem_fingerprint, request_fingerprint
+from solver_engine_with_constraints import ScheduleSolverWithConstraints
+
+AVAILABILITY = {"constraint_id": 1, "constraint_type": "teacher_availability", "priority": 2,
+                "entity_name": "כהן", "constraint_data": {"unavailable_days": [1]}, "is_active": True}
+
+
+def make_solver(courses=None, constraints=()):
+    solver = ScheduleSolverWithConstraints({})
+    solver.model_cache = None
+    solver.time_slots = [{"slot_id": day * 10 + period, "day_of_week": day, "period_number": period}
+                         for day in range(5) for period in range(1, 3)]
+    solver.teachers = [{"teacher_name": "כהן", "work_days": None}]
+    solver.classes = [{"class_name": "ז-1"}]
+    solver.courses = courses or [
+        {"course_id": 1, "class_list": "ז-1", "teacher_names": "כהן", "subject": "מתמטיקה", "hours": 2, "grade": "ז"},
+        {"course_id": 2, "class_list": "ז-1", "teacher_names": "כהן", "subject": "אנגלית", "hours": 2, "grade": "ז"},
+    ]
+    solver.constraints = compile_rows(list(constraints))
+    solver.build_index()
+    return solver
+
+
+class FakeCursor:
+    def __init__(self, row):
+        self.row = row
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append(params)
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, cursor_factory=None):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+class TestFingerprints:
+    """Empreintes stables des données et des demandes"""
+
+    def test_problem_fingerprint(self):
+        solver = make_solver()
+        reordered = make_solver(courses=list(reversed(solver.courses)))
+
+        assert problem_fingerprint(solver) == problem_fingerprint(reordered)
+        assert problem_fingerprint(solver) != problem_fingerprint(make_solver(constraints=[AVAILABILITY]))
+
+    def test_request_fingerprint_params(self):
+        problem = problem_fingerprint(make_solver())
+        base = request_fingerprint(problem, {"time_limit": 600, "advanced": False})
+
+        assert request_fingerprint(problem, {"time_limit": 600, "advanced": False, "wait": False}) == base
+        assert request_fingerprint(problem, {"time_limit": 300, "advanced": False}) != base
+
+    def test_find_cached_schedule(self, monkeypatch):
+        cursor = FakeCursor({"schedule_id": 42})
+        monkeypatch.setattr(solve_cache, "get_connection", lambda config: FakeConnection(cursor))
+
+        assert find_cached_schedule({}, "abc", "problem_fingerprint") == 42
+        assert cursor.queries == [("problem_fingerprint", "abc")]
+
+
+class TestModelReuse:
+    """Modèle construit réutilisé pour un nouveau solve des mêmes données"""
+
+    def test_second_solve_reuses_model(self):
+        solver = make_solver()
+        assert solver.solve(time_limit=10)
+        model = solver.model
+
+        assert len(solver.solve(time_limit=5)) == 4
+        assert solver.model is model
+
+    @pytest.mark.skipif(not solve_cache.BINARY_PROTO, reason="lecture binaire du CpModelProto indisponible")
+    def test_disk_cache_round_trip(self, tmp_path):
+        solver = make_solver()
+        solver.model_cache = ModelCache(str(tmp_path))
+        first = solver.solve(time_limit=10)
+
+        reloaded = make_solver()
+        reloaded.model_cache = ModelCache(str(tmp_path))
+        assert reloaded._reuse_model(problem_fingerprint(reloaded))
+        assert len(reloaded.schedule_vars) == len(solver.schedule_vars)
+        assert len(reloaded.solve(time_limit=10)) == len(first)
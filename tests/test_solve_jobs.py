@@ -0,0 +1,214 @@
+"""
+Tests unitaires pour la file de jobs de génération (solver/solve_jobs.py)
+Sans PostgreSQL: la persistance est désactivée, les processus de travail
+exécutent des générations factices.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+import solve_jobs
+from solve_jobs import SolveJobManager
+
+
+def quick_worker(params, db_config, conn, constraints=None):
+    """Génération factice immédiate"""
+    conn.send(("progress", "solving", 50))
+    conn.send(("result", {"success": True, "schedule_id": params["n"], "schedule": [{"slot_id": 1}]}))
+    conn.close()
+
+
+def slow_worker(params, db_config, conn, constraints=None):
+    """Génération factice qui ne se termine pas d'elle-même"""
+    conn.send(("progress", "solving", 20))
+    time.sleep(60)
+
+
+def decomposed_job_worker(params, db_config, conn, constraints=None):
+    """
+    Vrai _job_worker (processus spawn) sur deux classes indépendantes:
+    données et sauvegarde remplacées, le reste du pipeline est exécuté
+    """
+    import schedule_generation
+    from constraint_registry import compile_rows
+    from solver_engine_with_constraints import ScheduleSolverWithConstraints
+
+    def load_data_from_db(self):
+        self.teachers = [{"teacher_name": "כהן", "work_days": None}, {"teacher_name": "לוי", "work_days": None}]
+        self.classes = [{"class_name": "ז-1"}, {"class_name": "ח-1"}]
+        self.time_slots = [{"slot_id": day * 10 + period, "day_of_week": day, "period_number": period}
+                           for day in range(5) for period in range(1, 4)]
+        self.courses = [
+            {"course_id": 1, "class_list": "ז-1", "teacher_names": "כהן", "subject": "מתמטיקה", "hours": 3, "grade": "ז"},
+            {"course_id": 2, "class_list": "ח-1", "teacher_names": "לוי", "subject": "אנגלית", "hours": 3, "grade": "ח"},
+        ]
+        self.sync_groups = {}
+        self.constraints = compile_rows([])
+
+    ScheduleSolverWithConstraints.load_data_from_db = load_data_from_db
+    ScheduleSolverWithConstraints.save_schedule = lambda self, schedule: 55
+    schedule_generation._update_schedule_metadata = lambda *args: None
+    solve_jobs._job_worker(params, db_config, conn, constraints)
+
+
+class RegistryCursor:
+    """Tables de contraintes factices; compte les lectures des lignes (compilations)"""
+    row_reads = 0
+
+    def __init__(self):
+        self._result = []
+        self.description = []
+
+    def execute(self, query, params=None):
+        if "MD5" in query:
+            self._result = [("v-constraints" if "FROM constraints" in query else "v-institutional",)]
+        elif "FROM constraints" in query:
+            RegistryCursor.row_reads += 1
+            self.description = [("constraint_id",), ("constraint_type",), ("entity_name",), ("constraint_data",)]
+            self._result = [(1, "teacher_availability", "כהן", {"unavailable_days": [4]})]
+        else:
+            RegistryCursor.row_reads += 1
+            self.description, self._result = [("id",)], []
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class RegistryConnection:
+    def cursor(self, cursor_factory=None):
+        return RegistryCursor()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def constraints_job_worker(params, db_config, conn, constraints=None):
+    """Vrai _job_worker; la génération ne fait que charger les contraintes"""
+    import constraint_registry
+    import schedule_generation
+
+    def run_generate_schedule(params, db_config, progress, on_solution):
+        compiled = constraint_registry.load_constraints(db_config)
+        return {"success": True, "schedule_id": len(compiled), "row_reads": RegistryCursor.row_reads}
+
+    constraint_registry.get_connection = lambda config: RegistryConnection()
+    schedule_generation.run_generate_schedule = run_generate_schedule
+    solve_jobs._job_worker(params, db_config, conn, constraints)
+
+
+def make_manager(monkeypatch, worker, **kwargs):
+    monkeypatch.setattr(solve_jobs, "_job_worker", worker)
+    manager = SolveJobManager({}, poll_interval=0.02, **kwargs)
+    monkeypatch.setattr(manager, "_persist", lambda job: None)
+    monkeypatch.setattr(manager, "_load", lambda job_id: None)
+    monkeypatch.setattr(manager, "_compile_constraints", lambda: None)
+    return manager
+
+
+async def wait_for(condition, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition jamais remplie"
+        await asyncio.sleep(0.02)
+
+
+class TestSolveJobManager:
+    """Soumission, suivi, annulation et rétention des jobs"""
+
+    def test_submit_then_status(self, monkeypatch):
+        manager = make_manager(monkeypatch, quick_worker)
+
+        async def scenario():
+            job = manager.submit({"n": 7})
+            assert job["status"] == solve_jobs.QUEUED
+            return await asyncio.wait_for(manager.wait(job["job_id"]), timeout=30)
+
+        job = asyncio.run(scenario())
+        assert job["status"] == solve_jobs.SUCCEEDED and job["progress"] == 100
+        assert job["schedule_id"] == 7 and "schedule" not in job["result"]
+        assert manager.get(job["job_id"]) is job
+        assert manager.full_result(job["job_id"])["schedule"] == [{"slot_id": 1}]
+
+    def test_decomposed_generation_in_job_process(self, monkeypatch):
+        # Le processus du job lance les sous-processus de la décomposition
+        manager = make_manager(monkeypatch, decomposed_job_worker)
+
+        async def scenario():
+            job = manager.submit({"decompose": True, "reuse_cached": False, "time_limit": 30})
+            return await asyncio.wait_for(manager.wait(job["job_id"]), timeout=120)
+
+        job = asyncio.run(scenario())
+        assert job["status"] == solve_jobs.SUCCEEDED, job["error"]
+        assert job["schedule_id"] == 55
+        schedule = manager.full_result(job["job_id"])["schedule"]
+        assert sorted(entry["course_id"] for entry in schedule) == [1, 1, 1, 2, 2, 2]
+
+    def test_constraints_compiled_once_across_jobs(self, monkeypatch):
+        import constraint_registry
+        manager = make_manager(monkeypatch, constraints_job_worker)
+        monkeypatch.delattr(manager, "_compile_constraints")
+        monkeypatch.setattr(constraint_registry, "_cache", {})
+        monkeypatch.setattr(constraint_registry, "get_connection", lambda config: RegistryConnection())
+        monkeypatch.setattr(RegistryCursor, "row_reads", 0)
+
+        async def scenario():
+            first = await manager.wait(manager.submit({"n": 1})["job_id"])
+            second = await manager.wait(manager.submit({"n": 2})["job_id"])
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        for job in (first, second):
+            assert job["status"] == solve_jobs.SUCCEEDED, job["error"]
+            assert job["schedule_id"] == 1
+            # Le processus du job n'a relu que les empreintes
+            assert manager.full_result(job["job_id"])["row_reads"] == 0
+        # Lignes lues et compilées une seule fois, par le serveur
+        assert RegistryCursor.row_reads == 2
+
+    def test_cancel_running_and_queued(self, monkeypatch):
+        manager = make_manager(monkeypatch, slow_worker, max_concurrent=1)
+
+        async def scenario():
+            running = manager.submit({"n": 1})
+            queued = manager.submit({"n": 2})
+            await wait_for(lambda: running["stage"] == "solving")
+            assert queued["status"] == solve_jobs.QUEUED and manager.queue_position(queued["job_id"]) == 0
+
+            assert (await manager.cancel(queued["job_id"]))["status"] == solve_jobs.CANCELLED
+            process = manager._processes[running["job_id"]]
+            assert (await manager.cancel(running["job_id"]))["status"] == solve_jobs.CANCELLED
+            await wait_for(lambda: not process.is_alive(), timeout=10)
+            return running, queued
+
+        running, queued = asyncio.run(scenario())
+        assert running["error"] == queued["error"] == "Annulé par l'utilisateur"
+        assert queued["started_at"] is None
+
+    def test_finished_jobs_are_bounded(self, monkeypatch):
+        manager = make_manager(monkeypatch, quick_worker, max_retained=1, result_ttl=0)
+
+        async def scenario():
+            first = await manager.wait(manager.submit({"n": 1})["job_id"])
+            second = await manager.wait(manager.submit({"n": 2})["job_id"])
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        # Le plus ancien job terminé n'est plus en mémoire (relu dans solve_jobs)
+        assert list(manager.jobs) == [second["job_id"]]
+        assert manager.get(first["job_id"]) is None
+        # Résultat complet expiré: seul le résumé reste
+        manager._prune()
+        assert manager.full_result(second["job_id"]) is None
+        assert manager.get(second["job_id"])["schedule_id"] == 2
@@ -0,0 +1,84 @@
+"""
+Tests unitaires pour l'instrumentation Prometheus des moteurs (solver/solver_metrics.py)
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from ortools.sat.python import cp_model
+from prometheus_client import REGISTRY
+
+from solution_stream import SolutionRecorder
+from solver_metrics import InstrumentedCpSolver, instrument_engine
+
+
+@instrument_engine("test_engine")
+class ToyEngine:
+    """Moteur minimal: x + y <= 5, maximiser 2x + y"""
+
+    def __init__(self):
+        self.model = cp_model.CpModel()
+        self.solver = cp_model.CpSolver()
+        self.solver.parameters.num_search_workers = 1
+
+    def load_data(self):
+        self.upper = 5
+
+    def create_variables(self):
+        self.x = self.model.NewIntVar(0, 10, "x")
+        self.y = self.model.NewIntVar(0, 10, "y")
+
+    def add_constraints(self):
+        self._add_capacity_constraints()
+        self.model.Maximize(2 * self.x + self.y)
+
+    def _add_capacity_constraints(self):
+        self.model.Add(self.x + self.y <= self.upper)
+
+    def solve(self, callback=None):
+        return self.solver.Solve(self.model, callback)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, dict(labels, engine="test_engine")) or 0
+
+
+class TestInstrumentEngine:
+    """Le décorateur mesure chaque phase et la résolution CP-SAT"""
+
+    def test_phases_and_solve(self):
+        engine = ToyEngine()
+        assert isinstance(engine.solver, InstrumentedCpSolver)
+        assert engine.solver.parameters.num_search_workers == 1
+
+        loads = sample("solver_data_load_seconds_count")
+        optimal = sample("solver_solve_status_total", status="OPTIMAL")
+
+        engine.load_data()
+        engine.create_variables()
+        engine.add_constraints()
+        assert engine.solve() == cp_model.OPTIMAL
+
+        assert sample("solver_data_load_seconds_count") == loads + 1
+        assert sample("solver_model_build_seconds_count", step="add_constraints") >= 1
+        assert sample("solver_constraint_build_seconds_count", family="capacity_constraints") >= 1
+        assert sample("solver_model_variables") == 2
+        assert sample("solver_model_constraints") == 1
+        assert sample("solver_solve_status_total", status="OPTIMAL") == optimal + 1
+        assert sample("solver_objective_value") == 10
+        assert sample("solver_first_solution_seconds_count") >= 1
+
+    def test_caller_callback_still_called(self):
+        engine = ToyEngine()
+        engine.load_data()
+        engine.create_variables()
+        engine.add_constraints()
+
+        solutions = sample("solver_solutions_total")
+        recorder = SolutionRecorder(lambda callback: callback.Value(engine.x), min_interval=0)
+        engine.solve(recorder)
+
+        assert recorder.solutions
+        assert sample("solver_solutions_total") == solutions + len(recorder.solutions)
+        assert "on_solution_callback" not in vars(recorder)
@@ -195,7 +195,8 @@ class TestIntegrationOptimizationAdvanced:
     def test_generate_schedule_endpoint(self):
         """Test intégration: Vérifier la génération standard d'emploi du temps"""
         payload = {
-            "time_limit": 30  # Court pour test rapide
+            "time_limit": 30,  # Court pour test rapide
+            "wait": True
         }
         
         response = requests.post(
@@ -0,0 +1,64 @@
+"""
+Tests unitaires pour le générateur d'écoles synthétiques et le harnais de benchmark
+(benchmarks/synthetic_school.py, benchmarks/bench_solvers.py)
+"""
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bench_solvers import ENGINES, compare, run_case
+from synthetic_school import dataset_name, generate_school
+
+
+class TestSyntheticSchool:
+    """Tests pour le générateur de jeux de données"""
+
+    def test_same_seed_same_dataset(self):
+        assert generate_school(classes=8, teachers=20, seed=3) == generate_school(classes=8, teachers=20, seed=3)
+        assert generate_school(classes=8, teachers=20, seed=3) != generate_school(classes=8, teachers=20, seed=4)
+
+    def test_hours_and_parallel_groups(self):
+        school = generate_school(classes=12, teachers=36, parallel_ratio=0.25, utilization=0.75, seed=1)
+        expected_hours = round(0.75 * 5 * 8)
+
+        hours = Counter()
+        for course in school["solver_input"]:
+            for class_name in course["class_list"].split(","):
+                hours[class_name] += course["hours"]
+        assert set(hours.values()) == {expected_hours}
+
+        for group in school["parallel_groups"]:
+            course = next(c for c in school["solver_input"] if c["group_id"] == group["group_id"])
+            assert course["is_parallel"]
+            assert len(course["teacher_names"].split(",")) == len(course["class_list"].split(","))
+        assert dataset_name(school["params"]) == "c12-t36-p0.25-u0.75-s1"
+
+
+class TestBenchSolvers:
+    """Le harnais mesure un moteur sans base de données"""
+
+    def test_run_case_and_compare(self):
+        params = {"classes": 4, "teachers": 12, "parallel_ratio": 0.2, "utilization": 0.5, "seed": 1}
+        result = run_case("integrated", params, time_limit=10, seed=1, workers=1)
+
+        assert "error" not in result, result.get("traceback")
+        assert result["status"] in ("OPTIMAL", "FEASIBLE")
+        assert result["num_variables"] > 0 and result["build_time"] >= 0
+        assert result["first_solution_time"] is not None
+
+        slower = dict(result, build_time=result["build_time"] * 2 + 1)
+        assert compare([slower], [result], max_regression=0.25)
+        assert not compare([result], [result], max_regression=0.25)
+
+    @pytest.mark.parametrize("engine_name", list(ENGINES))
+    def test_every_engine_on_tiny_school(self, engine_name):
+        params = {"classes": 2, "teachers": 6, "parallel_ratio": 0.2, "utilization": 0.4, "seed": 1}
+        result = run_case(engine_name, params, time_limit=5, seed=1, workers=1)
+
+        assert "error" not in result, result.get("traceback")
+        assert result["status"] in ("OPTIMAL", "FEASIBLE")
+        assert result["entries"] > 0
@@ -0,0 +1,151 @@
+"""
+Tests unitaires pour le cache des vues d'emploi du temps (solver/timetable_views.py)
+Sans Redis ni PostgreSQL: cache mémoire seul et curseur factice.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+import solver_input_generator
+import timetable_views
+from timetable_views import CachedView, TimetableViewCache
+
+
+class FakeCursor:
+    def __init__(self, status):
+        self.status = status
+        self.slots_version = "v1"
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+
+    def fetchone(self):
+        if "time_slots" in self.queries[-1]:
+            return {"version": self.slots_version}
+        if "RETURNING schedule_id" in self.queries[-1]:
+            return (12,)
+        return None if self.status is None else {"status": self.status}
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, cursor_factory=None):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    monkeypatch.setattr(timetable_views, "_cache", TimetableViewCache(max_entries=4))
+
+    def install(status):
+        cursor = FakeCursor(status)
+        monkeypatch.setattr(timetable_views, "get_connection", lambda config: FakeConnection(cursor))
+        return cursor
+    return install
+
+
+def build_counter():
+    calls = []
+
+    def build(cur, schedule_id, suffix=""):
+        calls.append(schedule_id)
+        return {"success": True, "schedule_id": schedule_id, "name": f"כיתה{suffix}"}
+    return build, calls
+
+
+class TestTimetableViewCache:
+    """Tests pour le LRU, l'époque d'invalidation et les ETags"""
+
+    def test_lru_eviction_and_invalidation(self):
+        cache = TimetableViewCache(max_entries=2)
+        for schedule_id in (1, 2, 3):
+            cache.put(schedule_id, "by_class", CachedView.from_payload({"id": schedule_id}))
+
+        assert cache.get(1, "by_class") is None
+        assert cache.get(3, "by_class").body == b'{"id": 3}'
+
+        cache.invalidate()
+        assert cache.get(3, "by_class") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_invalidate_one_schedule(self):
+        cache = TimetableViewCache(max_entries=4)
+        for schedule_id in (1, 2):
+            cache.put(schedule_id, "grid", CachedView.from_payload({"id": schedule_id}))
+
+        cache.invalidate(1)
+
+        assert cache.get(1, "grid") is None
+        assert cache.get(2, "grid").body == b'{"id": 2}'
+        assert cache.epoch(1) == (0, 1) and cache.epoch(2) == (0, 0)
+
+    def test_etag_depends_on_content(self):
+        first = CachedView.from_payload({"a": 1})
+        assert first.etag == CachedView.from_payload({"a": 1}).etag
+        assert first.etag != CachedView.from_payload({"a": 2}).etag
+        assert first.etag.startswith('"')
+
+    def test_get_view_builds_once_for_saved_schedule(self, fake_db):
+        fake_db("active")
+        build, calls = build_counter()
+
+        view = timetable_views.get_view({}, 7, "by_class", build, "-א")
+        again = timetable_views.get_view({}, 7, "by_class", build, "-א")
+
+        assert calls == [7]
+        assert again is view
+        assert "כיתה-א".encode("utf-8") in view.body
+
+    def test_drafts_and_missing_schedules_are_not_cached(self, fake_db):
+        fake_db("draft")
+        build, calls = build_counter()
+        timetable_views.get_view({}, 8, "grid", build)
+        timetable_views.get_view({}, 8, "grid", build)
+        assert calls == [8, 8]
+
+        fake_db(None)
+        assert timetable_views.get_view({}, 9, "grid", build) is None
+
+    def test_time_slots_change_rebuilds_entries(self, fake_db):
+        cursor = fake_db("active")
+        calls = []
+
+        @timetable_views.reads_time_slots
+        def build(cur, schedule_id):
+            calls.append(schedule_id)
+            return {"success": True, "time_slots": [cursor.slots_version]}
+
+        timetable_views.get_view({}, 7, "entries:7", build)
+        timetable_views.get_view({}, 7, "entries:7", build)
+        cursor.slots_version = "v2"
+        view = timetable_views.get_view({}, 7, "entries:7", build)
+
+        assert calls == [7, 7]
+        assert b"v2" in view.body
+
+    def test_regeneration_from_solver_input_invalidates_views(self, fake_db, monkeypatch):
+        cursor = fake_db("active")
+        monkeypatch.setattr(solver_input_generator, "get_connection", lambda config: FakeConnection(cursor))
+        build, calls = build_counter()
+        timetable_views.get_view({}, 7, "grid", build)
+
+        # DELETE FROM schedules: toutes les vues sont périmées
+        assert solver_input_generator.SolverInputGenerator({}).save_to_database([]) == 12
+        timetable_views.get_view({}, 7, "grid", build)
+
+        assert calls == [7, 7]
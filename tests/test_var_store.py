@@ -0,0 +1,50 @@
+"""
+Tests unitaires pour le stockage compact des variables (solver/var_store.py)
+"""
+import os
+import sys
+
+from ortools.sat.python import cp_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from var_store import VarStore
+
+
+class TestVarStore:
+    """Tests pour l'accès (course_id, slot_id) → BoolVar"""
+
+    def test_add_get_and_presence_mask(self):
+        model = cp_model.CpModel()
+        store = VarStore(model, [10, 11], [1, 2, 3])
+
+        var = store.add(10, 2)
+
+        assert store.get(10, 2) is var
+        assert store.add(10, 2) is var  # pas de doublon
+        assert store.get(11, 2) is None
+        assert store.get(99, 1) is None
+        assert (10, 2) in store and (10, 1) not in store
+        assert len(store) == 1
+
+    def test_add_all_with_allowed_filter(self):
+        model = cp_model.CpModel()
+        store = VarStore(model, [10, 11], [1, 2, 3])
+
+        store.add_all(allowed=lambda course_id, slot_id: slot_id != 3)
+
+        assert len(store) == 4
+        assert len(store.row(10)) == 2
+        assert len(store.vars_for([10, 11], [1, 3])) == 2
+        assert sorted(key for key, _ in store.items()) == [(10, 1), (10, 2), (11, 1), (11, 2)]
+
+    def test_assigned_reads_solution(self):
+        model = cp_model.CpModel()
+        store = VarStore(model, [10], [1, 2])
+        store.add_all()
+        model.Add(store[(10, 2)] == 1)
+        model.Add(store[(10, 1)] == 0)
+
+        solver = cp_model.CpSolver()
+        assert solver.Solve(model) == cp_model.OPTIMAL
+        assert list(store.assigned(solver)) == [(10, 2)]
@@ -0,0 +1,57 @@
+"""
+Tests unitaires pour le démarrage à chaud (solver/warm_start.py)
+"""
+import os
+import sys
+
+from ortools.sat.python import cp_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solver"))
+
+from var_store import VarStore
+from warm_start import WarmStart
+
+
+SLOTS = [{"slot_id": i + 1, "day_of_week": 0, "period_number": i} for i in range(3)]
+COURSES = [
+    {"course_id": 1, "class_list": "ז-1", "teacher_names": "כהן", "subject": "מתמטיקה", "hours": 1},
+    {"course_id": 2, "class_list": "ז-2", "teacher_names": "לוי", "subject": "תנך", "hours": 1},
+]
+PREVIOUS = [
+    {"class_name": "ז-1", "subject": "מתמטיקה", "day_of_week": 0, "period_number": 2},
+    {"class_name": "ז-2", "subject": "תנך", "day_of_week": 0, "period_number": 0},
+]
+
+
+def _model():
+    model = cp_model.CpModel()
+    store = VarStore(model, [c["course_id"] for c in COURSES], [s["slot_id"] for s in SLOTS])
+    store.add_all()
+    for course in COURSES:
+        model.Add(sum(store.row(course["course_id"])) == course["hours"])
+    return model, store
+
+
+class TestWarmStart:
+    """Tests pour les indications et la fixation des classes non concernées"""
+
+    def test_hints_only_without_touched_entities(self):
+        model, store = _model()
+        stats = WarmStart(PREVIOUS, fix_untouched=True).apply(model, store, COURSES, SLOTS)
+
+        assert stats == {"hints": 6, "fixed_courses": 0}
+        assert len(model.Proto().solution_hint.vars) == 6
+
+    def test_untouched_classes_are_fixed(self):
+        model, store = _model()
+        warm_start = WarmStart(PREVIOUS, fix_untouched=True, touched_teachers=["כהן"])
+        assert warm_start.apply(model, store, COURSES, SLOTS)["fixed_courses"] == 1
+
+        # La classe ז-2 ne peut plus changer de créneau
+        model.Add(store[(2, 1)] == 0)
+        solver = cp_model.CpSolver()
+        assert solver.Solve(model) == cp_model.INFEASIBLE
+
+        assert warm_start.relax(model)
+        assert solver.Solve(model) == cp_model.OPTIMAL
+        assert not warm_start.relax(model)